@@ -1,6 +1,6 @@
 import abc
 import pandas as pd
-from typing import Any, Callable, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 class RepositoryPort(abc.ABC):
     """
@@ -23,6 +23,16 @@ class RepositoryPort(abc.ABC):
         """Crea las tablas necesarias en la base de datos."""
         pass
 
+    @abc.abstractmethod
+    def create_indexes(self) -> List[str]:
+        """Crea los índices secundarios declarados y devuelve sus nombres."""
+        pass
+
+    @abc.abstractmethod
+    def drop_indexes(self) -> List[str]:
+        """Elimina los índices secundarios declarados y devuelve los eliminados."""
+        pass
+
     @abc.abstractmethod
     def create_stored_procedures(self) -> None:
         """Crea los procedimientos almacenados necesarios."""
@@ -38,9 +48,32 @@ class RepositoryPort(abc.ABC):
         """Obtiene todos los registros de una tabla."""
         pass
 
+    @abc.abstractmethod
+    def fetch_records_in_chunks(self, table_name: str, chunk_size: int = 10000, start_after: Any = None) -> Iterator[pd.DataFrame]:
+        """
+        Obtiene los registros de una tabla en bloques, sin cargar la tabla completa en memoria.
+        `start_after` reanuda la lectura después de la fila con esa clave primaria.
+        """
+        pass
+
+    @abc.abstractmethod
+    def bulk_insert_records(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        """Inserta un lote de registros usando la vía masiva del conector. Devuelve las filas escritas."""
+        pass
+
+    @abc.abstractmethod
+    def count_records(self, table_name: str) -> int:
+        """Número de filas de una tabla."""
+        pass
+
+    @abc.abstractmethod
+    def max_primary_key(self, table_name: str) -> Optional[int]:
+        """Mayor clave primaria numérica de una tabla (None si está vacía)."""
+        pass
+
     @abc.abstractmethod
     def insert_record(self, table_name: str, data: dict) -> Any:
-        """Inserta un nuevo registro en una tabla."""
+        """Inserta un nuevo registro en una tabla y devuelve su clave primaria."""
         pass
 
     @abc.abstractmethod
@@ -53,6 +86,25 @@ class RepositoryPort(abc.ABC):
         """Elimina un registro de una tabla."""
         pass
 
+    @abc.abstractmethod
+    def update_records(self, table_name: str, updates: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Actualiza varios registros ((id, {columna: valor})) en lote; devuelve cuántos se enviaron."""
+        pass
+
+    @abc.abstractmethod
+    def delete_records(self, table_name: str, record_ids: List[Any]) -> int:
+        """Elimina varios registros por clave primaria en lote; devuelve cuántos se enviaron."""
+        pass
+
+    @abc.abstractmethod
+    def apply_table_changes(self, table_name: str, inserts: List[Dict[str, Any]],
+                            updates: List[Tuple[Any, Dict[str, Any]]], deletes: List[Any]) -> Dict[str, int]:
+        """
+        Aplica altas, cambios ((id, {columna: valor})) y bajas de una tabla como un lote
+        (una transacción en los backends que la admiten). Devuelve {"inserted", "updated", "deleted"}.
+        """
+        pass
+
     @abc.abstractmethod
     def execute_sp(self, sp_name: str, params: tuple = ()) -> Any:
         """Ejecuta un procedimiento almacenado."""
@@ -86,3 +138,25 @@ class RepositoryPort(abc.ABC):
     @abc.abstractmethod
     def sales_report(self) -> Tuple[Any, float]:
         pass
+
+    # Búsquedas por lotes de claves: una consulta (o un envío) para todas las claves.
+    # Devuelven las filas encontradas, en cualquier orden, y el tiempo total en ms.
+    @abc.abstractmethod
+    def search_clients(self, client_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        pass
+
+    @abc.abstractmethod
+    def search_products(self, product_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        pass
+
+    @abc.abstractmethod
+    def query_invoices(self, invoice_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        pass
+
+    @abc.abstractmethod
+    def explain_operation(self, operation: str) -> Optional[Dict[str, Any]]:
+        """
+        Plan de ejecución que el servidor usa para la operación de benchmark indicada
+        (ej. "sales_report"): {"format": ..., "plan": ...}, o None si no está disponible.
+        """
+        pass
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from infrastructure.adapters.out.connectors.async_base_connector import AsyncBaseConnector
+from shared.metrics_recorder import METRICS_RECORDER, record_metric
+from shared.phase_timing import get_last_phases, reset_last_phases, with_other_phase
+from shared.workload_spec import WorkloadCall, WorkloadSpec
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncBenchmarkService:
+    """
+    Servicio de aplicación para medir el escalado con la concurrencia usando un conector
+    asíncrono. Cada nivel de concurrencia lanza N corrutinas trabajadoras en un único hilo
+    que consumen un total fijo de peticiones, así que no hay coste de hilos ni de GIL en
+    la medición: las peticiones en vuelo las limita solo el pool del driver.
+    """
+    def __init__(self, connector: AsyncBaseConnector):
+        self.connector = connector
+
+    async def _run_level(self, calls: List[WorkloadCall], concurrency: int, requests_per_level: int) -> Dict[str, Any]:
+        latencies: Dict[str, List[float]] = {op_display: [] for op_display, _, _ in calls}
+        errors = 0
+        issued = 0
+        label = f"{self.connector.db_type} (async)"
+
+        async def _worker():
+            nonlocal errors, issued
+            while issued < requests_per_level:
+                # Sin await entre la comprobación y el incremento: es atómico dentro del bucle
+                op_display, op_method_name, kwargs = calls[issued % len(calls)]
+                issued += 1
+                reset_last_phases()
+                try:
+                    _result, latency_ms = await getattr(self.connector, op_method_name)(**kwargs)
+                    latencies[op_display].append(latency_ms)
+                    record_metric(label, op_display, latency_ms)
+                    phases = get_last_phases()
+                    if phases:
+                        for phase_name, phase_ms in with_other_phase(phases, latency_ms).items():
+                            record_metric(label, op_display, phase_ms, phase_name)
+                except Exception as e:
+                    errors += 1
+                    record_metric(label, op_display, -1.0)
+                    if errors == 1:
+                        logger.error("Error ejecutando %s en %s: %s", op_display, self.connector.db_type, e)
+
+        wall_start = time.perf_counter_ns()
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+        elapsed_s = (time.perf_counter_ns() - wall_start) / 1e9
+
+        completed = sum(len(values) for values in latencies.values())
+        # Sin peticiones completadas no hay percentiles: NaN, como el resto de drivers (no 0 ms)
+        p50, p95, p99 = (
+            (float(v) for v in np.percentile([v for values in latencies.values() for v in values], [50, 95, 99]))
+            if completed else (float("nan"),) * 3
+        )
+        METRICS_RECORDER.flush()
+
+        return {
+            "concurrency": concurrency,
+            "requests": completed,
+            "errors": errors,
+            "elapsed_s": elapsed_s,
+            "throughput_rps": completed / elapsed_s if elapsed_s > 0 else 0.0,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+        }
+
+    async def run_concurrency_scaling(self, operations: List[Tuple[str, str]],
+                                      concurrency_levels: Sequence[int] = (1, 2, 4, 8, 16, 32, 64, 128, 256),
+                                      requests_per_level: int = 1000, workload: Optional[WorkloadSpec] = None,
+                                      id_pools: Optional[Dict[str, np.ndarray]] = None) -> List[Dict[str, Any]]:
+        """
+        Ejecuta las operaciones (nombre_mostrado, nombre_metodo) en cada nivel de concurrencia.
+        Con `workload`, cada nivel ejecuta requests_per_level llamadas sorteadas de la carga
+        sobre los ids de `id_pools` (ver PerformanceService.load_id_pools), con la misma
+        semilla que el resto de drivers, y `operations` debe ser workload.operations_config();
+        sin ella, cada operación usa sus argumentos por defecto (siempre el id 1).
+
+        Returns:
+            List[Dict[str, Any]]: Una fila por nivel con rendimiento (peticiones/s) y percentiles.
+        """
+        if workload is not None:
+            # Sorteadas antes de medir: el coste de generarlas no entra en las latencias
+            calls = workload.generate(requests_per_level, id_pools or {})
+        else:
+            calls = [(op_display, op_method_name, {}) for op_display, op_method_name in operations]
+        results = []
+        for concurrency in concurrency_levels:
+            row = await self._run_level(calls, concurrency, requests_per_level)
+            results.append(row)
+            logger.info("%s c=%s: %.0f req/s, p50=%.2f ms, p99=%.2f ms", self.connector.db_type, concurrency, row['throughput_rps'], row['p50_ms'], row['p99_ms'])
+        return results
+
+    def run(self, credentials: Dict[str, Any], operations: List[Tuple[str, str]],
+            concurrency_levels: Sequence[int] = (1, 2, 4, 8, 16, 32, 64, 128, 256),
+            requests_per_level: int = 1000, workload: Optional[WorkloadSpec] = None,
+            id_pools: Optional[Dict[str, np.ndarray]] = None) -> List[Dict[str, Any]]:
+        """Punto de entrada síncrono: conecta, ejecuta el barrido y desconecta en su propio bucle."""
+        async def _main():
+            await self.connector.connect(**credentials)
+            try:
+                return await self.run_concurrency_scaling(operations, concurrency_levels, requests_per_level, workload, id_pools)
+            finally:
+                await self.connector.disconnect()
+
+        return asyncio.run(_main())
@@ -1,5 +1,10 @@
 from typing import Any, Tuple
 from application.ports.out.repository_port import RepositoryPort
+from shared.logger import get_logger
+from shared.tracing import span
+
+logger = get_logger(__name__)
+
 # La conversión de `productos_json_str` a `Json` (para PostgreSQL) o mantenerlo como `str`
 # debe ser manejada por la implementación del `RepositoryPort` (DbRepository) o, idealmente,
 # por el método específico del conector (`generate_invoice` o `execute_sp`).
@@ -30,13 +35,14 @@ class BillingService:
             # llama al stored procedure 'sp_generar_factura'.
             # Los parámetros coinciden con los de `RepositoryPort.generate_invoice`.
             
-            result, exec_time = self.repository.generate_invoice(
-                client_id=client_id,
-                staff_id=staff_id,
-                products_json_str=products_json_str
-            )
-            print(f"BillingService: Factura generada. Tiempo: {exec_time:.2f} ms")
+            with span("BillingService.generate_invoice_process", client_id=client_id, staff_id=staff_id):
+                result, exec_time = self.repository.generate_invoice(
+                    client_id=client_id,
+                    staff_id=staff_id,
+                    products_json_str=products_json_str
+                )
+            logger.debug("Factura generada. Tiempo: %.2f ms", exec_time)
             return result, exec_time
         except Exception as e:
-            print(f"BillingService: Error al generar factura: {str(e)}")
+            logger.error("Error al generar factura: %s", e)
             raise # Re-lanzar para que la UI lo maneje
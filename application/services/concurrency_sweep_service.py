@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+import numpy as np
+from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from infrastructure.adapters.out.persistence.repositories.db_repository import DbRepository
+from shared.latency_histogram import LatencyHistogram
+from shared.performance_data import TOTAL_PHASE, add_performance_histogram
+from shared.workload_spec import WorkloadSpec
+from shared.logger import get_logger, quiet_logging
+
+logger = get_logger(__name__)
+
+# Clientes concurrentes de cada nivel del barrido
+DEFAULT_CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+# Segundos de medición por nivel: cada cliente repite su lista de llamadas hasta agotarlos
+DEFAULT_LEVEL_DURATION_S = 5.0
+# Llamadas sorteadas por cliente antes de medir (se recorren en bucle)
+CALLS_PER_CLIENT = 200
+
+
+def _client_loop(repository: DbRepository, calls: List[Any], start: threading.Barrier, deadline: List[float],
+                 histograms: Dict[str, LatencyHistogram]) -> None:
+    """
+    Cliente de bucle cerrado: lanza la siguiente llamada en cuanto vuelve la anterior.
+    Cada hilo escribe en sus propios histogramas; se fusionan al terminar el nivel.
+    """
+    start.wait()
+    end = deadline[0]
+    i = 0
+    while time.perf_counter() < end:
+        op_display, op_method_name, kwargs = calls[i % len(calls)]
+        i += 1
+        try:
+            _result, elapsed_ms = getattr(repository, op_method_name)(**kwargs)
+        except Exception:
+            elapsed_ms = -1.0
+        histogram = histograms.get(op_display)
+        if histogram is None:
+            histogram = histograms[op_display] = LatencyHistogram()
+        histogram.record(elapsed_ms)
+
+
+def fit_usl(levels: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Ajusta la Ley de Escalabilidad Universal X(N) = λN / (1 + σ(N-1) + κN(N-1)) a las
+    filas de un barrido (clientes, throughput_ops). Con C(N) = X(N)/X(1) el modelo es
+    lineal en σ y κ: N/C(N) - 1 = σ(N-1) + κN(N-1), que se resuelve por mínimos cuadrados.
+    σ (contención) es la parte serializada; κ (coherencia) el coste de coordinar a los
+    clientes entre sí, que hace que el rendimiento baje pasado N*. Amdahl es el caso κ = 0.
+    """
+    points = sorted((row["clients"], row["throughput_ops"]) for row in levels if row["throughput_ops"] > 0)
+    if len(points) < 3 or points[0][0] != 1:
+        raise ValueError("El ajuste USL necesita al menos tres niveles con rendimiento, incluido el de 1 cliente.")
+    n = np.array([p[0] for p in points], dtype=float)
+    throughput = np.array([p[1] for p in points], dtype=float)
+    lambda_ops = throughput[0]
+    y = n / (throughput / lambda_ops) - 1
+
+    design = np.column_stack([n - 1, n * (n - 1)])
+    (sigma, kappa), *_ = np.linalg.lstsq(design, y, rcond=None)
+    # Coeficientes negativos no tienen sentido físico: se anulan y se reajusta el otro
+    if kappa < 0:
+        kappa = 0.0
+        sigma = float(np.dot(n - 1, y) / np.dot(n - 1, n - 1))
+    if sigma < 0:
+        sigma = 0.0
+        kappa = max(0.0, float(np.dot(n * (n - 1), y) / np.dot(n * (n - 1), n * (n - 1))))
+    amdahl_sigma = max(0.0, float(np.dot(n - 1, y) / np.dot(n - 1, n - 1)))
+
+    predicted = usl_throughput(n, lambda_ops, sigma, kappa)
+    ss_res = float(np.sum((throughput - predicted) ** 2))
+    ss_tot = float(np.sum((throughput - throughput.mean()) ** 2))
+    if sigma >= 1:
+        # Retrógrado desde el principio: ningún cliente extra aporta rendimiento
+        peak_clients = 1.0
+    elif kappa > 0:
+        peak_clients = max(1.0, math.sqrt((1 - sigma) / kappa))
+    else:
+        peak_clients = math.inf
+    return {
+        "lambda_ops": float(lambda_ops),
+        "sigma": float(sigma),
+        "kappa": float(kappa),
+        "r2": 1 - ss_res / ss_tot if ss_tot > 0 else float("nan"),
+        "peak_clients": peak_clients,
+        "peak_throughput_ops": float(usl_throughput(peak_clients, lambda_ops, sigma, kappa)) if math.isfinite(peak_clients)
+                               else float(lambda_ops / sigma) if sigma > 0 else math.inf,
+        "amdahl_sigma": amdahl_sigma,
+        "amdahl_max_speedup": 1 / amdahl_sigma if amdahl_sigma > 0 else math.inf,
+    }
+
+
+def usl_throughput(clients, lambda_ops: float, sigma: float, kappa: float):
+    """Rendimiento previsto por la USL para `clients` (escalar o array)."""
+    clients = np.asarray(clients, dtype=float)
+    return lambda_ops * clients / (1 + sigma * (clients - 1) + kappa * clients * (clients - 1))
+
+
+class ConcurrencySweepService:
+    """
+    Servicio de aplicación que ejecuta la misma carga de trabajo con un número creciente
+    de clientes concurrentes (hilos, cada uno con su propio conector, como haría un pool
+    de conexiones de un servidor de aplicaciones) y mide rendimiento y latencia de cola
+    en cada nivel. Las conexiones se abren antes de medir y se reutilizan entre niveles.
+    """
+    def __init__(self, connector_class: Type[BaseConnector], credentials: Dict[str, Any]):
+        self.connector_class = connector_class
+        self.credentials = credentials
+
+    def _open_clients(self, clients: List[DbRepository], needed: int, db_type_selected: str) -> None:
+        while len(clients) < needed:
+            connector = self.connector_class()
+            try:
+                connector.connect(**self.credentials)
+            except Exception as e:
+                # Límite de conexiones del servidor: el nivel se mide con las que haya
+                logger.warning("%s: no se pudo abrir la conexión %s (%s); se usan %s clientes.",
+                               db_type_selected, len(clients) + 1, e, len(clients))
+                return
+            clients.append(DbRepository(connector_instance=connector))
+
+    def run(self, db_type_selected: str, workload: WorkloadSpec, id_pools: Dict[str, np.ndarray],
+            levels: Sequence[int] = DEFAULT_CONCURRENCY_LEVELS, duration_s: float = DEFAULT_LEVEL_DURATION_S,
+            progress_callback: Optional[Callable[[int, int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Mide cada nivel durante `duration_s` segundos. Las latencias de cada nivel se
+        guardan en el almacén como "<bd> (N clientes)".
+
+        Returns:
+            Dict[str, Any]: {"levels": una fila por nivel (clientes, throughput_ops,
+                             percentiles de todas las llamadas), "operations": filas por
+                             nivel y operación, "usl": ajuste de fit_usl o None}
+        """
+        levels = sorted(set(int(level) for level in levels if level > 0))
+        clients: List[DbRepository] = []
+        client_calls: List[List[Any]] = []
+        level_rows, operation_rows = [], []
+        try:
+            for step, level in enumerate(levels, start=1):
+                if progress_callback is not None:
+                    progress_callback(step, len(levels), level)
+                self._open_clients(clients, level, db_type_selected)
+                active = min(level, len(clients))
+                if not active:
+                    break
+                # Cada cliente sortea sus llamadas con su propia semilla, siempre la misma
+                while len(client_calls) < active:
+                    client_calls.append(workload.generate(CALLS_PER_CLIENT, id_pools, seed=(workload.seed or 0) + len(client_calls)))
+
+                histograms = [{} for _ in range(active)]
+                start = threading.Barrier(active + 1)
+                deadline = [0.0]
+                threads = [
+                    threading.Thread(target=_client_loop, args=(clients[i], client_calls[i], start, deadline, histograms[i]), daemon=True)
+                    for i in range(active)
+                ]
+                with quiet_logging():
+                    for thread in threads:
+                        thread.start()
+                    deadline[0] = time.perf_counter() + duration_s
+                    wall_start = time.perf_counter()
+                    start.wait()
+                    for thread in threads:
+                        thread.join()
+                    wall_s = time.perf_counter() - wall_start
+
+                label = f"{db_type_selected} ({active} clientes)"
+                merged: Dict[str, LatencyHistogram] = {}
+                for client_histograms in histograms:
+                    for op_display, histogram in client_histograms.items():
+                        merged.setdefault(op_display, LatencyHistogram()).merge(histogram)
+                overall = LatencyHistogram()
+                for op_display, histogram in merged.items():
+                    add_performance_histogram(label, op_display, histogram, TOTAL_PHASE)
+                    overall.merge(histogram)
+                    row = {"database": db_type_selected, "clients": active, "operation": op_display}
+                    row.update(histogram.summary())
+                    operation_rows.append(row)
+
+                row = {"database": db_type_selected, "clients": active, "wall_s": wall_s,
+                       "throughput_ops": overall.total_count / wall_s if wall_s > 0 else 0.0}
+                row.update(overall.summary())
+                level_rows.append(row)
+                logger.info("%s: %.0f ops/s, p99=%.2f ms", label, row["throughput_ops"], row["p99_ms"])
+                if active < level:
+                    break
+        finally:
+            for repository in clients:
+                try:
+                    repository.connector.disconnect()
+                except Exception:
+                    pass
+
+        try:
+            usl = fit_usl(level_rows)
+        except ValueError as e:
+            logger.warning("%s: sin ajuste USL (%s)", db_type_selected, e)
+            usl = None
+        return {"levels": level_rows, "operations": operation_rows, "usl": usl}
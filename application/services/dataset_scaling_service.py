@@ -0,0 +1,189 @@
+import math
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from application.ports.out.repository_port import RepositoryPort
+from application.services.performance_service import PerformanceService
+from shared.metrics_recorder import METRICS_RECORDER, record_metric
+from shared.workload_spec import WorkloadSpec
+from shared.logger import get_logger, quiet_logging
+
+logger = get_logger(__name__)
+
+# Número de facturas de cada punto del barrido
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# Facturas generadas e insertadas por lote: acota la memoria del cliente con cualquier tamaño
+SEED_BATCH_SIZE = 10_000
+# Métodos del repositorio que escriben: el barrido los excluye de la carga, porque harían
+# crecer la tabla mientras se mide y el punto ya no correspondería a su tamaño
+WRITE_OPERATIONS = {
+    "generate_invoice", "insert_record", "update_record", "delete_record", "update_records",
+    "delete_records", "apply_table_changes", "bulk_insert_records",
+}
+# Exponente de crecimiento por debajo del cual se considera que la latencia no depende del tamaño
+CONSTANT_EXPONENT = 0.2
+
+
+def _growth_label(exponent: float) -> str:
+    if exponent < CONSTANT_EXPONENT:
+        return "O(1)"
+    if exponent < 0.8:
+        return "sublineal"
+    if exponent < 1.2:
+        return "O(N)"
+    return "superlineal"
+
+
+def fit_growth_exponents(rows: List[Dict[str, Any]], metric: str = "p50_ms") -> List[Dict[str, Any]]:
+    """
+    Ajuste log-log (latencia = c · N^k) por base de datos y operación. k ≈ 0 es una
+    búsqueda por índice, k ≈ 1 un recorrido completo; r2 indica si la ley de potencia
+    describe bien los puntos.
+    """
+    df = pd.DataFrame(rows)
+    fits = []
+    if df.empty:
+        return fits
+    for (database, operation), group in df.groupby(["database", "operation"]):
+        points = group[(group["size"] > 0) & (group[metric] > 0)]
+        if points["size"].nunique() < 2:
+            continue
+        log_size, log_latency = np.log10(points["size"].to_numpy(float)), np.log10(points[metric].to_numpy(float))
+        exponent, intercept = np.polyfit(log_size, log_latency, 1)
+        predicted = exponent * log_size + intercept
+        ss_res = float(np.sum((log_latency - predicted) ** 2))
+        ss_tot = float(np.sum((log_latency - log_latency.mean()) ** 2))
+        fits.append({
+            "database": database,
+            "operation": operation,
+            "exponent": float(exponent),
+            "growth": _growth_label(float(exponent)),
+            "r2": 1 - ss_res / ss_tot if ss_tot > 0 else float("nan"),
+            "points": len(points),
+        })
+    return fits
+
+
+class DatasetScalingService:
+    """
+    Servicio de aplicación que mide cómo crece la latencia con el volumen de datos: llena
+    el backend hasta cada tamaño del barrido (en facturas, con sus detalles) y ejecuta la
+    carga de trabajo en cada punto. Los datos sembrados se quedan en la base de datos, así
+    que los tamaños se recorren de menor a mayor y cada punto solo añade la diferencia.
+    """
+    def __init__(self, repository: RepositoryPort):
+        self.repository = repository
+        self.performance_service = PerformanceService(repository)
+
+    def seed_invoices(self, target_invoices: int, lines_per_invoice: float = 3.0,
+                      batch_size: int = SEED_BATCH_SIZE, seed: int = 0) -> int:
+        """
+        Inserta con bulk_insert_records las facturas (y sus detalles) que faltan hasta
+        `target_invoices`, con claves a continuación de las existentes, clientes, vendedores
+        y productos existentes y un número de líneas de Poisson. Devuelve las facturas insertadas.
+        """
+        missing = target_invoices - self.repository.count_records("Factura")
+        if missing <= 0:
+            return 0
+        rng = np.random.default_rng(seed + target_invoices)
+        clients = self.performance_service.load_table_ids("Clientes")
+        staff = self.performance_service.load_table_ids("Personal")
+        products = self.repository.fetch_all_records("Producto")
+        if not len(clients) or not len(staff) or products.empty:
+            raise ValueError("Para sembrar facturas hacen falta clientes, personal y productos (generate_test_data).")
+        product_ids = pd.to_numeric(products["producto_id"], errors="coerce").to_numpy()
+        product_prices = pd.to_numeric(products["precio"], errors="coerce").fillna(0.0).to_numpy(float)
+
+        next_invoice = (self.repository.max_primary_key("Factura") or 0) + 1
+        next_detail = (self.repository.max_primary_key("Detalle_Factura") or 0) + 1
+        now = datetime.now()
+        inserted = 0
+        while inserted < missing:
+            count = min(batch_size, missing - inserted)
+            invoice_ids = np.arange(next_invoice, next_invoice + count)
+            lines = np.maximum(rng.poisson(lines_per_invoice, count), 1)
+            line_invoice = np.repeat(np.arange(count), lines)
+            line_products = rng.integers(0, len(product_ids), len(line_invoice))
+            quantities = rng.integers(1, 6, len(line_invoice))
+            unit_prices = product_prices[line_products]
+            subtotals = np.round(quantities * unit_prices, 2)
+            totals = np.round(np.bincount(line_invoice, weights=subtotals, minlength=count), 2)
+            # Fechas repartidas en el último año
+            dates = [(now - timedelta(seconds=int(s))) for s in rng.integers(0, 365 * 86400, count)]
+
+            # Enteros y flotantes de Python: los controladores no adaptan los tipos de NumPy
+            self.repository.bulk_insert_records("Factura", [
+                {"factura_id": f, "cliente_id": c, "personal_id": p, "fecha": d, "total": t}
+                for f, c, p, d, t in zip(invoice_ids.tolist(), rng.choice(clients, count).tolist(),
+                                         rng.choice(staff, count).tolist(), dates, totals.tolist())
+            ])
+            detail_ids = range(next_detail, next_detail + len(line_invoice))
+            self.repository.bulk_insert_records("Detalle_Factura", [
+                {"detalle_id": d, "factura_id": f, "producto_id": p, "cantidad": q, "precio_unitario": u, "subtotal": s}
+                for d, f, p, q, u, s in zip(detail_ids, invoice_ids[line_invoice].tolist(),
+                                            product_ids[line_products].astype(int).tolist(), quantities.tolist(),
+                                            unit_prices.tolist(), subtotals.tolist())
+            ])
+            next_invoice += count
+            next_detail += len(line_invoice)
+            inserted += count
+        logger.info("Sembradas %s facturas (%s en total).", inserted, target_invoices)
+        return inserted
+
+    def run_sweep(self, db_type_selected: str, workload: WorkloadSpec, sizes: Sequence[int] = DEFAULT_SIZES,
+                  iterations_per_size: int = 200, lines_per_invoice: float = 3.0,
+                  progress_callback: Optional[Callable[[int, str], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Siembra cada tamaño y ejecuta `iterations_per_size` llamadas de la carga (la misma
+        semilla en todos los puntos). Las operaciones de escritura (WRITE_OPERATIONS) se
+        excluyen para que el tamaño no cambie durante la medición. Las latencias también
+        se guardan en el almacén como "<bd> [N facturas]".
+
+        Returns:
+            List[Dict[str, Any]]: Una fila por tamaño y operación con percentiles, conteo y errores.
+        """
+        read_operations = [op for op in workload.operations if op.method not in WRITE_OPERATIONS]
+        if not read_operations:
+            raise ValueError(f"La carga '{workload.name}' solo tiene operaciones de escritura: no hay nada que medir por tamaño.")
+        excluded = [op.name for op in workload.operations if op.method in WRITE_OPERATIONS]
+        if excluded:
+            logger.warning("Barrido por tamaño: se excluyen las escrituras %s de la carga '%s'.", excluded, workload.name)
+        workload = WorkloadSpec(workload.name, read_operations, workload.iterations, workload.seed)
+        rows = []
+        for step, size in enumerate(sorted(sizes), start=1):
+            if progress_callback is not None:
+                progress_callback(step, f"Sembrando {size:,} facturas")
+            self.seed_invoices(size, lines_per_invoice)
+            actual_size = self.repository.count_records("Factura")
+            label = f"{db_type_selected} [{actual_size:,} facturas]"
+
+            if progress_callback is not None:
+                progress_callback(step, f"Midiendo con {actual_size:,} facturas")
+            calls = self.performance_service.generate_workload_calls(workload, iterations_per_size)
+            latencies: Dict[str, List[float]] = {}
+            errors: Dict[str, int] = {}
+            with quiet_logging():
+                for op_name_display, op_method_name, kwargs in calls:
+                    try:
+                        _result, latency_ms = getattr(self.repository, op_method_name)(**kwargs)
+                        latencies.setdefault(op_name_display, []).append(latency_ms)
+                        record_metric(label, op_name_display, latency_ms)
+                    except Exception as e:
+                        errors[op_name_display] = errors.get(op_name_display, 0) + 1
+                        record_metric(label, op_name_display, -1.0)
+                        if errors[op_name_display] == 1:
+                            logger.error("Error en %s con %s facturas: %s", op_name_display, actual_size, e)
+
+            for op_name_display in sorted(set(latencies) | set(errors)):
+                values = latencies.get(op_name_display, [])
+                p50, p95, p99 = (float(v) for v in np.percentile(values, [50, 95, 99])) if values else (math.nan,) * 3
+                rows.append({
+                    "database": db_type_selected, "size": actual_size, "operation": op_name_display,
+                    "count": len(values), "errors": errors.get(op_name_display, 0),
+                    "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                })
+            logger.info("%s: barrido con %s facturas completado.", db_type_selected, actual_size)
+        METRICS_RECORDER.flush()
+        return rows
+
@@ -1,6 +1,22 @@
+import numpy as np
 import pandas as pd
-from typing import Any, Dict
+from typing import Any, Dict, List
 from application.ports.out.repository_port import RepositoryPort
+from infrastructure.adapters.out.persistence.config.table_definitions import TABLE_DEFINITIONS
+from infrastructure.adapters.out.persistence.utils.type_coercion import coerce_value
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _comparable(values: pd.Series, field_type: str) -> pd.Series:
+    """Columna en una forma comparable entre lo leído y lo editado (fechas y números normalizados)."""
+    if field_type == "datetime":
+        return pd.to_datetime(values, errors="coerce")
+    if field_type in ("int", "decimal"):
+        return pd.to_numeric(values, errors="coerce")
+    return values.astype(object)
+
 
 class EntityService:
     """
@@ -22,7 +38,7 @@ class EntityService:
             return df
         except Exception as e:
             # Considerar un logging más robusto aquí
-            print(f"Error en EntityService al obtener datos de {table_name}: {e}")
+            logger.error("Error al obtener datos de %s: %s", table_name, e)
             # Devolver un DataFrame vacío en caso de error para que la UI no falle.
             return pd.DataFrame()
 
@@ -36,7 +52,7 @@ class EntityService:
             # Por ejemplo, asegurar que los campos requeridos estén presentes.
             return self.repository.insert_record(table_name, data)
         except Exception as e:
-            print(f"Error en EntityService al agregar registro a {table_name}: {e}")
+            logger.error("Error al agregar registro a %s: %s", table_name, e)
             raise # Re-lanzar la excepción para que la capa superior la maneje (ej. mostrar error en UI)
 
     def update_entity(self, table_name: str, record_id: Any, data: Dict[str, Any]) -> None:
@@ -47,7 +63,7 @@ class EntityService:
             # Validaciones de datos podrían ir aquí.
             self.repository.update_record(table_name, record_id, data)
         except Exception as e:
-            print(f"Error en EntityService al actualizar registro {record_id} en {table_name}: {e}")
+            logger.error("Error al actualizar registro %s en %s: %s", record_id, table_name, e)
             raise
 
     def delete_entity(self, table_name: str, record_id: Any) -> None:
@@ -57,5 +73,63 @@ class EntityService:
         try:
             self.repository.delete_record(table_name, record_id)
         except Exception as e:
-            print(f"Error en EntityService al eliminar registro {record_id} de {table_name}: {e}")
+            logger.error("Error al eliminar registro %s de %s: %s", record_id, table_name, e)
+            raise
+
+    def diff_entity_data(self, table_name: str, original_df: pd.DataFrame, edited_df: pd.DataFrame) -> Dict[str, List[Any]]:
+        """
+        Altas, cambios y bajas entre la tabla leída y la editada (ej. con st.data_editor).
+        Compara columna a columna con operaciones vectorizadas en lugar de celda a celda;
+        los cambios solo llevan las columnas modificadas y todos los valores salen con el
+        tipo de TABLE_DEFINITIONS. Las filas sin clave primaria son altas.
+
+        Returns:
+            Dict[str, List[Any]]: {"inserts": [registro], "updates": [(id, {columna: valor})], "deletes": [id]}
+        """
+        definition = TABLE_DEFINITIONS[table_name]
+        pk_col, fields = definition["pk"], definition["fields"]
+        changes: Dict[str, List[Any]] = {"inserts": [], "updates": [], "deletes": []}
+        if pk_col not in edited_df.columns:
+            return changes
+        original = original_df.set_index(pk_col, drop=False) if pk_col in original_df.columns else original_df.iloc[0:0]
+        is_new = edited_df[pk_col].isna()
+        edited = edited_df[~is_new].set_index(pk_col, drop=False)
+
+        changes["deletes"] = [coerce_value(record_id, fields[pk_col]) for record_id in original.index.difference(edited.index)]
+
+        new_rows = pd.concat([edited_df[is_new], edited.loc[edited.index.difference(original.index)].reset_index(drop=True)])
+        for row in new_rows.to_dict("records"):
+            record = {col: coerce_value(value, fields[col]) for col, value in row.items() if col in fields and col != pk_col}
+            # Filas añadidas y dejadas en blanco en el editor
+            if any(value is not None and str(value).strip() != "" for value in record.values()):
+                changes["inserts"].append(record)
+
+        common = original.index.intersection(edited.index)
+        columns = [col for col in fields if col != pk_col and col in original.columns and col in edited.columns]
+        if len(common) and columns:
+            before, after = original.loc[common, columns], edited.loc[common, columns]
+            differs = np.zeros((len(common), len(columns)), dtype=bool)
+            for j, col in enumerate(columns):
+                old_values, new_values = _comparable(before[col], fields[col]), _comparable(after[col], fields[col])
+                both_missing = old_values.isna().to_numpy() & new_values.isna().to_numpy()
+                differs[:, j] = ~((old_values.to_numpy() == new_values.to_numpy()) | both_missing)
+            after_values = after.to_numpy(dtype=object)
+            for i in np.flatnonzero(differs.any(axis=1)):
+                changes["updates"].append((
+                    coerce_value(common[i], fields[pk_col]),
+                    {columns[j]: coerce_value(after_values[i, j], fields[columns[j]]) for j in np.flatnonzero(differs[i])},
+                ))
+        return changes
+
+    def save_entity_changes(self, table_name: str, changes: Dict[str, List[Any]]) -> Dict[str, int]:
+        """
+        Aplica el resultado de diff_entity_data como un único lote por tabla (una
+        transacción en los backends que la admiten) en lugar de una llamada por fila.
+        """
+        try:
+            return self.repository.apply_table_changes(
+                table_name, changes["inserts"], changes["updates"], changes["deletes"]
+            )
+        except Exception as e:
+            logger.error("Error al guardar los cambios de %s: %s", table_name, e)
             raise
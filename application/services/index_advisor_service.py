@@ -0,0 +1,226 @@
+import json
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from application.ports.out.repository_port import RepositoryPort
+from infrastructure.adapters.out.persistence.config.table_definitions import TABLE_DEFINITIONS, get_index_definitions, get_primary_key
+from shared.performance_data import get_query_plans
+from shared.logger import get_logger, quiet_logging
+
+logger = get_logger(__name__)
+
+SHOWPLAN_NS = "{http://schemas.microsoft.com/sqlserver/2004/07/showplan}"
+# Operadores de SQL Server que recorren la tabla o el índice entero
+SHOWPLAN_SCAN_OPS = {"Table Scan", "Clustered Index Scan", "Index Scan"}
+# Estrategias de $lookup (motor SBE) que no usan índice en la colección externa
+MONGO_UNINDEXED_JOINS = {"NestedLoopJoin", "HashJoin"}
+
+_PG_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+_PG_FILTER = re.compile(r"Filter: \(+(?:\w+\.)?(\w+)\s*(?:=|<|>|IN\b)")
+_MYSQL_TABLE_SCAN = re.compile(r"Table scan on (\w+)")
+_MYSQL_FILTER = re.compile(r"Filter: \(+(?:\w+\.)?(\w+)\s*(?:=|<|>|in\b)")
+_CQL_STATEMENT = re.compile(r"FROM (\w+) WHERE (\w+)\s*=")
+
+
+def _finding(table: str, column: str, evidence: str) -> Dict[str, str]:
+    return {"table": table, "column": column, "evidence": evidence.strip()}
+
+
+def _scans_from_text(plan: str) -> List[Dict[str, str]]:
+    """Recorridos completos con predicado en planes de texto (PostgreSQL, MySQL, trazas de Cassandra)."""
+    findings = []
+    lines = plan.splitlines()
+    for i, line in enumerate(lines):
+        seq_scan = _PG_SEQ_SCAN.search(line)
+        if seq_scan:
+            # El filtro de un nodo de PostgreSQL va en las líneas siguientes, antes del próximo nodo
+            for detail in lines[i + 1:]:
+                if "->" in detail:
+                    break
+                pg_filter = _PG_FILTER.search(detail)
+                if pg_filter:
+                    findings.append(_finding(seq_scan.group(1), pg_filter.group(1), f"{line.strip()} / {detail.strip()}"))
+                    break
+            continue
+        table_scan = _MYSQL_TABLE_SCAN.search(line)
+        if table_scan and i > 0:
+            # En EXPLAIN ANALYZE de MySQL el filtro es el nodo padre, en la línea anterior
+            mysql_filter = _MYSQL_FILTER.search(lines[i - 1])
+            if mysql_filter:
+                findings.append(_finding(table_scan.group(1), mysql_filter.group(1), f"{lines[i - 1].strip()} / {line.strip()}"))
+    # Trazas de Cassandra: secciones "sentencia: ms" seguidas de sus eventos
+    for section in plan.split("\n\n"):
+        statement = _CQL_STATEMENT.search(section.split("\n", 1)[0])
+        if statement and "seq scan" in section.lower():
+            findings.append(_finding(statement.group(1), statement.group(2), section.split("\n", 1)[0]))
+    return findings
+
+
+def _scans_from_showplan(plan: str) -> List[Dict[str, str]]:
+    """Operadores de recorrido con predicado residual en un showplan XML de SQL Server."""
+    findings = []
+    root = ET.fromstring(plan)
+    for relop in root.iter(f"{SHOWPLAN_NS}RelOp"):
+        if relop.get("PhysicalOp") not in SHOWPLAN_SCAN_OPS:
+            continue
+        for child in relop:
+            obj = child.find(f"{SHOWPLAN_NS}Object")
+            predicate = child.find(f"{SHOWPLAN_NS}Predicate")
+            if obj is None or predicate is None:
+                continue
+            table = obj.get("Table", "").strip("[]")
+            for column_ref in predicate.iter(f"{SHOWPLAN_NS}ColumnReference"):
+                if column_ref.get("Column"):
+                    findings.append(_finding(table, column_ref.get("Column"), f"{relop.get('PhysicalOp')} en {table}"))
+                    break
+    return findings
+
+
+def _filter_fields(filter_doc: Any) -> List[str]:
+    """Campos de un filtro de MongoDB ({"a": {"$eq": 1}}, {"$and": [...]})."""
+    fields = []
+    if isinstance(filter_doc, dict):
+        for key, value in filter_doc.items():
+            if key in ("$and", "$or") and isinstance(value, list):
+                for sub_filter in value:
+                    fields.extend(_filter_fields(sub_filter))
+            elif not key.startswith("$"):
+                fields.append(key)
+    return fields
+
+
+def _scans_from_mongo(plan: str) -> List[Dict[str, str]]:
+    """COLLSCAN con filtro y $lookup sin índice en la colección externa en un explain de MongoDB."""
+    findings = []
+
+    def _walk(node: Any, namespace: str) -> None:
+        if isinstance(node, list):
+            for item in node:
+                _walk(item, namespace)
+            return
+        if not isinstance(node, dict):
+            return
+        namespace = node.get("namespace", namespace)
+        collection = namespace.split(".", 1)[-1]
+        if node.get("stage") == "COLLSCAN" and node.get("filter"):
+            for field in _filter_fields(node["filter"]):
+                findings.append(_finding(collection, field, f"COLLSCAN en {collection}"))
+        if node.get("stage") == "EQ_LOOKUP" and node.get("strategy") in MONGO_UNINDEXED_JOINS:
+            foreign = node.get("foreignCollection", "").split(".", 1)[-1]
+            findings.append(_finding(foreign, node.get("foreignField", ""), f"$lookup {node['strategy']} sobre {foreign}"))
+        lookup = node.get("$lookup")
+        if isinstance(lookup, dict) and node.get("collectionScans", 0) > 0:
+            findings.append(_finding(lookup.get("from", ""), lookup.get("foreignField", ""),
+                                     f"$lookup con {node['collectionScans']} recorridos de {lookup.get('from')}"))
+        for value in node.values():
+            _walk(value, namespace)
+
+    _walk(json.loads(plan), "")
+    return findings
+
+
+def find_scans(plan: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Recorridos completos de tabla con un predicado que un índice podría resolver, como
+    {"table", "column", "evidence"}. Los recorridos sin filtro (ej. el del reporte de
+    ventas, que agrega la tabla entera) no se indican: un índice no los evitaría.
+    """
+    parsers = {"text": _scans_from_text, "xml": _scans_from_showplan, "json": _scans_from_mongo}
+    parser = parsers.get(plan.get("format"))
+    if parser is None:
+        return []
+    try:
+        return parser(plan["plan"])
+    except (ValueError, ET.ParseError) as e:
+        logger.warning("No se pudo analizar el plan de %s: %s", plan.get("operation"), e)
+        return []
+
+
+def _canonical_table(table: str) -> str:
+    """Nombre de TABLE_DEFINITIONS (los planes devuelven a menudo los nombres en minúsculas)."""
+    return next((name for name in TABLE_DEFINITIONS if name.lower() == table.lower()), table)
+
+
+class IndexAdvisorService:
+    """
+    Servicio de aplicación que sugiere índices a partir de los planes capturados en modo
+    explain y mide su efecto con una comparación antes/después.
+    """
+    def __init__(self, repository: RepositoryPort):
+        self.repository = repository
+
+    def suggest_indexes(self, plans: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Un índice sugerido por (base de datos, tabla, columna) recorrida, con las operaciones
+        afectadas. "declared" indica si create_indexes() ya lo aplica (está en
+        INDEX_DEFINITIONS o es la clave primaria); si no, hay que declararlo.
+        """
+        if plans is None:
+            plans = get_query_plans()
+        suggestions: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for (database, operation), plan in plans.items():
+            for finding in find_scans(plan):
+                table = _canonical_table(finding["table"])
+                column = finding["column"].lower()
+                declared = next(
+                    (index for index in get_index_definitions(table) if index["columns"][0].lower() == column), None
+                )
+                key = (database, table, column)
+                if key not in suggestions:
+                    suggestions[key] = {
+                        "database": database,
+                        "table": table,
+                        "columns": declared["columns"] if declared else [column],
+                        "index": declared["name"] if declared else f"idx_{table.lower()}_{column}",
+                        "declared": declared is not None or get_primary_key(table) == column,
+                        "operations": [],
+                        "evidence": finding["evidence"],
+                    }
+                if operation not in suggestions[key]["operations"]:
+                    suggestions[key]["operations"].append(operation)
+        return list(suggestions.values())
+
+    def benchmark_indexes(self, db_type_selected: str, operations: List[Tuple[str, str]],
+                          iterations: int = 30) -> List[Dict[str, Any]]:
+        """
+        Mide cada operación `iterations` veces sin los índices declarados y otra vez con
+        ellos (p50 y p95 en ms). Los índices se vuelven a crear aunque la medición falle.
+        Las operaciones de escritura (generate_invoice) también muestran el coste de mantenerlos.
+        """
+        with quiet_logging():
+            dropped = self.repository.drop_indexes()
+            try:
+                before = self._time_operations(operations, iterations)
+            finally:
+                created = self.repository.create_indexes()
+            after = self._time_operations(operations, iterations)
+        logger.info("%s: %s índices eliminados y %s recreados para la comparación.", db_type_selected, len(dropped), len(created))
+
+        rows = []
+        for op_name_display, _ in operations:
+            row = {"database": db_type_selected, "operation": op_name_display}
+            for label, timings in (("before", before), ("after", after)):
+                samples, errors = timings[op_name_display]
+                row[f"{label}_p50_ms"] = float(np.percentile(samples, 50)) if samples else float("nan")
+                row[f"{label}_p95_ms"] = float(np.percentile(samples, 95)) if samples else float("nan")
+                row[f"{label}_errors"] = errors
+            row["speedup_p50"] = row["before_p50_ms"] / row["after_p50_ms"] if row["after_p50_ms"] > 0 else float("nan")
+            rows.append(row)
+        return rows
+
+    def _time_operations(self, operations: List[Tuple[str, str]], iterations: int) -> Dict[str, Tuple[List[float], int]]:
+        timings = {}
+        for op_name_display, op_method_name in operations:
+            method_to_call = getattr(self.repository, op_method_name)
+            samples, errors = [], 0
+            for _ in range(iterations):
+                try:
+                    _result, exec_time = method_to_call()
+                    samples.append(exec_time)
+                except Exception as e:
+                    errors += 1
+                    if errors == 1:
+                        logger.error("Error midiendo %s: %s", op_name_display, e)
+            timings[op_name_display] = (samples, errors)
+        return timings
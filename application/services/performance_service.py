@@ -1,6 +1,29 @@
-from typing import List, Tuple, Dict, Any
+import math
+from typing import Callable, List, Optional, Sequence, Tuple, Dict, Any
+import numpy as np
+import pandas as pd
 from application.ports.out.repository_port import RepositoryPort
-from shared.performance_data import add_performance_metric, get_performance_data_store, clear_performance_data
+from infrastructure.adapters.out.persistence.config.table_definitions import get_primary_key
+from shared.performance_data import get_performance_data_store, get_performance_histograms, get_performance_summary, clear_performance_data, add_query_plan, get_query_plans, TOTAL_PHASE
+from shared.metrics_recorder import METRICS_RECORDER, record_metric
+from shared.phase_timing import get_last_phases, reset_last_phases, with_other_phase
+from shared.instrumentation import CLIENT_CPU_PHASE, get_last_measurement, reset_last_measurement
+from shared.profiling import DEFAULT_PROFILE_DIR, clear_profile_reports, get_profile_reports, profile_block
+from shared.logger import get_logger, measure_logging_overhead, quiet_logging
+from shared.workload_spec import WorkloadCall, WorkloadSpec, load_workload_spec
+
+logger = get_logger(__name__)
+
+# Búsquedas por lotes y su equivalente de una sola clave: (nombre, método por lotes, método de una clave, tabla)
+BATCH_LOOKUP_OPERATIONS = [
+    ("Búsqueda de clientes", "search_clients", "search_client", "Clientes"),
+    ("Búsqueda de productos", "search_products", "search_product", "Producto"),
+    ("Consulta de facturas", "query_invoices", "query_invoice", "Factura"),
+]
+# Claves por lote del benchmark de búsquedas por lotes
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1000)
+BATCH_MODE_SINGLE = "individual"
+BATCH_MODE_BATCH = "lote"
 
 class PerformanceService:
     """
@@ -9,7 +32,8 @@ class PerformanceService:
     def __init__(self, repository: RepositoryPort):
         self.repository = repository
 
-    def run_performance_tests(self, db_type_selected: str, operations: List[Tuple[str, str]]) -> Dict[str, List[Any]]:
+    def run_performance_tests(self, db_type_selected: str, operations: List[Tuple[str, str]],
+                              explain: bool = False) -> Dict[str, List[Any]]:
         """
         Ejecuta una lista de operaciones de prueba de rendimiento.
 
@@ -17,6 +41,7 @@ class PerformanceService:
             db_type_selected (str): El tipo de base de datos actual (ej. "PostgreSQL").
             operations (List[Tuple[str, str]]): Lista de tuplas, donde cada tupla contiene
                                                  (nombre_mostrado_operacion, nombre_metodo_en_repositorio).
+            explain (bool): Modo explain: al terminar, captura el plan de ejecución de cada operación.
 
         Returns:
             Dict[str, List[Any]]: El diccionario de datos de rendimiento actualizado.
@@ -26,34 +51,266 @@ class PerformanceService:
         # la UI podría ofrecer un botón para limpiar.
         # clear_performance_data() # Descomentar si se desea limpiar antes de cada ejecución.
 
+        with quiet_logging():
+            self._run_operations(db_type_selected, operations)
+
+        if explain:
+            self.capture_query_plans(db_type_selected, operations)
+
+        METRICS_RECORDER.flush()
+        return get_performance_data_store()
+
+    def _run_operations(self, db_type_selected: str, operations: List[Tuple[str, str]]) -> None:
         for op_name_display, op_method_name in operations:
-            try:
-                # Los métodos específicos del repositorio (search_client, etc.) ya usan measure_time.
-                # Ellos devuelven (resultado, tiempo_ejecucion_ms).
-                if hasattr(self.repository, op_method_name) and callable(getattr(self.repository, op_method_name)):
-                    method_to_call = getattr(self.repository, op_method_name)
-                    
-                    # Estos métodos en el RepositoryPort tienen argumentos por defecto.
-                    # Los llamamos sin argumentos adicionales aquí, usando esos defaults.
-                    _result, exec_time = method_to_call()
-                    
-                    add_performance_metric(db_type_selected, op_name_display, exec_time)
-                    print(f"PerformanceService: {db_type_selected} - {op_name_display}: OK ({exec_time:.2f} ms)")
-                else:
-                    print(f"PerformanceService: Método '{op_method_name}' no encontrado en el repositorio para la operación '{op_name_display}'.")
-                    # Podríamos registrar un error o un tiempo inválido aquí si es necesario.
-                    add_performance_metric(db_type_selected, op_name_display, -1.0) # Indicar error
+            self._run_call(db_type_selected, op_name_display, op_method_name, {})
 
-            except Exception as e:
-                print(f"PerformanceService: Error ejecutando {op_name_display} en {db_type_selected}: {str(e)}")
-                add_performance_metric(db_type_selected, op_name_display, -1.0) # Indicar error
-        
+    def _run_call(self, db_type_selected: str, op_name_display: str, op_method_name: str, kwargs: Dict[str, Any]) -> Optional[float]:
+        """Ejecuta una llamada del repositorio y registra su tiempo (-1.0 si falla)."""
+        try:
+            # Los métodos específicos del repositorio (search_client, etc.) devuelven
+            # (resultado, tiempo_ejecucion_ms) medido por la instrumentación del conector.
+            if hasattr(self.repository, op_method_name) and callable(getattr(self.repository, op_method_name)):
+                method_to_call = getattr(self.repository, op_method_name)
+
+                # Sin argumentos se usan los valores por defecto del RepositoryPort.
+                reset_last_phases()
+                reset_last_measurement()
+                _result, exec_time = method_to_call(**kwargs)
+
+                self.record_measurement(db_type_selected, op_name_display, exec_time)
+                logger.debug("%s - %s: OK (%.2f ms)", db_type_selected, op_name_display, exec_time)
+                return exec_time
+            else:
+                logger.warning("Método '%s' no encontrado en el repositorio para la operación '%s'.", op_method_name, op_name_display)
+                # Podríamos registrar un error o un tiempo inválido aquí si es necesario.
+                record_metric(db_type_selected, op_name_display, -1.0) # Indicar error
+
+        except Exception as e:
+            logger.error("Error ejecutando %s en %s: %s", op_name_display, db_type_selected, e)
+            record_metric(db_type_selected, op_name_display, -1.0) # Indicar error
+        return None
+
+    def load_workload(self, path: Optional[str] = None) -> WorkloadSpec:
+        """Especificación de carga de trabajo (por defecto default_workload.json)."""
+        return load_workload_spec(path)
+
+    def load_table_ids(self, table_name: str) -> np.ndarray:
+        """
+        Claves primarias existentes de la tabla. Si COUNT(*) coincide con MAX(pk), las
+        claves son exactamente 1..N y se generan sin leer la tabla (tablas sembradas a
+        millones de filas); si no, se leen con fetch_all_records. Siempre en orden
+        ascendente, para que una misma semilla sortee los mismos ids en todos los backends.
+        """
+        count = self.repository.count_records(table_name)
+        max_pk = self.repository.max_primary_key(table_name)
+        if count and max_pk == count:
+            return np.arange(1, count + 1, dtype=np.int64)
+        pk_col = get_primary_key(table_name)
+        df = self.repository.fetch_all_records(table_name)
+        if pk_col not in df.columns:
+            return np.array([], dtype=np.int64)
+        # Algunos backends (Redis) devuelven las claves como texto. np.unique ordena: el orden
+        # de recorrido (tokens de Cassandra, SCAN de Redis) cambiaría los ids sorteados
+        return np.unique(pd.to_numeric(df[pk_col], errors="coerce").dropna().astype(np.int64))
+
+    def load_id_pools(self, workload: WorkloadSpec) -> Dict[str, np.ndarray]:
+        """Claves primarias existentes de cada tabla que usan los generadores de la carga."""
+        pools = {}
+        for table_name in workload.tables():
+            pools[table_name] = self.load_table_ids(table_name)
+            if not len(pools[table_name]):
+                logger.warning("La tabla %s no tiene filas: sus parámetros usarán el valor por defecto.", table_name)
+        return pools
+
+    def generate_workload_calls(self, workload: WorkloadSpec, iterations: Optional[int] = None,
+                                seed: Optional[int] = None) -> List[WorkloadCall]:
+        """Llamadas (nombre_mostrado, método, argumentos) sorteadas sobre los ids actuales."""
+        return workload.generate(iterations or workload.iterations, self.load_id_pools(workload), seed)
+
+    def run_workload(self, db_type_selected: str, workload: WorkloadSpec, iterations: Optional[int] = None,
+                     explain: bool = False, seed: Optional[int] = None,
+                     progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, List[Any]]:
+        """
+        Ejecuta `iterations` llamadas de la carga de trabajo (por defecto las de la
+        especificación) con los pesos y parámetros sorteados. Las llamadas se generan
+        antes de medir; progress_callback(hechas, total) se invoca cada 50 llamadas.
+        """
+        calls = self.generate_workload_calls(workload, iterations, seed)
+        total = len(calls)
+        with quiet_logging():
+            for i, (op_name_display, op_method_name, kwargs) in enumerate(calls, start=1):
+                self._run_call(db_type_selected, op_name_display, op_method_name, kwargs)
+                if progress_callback is not None and (i % 50 == 0 or i == total):
+                    progress_callback(i, total)
+
+        if explain:
+            self.capture_query_plans(db_type_selected, workload.operations_config())
+
+        METRICS_RECORDER.flush()
         return get_performance_data_store()
 
+    def benchmark_batch_lookups(self, db_type_selected: str, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+                                repetitions: int = 20, seed: int = 0,
+                                progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Compara cada búsqueda por lotes con la búsqueda de una sola clave repetida para las
+        mismas claves (sorteadas sin repetición entre las existentes; los tamaños mayores
+        que la tabla se omiten). En cada repetición se miden las dos
+        formas, alternando cuál va primero para no dar siempre la caché caliente a la misma.
+        Los tiempos se guardan en el almacén como "<operación> ×N (individual|lote)".
+
+        Returns:
+            List[Dict[str, Any]]: Una fila por operación, tamaño y modo con p50/p95 del
+                                  lote completo, ms por clave (p50 / N) y aceleración del lote.
+        """
+        rng = np.random.default_rng(seed)
+        sizes = sorted(set(int(size) for size in batch_sizes if size > 0))
+        rows = []
+        total, done = len(BATCH_LOOKUP_OPERATIONS) * len(sizes), 0
+        for op_name_display, batch_method, single_method, table_name in BATCH_LOOKUP_OPERATIONS:
+            ids = np.unique(self.load_table_ids(table_name))
+            if not len(ids):
+                logger.warning("La tabla %s no tiene filas: se omite %s.", table_name, op_name_display)
+                done += len(sizes)
+                continue
+            for size in sizes:
+                if size > len(ids):
+                    # Un lote con claves repetidas se deduplica en el conector mientras el modo
+                    # individual mediría todas: el tiempo por clave y la aceleración saldrían inflados
+                    logger.warning("%s: la tabla %s solo tiene %s claves; se omite el lote de %s.",
+                                   op_name_display, table_name, len(ids), size)
+                    done += 1
+                    if progress_callback is not None:
+                        progress_callback(done, total)
+                    continue
+                label = f"{op_name_display} ×{size}"
+                latencies: Dict[str, List[float]] = {BATCH_MODE_SINGLE: [], BATCH_MODE_BATCH: []}
+                errors = {BATCH_MODE_SINGLE: 0, BATCH_MODE_BATCH: 0}
+                with quiet_logging():
+                    for repetition in range(repetitions):
+                        # Enteros de Python: los controladores no adaptan numpy.int64
+                        keys = rng.choice(ids, size=size, replace=False).tolist()
+                        modes = (BATCH_MODE_BATCH, BATCH_MODE_SINGLE) if repetition % 2 else (BATCH_MODE_SINGLE, BATCH_MODE_BATCH)
+                        for mode in modes:
+                            try:
+                                if mode == BATCH_MODE_BATCH:
+                                    _rows, elapsed_ms = getattr(self.repository, batch_method)(keys)
+                                else:
+                                    single_lookup = getattr(self.repository, single_method)
+                                    elapsed_ms = sum(single_lookup(key)[1] for key in keys)
+                            except Exception as e:
+                                errors[mode] += 1
+                                record_metric(db_type_selected, f"{label} ({mode})", -1.0)
+                                if errors[mode] == 1:
+                                    logger.error("Error en %s (%s) en %s: %s", label, mode, db_type_selected, e)
+                                continue
+                            latencies[mode].append(elapsed_ms)
+                            record_metric(db_type_selected, f"{label} ({mode})", elapsed_ms)
+
+                p50 = {mode: float(np.percentile(values, 50)) if values else math.nan for mode, values in latencies.items()}
+                for mode, values in latencies.items():
+                    rows.append({
+                        "database": db_type_selected, "operation": op_name_display, "batch_size": size, "mode": mode,
+                        "count": len(values), "errors": errors[mode],
+                        "p50_ms": p50[mode],
+                        "p95_ms": float(np.percentile(values, 95)) if values else math.nan,
+                        "per_key_ms": p50[mode] / size,
+                        "speedup": p50[BATCH_MODE_SINGLE] / p50[mode] if p50[mode] > 0 else math.nan,
+                    })
+                done += 1
+                if progress_callback is not None:
+                    progress_callback(done, total)
+        METRICS_RECORDER.flush()
+        return rows
+
+    def capture_query_plans(self, db_type_selected: str, operations: List[Tuple[str, str]]) -> int:
+        """
+        Modo explain: pide al repositorio el plan de cada operación (EXPLAIN ANALYZE, showplan,
+        executionStats o trazado, según el backend) y lo guarda junto a las métricas. Se hace
+        después de las mediciones porque analizar un plan vuelve a ejecutar la consulta y la
+        sobrecarga no debe mezclarse con los tiempos. Devuelve cuántos planes se capturaron.
+        """
+        captured = 0
+        for op_name_display, op_method_name in operations:
+            try:
+                plan = self.repository.explain_operation(op_method_name)
+            except Exception as e:
+                logger.error("Error obteniendo el plan de %s en %s: %s", op_name_display, db_type_selected, e)
+                plan = {"format": "error", "plan": str(e)}
+            if plan is None:
+                logger.info("%s no ofrece plan de ejecución para %s.", db_type_selected, op_name_display)
+                continue
+            add_query_plan(db_type_selected, op_name_display, plan)
+            captured += 1
+        return captured
+
+    def get_query_plans(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Devuelve el último plan capturado por (base de datos, operación)."""
+        return get_query_plans()
+
+    def profile_operation(self, db_type_selected: str, op_name_display: str, op_method_name: str,
+                          iterations: int = 50, output_dir: str = DEFAULT_PROFILE_DIR) -> Dict[str, Any]:
+        """
+        Modo de perfilado (opcional): ejecuta la operación `iterations` veces bajo cProfile y
+        tracemalloc y devuelve el informe (funciones más costosas, asignaciones, pico de
+        memoria y rutas del .prof y del informe de asignaciones). Los tiempos de estas
+        ejecuciones no se registran como métricas porque el perfilado los infla.
+        """
+        method_to_call = getattr(self.repository, op_method_name)
+        errors = 0
+        with profile_block(db_type_selected, op_name_display, output_dir) as report:
+            for _ in range(iterations):
+                try:
+                    method_to_call()
+                except Exception as e:
+                    errors += 1
+                    if errors == 1:
+                        logger.error("Error perfilando %s en %s: %s", op_name_display, db_type_selected, e)
+        report["iterations"] = iterations
+        report["errors"] = errors
+        logger.info("Perfil de %s - %s guardado en %s", db_type_selected, op_name_display, report['prof_path'])
+        return report
+
+    def measure_logging_overhead(self, samples: int = 100_000) -> Dict[str, float]:
+        """Coste por llamada (ns) del antiguo print frente al logger desactivado durante el benchmark."""
+        return measure_logging_overhead(samples)
+
+    def get_profile_reports(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Devuelve el último informe de perfilado por (base de datos, operación)."""
+        return get_profile_reports()
+
+    def record_measurement(self, db_type_selected: str, op_name_display: str, exec_time: float) -> None:
+        """
+        Registra el tiempo total de una operación y su desglose por fases (las fases que el
+        conector marcó más "other", el resto no cubierto por ellas), además del tiempo de
+        CPU del cliente si la instrumentación lo midió.
+        """
+        record_metric(db_type_selected, op_name_display, exec_time)
+        phases = get_last_phases()
+        if phases:
+            for phase_name, phase_ms in with_other_phase(phases, exec_time).items():
+                record_metric(db_type_selected, op_name_display, phase_ms, phase_name)
+        measurement = get_last_measurement()
+        if measurement is not None and measurement.cpu_ms is not None:
+            record_metric(db_type_selected, op_name_display, measurement.cpu_ms, CLIENT_CPU_PHASE)
+
     def get_current_performance_data(self) -> Dict[str, List[Any]]:
         """Devuelve los datos de rendimiento acumulados."""
+        METRICS_RECORDER.flush()
         return get_performance_data_store()
 
+    def get_current_histograms(self) -> Dict[Tuple[str, str, str], Any]:
+        """Devuelve los histogramas de latencia por (base de datos, operación, fase)."""
+        METRICS_RECORDER.flush()
+        return get_performance_histograms()
+
+    def get_performance_summary(self, phase: Optional[str] = TOTAL_PHASE) -> List[Dict[str, Any]]:
+        """Devuelve conteo, errores, media y percentiles por base de datos y operación."""
+        METRICS_RECORDER.flush()
+        return get_performance_summary(phase)
+
     def clear_all_performance_data(self) -> None:
         """Limpia todos los datos de rendimiento acumulados."""
+        METRICS_RECORDER.discard()
         clear_performance_data()
+        clear_profile_reports()
@@ -0,0 +1,136 @@
+import contextlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple, Type
+import numpy as np
+from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from infrastructure.adapters.out.persistence.repositories.db_repository import DbRepository
+from shared.latency_histogram import LatencyHistogram
+from shared.performance_data import TOTAL_PHASE, add_performance_histogram
+from shared.phase_timing import get_last_phases, reset_last_phases, with_other_phase
+from shared.instrumentation import CLIENT_CPU_PHASE, get_last_measurement, reset_last_measurement
+from shared.logger import get_logger, quiet_logging
+from shared.workload_spec import WorkloadSpec
+
+logger = get_logger(__name__)
+
+
+def _run_worker(connector_class: Type[BaseConnector], credentials: Dict[str, Any],
+                operations: List[Tuple[str, str]], iterations: int, quiet: bool,
+                workload: Optional[WorkloadSpec] = None, id_pools: Optional[Dict[str, np.ndarray]] = None,
+                worker_index: int = 0) -> Dict[str, Any]:
+    """
+    Cuerpo de cada proceso trabajador: crea su propio conector (las conexiones no se
+    pueden compartir entre procesos), ejecuta su parte de la carga y devuelve los
+    histogramas en forma compacta en lugar de las muestras. Con una carga de trabajo,
+    cada trabajador sortea sus `iterations` llamadas con su propia semilla.
+    """
+    if workload is not None:
+        seed = (workload.seed or 0) + worker_index
+        calls = workload.generate(iterations, id_pools or {}, seed=seed)
+    else:
+        calls = [(op_display, op_method_name, {}) for _ in range(iterations) for op_display, op_method_name in operations]
+    # {operación: {fase: histograma}}; la fase TOTAL_PHASE es la latencia completa
+    histograms = {op_display: {TOTAL_PHASE: LatencyHistogram()} for op_display, _ in operations}
+    # El registro DEBUG/INFO de los conectores también compite por el GIL del trabajador
+    output = quiet_logging() if quiet else contextlib.nullcontext()
+    with output:
+        connector = connector_class()
+        connector.connect(**credentials)
+        repository = DbRepository(connector_instance=connector)
+        wall_start = time.perf_counter_ns()
+        try:
+            for op_display, op_method_name, kwargs in calls:
+                method_to_call = getattr(repository, op_method_name)
+                op_histograms = histograms[op_display]
+                reset_last_phases()
+                reset_last_measurement()
+                try:
+                    # Mismo tiempo que en el resto de servicios: el que mide la instrumentación del conector
+                    _result, elapsed_ms = method_to_call(**kwargs)
+                except Exception:
+                    op_histograms[TOTAL_PHASE].record(-1.0)
+                    continue
+                op_histograms[TOTAL_PHASE].record(elapsed_ms)
+                phases = get_last_phases()
+                breakdown = with_other_phase(phases, elapsed_ms) if phases else {}
+                measurement = get_last_measurement()
+                if measurement is not None and measurement.cpu_ms is not None:
+                    breakdown[CLIENT_CPU_PHASE] = measurement.cpu_ms
+                for phase_name, phase_ms in breakdown.items():
+                    if phase_name not in op_histograms:
+                        op_histograms[phase_name] = LatencyHistogram()
+                    op_histograms[phase_name].record(phase_ms)
+        finally:
+            wall_ns = time.perf_counter_ns() - wall_start
+            connector.disconnect()
+    return {
+        "wall_s": wall_ns / 1e9,
+        "histograms": {
+            op_display: {phase_name: histogram.to_dict() for phase_name, histogram in op_histograms.items()}
+            for op_display, op_histograms in histograms.items()
+        },
+    }
+
+
+class ProcessPoolBenchmarkService:
+    """
+    Servicio de aplicación que reparte la carga del benchmark entre varios procesos para
+    que el cliente Python (GIL, pandas, JSON, print) no sea el cuello de botella. Los
+    histogramas de cada proceso se fusionan en el padre y se guardan en el almacén de
+    rendimiento habitual.
+    """
+    def __init__(self, connector_class: Type[BaseConnector], credentials: Dict[str, Any]):
+        # Se pasan la clase y las credenciales (serializables), no una instancia conectada
+        self.connector_class = connector_class
+        self.credentials = credentials
+
+    def run(self, db_type_selected: str, operations: List[Tuple[str, str]],
+            workers: int = 4, iterations_per_worker: int = 100, quiet: bool = True,
+            workload: Optional[WorkloadSpec] = None, id_pools: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        Ejecuta las operaciones (nombre_mostrado, nombre_metodo_en_repositorio)
+        iterations_per_worker veces en cada uno de los procesos. Con `workload`, cada
+        proceso ejecuta iterations_per_worker llamadas sorteadas de la carga de trabajo
+        sobre los ids de `id_pools` (ver PerformanceService.load_id_pools) y `operations`
+        debe ser workload.operations_config().
+
+        Returns:
+            Dict[str, Any]: Resumen por operación (percentiles y rendimiento agregado).
+        """
+        merged = {op_display: {TOTAL_PHASE: LatencyHistogram()} for op_display, _ in operations}
+        wall_times = []
+        # "spawn" evita heredar sockets y locks de los drivers por fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(_run_worker, self.connector_class, self.credentials, operations, iterations_per_worker, quiet,
+                                workload, id_pools, worker_index)
+                for worker_index in range(workers)
+            ]
+            for future in as_completed(futures):
+                try:
+                    worker_result = future.result()
+                except Exception as e:
+                    logger.error("Error en un proceso trabajador de %s: %s", db_type_selected, e)
+                    continue
+                wall_times.append(worker_result["wall_s"])
+                for op_display, phase_data in worker_result["histograms"].items():
+                    for phase_name, data in phase_data.items():
+                        if phase_name not in merged[op_display]:
+                            merged[op_display][phase_name] = LatencyHistogram()
+                        merged[op_display][phase_name].merge(LatencyHistogram.from_dict(data))
+
+        label = f"{db_type_selected} ({workers} procesos)"
+        # Los procesos corren en paralelo: el rendimiento se calcula con el más lento
+        wall_s = max(wall_times) if wall_times else 0.0
+        summary = {}
+        for op_display, op_histograms in merged.items():
+            for phase_name, phase_histogram in op_histograms.items():
+                add_performance_histogram(label, op_display, phase_histogram, phase_name)
+            histogram = op_histograms[TOTAL_PHASE]
+            summary[op_display] = histogram.summary()
+            summary[op_display]["throughput_ops"] = histogram.total_count / wall_s if wall_s > 0 else 0.0
+            logger.info("%s - %s: %s ops, p50=%.2f ms, p99=%.2f ms", label, op_display, histogram.total_count, summary[op_display]['p50_ms'], summary[op_display]['p99_ms'])
+        return summary
@@ -0,0 +1,248 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from application.ports.out.repository_port import RepositoryPort
+from infrastructure.adapters.out.persistence.config.table_definitions import TABLE_DEFINITIONS
+from shared.instrumentation import measure
+from shared.metrics_recorder import METRICS_RECORDER, record_metric
+from shared.workload_capture import read_capture
+from shared.logger import get_logger, quiet_logging
+
+logger = get_logger(__name__)
+
+PACING_ORIGINAL = "original"
+PACING_ASAP = "asap"
+
+# Operaciones que ya devuelven (resultado, tiempo_ms) medido por el conector
+TIMED_OPERATIONS = {
+    "search_client", "search_product", "generate_invoice", "query_invoice", "sales_report",
+    "search_clients", "search_products", "query_invoices",
+}
+
+# Argumento -> tabla cuyo id referencia, para traducir ids creados durante la captura
+ID_ARGUMENTS = {
+    "search_client": {"client_id": "Clientes"},
+    "search_product": {"product_id": "Producto"},
+    "query_invoice": {"invoice_id": "Factura"},
+    "generate_invoice": {"client_id": "Clientes", "staff_id": "Personal"},
+}
+# Lo mismo para los argumentos que son listas de ids (búsquedas por lotes)
+ID_LIST_ARGUMENTS = {
+    "search_clients": {"client_ids": "Clientes"},
+    "search_products": {"product_ids": "Producto"},
+    "query_invoices": {"invoice_ids": "Factura"},
+}
+
+# Columna de clave primaria -> tabla, para traducir las claves foráneas de insert/update
+_PK_OWNER = {definition["pk"]: name for name, definition in TABLE_DEFINITIONS.items()}
+
+
+class IdRemapper:
+    """
+    Traduce los ids que generó la captura a los que genera la reproducción. Una escritura
+    (generate_invoice, insert_record) crea en el backend destino un id distinto del
+    capturado; las llamadas posteriores que lo usan (también las claves foráneas de las
+    altas de apply_table_changes) se reescriben con el nuevo. Los ids sin traducción se
+    usan tal cual: son filas que ya existían antes de la captura, altas con clave
+    explícita (mismo id en el destino) o altas sin clave de apply_table_changes, que solo
+    devuelve recuentos; para estas últimas replay() avisa una vez por tabla.
+    """
+    def __init__(self):
+        self.mapping: Dict[Tuple[str, Any], Any] = {}
+
+    def add(self, table: str, captured_id: Any, replayed_id: Any) -> None:
+        if captured_id is not None and replayed_id is not None:
+            self.mapping[(table, captured_id)] = replayed_id
+
+    def get(self, table: str, captured_id: Any) -> Any:
+        return self.mapping.get((table, captured_id), captured_id)
+
+    def remap_record(self, table_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        own_pk = TABLE_DEFINITIONS.get(table_name, {}).get("pk")
+        return {
+            column: self.get(_PK_OWNER[column], value) if column in _PK_OWNER and column != own_pk else value
+            for column, value in data.items()
+        }
+
+    def remap_call(self, operation: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        args = dict(args)
+        for arg, table in ID_ARGUMENTS.get(operation, {}).items():
+            if arg in args:
+                args[arg] = self.get(table, args[arg])
+        for arg, table in ID_LIST_ARGUMENTS.get(operation, {}).items():
+            if arg in args:
+                args[arg] = [self.get(table, record_id) for record_id in args[arg]]
+        if operation == "generate_invoice" and "products_json_str" in args:
+            products = json.loads(args["products_json_str"])
+            for item in products:
+                item["producto_id"] = self.get("Producto", item["producto_id"])
+            args["products_json_str"] = json.dumps(products)
+        elif operation in ("insert_record", "update_record") and "data" in args:
+            args["data"] = self.remap_record(args["table_name"], args["data"])
+        if operation in ("update_record", "delete_record"):
+            args["record_id"] = self.get(args["table_name"], args["record_id"])
+        elif operation == "update_records":
+            args["updates"] = [(self.get(args["table_name"], record_id), self.remap_record(args["table_name"], data))
+                               for record_id, data in args["updates"]]
+        elif operation == "delete_records":
+            args["record_ids"] = [self.get(args["table_name"], record_id) for record_id in args["record_ids"]]
+        elif operation == "apply_table_changes":
+            table_name = args["table_name"]
+            args["inserts"] = [self.remap_record(table_name, record) for record in args["inserts"]]
+            args["updates"] = [(self.get(table_name, record_id), self.remap_record(table_name, data))
+                               for record_id, data in args["updates"]]
+            args["deletes"] = [self.get(table_name, record_id) for record_id in args["deletes"]]
+        return args
+
+
+def _created_id(operation: str, result: Any) -> Any:
+    if operation == "generate_invoice":
+        invoice = result[0]
+        return invoice[0] if isinstance(invoice, (tuple, list)) and invoice else invoice
+    if operation == "insert_record":
+        return result
+    return None
+
+
+def _untracked_inserts(operation: str, args: Dict[str, Any]) -> int:
+    """Altas de apply_table_changes sin clave primaria: su id nuevo no se puede traducir."""
+    if operation != "apply_table_changes":
+        return 0
+    pk_col = TABLE_DEFINITIONS.get(args["table_name"], {}).get("pk")
+    return sum(1 for record in args["inserts"] if record.get(pk_col) is None)
+
+
+def _is_integer_id(value: Any) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def _created_table(operation: str, args: Dict[str, Any]) -> Optional[str]:
+    if operation == "generate_invoice":
+        return "Factura"
+    if operation == "insert_record":
+        return args.get("table_name")
+    return None
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50_ms": float("nan"), "p95_ms": float("nan"), "p99_ms": float("nan")}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+class WorkloadReplayService:
+    """
+    Servicio de aplicación que reproduce una captura de DbRepository.start_capture contra
+    cualquier backend, con el ritmo original o lo más rápido posible. Las llamadas se
+    lanzan en orden desde un único hilo y una única conexión (el orden hace falta para
+    traducir los ids creados), así que el ritmo original es un bucle cerrado con horario:
+    ninguna llamada sale antes de su hora, pero una llamada lenta retrasa a todas las
+    siguientes. Ese retraso se mide como "lag" y no se compensa; no es una reproducción
+    en bucle abierto.
+    """
+    def __init__(self, repository: RepositoryPort):
+        self.repository = repository
+
+    def replay(self, db_type_selected: str, capture_path: str, pacing: str = PACING_ORIGINAL,
+               speed: float = 1.0, include_failed: bool = False,
+               progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Reproduce la captura y registra las latencias como "<bd> (replay)". Las llamadas
+        que fallaron al capturarse se omiten salvo include_failed. Con pacing "original",
+        `speed` acelera (>1) o ralentiza el ritmo y "lag" es el retraso de salida de cada
+        llamada respecto a su hora prevista (acumulado por las llamadas lentas anteriores:
+        un lag alto indica que el backend no sostiene el ritmo capturado).
+
+        Returns:
+            Dict[str, Any]: {"operations": filas por operación (capturado frente a reproducido),
+                             "calls", "errors", "elapsed_s", "lag_p95_ms", "lag_max_ms"}
+        """
+        if pacing not in (PACING_ORIGINAL, PACING_ASAP):
+            raise ValueError(f"Ritmo no soportado: '{pacing}'. Opciones: {PACING_ORIGINAL}, {PACING_ASAP}.")
+        entries = [entry for entry in read_capture(capture_path) if include_failed or "err" not in entry]
+        # Los hilos de la aplicación escriben en la captura casi en orden: se ordena por hora de inicio
+        entries.sort(key=lambda entry: entry["t"])
+        label = f"{db_type_selected} (replay)"
+        remapper = IdRemapper()
+        replayed: Dict[str, List[float]] = {}
+        captured: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        lags: List[float] = []
+        unmapped_tables = set()
+        total = len(entries)
+
+        origin_t = entries[0]["t"] if entries else 0.0
+        start = time.perf_counter()
+        with quiet_logging():
+            for i, entry in enumerate(entries, start=1):
+                operation = entry["op"]
+                if pacing == PACING_ORIGINAL:
+                    due = start + (entry["t"] - origin_t) / speed
+                    wait = due - time.perf_counter()
+                    if wait > 0:
+                        time.sleep(wait)
+                    lags.append(max(0.0, time.perf_counter() - due) * 1000)
+                if "ms" in entry:
+                    captured.setdefault(operation, []).append(entry["ms"])
+                try:
+                    args = remapper.remap_call(operation, entry.get("a", {}))
+                    method_to_call = getattr(self.repository, operation)
+                    if operation in TIMED_OPERATIONS:
+                        result, latency_ms = method_to_call(**args)
+                    else:
+                        result, latency_ms = measure(operation, method_to_call, **args)
+                    if _untracked_inserts(operation, args) and args["table_name"] not in unmapped_tables:
+                        unmapped_tables.add(args["table_name"])
+                        logger.warning("apply_table_changes en %s crea filas de %s sin devolver sus ids: las llamadas "
+                                       "posteriores que las usen irán con los ids capturados.",
+                                       db_type_selected, args["table_name"])
+                    table = _created_table(operation, args)
+                    if table is not None:
+                        created_id = _created_id(operation, result)
+                        if _is_integer_id(created_id):
+                            remapper.add(table, entry.get("id"), int(created_id))
+                        elif table not in unmapped_tables:
+                            # Sin id entero no hay traducción: las llamadas posteriores usarían el capturado
+                            unmapped_tables.add(table)
+                            logger.warning("%s en %s devolvió %r en lugar del id creado: los ids de %s no se traducirán.",
+                                           operation, db_type_selected, created_id, table)
+                    replayed.setdefault(operation, []).append(latency_ms)
+                    record_metric(label, operation, latency_ms)
+                except Exception as e:
+                    errors[operation] = errors.get(operation, 0) + 1
+                    record_metric(label, operation, -1.0)
+                    if errors[operation] == 1:
+                        logger.error("Error reproduciendo %s en %s: %s", operation, db_type_selected, e)
+                if progress_callback is not None and (i % 50 == 0 or i == total):
+                    progress_callback(i, total)
+        elapsed_s = time.perf_counter() - start
+        METRICS_RECORDER.flush()
+
+        rows = []
+        for operation in sorted(set(replayed) | set(errors)):
+            row = {"database": db_type_selected, "operation": operation,
+                   "calls": len(replayed.get(operation, [])), "errors": errors.get(operation, 0)}
+            row.update({f"replay_{key}": value for key, value in _percentiles(replayed.get(operation, [])).items()})
+            row.update({f"captured_{key}": value for key, value in _percentiles(captured.get(operation, [])).items()})
+            rows.append(row)
+        logger.info("%s: %s llamadas reproducidas en %.1f s (%s)", label, total, elapsed_s, pacing)
+        return {
+            "operations": rows,
+            "calls": total,
+            "errors": sum(errors.values()),
+            "elapsed_s": elapsed_s,
+            "remapped_ids": len(remapper.mapping),
+            "lag_p95_ms": float(np.percentile(lags, 95)) if lags else 0.0,
+            "lag_max_ms": max(lags) if lags else 0.0,
+        }
+
+
+def compare_replays(results: List[Dict[str, Any]], metric: str = "replay_p50_ms") -> Dict[str, Dict[str, float]]:
+    """{operación: {base de datos: métrica}} a partir de varios resultados de replay()."""
+    comparison: Dict[str, Dict[str, float]] = {}
+    for result in results:
+        for row in result["operations"]:
+            comparison.setdefault(row["operation"], {})[row["database"]] = row[metric]
+    return comparison
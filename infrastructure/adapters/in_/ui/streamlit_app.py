@@ -1,12 +1,8 @@
 import streamlit as st
 import json
+from datetime import datetime
 from pathlib import Path
-from infrastructure.adapters.out.connectors.postgres.postgres_connector import PostgreSQLConnector
-from infrastructure.adapters.out.connectors.sqlserver.sqlserver_connector import SQLServerConnector
-from infrastructure.adapters.out.connectors.mysql.mysql_connector import MySQLConnector
-from infrastructure.adapters.out.connectors.mongodb.mongodb_connector import MongoDBConnector
-from infrastructure.adapters.out.connectors.redis.redis_connector import RedisConnector
-from infrastructure.adapters.out.connectors.cassandra.cassandra_connector import CassandraConnector
+from infrastructure.adapters.out.connectors.connector_registry import benchmark_connector_imports, create_connector
 from infrastructure.adapters.out.persistence.repositories.db_repository import DbRepository
 from infrastructure.adapters.out.persistence.utils.db_credentials_helper import get_db_credentials
 from application.services.entity_service import EntityService
@@ -17,8 +13,12 @@ from infrastructure.adapters.in_.ui.views.performance_view import performance_te
 from infrastructure.adapters.in_.ui.views.results_view import results_tab_view
 from infrastructure.adapters.in_.ui.views.billing_view import billing_tab_view
 from infrastructure.adapters.in_.ui.views.multi_spaces_view import multi_spaces_tab_view
+from infrastructure.adapters.out.metrics.prometheus_exporter import DEFAULT_PORT, cache_collector, get_exporter, pool_collector
+from shared.logger import configure_logging
+from shared.workload_capture import DEFAULT_CAPTURE_DIR
 
 st.set_page_config(page_title="Comparación de Bases de Datos", layout="wide")
+configure_logging()
 
 st.sidebar.write(f"Streamlit Version: {st.__version__}")
 
@@ -29,20 +29,6 @@ with open(DEFAULT_CREDENTIALS_FILE, "r") as f:
 
 AVAILABLE_DB_TYPES = tuple(DB_DEFAULTS.keys())
 
-try:
-    # Asegurarse de que todos los conectores se puedan importar
-    from infrastructure.adapters.out.connectors.postgres.postgres_connector import PostgreSQLConnector
-    from infrastructure.adapters.out.connectors.sqlserver.sqlserver_connector import SQLServerConnector
-    from infrastructure.adapters.out.connectors.mysql.mysql_connector import MySQLConnector
-    from infrastructure.adapters.out.connectors.mongodb.mongodb_connector import MongoDBConnector
-    from infrastructure.adapters.out.connectors.redis.redis_connector import RedisConnector
-    from infrastructure.adapters.out.connectors.cassandra.cassandra_connector import CassandraConnector
-except ImportError as e:
-    st.error(f"Error crítico al importar conectores: {e}. Verifique la configuración de PYTHONPATH y la estructura del proyecto.")
-    st.stop()
-
-
-
 def initialize_services(db_connector_instance):
     """Inicializa y devuelve los servicios de aplicación."""
     repository = DbRepository(connector_instance=db_connector_instance)
@@ -53,6 +39,43 @@ def initialize_services(db_connector_instance):
     
     return entity_service, performance_service, billing_service, repository
 
+def workload_capture_sidebar(repository):
+    """Captura las llamadas de datos del repositorio (mantenedores, facturación, pruebas) para reproducirlas."""
+    st.sidebar.header("Captura de Carga")
+    status = repository.capture_status()
+    if status is not None:
+        st.sidebar.caption(f"Capturando en {status['path']} ({status['calls']} llamadas).")
+        if st.sidebar.button("Detener captura"):
+            st.sidebar.success(f"Captura cerrada con {repository.stop_capture()} llamadas.")
+    else:
+        default_path = str(Path(DEFAULT_CAPTURE_DIR) / f"{repository.connector.db_type.lower()}_{datetime.now():%Y%m%d}.jsonl.gz")
+        capture_path = st.sidebar.text_input("Fichero de captura", value=default_path)
+        if st.sidebar.button("Iniciar captura"):
+            Path(capture_path).parent.mkdir(parents=True, exist_ok=True)
+            repository.start_capture(capture_path)
+            st.sidebar.success(f"Capturando en {capture_path}.")
+
+def metrics_exporter_sidebar(db_connector_instance):
+    """Arranca el exportador Prometheus y registra los colectores del conector actual."""
+    st.sidebar.header("Métricas (Prometheus)")
+    exporter = get_exporter()
+    if not exporter.running:
+        port = st.sidebar.number_input("Puerto de /metrics", min_value=1024, max_value=65535, value=DEFAULT_PORT, step=1)
+        if st.sidebar.button("Iniciar exportador"):
+            try:
+                exporter.start(port=int(port))
+            except OSError as e:
+                st.sidebar.error(f"No se pudo iniciar el exportador: {str(e)}")
+    if exporter.running:
+        # Se re-registran en cada ejecución: las claves fijas reemplazan al conector anterior
+        exporter.register_collector("pool", pool_collector(db_connector_instance))
+        if hasattr(db_connector_instance, "cache_stats"):
+            exporter.register_collector("cache", cache_collector(db_connector_instance))
+        else:
+            exporter.unregister_collector("cache")
+        st.sidebar.caption(f"Exportando en http://127.0.0.1:{exporter.port}/metrics")
+
+
 def run_app():
     st.title("Sistema de Comparación de Bases de Datos para Facturación")
 
@@ -107,20 +130,14 @@ def run_app():
             selected_db_type_sidebar, db_host, db_port, db_name, db_user, db_password
         )
 
+        # El registro importa solo el módulo del conector elegido; si falta su controlador
+        # el error se limita a este tipo de base de datos
         connector_instance_to_use = None
-        if selected_db_type_sidebar == "PostgreSQL":
-            connector_instance_to_use = PostgreSQLConnector()
-        elif selected_db_type_sidebar == "SQLServer":
-            connector_instance_to_use = SQLServerConnector()
-        elif selected_db_type_sidebar == "MySQL":
-            connector_instance_to_use = MySQLConnector()
-        elif selected_db_type_sidebar == "MongoDB":
-            connector_instance_to_use = MongoDBConnector()
-        elif selected_db_type_sidebar == "Redis":
-            connector_instance_to_use = RedisConnector()
-        elif selected_db_type_sidebar == "Cassandra":
-            connector_instance_to_use = CassandraConnector()
-        
+        try:
+            connector_instance_to_use = create_connector(selected_db_type_sidebar)
+        except (RuntimeError, ValueError) as e:
+            st.sidebar.error(str(e))
+
         if connector_instance_to_use:
             st.session_state.db_connector_instance = connector_instance_to_use
             try:
@@ -150,8 +167,12 @@ def run_app():
                 st.session_state.db_initialized_schema = False
             finally:
                 pass
-        else:
-            st.sidebar.error("Tipo de base de datos no soportado o conector no disponible.")
+
+    with st.sidebar.expander("Coste de importación de conectores"):
+        st.caption("Arranque (proceso nuevo) y re-ejecución del script importando todos los conectores frente al registro perezoso.")
+        if st.button("Medir importación", key="connector_import_benchmark"):
+            with st.spinner("Importando conectores en procesos nuevos..."):
+                st.dataframe(benchmark_connector_imports(selected_db_type_sidebar, repeats=3), hide_index=True)
 
     if not st.session_state.db_connector_instance or not st.session_state.repository:
         st.warning("Por favor, configure y conecte a una base de datos usando la barra lateral.")
@@ -161,6 +182,9 @@ def run_app():
         st.error("Los servicios de aplicación no se inicializaron correctamente. Intente reconectar.")
         return
 
+    metrics_exporter_sidebar(st.session_state.db_connector_instance)
+    workload_capture_sidebar(st.session_state.repository)
+
     tab_mantenedores, tab_pruebas, tab_multi, tab_resultados, tab_facturacion = st.tabs([
         "Mantenedores",
         "Ejecutar Pruebas de Rendimiento",
@@ -173,7 +197,12 @@ def run_app():
         maintainers_tab_view(st.session_state.entity_service)
 
     with tab_pruebas:
-        performance_test_view(st.session_state.performance_service, st.session_state.db_type_selected)
+        performance_test_view(
+            st.session_state.performance_service,
+            st.session_state.db_type_selected,
+            connector_class=type(st.session_state.db_connector_instance),
+            credentials=st.session_state.credentials
+        )
 
     with tab_multi:
         multi_spaces_tab_view(DB_DEFAULTS)
@@ -3,6 +3,9 @@ import json
 import pandas as pd
 from application.services.billing_service import BillingService
 from application.services.entity_service import EntityService
+from shared.tracing import enable_tracing, last_trace_id, span_tree, get_finished_spans, to_chrome_trace
+
+INVOICE_ROOT_SPAN = "BillingService.generate_invoice_process"
 
 @st.cache_data(ttl=3600)
 def get_cached_entity_data(_entity_service: EntityService, table_name: str):
@@ -78,6 +81,10 @@ def billing_tab_view(billing_service: BillingService, entity_service: EntityServ
     st.markdown("---")
 
     st.caption(f"La factura se generará en la base de datos conectada: **{current_db_type}**")
+    trace_invoice = st.checkbox(
+        "Trazar esta factura", value=False, key="trace_invoice_checkbox",
+        help="Registra los spans servicio → repositorio → conector de la factura para ver en qué llamada se va el tiempo."
+    )
     if st.button("Generar Factura", key="generate_invoice_final_button"):
         cliente_id = None
         if selected_cliente != "Seleccione un cliente":
@@ -94,6 +101,8 @@ def billing_tab_view(billing_service: BillingService, entity_service: EntityServ
         products_for_json = [{"producto_id": item['producto_id'], "cantidad": item['cantidad']} for item in st.session_state.current_invoice_products]
         productos_json_str = json.dumps(products_for_json)
         
+        if trace_invoice:
+            enable_tracing()
         try:
             with st.spinner(f"Generando factura en {current_db_type}..."):
                 _result, exec_time = billing_service.generate_invoice_process(
@@ -109,7 +118,43 @@ def billing_tab_view(billing_service: BillingService, entity_service: EntityServ
             else:
                 st.warning("El SP no devolvió un resultado.")
             st.session_state.current_invoice_products = []
+            if trace_invoice:
+                st.session_state.last_invoice_trace_id = last_trace_id(INVOICE_ROOT_SPAN)
             st.rerun()
 
         except Exception as e:
             st.error(f"Error al generar factura en {current_db_type}: {str(e)}")
+            if trace_invoice:
+                # La traza también sirve para ver en qué capa falló la factura
+                st.session_state.last_invoice_trace_id = last_trace_id(INVOICE_ROOT_SPAN)
+
+    render_invoice_trace(st.session_state.get('last_invoice_trace_id'))
+
+
+def render_invoice_trace(trace_id):
+    """Árbol de spans de la última factura trazada y descarga en formato Chrome trace."""
+    if not trace_id:
+        return
+    spans = span_tree(trace_id)
+    if not spans:
+        return
+    st.markdown("---")
+    st.subheader("Traza de la Última Factura")
+    trace_df = pd.DataFrame([
+        {
+            # Espacios no separables: la tabla recorta los espacios normales al inicio
+            "Span": ("\u00a0\u00a0\u00a0\u00a0" * s['depth']) + ("└ " if s['depth'] else "") + s['name'],
+            "Duración (ms)": s['duration_ms'],
+            "Estado": s['status'],
+            "Atributos": ", ".join(f"{key}={value}" for key, value in s['attributes'].items()),
+        }
+        for s in spans
+    ])
+    st.dataframe(trace_df.style.format({"Duración (ms)": "{:.3f}"}), use_container_width=True, hide_index=True)
+    st.download_button(
+        "Descargar traza (Chrome trace JSON)",
+        data=json.dumps(to_chrome_trace(get_finished_spans(trace_id)), default=str),
+        file_name=f"factura_{trace_id[:8]}.trace.json",
+        mime="application/json",
+        help="Se abre en chrome://tracing o en https://ui.perfetto.dev",
+    )
@@ -79,100 +79,21 @@ def maintainers_tab_view(entity_service: EntityService):
         column_config=column_editor_config,
     )
     
-    changes_processed_flag = False
-
-    current_data_indexed = current_data_df.set_index(pk_col, drop=False)
-    edited_data_indexed = edited_data.set_index(pk_col, drop=False)
-
-    original_ids = set(current_data_indexed.index)
-    edited_ids = set(edited_data_indexed.index)
-
-    deleted_ids = list(original_ids - edited_ids)
-    
-    if deleted_ids:
-        for record_id_to_delete in deleted_ids:
-            try:
-                entity_service.delete_entity(selected_table_name, record_id_to_delete)
-                st.success(f"Registro (ID: {record_id_to_delete}) eliminado de {selected_table_name}.")
-                changes_processed_flag = True
-            except Exception as e:
-                st.error(f"Error eliminando ID {record_id_to_delete}: {e}")
-    
-    common_ids = list(original_ids.intersection(edited_ids))
-    
-    if common_ids:
-        current_common = current_data_indexed.loc[common_ids]
-        edited_common = edited_data_indexed.loc[common_ids]
-
-        for record_id_to_update in common_ids:
-            original_row = current_common.loc[record_id_to_update]
-            edited_row = edited_common.loc[record_id_to_update]
-            
-            update_payload = {}
-            for col_name, original_value in original_row.items():
-                if col_name == pk_col:
-                    continue
-                new_value = edited_row[col_name]
-                
-                if not pd.Series([original_value]).equals(pd.Series([new_value])):
-                    field_type = fields_config.get(col_name)
-                    if field_type == "datetime" and isinstance(new_value, str):
-                        try:
-                            update_payload[col_name] = pd.to_datetime(new_value).date()
-                        except ValueError:
-                            st.warning(f"Valor de fecha inválido '{new_value}' para '{col_name}'. Se omite.")
-                            continue
-                    elif field_type == "decimal" and new_value is not None:
-                         update_payload[col_name] = float(new_value)
-                    elif field_type == "int" and new_value is not None:
-                         update_payload[col_name] = int(new_value)
-                    else:
-                        update_payload[col_name] = new_value
-            
-            if update_payload:
-                try:
-                    entity_service.update_entity(selected_table_name, record_id_to_update, update_payload)
-                    st.success(f"Registro (ID: {record_id_to_update}) actualizado en {selected_table_name}.")
-                    changes_processed_flag = True
-                except Exception as e:
-                    st.error(f"Error actualizando ID {record_id_to_update}: {e}")
-
-    added_ids = list(edited_ids - original_ids)
-    
-    if added_ids:
-        for record_id_added in added_ids:
-            new_row_data_dict = edited_data_indexed.loc[record_id_added].to_dict()
-            
-            if pk_col in new_row_data_dict and (new_row_data_dict[pk_col] is None or str(new_row_data_dict[pk_col]).strip() == ""):
-                del new_row_data_dict[pk_col]
-            
-            insert_payload = {}
-            is_empty_row = True
-            for col_name, value in new_row_data_dict.items():
-                if value is not None and str(value).strip() != "":
-                    is_empty_row = False
-                field_type = fields_config.get(col_name)
-                if field_type == "datetime" and isinstance(value, str):
-                    try:
-                        insert_payload[col_name] = pd.to_datetime(value).date()
-                    except ValueError:
-                        insert_payload[col_name] = None 
-                elif field_type == "decimal" and value is not None:
-                    insert_payload[col_name] = float(value)
-                elif field_type == "int" and value is not None:
-                    insert_payload[col_name] = int(value)
-                else:
-                    insert_payload[col_name] = value
-            
-            if not insert_payload or is_empty_row: 
-                continue
+    # Un diff vectorizado y un único lote por tabla (no una llamada con su commit por fila)
+    try:
+        changes = entity_service.diff_entity_data(selected_table_name, current_data_df, edited_data)
+    except (TypeError, ValueError) as e:
+        st.error(f"Valor no válido en la tabla editada: {e}")
+        return
 
-            try:
-                entity_service.add_entity(selected_table_name, insert_payload)
-                st.success(f"Nuevo registro agregado a {selected_table_name} desde la tabla.")
-                changes_processed_flag = True
-            except Exception as e:
-                st.error(f"Error agregando nuevo registro desde la tabla: {e}")
-    
-    if changes_processed_flag:
+    if changes["inserts"] or changes["updates"] or changes["deletes"]:
+        try:
+            applied = entity_service.save_entity_changes(selected_table_name, changes)
+        except Exception as e:
+            st.error(f"Error guardando los cambios de {selected_table_name}: {e}")
+            return
+        st.success(
+            f"{selected_table_name}: {applied['inserted']} registros agregados, "
+            f"{applied['updated']} actualizados y {applied['deleted']} eliminados."
+        )
         st.rerun()
@@ -1,24 +1,15 @@
 import streamlit as st
-from infrastructure.adapters.out.connectors.postgres.postgres_connector import PostgreSQLConnector
-from infrastructure.adapters.out.connectors.sqlserver.sqlserver_connector import SQLServerConnector
-from infrastructure.adapters.out.connectors.mysql.mysql_connector import MySQLConnector
-from infrastructure.adapters.out.connectors.mongodb.mongodb_connector import MongoDBConnector
-from infrastructure.adapters.out.connectors.redis.redis_connector import RedisConnector
-from infrastructure.adapters.out.connectors.cassandra.cassandra_connector import CassandraConnector
+from infrastructure.adapters.out.connectors.connector_registry import create_connector
 from infrastructure.adapters.out.persistence.repositories.db_repository import DbRepository
 from infrastructure.adapters.out.persistence.utils.db_credentials_helper import get_db_credentials
+import pandas as pd
 from application.services.performance_service import PerformanceService
+from application.services.replay_service import PACING_ASAP, PACING_ORIGINAL, WorkloadReplayService, compare_replays
 from shared.performance_data import clear_performance_data
-from infrastructure.adapters.in_.ui.views.results_view import render_performance_results
-
-CONNECTOR_MAP = {
-    "PostgreSQL": PostgreSQLConnector,
-    "SQLServer": SQLServerConnector,
-    "MySQL": MySQLConnector,
-    "MongoDB": MongoDBConnector,
-    "Redis": RedisConnector,
-    "Cassandra": CassandraConnector,
-}
+from application.services.concurrency_sweep_service import DEFAULT_CONCURRENCY_LEVELS, ConcurrencySweepService
+from application.services.dataset_scaling_service import DEFAULT_SIZES, DatasetScalingService
+from shared.workload_spec import load_workload_spec
+from infrastructure.adapters.in_.ui.views.results_view import render_concurrency_sweep, render_performance_results, render_scaling_sweep
 
 def multi_spaces_tab_view(defaults: dict):
     st.header("Multi-Spaces")
@@ -36,20 +27,16 @@ def multi_spaces_tab_view(defaults: dict):
 
     if st.button("Ejecutar Test en Todas"):
         clear_performance_data()
-        test_operations = [
-            ("Búsqueda de cliente", "search_client"),
-            ("Búsqueda de producto", "search_product"),
-            ("Generación de factura", "generate_invoice"),
-            ("Consulta de factura", "query_invoice"),
-            ("Reporte de ventas", "sales_report"),
-        ]
+        # Misma carga (y misma semilla) en todas: cada backend recibe las mismas llamadas
+        workload = load_workload_spec()
         last_repo = None
         for db_type, db_creds in creds.items():
-            connector_cls = CONNECTOR_MAP.get(db_type)
-            if not connector_cls:
-                st.warning(f"Conector no soportado para {db_type}")
+            try:
+                connector = create_connector(db_type)
+            except (RuntimeError, ValueError) as e:
+                # Falta el controlador o el tipo no está registrado: se sigue con las demás
+                st.warning(f"Conector no disponible para {db_type}: {e}")
                 continue
-            connector = connector_cls()
             try:
                 connector.connect(**db_creds)
                 repo = DbRepository(connector_instance=connector)
@@ -58,7 +45,7 @@ def multi_spaces_tab_view(defaults: dict):
                 repo.create_stored_procedures()
                 repo.generate_test_data()
                 perf_service = PerformanceService(repo)
-                perf_service.run_performance_tests(db_type, test_operations)
+                perf_service.run_workload(db_type, workload)
                 st.success(f"Pruebas completadas en {db_type}")
             except Exception as e:
                 st.error(f"Error en {db_type}: {e}")
@@ -72,3 +59,92 @@ def multi_spaces_tab_view(defaults: dict):
         if last_repo:
             perf_service_summary = PerformanceService(last_repo)
             render_performance_results(perf_service_summary)
+
+    st.subheader("Reproducir Captura en Todas")
+    replay_path = st.text_input("Fichero de captura", value="", key="replay_path_multi")
+    replay_pacing = st.selectbox("Ritmo", [PACING_ASAP, PACING_ORIGINAL], key="replay_pacing_multi")
+    if st.button("Reproducir en Todas") and replay_path:
+        results = []
+        for db_type, db_creds in creds.items():
+            try:
+                connector = create_connector(db_type)
+            except (RuntimeError, ValueError) as e:
+                st.warning(f"Conector no disponible para {db_type}: {e}")
+                continue
+            try:
+                connector.connect(**db_creds)
+                repo = DbRepository(connector_instance=connector)
+                results.append(WorkloadReplayService(repo).replay(db_type, replay_path, pacing=replay_pacing))
+                st.success(f"Captura reproducida en {db_type}")
+            except Exception as e:
+                st.error(f"Error en {db_type}: {e}")
+            finally:
+                try:
+                    connector.disconnect()
+                except Exception:
+                    pass
+        if results:
+            st.write("p50 (ms) por operación y base de datos:")
+            st.dataframe(pd.DataFrame(compare_replays(results)).T)
+            st.write("p99 (ms) por operación y base de datos:")
+            st.dataframe(pd.DataFrame(compare_replays(results, "replay_p99_ms")).T)
+
+    st.subheader("Barrido por Tamaño en Todas")
+    sweep_sizes = st.text_input("Tamaños (facturas, separados por comas)", value=", ".join(str(size) for size in DEFAULT_SIZES[:3]), key="sweep_sizes_multi")
+    if st.button("Barrido en Todas"):
+        sizes = [int(size) for size in sweep_sizes.replace("_", "").split(",") if size.strip().isdigit()]
+        workload = load_workload_spec()
+        rows = []
+        for db_type, db_creds in creds.items():
+            try:
+                connector = create_connector(db_type)
+            except (RuntimeError, ValueError) as e:
+                st.warning(f"Conector no disponible para {db_type}: {e}")
+                continue
+            try:
+                connector.connect(**db_creds)
+                repo = DbRepository(connector_instance=connector)
+                repo.create_tables()
+                repo.generate_test_data()
+                rows.extend(DatasetScalingService(repo).run_sweep(db_type, workload, sizes))
+                st.success(f"Barrido completado en {db_type}")
+            except Exception as e:
+                st.error(f"Error en {db_type}: {e}")
+            finally:
+                try:
+                    connector.disconnect()
+                except Exception:
+                    pass
+        if rows:
+            render_scaling_sweep(rows)
+
+    st.subheader("Concurrencia en Todas")
+    max_clients = st.selectbox("Clientes máximos", list(DEFAULT_CONCURRENCY_LEVELS), index=6, key="concurrency_max_multi")
+    if st.button("Concurrencia en Todas"):
+        levels = [level for level in DEFAULT_CONCURRENCY_LEVELS if level <= max_clients]
+        workload = load_workload_spec()
+        results = []
+        for db_type, db_creds in creds.items():
+            try:
+                connector = create_connector(db_type)
+            except (RuntimeError, ValueError) as e:
+                st.warning(f"Conector no disponible para {db_type}: {e}")
+                continue
+            try:
+                connector.connect(**db_creds)
+                repo = DbRepository(connector_instance=connector)
+                repo.create_tables()
+                repo.generate_test_data()
+                id_pools = PerformanceService(repo).load_id_pools(workload)
+                # Cada cliente del barrido abre su propia conexión con la misma clase y credenciales
+                results.append(ConcurrencySweepService(type(connector), db_creds).run(db_type, workload, id_pools, levels))
+                st.success(f"Barrido de concurrencia completado en {db_type}")
+            except Exception as e:
+                st.error(f"Error en {db_type}: {e}")
+            finally:
+                try:
+                    connector.disconnect()
+                except Exception:
+                    pass
+        if results:
+            render_concurrency_sweep(results)
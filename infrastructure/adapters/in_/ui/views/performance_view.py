@@ -1,17 +1,44 @@
+import json
 import streamlit as st
-from application.services.performance_service import PerformanceService
-from shared.performance_data import add_performance_metric
+import pandas as pd
+from application.services.performance_service import DEFAULT_BATCH_SIZES, PerformanceService
+from application.services.process_pool_benchmark_service import ProcessPoolBenchmarkService
+from application.services.index_advisor_service import IndexAdvisorService
+from application.services.replay_service import PACING_ASAP, PACING_ORIGINAL, WorkloadReplayService
+from application.services.concurrency_sweep_service import DEFAULT_CONCURRENCY_LEVELS, ConcurrencySweepService
+from application.services.dataset_scaling_service import DEFAULT_SIZES, DatasetScalingService
+from shared.workload_spec import WorkloadSpec
+from infrastructure.adapters.in_.ui.views.results_view import render_batch_lookups, render_concurrency_sweep, render_scaling_sweep
 
-def performance_test_view(performance_service: PerformanceService, db_type_selected: str):
+def performance_test_view(performance_service: PerformanceService, db_type_selected: str,
+                          connector_class=None, credentials=None):
     st.header("Pruebas de Rendimiento")
 
-    test_operations_config = [
-        ("Búsqueda de cliente", "search_client"),
-        ("Búsqueda de producto", "search_product"),
-        ("Generación de factura", "generate_invoice"),
-        ("Consulta de factura", "query_invoice"),
-        ("Reporte de ventas", "sales_report")
-    ]
+    st.subheader("Carga de Trabajo")
+    uploaded_workload = st.file_uploader(
+        "Especificación de carga (JSON)", type=["json"],
+        help="Mezcla de operaciones con pesos y generadores de parámetros. Sin fichero se usa default_workload.json.",
+    )
+    try:
+        workload = WorkloadSpec.from_dict(json.load(uploaded_workload)) if uploaded_workload else performance_service.load_workload()
+    except (ValueError, KeyError) as e:
+        st.error(f"Especificación de carga no válida: {str(e)}")
+        return
+    test_operations_config = workload.operations_config()
+    st.dataframe(
+        pd.DataFrame([{"operación": op.name, "peso": op.weight, "parámetros": ", ".join(
+            f"{param}: {spec['generator']}" + (f" sobre {spec['table']}" if "table" in spec else "") for param, spec in op.params.items()
+        ) or "(por defecto)"} for op in workload.operations]),
+        use_container_width=True, hide_index=True,
+    )
+    workload_iterations = st.number_input("Llamadas a ejecutar", min_value=1, max_value=1_000_000, value=workload.iterations, step=50)
+
+    explain_mode = st.checkbox(
+        "Modo explain: capturar el plan de ejecución de cada operación",
+        value=False,
+        help="Al terminar las mediciones se pide al servidor el plan de cada consulta (EXPLAIN ANALYZE, showplan XML, "
+             "executionStats o trazado de Cassandra). Vuelve a ejecutar las consultas, pero fuera de los tiempos medidos.",
+    )
 
     if st.button("Ejecutar Todas las Pruebas de Rendimiento"):
         if not db_type_selected:
@@ -25,29 +52,188 @@ def performance_test_view(performance_service: PerformanceService, db_type_selec
         performance_service.clear_all_performance_data()
         st.info("Datos de rendimiento anteriores limpiados. Ejecutando nuevas pruebas...")
 
-        for i, (op_name_display, op_method_name) in enumerate(test_operations_config):
-            status_text.text(f"Ejecutando: {op_name_display} en {db_type_selected}...")
-            try:
-                if hasattr(performance_service.repository, op_method_name) and \
-                   callable(getattr(performance_service.repository, op_method_name)):
-                    
-                    method_to_call_on_repo = getattr(performance_service.repository, op_method_name)
-                    
-                    _result, exec_time = method_to_call_on_repo() 
-                    
-                    add_performance_metric(db_type_selected, op_name_display, exec_time)
-                    
-                    st.write(f"{db_type_selected} - {op_name_display}: OK ({exec_time:.2f} ms)")
-                else:
-                    st.write(f"{db_type_selected} - {op_name_display}: Error - Método '{op_method_name}' no encontrado en el repositorio.")
-                    add_performance_metric(db_type_selected, op_name_display, -1.0)
+        def _progress(done, total):
+            status_text.text(f"Ejecutando carga '{workload.name}' en {db_type_selected}: {done} de {total} llamadas...")
+            progress_bar.progress(done / total)
 
+        # run_workload silencia el registro DEBUG/INFO: formatear y escribir mensajes sesga los tiempos
+        performance_service.run_workload(db_type_selected, workload, iterations=int(workload_iterations), progress_callback=_progress)
+        summary = performance_service.get_performance_summary()
+        if summary:
+            st.dataframe(
+                pd.DataFrame(summary)[["operation", "count", "errors", "p50_ms", "p95_ms", "p99_ms"]],
+                use_container_width=True, hide_index=True,
+            )
+
+        if explain_mode:
+            status_text.text(f"Capturando planes de ejecución en {db_type_selected}...")
+            captured = performance_service.capture_query_plans(db_type_selected, test_operations_config)
+            st.write(f"Planes de ejecución capturados: {captured} de {total_ops} (ver pestaña de resultados).")
 
-            except Exception as e:
-                st.write(f"{db_type_selected} - {op_name_display}: Error - {str(e)}")
-                add_performance_metric(db_type_selected, op_name_display, -1.0)
-            
-            progress_bar.progress((i + 1) / total_ops)
-        
         status_text.text("Pruebas de rendimiento completadas!")
+        overhead = performance_service.measure_logging_overhead(samples=20_000)
+        st.caption(
+            f"Registro silenciado durante la prueba: un print de depuración costaba {overhead['print_ns']:.0f} ns por llamada, "
+            f"el logger desactivado {overhead['logger_disabled_ns']:.0f} ns (ahorro de {overhead['saved_per_call_ns']:.0f} ns por mensaje)."
+        )
         st.balloons()
+
+    st.subheader("Perfilado de Operación")
+    st.write("Ejecuta una operación varias veces bajo cProfile y tracemalloc para ver en qué funciones se va el tiempo y cuánta memoria asigna. Los tiempos perfilados no se mezclan con los del benchmark.")
+    col_operation, col_profile_iterations = st.columns(2)
+    profile_labels = [op_name_display for op_name_display, _ in test_operations_config]
+    profile_choice = col_operation.selectbox("Operación a perfilar", profile_labels)
+    profile_iterations = col_profile_iterations.number_input("Iteraciones perfiladas", min_value=1, max_value=10000, value=50, step=10)
+
+    if st.button("Perfilar Operación"):
+        if not db_type_selected:
+            st.error("Por favor, conecte a una base de datos primero desde la barra lateral.")
+        else:
+            op_method_name = dict(test_operations_config)[profile_choice]
+            with st.spinner(f"Perfilando {profile_choice} en {db_type_selected}..."):
+                try:
+                    report = performance_service.profile_operation(
+                        db_type_selected, profile_choice, op_method_name, iterations=int(profile_iterations)
+                    )
+                    st.success(
+                        f"Perfil guardado en {report['prof_path']} (pico de memoria {report['peak_memory_kb']:.1f} KiB). "
+                        "Las funciones más costosas están en la pestaña de resultados."
+                    )
+                except Exception as e:
+                    st.error(f"Error al perfilar la operación: {str(e)}")
+
+    st.subheader("Asesor de Índices")
+    st.write("Busca en los planes capturados en modo explain recorridos completos de tabla con filtro y sugiere el índice que los evitaría. La comparación mide cada operación sin los índices declarados y con ellos.")
+    index_advisor = IndexAdvisorService(performance_service.repository)
+    col_suggest, col_compare_iterations = st.columns(2)
+    if col_suggest.button("Sugerir Índices"):
+        suggestions = index_advisor.suggest_indexes()
+        if not performance_service.get_query_plans():
+            st.info("No hay planes capturados: ejecute las pruebas con el modo explain activado.")
+        elif not suggestions:
+            st.success("Ningún plan capturado recorre una tabla entera con un filtro indexable.")
+        else:
+            st.dataframe(pd.DataFrame(suggestions), use_container_width=True, hide_index=True)
+    compare_iterations = col_compare_iterations.number_input("Iteraciones por operación (antes/después)", min_value=1, max_value=10000, value=30, step=10)
+
+    if st.button("Comparar Sin y Con Índices"):
+        if not db_type_selected:
+            st.error("Por favor, conecte a una base de datos primero desde la barra lateral.")
+        else:
+            with st.spinner(f"Midiendo {db_type_selected} sin índices y con índices..."):
+                try:
+                    comparison = index_advisor.benchmark_indexes(db_type_selected, test_operations_config, iterations=int(compare_iterations))
+                    st.dataframe(pd.DataFrame(comparison).set_index(['database', 'operation']))
+                except Exception as e:
+                    st.error(f"Error en la comparación de índices: {str(e)}")
+
+    st.subheader("Barrido por Tamaño de Datos")
+    st.write("Siembra la base de datos hasta cada número de facturas y ejecuta la carga en cada punto. Los datos sembrados no se borran: los tamaños se recorren de menor a mayor.")
+    sweep_sizes = st.text_input("Tamaños (facturas, separados por comas)", value=", ".join(str(size) for size in DEFAULT_SIZES[:3]), key="sweep_sizes_single")
+    sweep_iterations = st.number_input("Llamadas por tamaño", min_value=10, max_value=100000, value=200, step=50, key="sweep_iterations_single")
+
+    if st.button("Ejecutar Barrido por Tamaño"):
+        try:
+            sizes = [int(size) for size in sweep_sizes.replace("_", "").split(",") if size.strip()]
+        except ValueError:
+            st.error("Los tamaños deben ser números enteros separados por comas.")
+            sizes = []
+        if sizes:
+            sweep_status = st.empty()
+            try:
+                rows = DatasetScalingService(performance_service.repository).run_sweep(
+                    db_type_selected, workload, sizes, iterations_per_size=int(sweep_iterations),
+                    progress_callback=lambda step, message: sweep_status.text(f"[{step}/{len(sizes)}] {message}..."),
+                )
+                sweep_status.text("Barrido completado.")
+                render_scaling_sweep(rows)
+            except Exception as e:
+                st.error(f"Error en el barrido por tamaño: {str(e)}")
+
+    st.subheader("Búsquedas por Lotes")
+    st.write("Compara buscar N claves de una en una con una sola búsqueda por lotes (IN / ANY, $in, pipeline de Redis, lecturas asíncronas de Cassandra) y muestra el tiempo amortizado por clave.")
+    col_batch_sizes, col_batch_reps = st.columns(2)
+    batch_sizes = col_batch_sizes.text_input("Claves por lote (separadas por comas)", value=", ".join(str(size) for size in DEFAULT_BATCH_SIZES), key="batch_sizes_single")
+    batch_repetitions = col_batch_reps.number_input("Repeticiones por tamaño", min_value=1, max_value=1000, value=20, step=5, key="batch_repetitions_single")
+
+    if st.button("Ejecutar Búsquedas por Lotes"):
+        try:
+            sizes = [int(size) for size in batch_sizes.replace("_", "").split(",") if size.strip()]
+        except ValueError:
+            st.error("Los tamaños de lote deben ser números enteros separados por comas.")
+            sizes = []
+        if sizes:
+            batch_progress = st.progress(0)
+            try:
+                rows = performance_service.benchmark_batch_lookups(
+                    db_type_selected, sizes, repetitions=int(batch_repetitions),
+                    progress_callback=lambda done, total: batch_progress.progress(done / total),
+                )
+                render_batch_lookups(rows)
+            except Exception as e:
+                st.error(f"Error en las búsquedas por lotes: {str(e)}")
+
+    st.subheader("Reproducción de Captura")
+    st.write("Vuelve a lanzar contra esta base de datos las llamadas de una captura (barra lateral, \"Captura de Carga\"), una tras otra, esperando a la hora capturada de cada una (ritmo original) o lo más rápido posible. Una llamada lenta retrasa a las siguientes: ese retraso aparece como retraso de salida. Los ids creados por las escrituras se traducen a los que genera la reproducción.")
+    replay_path = st.text_input("Fichero de captura a reproducir", value="", key="replay_path_single")
+    col_pacing, col_speed = st.columns(2)
+    replay_pacing = col_pacing.selectbox("Ritmo", [PACING_ORIGINAL, PACING_ASAP], key="replay_pacing_single")
+    replay_speed = col_speed.number_input("Velocidad (ritmo original)", min_value=0.1, max_value=1000.0, value=1.0, step=0.5, key="replay_speed_single")
+
+    if st.button("Reproducir Captura"):
+        if not replay_path:
+            st.error("Indique el fichero de captura.")
+        else:
+            replay_progress = st.progress(0)
+            try:
+                result = WorkloadReplayService(performance_service.repository).replay(
+                    db_type_selected, replay_path, pacing=replay_pacing, speed=float(replay_speed),
+                    progress_callback=lambda done, total: replay_progress.progress(done / total),
+                )
+                st.dataframe(pd.DataFrame(result["operations"]), use_container_width=True, hide_index=True)
+                st.caption(
+                    f"{result['calls']} llamadas en {result['elapsed_s']:.1f} s, {result['errors']} errores, "
+                    f"{result['remapped_ids']} ids traducidos. Retraso de salida p95 {result['lag_p95_ms']:.1f} ms, máximo {result['lag_max_ms']:.1f} ms."
+                )
+            except (OSError, ValueError) as e:
+                st.error(f"Error al reproducir la captura: {str(e)}")
+
+    if connector_class is None or credentials is None:
+        return
+
+    st.subheader("Carga Multiproceso")
+    st.write("Reparte la carga entre varios procesos, cada uno con su propio conector, para que el cliente Python no limite el resultado.")
+    col_workers, col_iterations = st.columns(2)
+    workers = col_workers.number_input("Procesos", min_value=1, max_value=64, value=4, step=1)
+    iterations = col_iterations.number_input("Llamadas por proceso", min_value=1, max_value=100000, value=100, step=10)
+
+    if st.button("Ejecutar Carga Multiproceso"):
+        with st.spinner(f"Ejecutando {int(workers)} procesos contra {db_type_selected}..."):
+            try:
+                summary = ProcessPoolBenchmarkService(connector_class, credentials).run(
+                    db_type_selected, test_operations_config, workers=int(workers), iterations_per_worker=int(iterations),
+                    workload=workload, id_pools=performance_service.load_id_pools(workload),
+                )
+                st.dataframe(pd.DataFrame(summary).T)
+                st.success("Carga multiproceso completada. Los percentiles están en la pestaña de resultados.")
+            except Exception as e:
+                st.error(f"Error en la carga multiproceso: {str(e)}")
+
+    st.subheader("Barrido de Concurrencia")
+    st.write("Ejecuta la carga con 1, 2, 4 … clientes concurrentes (un hilo y una conexión por cliente) y ajusta la Ley de Escalabilidad Universal para dimensionar servidores y pools de conexiones.")
+    col_levels, col_duration = st.columns(2)
+    max_clients = col_levels.selectbox("Clientes máximos", list(DEFAULT_CONCURRENCY_LEVELS), index=6)
+    level_duration = col_duration.number_input("Segundos por nivel", min_value=1.0, max_value=300.0, value=5.0, step=1.0)
+
+    if st.button("Ejecutar Barrido de Concurrencia"):
+        levels = [level for level in DEFAULT_CONCURRENCY_LEVELS if level <= max_clients]
+        sweep_status = st.empty()
+        try:
+            result = ConcurrencySweepService(connector_class, credentials).run(
+                db_type_selected, workload, performance_service.load_id_pools(workload), levels, float(level_duration),
+                progress_callback=lambda step, total, clients: sweep_status.text(f"[{step}/{total}] {clients} clientes..."),
+            )
+            sweep_status.text("Barrido de concurrencia completado.")
+            render_concurrency_sweep([result])
+        except Exception as e:
+            st.error(f"Error en el barrido de concurrencia: {str(e)}")
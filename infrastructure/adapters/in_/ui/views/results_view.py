@@ -1,21 +1,222 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
-from application.services.performance_service import PerformanceService
+from application.services.performance_service import BATCH_MODE_SINGLE, PerformanceService
+from application.services.dataset_scaling_service import fit_growth_exponents
+from application.services.concurrency_sweep_service import usl_throughput
+from shared.performance_data import TOTAL_PHASE
+from shared.phase_timing import OTHER, PHASES
+from shared.instrumentation import CLIENT_CPU_PHASE
 
 
+def render_phase_breakdown(performance_service: PerformanceService) -> None:
+    """Gráfico apilado: tiempo medio de cada fase por base de datos y operación."""
+    df_all = pd.DataFrame(performance_service.get_performance_summary(phase=None))
+    df_phases = df_all[df_all['phase'] != TOTAL_PHASE]
+    if df_phases.empty:
+        return
+
+    totals = df_all[df_all['phase'] == TOTAL_PHASE].set_index(['database', 'operation'])['count']
+    df_phases = df_phases.join(totals.rename('total_count'), on=['database', 'operation'])
+    # Contribución media por operación: una fase puede no aparecer en todas las ejecuciones
+    df_phases = df_phases.assign(
+        contribution_ms=df_phases['mean_ms'] * df_phases['count'] / df_phases['total_count']
+    )
+    breakdown = df_phases.pivot_table(
+        index=['database', 'operation'], columns='phase', values='contribution_ms', aggfunc='sum', fill_value=0.0
+    )
+    breakdown = breakdown[[p for p in (*PHASES, OTHER) if p in breakdown.columns]]
+
+    st.subheader("Desglose por Fases (ms medios por operación)")
+    st.dataframe(breakdown)
+    try:
+        fig_phases, ax_phases = plt.subplots(figsize=(12, max(4, 0.5 * len(breakdown))))
+        breakdown.index = [f"{db} - {op}" for db, op in breakdown.index]
+        breakdown.plot(kind='barh', stacked=True, ax=ax_phases, width=0.8)
+        ax_phases.set_title("Dónde se va el tiempo: pool, ejecución, lectura, materialización, commit", fontsize=14)
+        ax_phases.set_xlabel("Tiempo (ms)", fontsize=12)
+        ax_phases.legend(title="Fase", bbox_to_anchor=(1.05, 1), loc='upper left')
+        plt.tight_layout()
+        st.pyplot(fig_phases)
+    except Exception as e:
+        st.error(f"Error al generar gráfico de fases: {e}")
+
+
+def render_client_cpu(performance_service: PerformanceService) -> None:
+    """Tabla de tiempo de pared frente a tiempo de CPU del cliente por operación."""
+    df_all = pd.DataFrame(performance_service.get_performance_summary(phase=None))
+    df_cpu = df_all[df_all['phase'] == CLIENT_CPU_PHASE]
+    if df_cpu.empty:
+        return
+
+    wall = df_all[df_all['phase'] == TOTAL_PHASE].set_index(['database', 'operation'])['mean_ms']
+    cpu = df_cpu.set_index(['database', 'operation'])['mean_ms']
+    df_compare = pd.DataFrame({'wall_ms': wall, 'client_cpu_ms': cpu}).dropna()
+    # Lo que no es CPU del cliente es espera: red, servidor y bloqueos del driver
+    df_compare['client_cpu_pct'] = 100 * df_compare['client_cpu_ms'] / df_compare['wall_ms'].where(df_compare['wall_ms'] > 0)
+
+    st.subheader("Tiempo de Pared vs. CPU del Cliente (ms medios)")
+    st.dataframe(df_compare)
+
+
+def render_profile_reports(performance_service: PerformanceService) -> None:
+    """Funciones más costosas, asignaciones y pico de memoria de cada operación perfilada."""
+    reports = performance_service.get_profile_reports()
+    if not reports:
+        return
+
+    st.subheader("Perfiles de Operación (cProfile / tracemalloc)")
+    st.dataframe(pd.DataFrame([
+        {
+            'database': db, 'operation': op, 'iterations': report.get('iterations'),
+            'errors': report.get('errors'), 'wall_ms': report['wall_ms'], 'peak_memory_kb': report['peak_memory_kb'],
+        }
+        for (db, op), report in reports.items()
+    ]).set_index(['database', 'operation']))
+    for (db, op), report in reports.items():
+        with st.expander(f"{db} - {op}"):
+            st.caption(f"Perfil: {report['prof_path']} · Asignaciones: {report['alloc_path']}")
+            st.write("Funciones con más tiempo propio")
+            st.dataframe(pd.DataFrame(report['top_functions']))
+            st.write("Líneas con más memoria asignada")
+            st.dataframe(pd.DataFrame(report['top_allocations']))
+
+
+def render_query_plans(performance_service: PerformanceService) -> None:
+    """Planes de ejecución capturados en modo explain, uno por base de datos y operación."""
+    plans = performance_service.get_query_plans()
+    if not plans:
+        return
+
+    st.subheader("Planes de Ejecución (modo explain)")
+    for (db, op), plan in sorted(plans.items()):
+        with st.expander(f"{db} - {op}"):
+            if plan['format'] == "error":
+                st.error(f"No se pudo obtener el plan: {plan['plan']}")
+            elif plan['format'] == "json":
+                st.json(plan['plan'])
+            else:
+                st.code(plan['plan'], language="xml" if plan['format'] == "xml" else None)
+
+
+def render_scaling_sweep(rows: list, metric: str = "p50_ms") -> None:
+    """Latencia frente a número de facturas (log-log), un gráfico por operación y una línea por base de datos."""
+    df = pd.DataFrame(rows)
+    if df.empty:
+        st.warning("El barrido no produjo mediciones.")
+        return
+    df = df[df[metric] > 0]
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    fits = fit_growth_exponents(rows, metric)
+    if fits:
+        st.write("Exponente de crecimiento k (latencia ∝ N^k):")
+        st.dataframe(pd.DataFrame(fits), use_container_width=True, hide_index=True)
+
+    for operation in sorted(df['operation'].unique()):
+        try:
+            fig, ax = plt.subplots(figsize=(10, 5))
+            op_data = df[df['operation'] == operation]
+            for db_name in op_data['database'].unique():
+                db_data = op_data[op_data['database'] == db_name].sort_values('size')
+                ax.plot(db_data['size'], db_data[metric], label=db_name, marker='o')
+            ax.set_xscale('log')
+            ax.set_yscale('log')
+            ax.set_title(f"{operation}: {metric} frente al tamaño", fontsize=14)
+            ax.set_xlabel("Facturas", fontsize=12)
+            ax.set_ylabel("Tiempo (ms)", fontsize=12)
+            ax.legend(title="Base de Datos")
+            ax.grid(True, which='both', linestyle='--', alpha=0.5)
+            plt.tight_layout()
+            st.pyplot(fig)
+        except Exception as e:
+            st.error(f"Error al generar el gráfico de {operation}: {e}")
+
+def render_batch_lookups(rows: list) -> None:
+    """Tiempo por clave frente a claves por lote (log-log): búsquedas de una en una frente a una búsqueda por lotes."""
+    df = pd.DataFrame(rows)
+    if df.empty:
+        st.warning("El benchmark de búsquedas por lotes no produjo mediciones.")
+        return
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    for operation in df['operation'].unique():
+        try:
+            fig, ax = plt.subplots(figsize=(10, 5))
+            op_data = df[(df['operation'] == operation) & (df['per_key_ms'] > 0)]
+            for (db_name, mode), series in op_data.groupby(['database', 'mode']):
+                series = series.sort_values('batch_size')
+                ax.plot(series['batch_size'], series['per_key_ms'], label=f"{db_name} ({mode})", marker='o',
+                        linestyle='--' if mode == BATCH_MODE_SINGLE else '-')
+            ax.set_xscale('log')
+            ax.set_yscale('log')
+            ax.set_title(f"{operation}: tiempo por clave (p50)", fontsize=14)
+            ax.set_xlabel("Claves por lote", fontsize=12)
+            ax.set_ylabel("Tiempo por clave (ms)", fontsize=12)
+            ax.legend(title="Base de Datos")
+            ax.grid(True, which='both', linestyle='--', alpha=0.5)
+            plt.tight_layout()
+            st.pyplot(fig)
+        except Exception as e:
+            st.error(f"Error al generar el gráfico de {operation}: {e}")
+
+def render_concurrency_sweep(results: list) -> None:
+    """Rendimiento y p99 frente a clientes concurrentes, con la curva USL ajustada de cada base de datos."""
+    df_levels = pd.DataFrame([row for result in results for row in result["levels"]])
+    if df_levels.empty:
+        st.warning("El barrido de concurrencia no produjo mediciones.")
+        return
+    st.dataframe(
+        df_levels[["database", "clients", "throughput_ops", "count", "errors", "p50_ms", "p95_ms", "p99_ms", "p999_ms"]],
+        use_container_width=True, hide_index=True,
+    )
+    fits = [{"database": result["levels"][0]["database"], **result["usl"]} for result in results if result["usl"] and result["levels"]]
+    if fits:
+        st.write("Ajuste USL: σ = contención, κ = coherencia, N* = clientes con el rendimiento máximo previsto:")
+        st.dataframe(pd.DataFrame(fits), use_container_width=True, hide_index=True)
+
+    try:
+        fig, (ax_throughput, ax_tail) = plt.subplots(1, 2, figsize=(14, 5))
+        fits_by_db = {fit["database"]: fit for fit in fits}
+        for db_name in df_levels['database'].unique():
+            db_data = df_levels[df_levels['database'] == db_name].sort_values('clients')
+            line = ax_throughput.plot(db_data['clients'], db_data['throughput_ops'], label=db_name, marker='o', linestyle='')
+            fit = fits_by_db.get(db_name)
+            if fit:
+                clients = np.geomspace(1, db_data['clients'].max(), 100)
+                ax_throughput.plot(clients, usl_throughput(clients, fit['lambda_ops'], fit['sigma'], fit['kappa']),
+                                   linestyle='--', color=line[0].get_color())
+            ax_tail.plot(db_data['clients'], db_data['p99_ms'], label=db_name, marker='o')
+        ax_throughput.set_title("Rendimiento (puntos) y ajuste USL (discontinua)", fontsize=14)
+        ax_throughput.set_ylabel("Operaciones / s", fontsize=12)
+        ax_tail.set_title("Latencia p99", fontsize=14)
+        ax_tail.set_ylabel("Tiempo (ms)", fontsize=12)
+        ax_tail.set_yscale('log')
+        for ax in (ax_throughput, ax_tail):
+            ax.set_xscale('log', base=2)
+            ax.set_xlabel("Clientes concurrentes", fontsize=12)
+            ax.legend(title="Base de Datos")
+            ax.grid(True, which='both', linestyle='--', alpha=0.5)
+        plt.tight_layout()
+        st.pyplot(fig)
+    except Exception as e:
+        st.error(f"Error al generar los gráficos de concurrencia: {e}")
+
 def render_performance_results(performance_service: PerformanceService) -> bool:
     """Renderiza tablas y gráficos con los datos de rendimiento actuales."""
-    performance_data_dict = performance_service.get_current_performance_data()
+    # Los resúmenes salen de los histogramas: el coste no depende del número de muestras
+    summary_rows = performance_service.get_performance_summary()
+    render_profile_reports(performance_service)
 
-    if not performance_data_dict or not performance_data_dict['database']:
+    if not summary_rows:
         st.warning(
             "No hay datos de rendimiento disponibles. Ejecute las pruebas primero desde la pestaña 'Ejecutar Pruebas de Rendimiento'."
         )
         return False
 
-    df = pd.DataFrame(performance_data_dict)
-    df_valid = df[df['time_ms'] >= 0]
+    df_summary = pd.DataFrame(summary_rows).drop(columns=['phase']).set_index(['database', 'operation'])
+    df_valid = df_summary[df_summary['count'] > 0].reset_index()
 
     if df_valid.empty:
         st.warning(
@@ -23,20 +224,24 @@ def render_performance_results(performance_service: PerformanceService) -> bool:
         )
         return False
 
-    st.subheader("Datos Crudos de Tiempos de Ejecución (ms)")
-    st.dataframe(df)
+    st.subheader("Resumen Estadístico (ms)")
+    st.dataframe(df_summary)
+
+    render_phase_breakdown(performance_service)
+    render_client_cpu(performance_service)
+    render_query_plans(performance_service)
 
-    st.subheader("Resumen Estadístico (solo datos válidos)")
-    st.dataframe(df_valid.groupby(['database', 'operation'])['time_ms'].describe())
+    with st.expander("Muestras crudas (reservorio acotado)"):
+        st.dataframe(pd.DataFrame(performance_service.get_current_performance_data()))
 
     st.subheader("Gráficos Comparativos (solo datos válidos)")
 
     try:
         fig_bar, ax_bar = plt.subplots(figsize=(12, 7))
-        pivot_df = df_valid.pivot(index='database', columns='operation', values='time_ms')
+        pivot_df = df_valid.pivot(index='database', columns='operation', values='mean_ms')
         pivot_df.plot(kind='bar', ax=ax_bar, width=0.8)
 
-        ax_bar.set_title("Tiempo de Ejecución por Operación y Base de Datos", fontsize=16)
+        ax_bar.set_title("Tiempo Medio de Ejecución por Operación y Base de Datos", fontsize=16)
         ax_bar.set_ylabel("Tiempo (ms)", fontsize=12)
         ax_bar.set_xlabel("Base de Datos", fontsize=12)
         ax_bar.legend(title="Operaciones", bbox_to_anchor=(1.05, 1), loc='upper left')
@@ -50,9 +255,10 @@ def render_performance_results(performance_service: PerformanceService) -> bool:
         fig_line, ax_line = plt.subplots(figsize=(12, 7))
         for db_name in df_valid['database'].unique():
             db_data = df_valid[df_valid['database'] == db_name]
-            ax_line.plot(db_data['operation'], db_data['time_ms'], label=db_name, marker='o', linestyle='-')
+            line = ax_line.plot(db_data['operation'], db_data['p50_ms'], label=f"{db_name} p50", marker='o', linestyle='-')
+            ax_line.plot(db_data['operation'], db_data['p99_ms'], label=f"{db_name} p99", marker='x', linestyle='--', color=line[0].get_color())
 
-        ax_line.set_title("Comparación de Rendimiento entre Bases de Datos", fontsize=16)
+        ax_line.set_title("Percentiles p50 / p99 entre Bases de Datos", fontsize=16)
         ax_line.set_ylabel("Tiempo (ms)", fontsize=12)
         ax_line.set_xlabel("Operación", fontsize=12)
         ax_line.legend(title="Base de Datos")
@@ -0,0 +1,58 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from shared.instrumentation import measure_async
+
+
+class AsyncBaseConnector(ABC):
+    """
+    Clase base abstracta para conectores asíncronos (asyncio).
+    Es paralela a BaseConnector para las operaciones del benchmark: cada operación es una
+    corrutina que devuelve (resultado, tiempo_ms), de modo que un único proceso puede
+    mantener miles de peticiones en vuelo sin un hilo por petición.
+    """
+    def __init__(self, db_type: str):
+        self.db_type = db_type
+        self.connection = None
+
+    @abstractmethod
+    async def connect(self, **credentials: Any) -> None:
+        """Establece la conexión (o el pool de conexiones) con la base de datos."""
+        pass
+
+    @abstractmethod
+    async def disconnect(self) -> None:
+        """Cierra la conexión con la base de datos."""
+        pass
+
+    async def measure_time(self, operation_name: str, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Tuple[Any, float]:
+        """Mide el tiempo de una corrutina en milisegundos, con desglose por fases."""
+        return await measure_async(operation_name, func, *args, **kwargs)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Conexiones del pool por estado (size, idle, max); vacío si el driver no las expone."""
+        return {}
+
+    @abstractmethod
+    async def search_client(self, client_id: int = 1) -> Tuple[Any, float]:
+        """Busca un cliente por ID."""
+        pass
+
+    @abstractmethod
+    async def search_product(self, product_id: int = 1) -> Tuple[Any, float]:
+        """Busca un producto por ID."""
+        pass
+
+    @abstractmethod
+    async def generate_invoice(self, client_id: int = 1, staff_id: int = 1, products_json_str: str = '[{"producto_id": 1, "cantidad": 1}]') -> Tuple[Any, float]:
+        """Genera una factura."""
+        pass
+
+    @abstractmethod
+    async def query_invoice(self, invoice_id: int = 1) -> Tuple[Any, float]:
+        """Consulta una factura por ID."""
+        pass
+
+    @abstractmethod
+    async def sales_report(self) -> Tuple[Any, float]:
+        """Genera un informe de ventas."""
+        pass
@@ -1,12 +1,39 @@
 from abc import ABC, abstractmethod
 import pandas as pd
-from typing import Any, Tuple, Callable
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Callable
+from infrastructure.adapters.out.persistence.config.table_definitions import get_primary_key
+from infrastructure.adapters.out.persistence.utils.type_coercion import to_driver_value
+from shared.instrumentation import measure
+from shared.phase_timing import COMMIT, EXECUTE, FETCH, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Parámetros por defecto de las operaciones de benchmark (los mismos del RepositoryPort);
+# explain_operation analiza la consulta con ellos para que el plan sea el de la prueba
+BENCHMARK_DEFAULT_PARAMS: Dict[str, Optional[tuple]] = {
+    "search_client": (1,),
+    "search_product": (1,),
+    "query_invoice": (1,),
+    "sales_report": None,
+}
+
+# Búsquedas por lotes de claves: operación -> (tabla, operación equivalente de una sola clave)
+BATCH_LOOKUPS: Dict[str, Tuple[str, str]] = {
+    "search_clients": ("Clientes", "search_client"),
+    "search_products": ("Producto", "search_product"),
+    "query_invoices": ("Factura", "query_invoice"),
+}
 
 class BaseConnector(ABC):
     """
     Clase base abstracta para conectores de base de datos.
     Define la interfaz que todos los conectores deben implementar.
     """
+    # fetch_records_in_chunks recorre la tabla por clave primaria ascendente (la reanudación
+    # de MigrationPipeline depende de ello); Cassandra recorre en orden de token
+    CHUNKS_IN_PK_ORDER = True
+
     def __init__(self, db_type: str):
         self.db_type = db_type
         self.connection = None
@@ -32,16 +59,31 @@ class BaseConnector(ABC):
         """Ejecuta un procedimiento almacenado y devuelve el resultado y el tiempo de ejecución."""
         pass
 
-    @abstractmethod
     def measure_time(self, operation_name: str, func: Callable, *args: Any, **kwargs: Any) -> Tuple[Any, float]:
-        """Mide el tiempo de ejecución de una función."""
-        pass
+        """
+        Mide el tiempo de ejecución de una función (ms, perf_counter_ns con el sobrecoste
+        del temporizador descontado) y su desglose por fases. Es común a todos los conectores
+        para que los tiempos de distintos backends sean comparables.
+        """
+        return measure(operation_name, func, *args, **kwargs)
 
     @abstractmethod
     def create_tables(self) -> None:
         """Crea las tablas necesarias en la base de datos."""
         pass
 
+    def create_indexes(self) -> List[str]:
+        """
+        Aplica los índices secundarios declarados en INDEX_DEFINITIONS (idempotente) y
+        devuelve los nombres de los índices presentes tras la llamada. Por defecto no hay
+        índices (ej. Redis).
+        """
+        return []
+
+    def drop_indexes(self) -> List[str]:
+        """Elimina los índices de INDEX_DEFINITIONS (para medir sin ellos); devuelve los eliminados."""
+        return []
+
     @abstractmethod
     def create_stored_procedures(self) -> None:
         """Crea los procedimientos almacenados necesarios en la base de datos."""
@@ -59,7 +101,7 @@ class BaseConnector(ABC):
 
     @abstractmethod
     def insert_record(self, table_name: str, data: dict) -> Any:
-        """Inserta un nuevo registro en una tabla."""
+        """Inserta un nuevo registro en una tabla y devuelve su clave primaria."""
         pass
 
     @abstractmethod
@@ -97,7 +139,208 @@ class BaseConnector(ABC):
         """Genera un informe de ventas."""
         pass
 
+    def search_clients(self, client_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        """Busca varios clientes por ID en una sola operación."""
+        return self.measure_time("search_clients", self._lookup_many, "search_clients", list(dict.fromkeys(client_ids)))
+
+    def search_products(self, product_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        """Busca varios productos por ID en una sola operación."""
+        return self.measure_time("search_products", self._lookup_many, "search_products", list(dict.fromkeys(product_ids)))
+
+    def query_invoices(self, invoice_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        """Consulta varias facturas por ID en una sola operación."""
+        return self.measure_time("query_invoices", self._lookup_many, "query_invoices", list(dict.fromkeys(invoice_ids)))
+
+    def _lookup_many(self, operation: str, record_ids: Sequence[Any]) -> List[Any]:
+        """
+        Filas de las claves pedidas (ya sin duplicados) en cualquier orden y sin las
+        inexistentes, con el formato de la búsqueda de una sola clave. Por defecto hace una
+        búsqueda por clave tras otra; los conectores lo sobrescriben con una única consulta
+        o un único envío (IN, $in, pipeline, lecturas asíncronas).
+        """
+        single_lookup = getattr(self, BATCH_LOOKUPS[operation][1])
+        rows = []
+        for record_id in record_ids:
+            row, _ = single_lookup(record_id)
+            if row:
+                rows.append(row)
+        return rows
+
+    def explain_operation(self, operation: str) -> Optional[Dict[str, Any]]:
+        """
+        Plan de ejecución del servidor para una operación de benchmark, como
+        {"format": "text" | "json" | "xml", "plan": str}. Devuelve None si el backend no
+        expone planes o si la operación no se puede analizar sin efectos (generate_invoice
+        escribe datos).
+        """
+        return None
+
     @abstractmethod
     def is_table_empty(self, table_name: str) -> bool:
         """Verifica si una tabla está vacía."""
         pass
+
+    def fetch_records_in_chunks(self, table_name: str, chunk_size: int = 10000, start_after: Any = None) -> Iterator[pd.DataFrame]:
+        """
+        Recupera los registros de una tabla en bloques de como máximo `chunk_size` filas,
+        siempre en el mismo orden de recorrido. Si se indica `start_after`, la lectura
+        continúa a partir de la fila con esa clave primaria (reanudación por checkpoint).
+        La implementación por defecto reutiliza fetch_all_records; los conectores la
+        sobrescriben con lecturas por cursor para mantener acotado el uso de memoria.
+        """
+        df = self.fetch_all_records(table_name)
+        pk_col = get_primary_key(table_name)
+        if pk_col and pk_col in df.columns:
+            df = df.sort_values(by=pk_col)
+            if start_after is not None:
+                df = df[df[pk_col] > start_after]
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size].reset_index(drop=True)
+
+    def count_records(self, table_name: str) -> int:
+        """
+        Número de filas de una tabla. Por defecto lee la tabla entera; los conectores lo
+        sobrescriben con un recuento en el servidor.
+        """
+        return len(self.fetch_all_records(table_name))
+
+    def max_primary_key(self, table_name: str) -> Optional[int]:
+        """
+        Mayor clave primaria numérica (None si la tabla está vacía), para insertar en bloque
+        a continuación de los datos existentes. Por defecto lee la tabla entera.
+        """
+        df = self.fetch_all_records(table_name)
+        pk_col = get_primary_key(table_name)
+        if df.empty or pk_col not in df.columns:
+            return None
+        keys = pd.to_numeric(df[pk_col], errors="coerce").dropna()
+        return int(keys.max()) if not keys.empty else None
+
+    def bulk_insert_records(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        """
+        Inserta un lote de registros (conservando sus claves primarias) y devuelve
+        el número de filas escritas. Por defecto inserta registro a registro.
+        """
+        for record in records:
+            self.insert_record(table_name, record)
+        return len(records)
+
+    def apply_table_changes(self, table_name: str, inserts: List[Dict[str, Any]],
+                            updates: List[Tuple[Any, Dict[str, Any]]], deletes: List[Any]) -> Dict[str, int]:
+        """
+        Aplica en una tabla las bajas, los cambios ((id, {columna: valor})) y las altas, en
+        ese orden, y devuelve cuántas filas hay de cada tipo. Por defecto va fila a fila
+        (un commit por fila); los conectores lo sobrescriben con una única transacción.
+        """
+        for record_id in deletes:
+            self.delete_record(table_name, record_id)
+        for record_id, changes in updates:
+            self.update_record(table_name, record_id, changes)
+        for record in inserts:
+            self.insert_record(table_name, record)
+        return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+    def update_records(self, table_name: str, updates: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """
+        Actualiza varios registros ((id, {columna: valor}); cada uno puede cambiar columnas
+        distintas) y devuelve cuántos se enviaron. Por defecto se aplica con
+        apply_table_changes en trozos de BATCH_CHUNK_SIZE; los conectores SQL lo hacen en
+        una única transacción.
+        """
+        for start in range(0, len(updates), self.BATCH_CHUNK_SIZE):
+            self.apply_table_changes(table_name, [], updates[start:start + self.BATCH_CHUNK_SIZE], [])
+        return len(updates)
+
+    def delete_records(self, table_name: str, record_ids: List[Any]) -> int:
+        """Elimina varios registros por clave primaria, igual que update_records; devuelve cuántos se enviaron."""
+        for start in range(0, len(record_ids), self.BATCH_CHUNK_SIZE):
+            self.apply_table_changes(table_name, [], [], record_ids[start:start + self.BATCH_CHUNK_SIZE])
+        return len(record_ids)
+
+    # Marcador de parámetros del controlador DB-API de los conectores SQL ("%s" o "?")
+    PARAM_PLACEHOLDER = "%s"
+    # Claves o filas por sentencia / lote en las operaciones masivas
+    BATCH_CHUNK_SIZE = 1000
+
+    def _driver_value(self, value: Any) -> Any:
+        return to_driver_value(value)
+
+    def _delete_rows(self, table_name: str, record_ids: List[Any]) -> None:
+        # DELETE ... IN (...) por trozos: una sentencia cada BATCH_CHUNK_SIZE claves
+        pk_col = get_primary_key(table_name)
+        values = [self._driver_value(record_id) for record_id in record_ids]
+        for start in range(0, len(values), self.BATCH_CHUNK_SIZE):
+            chunk = values[start:start + self.BATCH_CHUNK_SIZE]
+            placeholders = ", ".join([self.PARAM_PLACEHOLDER] * len(chunk))
+            self.cursor.execute(f"DELETE FROM {table_name} WHERE {pk_col} IN ({placeholders})", tuple(chunk))
+
+    def _fetch_by_keys(self, table_name: str, record_ids: Sequence[Any]) -> List[Any]:
+        # SELECT ... IN (...) por trozos: una consulta cada BATCH_CHUNK_SIZE claves
+        pk_col = get_primary_key(table_name)
+        values = [self._driver_value(record_id) for record_id in record_ids]
+        rows = []
+        for start in range(0, len(values), self.BATCH_CHUNK_SIZE):
+            chunk = values[start:start + self.BATCH_CHUNK_SIZE]
+            placeholders = ", ".join([self.PARAM_PLACEHOLDER] * len(chunk))
+            cursor, _ = self.execute_query(f"SELECT * FROM {table_name} WHERE {pk_col} IN ({placeholders})", tuple(chunk))
+            with phase(FETCH):
+                rows.extend(cursor.fetchall())
+        return rows
+
+    def _update_rows(self, table_name: str, updates: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        pk_col = get_primary_key(table_name)
+        # Un executemany por combinación de columnas modificadas
+        for columns, rows in group_by_columns((changes, record_id) for record_id, changes in updates).items():
+            set_clause = ", ".join(f"{col} = {self.PARAM_PLACEHOLDER}" for col in columns)
+            self.cursor.executemany(
+                f"UPDATE {table_name} SET {set_clause} WHERE {pk_col} = {self.PARAM_PLACEHOLDER}",
+                [tuple(self._driver_value(changes[col]) for col in columns) + (self._driver_value(record_id),)
+                 for changes, record_id in rows],
+            )
+
+    def _insert_rows(self, table_name: str, records: List[Dict[str, Any]]) -> None:
+        for columns, rows in group_by_columns((record, None) for record in records).items():
+            placeholders = ", ".join([self.PARAM_PLACEHOLDER] * len(columns))
+            self.cursor.executemany(
+                f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
+                [tuple(self._driver_value(record[col]) for col in columns) for record, _ in rows],
+            )
+
+    def _apply_changes_in_transaction(self, table_name: str, inserts: List[Dict[str, Any]],
+                                      updates: List[Tuple[Any, Dict[str, Any]]], deletes: List[Any]) -> Dict[str, int]:
+        """
+        apply_table_changes de los conectores DB-API: sentencias por lotes (_delete_rows,
+        _update_rows, _insert_rows, que cada conector puede especializar) y un único
+        commit. Ante cualquier error se deshace todo el lote.
+        """
+        try:
+            with phase(EXECUTE):
+                if deletes:
+                    self._delete_rows(table_name, deletes)
+                if updates:
+                    self._update_rows(table_name, updates)
+                if inserts:
+                    self._insert_rows(table_name, inserts)
+            with phase(COMMIT):
+                self.connection.commit()
+        except Exception as e:
+            logger.error("Error al aplicar los cambios de %s (se deshace el lote): %s", table_name, e)
+            self.connection.rollback()
+            raise
+        return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Conexiones del conector por estado (ej. {"size": 1, "idle": 0, "max": 1}). Los
+        conectores síncronos usan una única conexión; los que tienen pool lo sobrescriben.
+        """
+        connected = int(self.connection is not None)
+        return {"size": connected, "max": 1}
+
+
+def group_by_columns(items: Iterator[Tuple[Dict[str, Any], Any]]) -> Dict[Tuple[str, ...], List[Tuple[Dict[str, Any], Any]]]:
+    """Agrupa (diccionario, extra) por sus columnas, para una sentencia parametrizada por grupo."""
+    groups: Dict[Tuple[str, ...], List[Tuple[Dict[str, Any], Any]]] = {}
+    for data, extra in items:
+        groups.setdefault(tuple(data.keys()), []).append((data, extra))
+    return groups
@@ -0,0 +1,156 @@
+import asyncio
+import json
+from datetime import datetime
+from infrastructure.adapters.out.connectors.async_base_connector import AsyncBaseConnector
+
+# Clave primaria de las tablas en las que generate_invoice crea filas
+ID_COLUMNS = {"factura": "factura_id", "detalle": "detalle_id"}
+ID_TABLES = {"factura": "factura", "detalle": "detalle_factura"}
+
+
+class AsyncCassandraConnector(AsyncBaseConnector):
+    """
+    Conector asíncrono para Apache Cassandra. cassandra-driver ya es asíncrono por dentro
+    (execute_async devuelve un ResponseFuture); aquí se enlaza ese futuro con el bucle de
+    asyncio, sin hilos adicionales por petición.
+    """
+
+    def __init__(self, db_type: str = "Cassandra"):
+        super().__init__(db_type)
+        self.cluster = None
+        self.session = None
+        self._prepared = {}
+        # Siguiente id a probar por tabla en generate_invoice (se siembra con MAX al conectar)
+        self._next_ids = {}
+
+    async def connect(self, host, database, user, password, port):
+        try:
+            from cassandra.auth import PlainTextAuthProvider
+            from cassandra.cluster import Cluster
+        except ImportError:
+            raise RuntimeError("El conector 'cassandra-driver' no está instalado. Por favor, instala 'cassandra-driver' (`pip install cassandra-driver`).")
+
+        auth_provider = PlainTextAuthProvider(username=user, password=password)
+        self.cluster = Cluster([host], port=port, auth_provider=auth_provider)
+        # El establecimiento de la sesión es bloqueante: se hace fuera del bucle
+        loop = asyncio.get_running_loop()
+        self.session = await loop.run_in_executor(None, self.cluster.connect, database)
+        self.connection = self.session
+        for name, query in {
+            "cliente": "SELECT * FROM clientes WHERE cliente_id=?",
+            "producto": "SELECT * FROM producto WHERE producto_id=?",
+            "factura": "SELECT * FROM factura WHERE factura_id=?",
+            "detalles": "SELECT * FROM detalle_factura WHERE factura_id=?",
+            # IF NOT EXISTS: un INSERT normal es un upsert y sobrescribiría una factura existente
+            "insert_factura": "INSERT INTO factura (factura_id, cliente_id, personal_id, fecha, total) VALUES (?, ?, ?, ?, ?) IF NOT EXISTS",
+            "insert_detalle": "INSERT INTO detalle_factura (detalle_id, factura_id, producto_id, cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?, ?) IF NOT EXISTS",
+        }.items():
+            self._prepared[name] = await loop.run_in_executor(None, self.session.prepare, query)
+        for table in ID_COLUMNS:
+            self._next_ids[table] = await self._max_id(table) + 1
+
+    async def disconnect(self):
+        if self.session:
+            self.session.shutdown()
+            self.session = None
+        if self.cluster:
+            self.cluster.shutdown()
+            self.cluster = None
+        self._prepared = {}
+        self._next_ids = {}
+        self.connection = None
+
+    async def _execute(self, statement, params=None):
+        """
+        Ejecuta con execute_async y espera todas las filas desde asyncio. Las páginas
+        siguientes se piden desde el callback, como hace el conector síncrono al iterar el
+        resultado: sales_report recorre la tabla completa y no solo la primera página.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        response_future = self.session.execute_async(statement, params)
+        rows = []
+
+        def _on_success(page):
+            rows.extend(page)
+            if response_future.has_more_pages:
+                response_future.start_fetching_next_page()
+            else:
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(rows))
+
+        def _on_error(exc):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_exception(exc))
+
+        response_future.add_callbacks(_on_success, _on_error)
+        return await future
+
+    async def _max_id(self, table: str) -> int:
+        result = await self._execute(f"SELECT MAX({ID_COLUMNS[table]}) FROM {ID_TABLES[table]}")
+        return (result[0][0] if result else None) or 0
+
+    async def _insert_new(self, table: str, make_params) -> int:
+        """
+        Inserta con el siguiente id libre. El contador local reparte ids distintos entre las
+        corrutinas de este conector sin esperar al servidor; IF NOT EXISTS (transacción
+        ligera) detecta los que ya usó otro proceso o el conector síncrono, y en ese caso
+        se salta al MAX actual y se reintenta.
+        """
+        while True:
+            new_id = self._next_ids[table]
+            self._next_ids[table] += 1
+            result = await self._execute(self._prepared[f"insert_{table}"], make_params(new_id))
+            # Primera columna de una escritura condicional: [applied]
+            if result and result[0][0]:
+                return new_id
+            self._next_ids[table] = max(self._next_ids[table], await self._max_id(table) + 1)
+
+    async def _one(self, statement, params=None):
+        rows = await self._execute(statement, params)
+        return dict(rows[0]._asdict()) if rows else None
+
+    async def search_client(self, client_id: int = 1):
+        return await self.measure_time("search_client", self._one, self._prepared["cliente"], (client_id,))
+
+    async def search_product(self, product_id: int = 1):
+        return await self.measure_time("search_product", self._one, self._prepared["producto"], (product_id,))
+
+    async def generate_invoice(self, client_id: int = 1, staff_id: int = 1, products_json_str: str = '[{"producto_id": 1, "cantidad": 1}]'):
+        async def _generate():
+            products = json.loads(products_json_str)
+            lines = []
+            total = 0.0
+            for item in products:
+                precio = float(item.get("precio", 10.0))
+                cantidad = int(item.get("cantidad", 1))
+                lines.append((item.get("producto_id"), cantidad, precio, precio * cantidad))
+                total += precio * cantidad
+            factura_id = await self._insert_new(
+                "factura", lambda new_id: (new_id, client_id, staff_id, datetime.utcnow(), total)
+            )
+            # Los detalles son particiones independientes: se escriben en paralelo
+            await asyncio.gather(*(
+                self._insert_new("detalle", lambda new_id, line=line: (new_id, factura_id) + line)
+                for line in lines
+            ))
+            return {"factura_id": factura_id, "total": total}
+
+        return await self.measure_time("generate_invoice", _generate)
+
+    async def query_invoice(self, invoice_id: int = 1):
+        async def _query():
+            invoice, details = await asyncio.gather(
+                self._one(self._prepared["factura"], (invoice_id,)),
+                self._execute(self._prepared["detalles"], (invoice_id,)),
+            )
+            if invoice:
+                invoice["detalles"] = [dict(r._asdict()) for r in details]
+            return invoice
+
+        return await self.measure_time("query_invoice", _query)
+
+    async def sales_report(self):
+        async def _report():
+            rows = await self._execute("SELECT * FROM factura")
+            return [dict(r._asdict()) for r in rows]
+
+        return await self.measure_time("sales_report", _report)
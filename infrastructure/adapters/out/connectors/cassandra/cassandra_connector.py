@@ -1,20 +1,66 @@
-import time
 import json
 from datetime import datetime
+from typing import Optional
 from cassandra.cluster import Cluster
+from cassandra.concurrent import execute_concurrent_with_args
+from cassandra.query import BatchStatement, SimpleStatement
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.io.asyncioreactor import AsyncioConnection
 import pandas as pd
-from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from infrastructure.adapters.out.connectors.base_connector import BENCHMARK_DEFAULT_PARAMS, BaseConnector
+from infrastructure.adapters.out.persistence.config.table_definitions import get_index_definitions, get_primary_key
+from infrastructure.adapters.out.persistence.utils.type_coercion import to_driver_value
+from shared.instrumentation import instrumented
+from shared.phase_timing import EXECUTE, FETCH, MATERIALIZE, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Sentencias por BATCH: los lotes grandes superan batch_size_fail_threshold del servidor
+CASSANDRA_BATCH_SIZE = 100
+
+SEARCH_CLIENT_CQL = "SELECT * FROM clientes WHERE cliente_id=%s"
+SEARCH_PRODUCT_CQL = "SELECT * FROM producto WHERE producto_id=%s"
+QUERY_INVOICE_CQL = "SELECT * FROM factura WHERE factura_id=%s"
+QUERY_INVOICE_DETAILS_CQL = "SELECT * FROM detalle_factura WHERE factura_id=%s"
+SALES_REPORT_CQL = "SELECT * FROM factura"
+# Altas de generate_invoice: condicionales para no sobrescribir filas con el mismo id
+INSERT_INVOICE_CQL = "INSERT INTO factura (factura_id, cliente_id, personal_id, fecha, total) VALUES (%s, %s, %s, %s, %s) IF NOT EXISTS"
+INSERT_INVOICE_DETAIL_CQL = (
+    "INSERT INTO detalle_factura (detalle_id, factura_id, producto_id, cantidad, precio_unitario, subtotal) "
+    "VALUES (%s, %s, %s, %s, %s, %s) IF NOT EXISTS"
+)
+# Sentencias preparadas de las búsquedas por lotes (una lectura por clave, en paralelo)
+BATCH_LOOKUP_CQL = {
+    "search_clients": "SELECT * FROM clientes WHERE cliente_id=?",
+    "search_products": "SELECT * FROM producto WHERE producto_id=?",
+    "query_invoices": "SELECT * FROM factura WHERE factura_id=?",
+}
+BATCH_INVOICE_DETAILS_CQL = "SELECT * FROM detalle_factura WHERE factura_id=?"
+# Lecturas en vuelo a la vez en las búsquedas por lotes y las inserciones masivas
+CASSANDRA_CONCURRENCY = 100
+# Sentencias que ejecuta cada operación de benchmark (las que traza explain_operation)
+BENCHMARK_STATEMENTS = {
+    "search_client": [SEARCH_CLIENT_CQL],
+    "search_product": [SEARCH_PRODUCT_CQL],
+    "query_invoice": [QUERY_INVOICE_CQL, QUERY_INVOICE_DETAILS_CQL],
+    "sales_report": [SALES_REPORT_CQL],
+}
 
 
 class CassandraConnector(BaseConnector):
     """Simple connector for Apache Cassandra using cassandra-driver."""
 
+    # fetch_records_in_chunks recorre en orden de token, no de clave primaria
+    CHUNKS_IN_PK_ORDER = False
+
     def __init__(self, db_type: str = "Cassandra"):
         super().__init__(db_type)
         self.cluster = None
         self.session = None
+        self._prepared = {}
+        # Siguiente id a probar por tabla en generate_invoice (None: leer MAX del servidor)
+        self._next_ids = {}
 
     def connect(self, host, database, user, password, port):
         auth_provider = PlainTextAuthProvider(username=user, password=password)
@@ -41,22 +87,17 @@ class CassandraConnector(BaseConnector):
             self.cluster = None
         self.connection = None
         self.cursor = None
+        # Las sentencias preparadas pertenecen a la sesión cerrada
+        self._prepared = {}
+        self._next_ids = {}
 
+    @instrumented()
     def execute_query(self, query, params=None):
-        start_time = time.time()
-        result = self.session.execute(query, params or [])
-        exec_time = (time.time() - start_time) * 1000
-        return result, exec_time
+        return self.session.execute(query, params or [])
 
     def execute_sp(self, sp_name, params):
         raise NotImplementedError("Cassandra does not support stored procedures")
 
-    def measure_time(self, operation_name, func, *args, **kwargs):
-        start = time.time()
-        result = func(*args, **kwargs)
-        exec_time = (time.time() - start) * 1000
-        return result, exec_time
-
     def create_tables(self):
         queries = [
             """CREATE TABLE IF NOT EXISTS clientes (\n                cliente_id int PRIMARY KEY,\n                nombre text,\n                email text,\n                telefono text,\n                direccion text\n            )""",
@@ -67,6 +108,39 @@ class CassandraConnector(BaseConnector):
         ]
         for q in queries:
             self.session.execute(q)
+        self.create_indexes()
+
+    def create_indexes(self):
+        """
+        Índices secundarios de INDEX_DEFINITIONS. Sin el de detalle_factura(factura_id),
+        query_invoice no puede filtrar los detalles por factura (exigiría ALLOW FILTERING).
+        Los índices secundarios de Cassandra son de una sola columna: los compuestos se omiten.
+        """
+        created = []
+        for index in get_index_definitions():
+            if len(index['columns']) != 1:
+                logger.debug("Índice compuesto %s omitido en Cassandra.", index['name'])
+                continue
+            try:
+                self.session.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index['name']} ON {index['table'].lower()} ({index['columns'][0]})"
+                )
+                created.append(index['name'])
+            except Exception as e:
+                logger.error("Error al crear el índice %s en Cassandra: %s", index['name'], e)
+        return created
+
+    def drop_indexes(self):
+        dropped = []
+        for index in get_index_definitions():
+            if len(index['columns']) != 1:
+                continue
+            try:
+                self.session.execute(f"DROP INDEX IF EXISTS {index['name']}")
+                dropped.append(index['name'])
+            except Exception as e:
+                logger.error("Error al eliminar el índice %s en Cassandra: %s", index['name'], e)
+        return dropped
 
     def create_stored_procedures(self):
         # Not applicable for Cassandra
@@ -98,16 +172,60 @@ class CassandraConnector(BaseConnector):
                     (i * 100 + j, i, j, j, 10.0 + j, (10.0 + j) * j)
                 )
 
+    def _fetch_dicts(self, query, params=None):
+        with phase(EXECUTE):
+            result = self.session.execute(query, params)
+        # Iterar el resultado pide al coordinador las páginas restantes
+        with phase(FETCH):
+            rows = list(result)
+        with phase(MATERIALIZE):
+            return [dict(r._asdict()) for r in rows]
+
     def fetch_all_records(self, table_name):
-        rows = self.session.execute(f"SELECT * FROM {table_name}")
-        return pd.DataFrame([dict(r._asdict()) for r in rows])
+        records = self._fetch_dicts(f"SELECT * FROM {table_name}")
+        with phase(MATERIALIZE):
+            return pd.DataFrame(records)
+
+    def fetch_records_in_chunks(self, table_name, chunk_size=10000, start_after=None):
+        # Paginación nativa del driver: cada página es un bloque, en orden de token.
+        # La reanudación también sigue el orden de token de la clave de partición.
+        pk_col = self._pk_column(table_name)
+        if start_after is not None:
+            statement = SimpleStatement(
+                f"SELECT * FROM {table_name} WHERE token({pk_col}) > token(%s)", fetch_size=chunk_size
+            )
+            result = self.session.execute(statement, (start_after,))
+        else:
+            statement = SimpleStatement(f"SELECT * FROM {table_name}", fetch_size=chunk_size)
+            result = self.session.execute(statement)
+        while True:
+            rows = result.current_rows
+            if rows:
+                yield pd.DataFrame([dict(r._asdict()) for r in rows])
+            if not result.has_more_pages:
+                break
+            result.fetch_next_page()
+
+    def bulk_insert_records(self, table_name, records):
+        if not records:
+            return 0
+        columns = list(records[0].keys())
+        prepared = self.session.prepare(
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+        )
+        # Escrituras concurrentes con una sentencia preparada; las BATCH multi-partición
+        # de Cassandra son más lentas que esto.
+        args = [tuple(record.get(col) for col in columns) for record in records]
+        execute_concurrent_with_args(self.session, prepared, args, concurrency=CASSANDRA_CONCURRENCY, raise_on_first_error=True)
+        return len(args)
 
     def insert_record(self, table_name, data):
         columns = ", ".join(data.keys())
         placeholders = ", ".join(["%s"] * len(data))
         query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
         self.session.execute(query, tuple(data.values()))
-        return True
+        # Cassandra no genera claves: el id es el que trae el registro
+        return data.get(self._pk_column(table_name))
 
     def update_record(self, table_name, record_id, data):
         set_clause = ", ".join([f"{k}=%s" for k in data.keys()])
@@ -119,6 +237,37 @@ class CassandraConnector(BaseConnector):
         pk_col = self._pk_column(table_name)
         self.session.execute(f"DELETE FROM {table_name} WHERE {pk_col}=%s", (record_id,))
 
+    def apply_table_changes(self, table_name, inserts, updates, deletes):
+        # Sentencias preparadas agrupadas en BATCH LOGGED de CASSANDRA_BATCH_SIZE: cada lote
+        # se aplica entero o no se aplica (Cassandra no tiene transacciones multi-partición)
+        pk_col = self._pk_column(table_name)
+        statements = []
+        if deletes:
+            prepared = self.session.prepare(f"DELETE FROM {table_name} WHERE {pk_col}=?")
+            statements.extend((prepared, (to_driver_value(record_id),)) for record_id in deletes)
+        prepared_by_columns = {}
+        for record_id, changes in updates:
+            columns = tuple(changes)
+            if ("update", columns) not in prepared_by_columns:
+                set_clause = ", ".join(f"{col}=?" for col in columns)
+                prepared_by_columns[("update", columns)] = self.session.prepare(f"UPDATE {table_name} SET {set_clause} WHERE {pk_col}=?")
+            params = tuple(to_driver_value(changes[col]) for col in columns) + (to_driver_value(record_id),)
+            statements.append((prepared_by_columns[("update", columns)], params))
+        for record in inserts:
+            columns = tuple(record)
+            if ("insert", columns) not in prepared_by_columns:
+                prepared_by_columns[("insert", columns)] = self.session.prepare(
+                    f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+                )
+            statements.append((prepared_by_columns[("insert", columns)], tuple(to_driver_value(record[col]) for col in columns)))
+        with phase(EXECUTE):
+            for start in range(0, len(statements), CASSANDRA_BATCH_SIZE):
+                batch = BatchStatement()
+                for statement, params in statements[start:start + CASSANDRA_BATCH_SIZE]:
+                    batch.add(statement, params)
+                self.session.execute(batch)
+        return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
     def _pk_column(self, table_name: str) -> str:
         mapping = {
             "clientes": "cliente_id",
@@ -129,74 +278,136 @@ class CassandraConnector(BaseConnector):
         }
         return mapping.get(table_name.lower(), "id")
 
+    def _fetch_row(self, query, params):
+        with phase(EXECUTE):
+            return self.session.execute(query, params).one()
+
     def search_client(self, client_id: int = 1):
         return self.measure_time(
-            "search_client",
-            lambda cid: self.session.execute(
-                "SELECT * FROM clientes WHERE cliente_id=%s", (cid,)
-            ).one(),
-            client_id,
+            "search_client", self._fetch_row, SEARCH_CLIENT_CQL, (client_id,)
         )
 
     def search_product(self, product_id: int = 1):
         return self.measure_time(
-            "search_product",
-            lambda pid: self.session.execute(
-                "SELECT * FROM producto WHERE producto_id=%s", (pid,)
-            ).one(),
-            product_id,
+            "search_product", self._fetch_row, SEARCH_PRODUCT_CQL, (product_id,)
         )
 
+    def _insert_new(self, table_name, query, make_params):
+        """
+        Inserta con el siguiente id libre de la tabla. IF NOT EXISTS (transacción ligera)
+        evita sobrescribir la fila de otro cliente que eligió el mismo id, ya que un INSERT
+        normal de Cassandra es un upsert; si el id estaba ocupado se salta al MAX actual.
+        """
+        pk_col = get_primary_key(table_name)
+        while True:
+            if self._next_ids.get(table_name) is None:
+                max_id = self._fetch_row(f"SELECT MAX({pk_col}) FROM {table_name}", None)[0]
+                self._next_ids[table_name] = (max_id or 0) + 1
+            new_id = self._next_ids[table_name]
+            self._next_ids[table_name] = new_id + 1
+            with phase(EXECUTE):
+                applied = self.session.execute(query, make_params(new_id)).one()[0]
+            if applied:
+                return new_id
+            self._next_ids[table_name] = None
+
     def generate_invoice(self, client_id: int, staff_id: int, products_json_str: str):
         def _generate():
-            products = json.loads(products_json_str)
-            result = self.session.execute("SELECT MAX(factura_id) FROM factura").one()
-            factura_id = (result[0] or 0) + 1
-            total = 0.0
-            self.session.execute(
-                "INSERT INTO factura (factura_id, cliente_id, personal_id, fecha, total) VALUES (%s, %s, %s, %s, %s)",
-                (factura_id, client_id, staff_id, datetime.utcnow(), 0.0)
+            with phase(MATERIALIZE):
+                products = json.loads(products_json_str)
+            factura_id = self._insert_new(
+                "factura", INSERT_INVOICE_CQL, lambda new_id: (new_id, client_id, staff_id, datetime.utcnow(), 0.0)
             )
-            detail_id = 0
+            total = 0.0
             for item in products:
-                detail_id += 1
                 precio = float(item.get('precio', 10.0))
                 cantidad = int(item.get('cantidad', 1))
                 subtotal = precio * cantidad
-                self.session.execute(
-                    "INSERT INTO detalle_factura (detalle_id, factura_id, producto_id, cantidad, precio_unitario, subtotal) VALUES (%s, %s, %s, %s, %s, %s)",
-                    (detail_id, factura_id, item.get('producto_id'), cantidad, precio, subtotal)
+                self._insert_new(
+                    "detalle_factura", INSERT_INVOICE_DETAIL_CQL,
+                    lambda new_id: (new_id, factura_id, item.get('producto_id'), cantidad, precio, subtotal),
                 )
                 total += subtotal
-            self.session.execute(
-                "UPDATE factura SET total=%s WHERE factura_id=%s",
-                (total, factura_id)
-            )
+            with phase(EXECUTE):
+                self.session.execute(
+                    "UPDATE factura SET total=%s WHERE factura_id=%s",
+                    (total, factura_id)
+                )
             return {"factura_id": factura_id, "total": total}
 
         return self.measure_time("generate_invoice", _generate)
 
     def query_invoice(self, invoice_id: int = 1):
         def _query(iid):
-            inv = self.session.execute(
-                "SELECT * FROM factura WHERE factura_id=%s", (iid,)
-            ).one()
-            details = self.session.execute(
-                "SELECT * FROM detalle_factura WHERE factura_id=%s", (iid,)
-            )
-            inv_dict = dict(inv._asdict()) if inv else None
+            inv = self._fetch_row(QUERY_INVOICE_CQL, (iid,))
+            details = self._fetch_dicts(QUERY_INVOICE_DETAILS_CQL, (iid,))
+            with phase(MATERIALIZE):
+                inv_dict = dict(inv._asdict()) if inv else None
             if inv_dict:
-                inv_dict["detalles"] = [dict(r._asdict()) for r in details]
+                inv_dict["detalles"] = details
             return inv_dict
 
         return self.measure_time("query_invoice", _query, invoice_id)
 
+    def _fetch_concurrent(self, query, args):
+        # Sentencia preparada una vez por sesión; cada clave es una lectura asíncrona con
+        # hasta CASSANDRA_CONCURRENCY en vuelo, dirigida a su réplica (un IN multi-partición
+        # concentraría todo el trabajo en el coordinador)
+        prepared = self._prepared.get(query)
+        if prepared is None:
+            prepared = self._prepared[query] = self.session.prepare(query)
+        with phase(EXECUTE):
+            results = execute_concurrent_with_args(
+                self.session, prepared, args, concurrency=CASSANDRA_CONCURRENCY, raise_on_first_error=True
+            )
+        with phase(FETCH):
+            row_lists = [list(result) for _success, result in results]
+        with phase(MATERIALIZE):
+            return [[dict(r._asdict()) for r in rows] for rows in row_lists]
+
+    def _lookup_many(self, operation, record_ids):
+        args = [(to_driver_value(record_id),) for record_id in record_ids]
+        rows_per_key = self._fetch_concurrent(BATCH_LOOKUP_CQL[operation], args)
+        if operation == "query_invoices":
+            details_per_key = self._fetch_concurrent(BATCH_INVOICE_DETAILS_CQL, args)
+            for rows, details in zip(rows_per_key, details_per_key):
+                if rows:
+                    rows[0]["detalles"] = details
+        return [rows[0] for rows in rows_per_key if rows]
+
     def sales_report(self):
-        def _report():
-            rows = self.session.execute("SELECT * FROM factura")
-            return [dict(r._asdict()) for r in rows]
+        return self.measure_time("sales_report", self._fetch_dicts, SALES_REPORT_CQL)
+
+    def explain_operation(self, operation):
+        """
+        Cassandra no tiene EXPLAIN: se ejecuta cada sentencia con trazado de consulta y se
+        devuelven los eventos del coordinador y las réplicas (lecturas de SSTables,
+        memtables, tombstones) con su tiempo transcurrido.
+        """
+        statements = BENCHMARK_STATEMENTS.get(operation)
+        if statements is None:
+            return None
+        params = BENCHMARK_DEFAULT_PARAMS[operation]
+        sections = []
+        for query in statements:
+            result = self.session.execute(query, params if "%s" in query else None, trace=True)
+            trace = result.get_query_trace()
+            lines = [f"{query}: {trace.duration.total_seconds() * 1000:.3f} ms (coordinador {trace.coordinator})"]
+            lines.extend(
+                f"  {event.source_elapsed.total_seconds() * 1000:9.3f} ms  {event.source}  {event.description}"
+                for event in trace.events
+            )
+            sections.append("\n".join(lines))
+        return {"format": "text", "plan": "\n\n".join(sections)}
+
+    def count_records(self, table_name: str) -> int:
+        row = self.session.execute(f"SELECT COUNT(*) FROM {table_name}").one()
+        return row[0] if row else 0
 
-        return self.measure_time("sales_report", _report)
+    def max_primary_key(self, table_name: str) -> Optional[int]:
+        # Agregado sobre todas las particiones: recorre la tabla, como COUNT(*)
+        row = self.session.execute(f"SELECT MAX({get_primary_key(table_name)}) FROM {table_name}").one()
+        return int(row[0]) if row and row[0] is not None else None
 
     def is_table_empty(self, table_name: str) -> bool:
         row = self.session.execute(f"SELECT COUNT(*) FROM {table_name}").one()
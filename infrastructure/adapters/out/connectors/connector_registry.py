@@ -0,0 +1,133 @@
+import importlib
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+# db_type -> (módulo, clase). El módulo (y con él su controlador: psycopg2, pymongo,
+# cassandra-driver...) solo se importa la primera vez que se pide ese conector.
+CONNECTOR_SPECS: Dict[str, Tuple[str, str]] = {
+    "PostgreSQL": ("infrastructure.adapters.out.connectors.postgres.postgres_connector", "PostgreSQLConnector"),
+    "SQLServer": ("infrastructure.adapters.out.connectors.sqlserver.sqlserver_connector", "SQLServerConnector"),
+    "MySQL": ("infrastructure.adapters.out.connectors.mysql.mysql_connector", "MySQLConnector"),
+    "MongoDB": ("infrastructure.adapters.out.connectors.mongodb.mongodb_connector", "MongoDBConnector"),
+    "Redis": ("infrastructure.adapters.out.connectors.redis.redis_connector", "RedisConnector"),
+    "Cassandra": ("infrastructure.adapters.out.connectors.cassandra.cassandra_connector", "CassandraConnector"),
+    "SQLite": ("infrastructure.adapters.out.connectors.sqlite.sqlite_connector", "SQLiteConnector"),
+    "SQLite+DuckDB": ("infrastructure.adapters.out.connectors.sqlite.sqlite_connector", "SQLiteDuckDBConnector"),
+    "InMemory": ("infrastructure.adapters.out.connectors.memory.in_memory_connector", "InMemoryConnector"),
+}
+
+# Raíz del proyecto (donde está el paquete infrastructure), para los procesos del benchmark
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+
+_loaded: Dict[str, Type[BaseConnector]] = {}
+_load_lock = threading.Lock()
+
+
+def register_connector(db_type: str, module_path: str, class_name: str) -> None:
+    """Registra (o reemplaza) un conector sin importarlo."""
+    with _load_lock:
+        CONNECTOR_SPECS[db_type] = (module_path, class_name)
+        _loaded.pop(db_type, None)
+
+
+def registered_db_types() -> List[str]:
+    return list(CONNECTOR_SPECS)
+
+
+def is_loaded(db_type: str) -> bool:
+    return db_type in _loaded
+
+
+def get_connector_class(db_type: str) -> Type[BaseConnector]:
+    """
+    Clase del conector de db_type, importando su módulo la primera vez. Un controlador
+    que falta solo afecta a ese conector: se lanza RuntimeError con el motivo y el resto
+    de la aplicación sigue funcionando.
+    """
+    connector_cls = _loaded.get(db_type)
+    if connector_cls is not None:
+        return connector_cls
+    if db_type not in CONNECTOR_SPECS:
+        raise ValueError(f"Tipo de base de datos no soportado: '{db_type}'.")
+    module_path, class_name = CONNECTOR_SPECS[db_type]
+    with _load_lock:
+        if db_type not in _loaded:
+            try:
+                module = importlib.import_module(module_path)
+            except ImportError as e:
+                raise RuntimeError(
+                    f"El conector de {db_type} no está disponible porque falta un módulo ({e}). "
+                    f"Instala su controlador (ver requirements.txt)."
+                ) from e
+            _loaded[db_type] = getattr(module, class_name)
+            logger.debug("Conector %s cargado desde %s.", db_type, module_path)
+    return _loaded[db_type]
+
+
+def create_connector(db_type: str, **kwargs: Any) -> BaseConnector:
+    """Instancia el conector de db_type (sin conectar)."""
+    return get_connector_class(db_type)(**kwargs)
+
+
+_IMPORT_PROBE = """
+import importlib, json, sys, time
+modules = json.loads(sys.argv[1])
+errors = []
+start = time.perf_counter_ns()
+for module_path in modules:
+    try:
+        importlib.import_module(module_path)
+    except Exception as e:
+        errors.append(f"{module_path}: {e}")
+cold_ns = time.perf_counter_ns() - start
+start = time.perf_counter_ns()
+for module_path in modules:
+    try:
+        importlib.import_module(module_path)
+    except Exception:
+        pass
+warm_ns = time.perf_counter_ns() - start
+print(json.dumps({"cold_ms": cold_ns / 1e6, "warm_ms": warm_ns / 1e6, "errors": errors}))
+"""
+
+
+def _probe_imports(modules: List[str], repeats: int) -> Dict[str, Any]:
+    """Importa los módulos en procesos nuevos (sin caché de sys.modules) y devuelve la mediana."""
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE, json.dumps(modules)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    runs.sort(key=lambda run: run["cold_ms"])
+    median = runs[len(runs) // 2]
+    return {"startup_ms": median["cold_ms"], "rerun_ms": median["warm_ms"], "import_errors": len(median["errors"])}
+
+
+def benchmark_connector_imports(db_type: Optional[str] = None, repeats: int = 5) -> List[Dict[str, Any]]:
+    """
+    Coste de importar los conectores al arrancar (proceso nuevo) y en cada re-ejecución
+    del script de Streamlit (módulos ya en caché), antes y después del registro:
+    "eager" importa todos los módulos como hacía streamlit_app; "lazy" solo importa el
+    registro y, si se indica db_type, el conector que se va a usar.
+    """
+    registry_module = __name__
+    eager_modules = list(dict.fromkeys(module_path for module_path, _ in CONNECTOR_SPECS.values()))
+    lazy_modules = [registry_module]
+    if db_type is not None:
+        lazy_modules.append(CONNECTOR_SPECS[db_type][0])
+
+    rows = []
+    for scenario, modules in (("eager (todos los conectores)", eager_modules),
+                              (f"lazy (registro{' + ' + db_type if db_type else ''})", lazy_modules)):
+        rows.append({"scenario": scenario, "modules": len(modules), **_probe_imports(modules, repeats)})
+    return rows
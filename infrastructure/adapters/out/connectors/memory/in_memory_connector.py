@@ -0,0 +1,497 @@
+import json
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import numpy as np
+import pandas as pd
+from infrastructure.adapters.out.connectors.base_connector import BATCH_LOOKUPS, BaseConnector
+from infrastructure.adapters.out.persistence.config.table_definitions import TABLE_DEFINITIONS, get_index_definitions, get_primary_key
+from infrastructure.adapters.out.persistence.utils.type_coercion import to_driver_value
+from shared.phase_timing import EXECUTE, FETCH, MATERIALIZE, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Perfil que se aplica a las operaciones sin perfil propio (CRUD, lecturas por bloques...)
+DEFAULT_PROFILE_KEY = "default"
+
+# Último tramo de cada espera que se completa cediendo el GIL en bucle: time.sleep se
+# pasa de largo unas decenas de microsegundos y eso sesgaría los percentiles bajos
+SPIN_THRESHOLD_S = 0.0002
+
+# Perfiles predefinidos (campo "Base de Datos" de la barra lateral): operación -> parámetros de LatencyProfile
+LATENCY_PRESETS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "sin_latencia": {},
+    "lan": {
+        DEFAULT_PROFILE_KEY: {"distribution": "lognormal", "mean_ms": 0.5, "stddev_ms": 0.2},
+        "generate_invoice": {"distribution": "lognormal", "mean_ms": 2.0, "stddev_ms": 0.8},
+        "sales_report": {"distribution": "lognormal", "mean_ms": 8.0, "stddev_ms": 3.0},
+    },
+    "wan": {
+        DEFAULT_PROFILE_KEY: {"distribution": "normal", "mean_ms": 25.0, "stddev_ms": 5.0, "jitter_ms": 10.0},
+        "sales_report": {"distribution": "lognormal", "mean_ms": 60.0, "stddev_ms": 30.0, "jitter_ms": 10.0},
+    },
+    "inestable": {
+        DEFAULT_PROFILE_KEY: {"distribution": "exponential", "mean_ms": 2.0, "error_rate": 0.05},
+        "generate_invoice": {"distribution": "exponential", "mean_ms": 5.0, "error_rate": 0.1, "max_ops_per_s": 200},
+    },
+}
+
+
+class InjectedFaultError(RuntimeError):
+    """Error simulado por un perfil con error_rate > 0."""
+
+
+class LatencyProfile:
+    """
+    Latencia inyectada en una operación. Todas las distribuciones se parametrizan con la
+    media y la desviación típica en ms ("constant" ignora la desviación y "exponential"
+    la fija igual a la media); jitter_ms suma un ruido uniforme en [0, jitter_ms).
+    error_rate es la probabilidad de que la llamada falle (después de esperar) y
+    max_ops_per_s limita el rendimiento con un token bucket de capacidad `burst`.
+    """
+    DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, distribution: str = "constant", mean_ms: float = 0.0, stddev_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 max_ops_per_s: Optional[float] = None, burst: int = 1):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Distribución no soportada: '{distribution}'. Opciones: {', '.join(self.DISTRIBUTIONS)}.")
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate debe estar entre 0 y 1.")
+        self.distribution = distribution
+        self.mean_ms = float(mean_ms)
+        self.stddev_ms = float(stddev_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.error_rate = float(error_rate)
+        self.max_ops_per_s = max_ops_per_s
+        self.burst = burst
+
+    def sample(self, rng: np.random.Generator, size: Optional[int] = None) -> Any:
+        """Latencias en ms (un valor o un array de `size`), nunca negativas."""
+        mean, sd = self.mean_ms, self.stddev_ms
+        if self.distribution == "constant" or mean <= 0:
+            values = np.full(size, mean) if size is not None else mean
+        elif self.distribution == "uniform":
+            half_width = sd * math.sqrt(3)
+            values = rng.uniform(mean - half_width, mean + half_width, size)
+        elif self.distribution == "normal":
+            values = rng.normal(mean, sd, size)
+        elif self.distribution == "lognormal":
+            sigma = math.sqrt(math.log1p((sd / mean) ** 2))
+            values = rng.lognormal(math.log(mean) - sigma ** 2 / 2, sigma, size)
+        else:
+            values = rng.exponential(mean, size)
+        if self.jitter_ms > 0:
+            values = values + rng.uniform(0.0, self.jitter_ms, size)
+        return np.maximum(values, 0.0)
+
+    def expected_percentiles(self, percentiles: Sequence[float] = (50, 95, 99),
+                             samples: int = 200_000, seed: int = 0) -> Dict[str, float]:
+        """Percentiles teóricos del perfil (Monte Carlo), para contrastarlos con los medidos."""
+        values = self.sample(np.random.default_rng(seed), samples)
+        return {f"p{p:g}_ms": float(np.percentile(values, p)) for p in percentiles}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "distribution": self.distribution,
+            "mean_ms": self.mean_ms,
+            "stddev_ms": self.stddev_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "max_ops_per_s": self.max_ops_per_s,
+            "burst": self.burst,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyProfile":
+        return cls(**data)
+
+
+class TokenBucket:
+    """
+    Limitador de rendimiento compartido entre hilos. Cada llamada reserva un token (el
+    saldo puede quedar negativo) y espera fuera del lock a que le toque, así que las
+    peticiones se atienden en orden de llegada y la espera cuenta como latencia, igual
+    que la cola de un servidor saturado.
+    """
+    def __init__(self, rate_per_s: float, burst: int = 1):
+        self.rate_per_s = float(rate_per_s)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserva un token y devuelve cuántos segundos hay que esperar para usarlo."""
+        with self._lock:
+            now = time.perf_counter()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_s)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate_per_s
+
+
+def _precise_sleep(seconds: float) -> None:
+    if seconds <= 0:
+        return
+    deadline = time.perf_counter() + seconds
+    if seconds > SPIN_THRESHOLD_S:
+        time.sleep(seconds - SPIN_THRESHOLD_S)
+    while time.perf_counter() < deadline:
+        time.sleep(0)
+
+
+class _Table:
+    """
+    Filas de una tabla como tuplas en el orden de TABLE_DEFINITIONS, por clave primaria,
+    y un índice hash (valor -> claves) por cada columna de INDEX_DEFINITIONS.
+    """
+    __slots__ = ("name", "pk", "columns", "positions", "rows", "indexes", "next_id")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pk = get_primary_key(name)
+        self.columns = list(TABLE_DEFINITIONS[name]["fields"])
+        self.positions = {column: i for i, column in enumerate(self.columns)}
+        self.rows: Dict[Any, tuple] = {}
+        self.indexes: Dict[str, Dict[Any, Set[Any]]] = {
+            index["columns"][0]: {} for index in get_index_definitions(name)
+        }
+        self.next_id = 1
+
+    def _index_row(self, pk: Any, row: tuple) -> None:
+        for column, index in self.indexes.items():
+            index.setdefault(row[self.positions[column]], set()).add(pk)
+
+    def _unindex_row(self, pk: Any, row: tuple) -> None:
+        for column, index in self.indexes.items():
+            keys = index.get(row[self.positions[column]])
+            if keys is not None:
+                keys.discard(pk)
+                if not keys:
+                    del index[row[self.positions[column]]]
+
+    def insert(self, data: Dict[str, Any]) -> Any:
+        pk = data.get(self.pk)
+        if pk is None:
+            pk = self.next_id
+        if pk in self.rows:
+            raise ValueError(f"Clave primaria duplicada en {self.name}: {pk}.")
+        row = tuple(pk if column == self.pk else data.get(column) for column in self.columns)
+        self.rows[pk] = row
+        self._index_row(pk, row)
+        if isinstance(pk, (int, np.integer)):
+            self.next_id = max(self.next_id, int(pk) + 1)
+        return pk
+
+    def update(self, pk: Any, data: Dict[str, Any]) -> bool:
+        old_row = self.rows.get(pk)
+        if old_row is None:
+            return False
+        new_row = tuple(data.get(column, old_row[i]) if column != self.pk else pk for i, column in enumerate(self.columns))
+        self._unindex_row(pk, old_row)
+        self.rows[pk] = new_row
+        self._index_row(pk, new_row)
+        return True
+
+    def delete(self, pk: Any) -> bool:
+        row = self.rows.pop(pk, None)
+        if row is None:
+            return False
+        self._unindex_row(pk, row)
+        return True
+
+    def lookup(self, column: str, value: Any) -> List[tuple]:
+        """Filas con column == value: por índice si lo hay, si no recorriendo la tabla."""
+        if column == self.pk:
+            row = self.rows.get(value)
+            return [row] if row is not None else []
+        if column in self.indexes:
+            return [self.rows[pk] for pk in self.indexes[column].get(value, ())]
+        position = self.positions[column]
+        return [row for row in self.rows.values() if row[position] == value]
+
+    def value(self, row: tuple, column: str) -> Any:
+        return row[self.positions[column]]
+
+
+class InMemoryConnector(BaseConnector):
+    """
+    Backend en proceso para probar y medir el propio arnés (PerformanceService, drivers de
+    carga, registro de métricas) sin bases de datos reales. Guarda las cinco entidades en
+    estructuras indexadas y cada operación espera una latencia sacada de su LatencyProfile,
+    así los percentiles que reporta el arnés se pueden contrastar con los inyectados.
+    """
+    def __init__(self, db_type: str = "InMemory"):
+        super().__init__(db_type)
+        self.tables: Dict[str, _Table] = {}
+        self.profiles: Dict[str, LatencyProfile] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        # Un lock para los datos (las escrituras de varias tablas son atómicas) y otro para el generador aleatorio
+        self._data_lock = threading.RLock()
+        self._rng_lock = threading.Lock()
+        self._rng = np.random.default_rng()
+
+    def connect(self, database: str = "sin_latencia", profiles: Optional[Dict[str, Any]] = None,
+                seed: Optional[int] = None, **_ignored: Any) -> None:
+        """
+        `database` elige un perfil de LATENCY_PRESETS; `profiles` (operación -> LatencyProfile
+        o sus parámetros) lo completa o reemplaza por operación. Con `seed` la secuencia de
+        latencias y errores es reproducible.
+        """
+        if database not in LATENCY_PRESETS:
+            raise ValueError(f"Perfil de latencia desconocido: '{database}'. Opciones: {', '.join(LATENCY_PRESETS)}.")
+        self._rng = np.random.default_rng(seed)
+        self.profiles, self._buckets = {}, {}
+        for operation, profile in {**LATENCY_PRESETS[database], **(profiles or {})}.items():
+            self.set_profile(operation, profile)
+        self.tables = {name: _Table(name) for name in TABLE_DEFINITIONS}
+        self.connection = self.tables
+        logger.info("InMemory conectado con el perfil '%s' (%s operaciones con latencia propia).", database, len(self.profiles))
+
+    def disconnect(self) -> None:
+        self.connection = None
+
+    def set_profile(self, operation: str, profile: Any) -> None:
+        """Fija (o con None, elimina) la latencia inyectada en una operación ("default" para el resto)."""
+        if profile is None:
+            self.profiles.pop(operation, None)
+            self._buckets.pop(operation, None)
+            return
+        if isinstance(profile, dict):
+            profile = LatencyProfile.from_dict(profile)
+        self.profiles[operation] = profile
+        if profile.max_ops_per_s:
+            self._buckets[operation] = TokenBucket(profile.max_ops_per_s, profile.burst)
+        else:
+            self._buckets.pop(operation, None)
+
+    def injected_profiles(self, percentiles: Sequence[float] = (50, 95, 99)) -> List[Dict[str, Any]]:
+        """Perfil de cada operación con sus percentiles teóricos (sin la espera del limitador)."""
+        return [
+            {"operation": operation, **profile.to_dict(), **profile.expected_percentiles(percentiles)}
+            for operation, profile in self.profiles.items()
+        ]
+
+    def _simulate(self, operation: str) -> None:
+        key = operation if operation in self.profiles else DEFAULT_PROFILE_KEY
+        profile = self.profiles.get(key)
+        if profile is None:
+            return
+        with phase(EXECUTE):
+            bucket = self._buckets.get(key)
+            wait_s = bucket.reserve() if bucket is not None else 0.0
+            with self._rng_lock:
+                latency_ms = float(profile.sample(self._rng))
+                fails = profile.error_rate > 0 and self._rng.random() < profile.error_rate
+            _precise_sleep(wait_s + latency_ms / 1000)
+        if fails:
+            raise InjectedFaultError(f"Fallo inyectado en {operation} (error_rate={profile.error_rate:g}).")
+
+    def execute_query(self, query, params=None):  # type: ignore[override]
+        raise NotImplementedError("execute_query no está soportado en el backend en memoria.")
+
+    def execute_sp(self, sp_name, params):  # type: ignore[override]
+        if sp_name != "sp_generar_factura":
+            raise NotImplementedError(f"El backend en memoria no emula '{sp_name}'.")
+        return self.measure_time(sp_name, self._generar_factura, *params)
+
+    def _generar_factura(self, cliente_id: int, personal_id: int, productos_json: Any) -> Tuple[int, float]:
+        with phase(MATERIALIZE):
+            productos = json.loads(productos_json) if isinstance(productos_json, str) else productos_json
+        with self._data_lock:
+            for table_name, key in (("Clientes", cliente_id), ("Personal", personal_id)):
+                if key not in self.tables[table_name].rows:
+                    raise ValueError(f"No existe {get_primary_key(table_name)}={key} en {table_name}.")
+            producto = self.tables["Producto"]
+            lines = []
+            for item in productos:
+                row = producto.rows.get(item["producto_id"])
+                if row is None:
+                    raise ValueError(f"Producto con ID {item['producto_id']} no encontrado.")
+                precio_unitario = float(producto.value(row, "precio"))
+                lines.append((item["producto_id"], item["cantidad"], precio_unitario, item["cantidad"] * precio_unitario))
+            # Validado todo antes de escribir: la factura se inserta completa o no se inserta
+            total = sum(line[3] for line in lines)
+            factura_id = self.tables["Factura"].insert({
+                "cliente_id": cliente_id, "personal_id": personal_id, "fecha": datetime.now(), "total": total,
+            })
+            for producto_id, cantidad, precio_unitario, subtotal in lines:
+                self.tables["Detalle_Factura"].insert({
+                    "factura_id": factura_id, "producto_id": producto_id, "cantidad": cantidad,
+                    "precio_unitario": precio_unitario, "subtotal": subtotal,
+                })
+        return (factura_id, total)
+
+    def create_tables(self) -> None:
+        # Las tablas existen desde connect(); aquí solo se crean las que falten
+        with self._data_lock:
+            for name in TABLE_DEFINITIONS:
+                self.tables.setdefault(name, _Table(name))
+
+    def create_indexes(self) -> List[str]:
+        created = []
+        with self._data_lock:
+            for index in get_index_definitions():
+                table, column = self.tables[index["table"]], index["columns"][0]
+                if column not in table.indexes:
+                    table.indexes[column] = {}
+                    for pk, row in table.rows.items():
+                        table.indexes[column].setdefault(table.value(row, column), set()).add(pk)
+                created.append(index["name"])
+        return created
+
+    def drop_indexes(self) -> List[str]:
+        dropped = []
+        with self._data_lock:
+            for index in get_index_definitions():
+                if self.tables[index["table"]].indexes.pop(index["columns"][0], None) is not None:
+                    dropped.append(index["name"])
+        return dropped
+
+    def create_stored_procedures(self) -> None:
+        logger.info("El backend en memoria emula sp_generar_factura en el conector.")
+
+    def generate_test_data(self, num_records_per_table: int = 10) -> None:
+        seeds = {
+            "Clientes": lambda i: {"nombre": f"Cliente {i}", "email": f"cliente{i}@example.com", "telefono": f"111-222-{i:04d}", "direccion": f"Dir {i}"},
+            "Personal": lambda i: {"nombre": f"Vendedor {i}", "rol": "Vendedor"},
+            "Producto": lambda i: {"nombre": f"Producto {i}", "precio": 10.00 + i * 0.5, "stock": 100 + i},
+        }
+        with self._data_lock:
+            for table_name, make_row in seeds.items():
+                if self.is_table_empty(table_name):
+                    for i in range(1, num_records_per_table + 1):
+                        self.tables[table_name].insert(make_row(i))
+
+    def fetch_all_records(self, table_name: str) -> pd.DataFrame:
+        self._simulate("fetch_all_records")
+        table = self.tables[table_name]
+        with self._data_lock:
+            rows = list(table.rows.values())
+        with phase(MATERIALIZE):
+            return pd.DataFrame(rows, columns=table.columns)
+
+    def fetch_records_in_chunks(self, table_name: str, chunk_size: int = 10000, start_after: Any = None) -> Iterator[pd.DataFrame]:
+        table = self.tables[table_name]
+        with self._data_lock:
+            pks = sorted(pk for pk in table.rows if start_after is None or pk > start_after)
+        for start in range(0, len(pks), chunk_size):
+            self._simulate("fetch_records_in_chunks")
+            with self._data_lock:
+                rows = [table.rows[pk] for pk in pks[start:start + chunk_size] if pk in table.rows]
+            yield pd.DataFrame(rows, columns=table.columns)
+
+    def bulk_insert_records(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        self._simulate("bulk_insert_records")
+        table = self.tables[table_name]
+        with self._data_lock:
+            duplicated = [record[table.pk] for record in records if record.get(table.pk) in table.rows]
+            if duplicated:
+                raise ValueError(f"Claves primarias duplicadas en {table_name}: {duplicated[:5]}.")
+            for record in records:
+                table.insert(record)
+        return len(records)
+
+    def insert_record(self, table_name: str, data: dict) -> Any:
+        self._simulate("insert_record")
+        with self._data_lock:
+            return self.tables[table_name].insert(data)
+
+    def update_record(self, table_name: str, record_id: Any, data: dict) -> None:
+        self._simulate("update_record")
+        with self._data_lock:
+            if not self.tables[table_name].update(record_id, data):
+                logger.warning("UPDATE en %s con ID %s no afectó ninguna fila.", table_name, record_id)
+
+    def delete_record(self, table_name: str, record_id: Any) -> None:
+        self._simulate("delete_record")
+        with self._data_lock:
+            if not self.tables[table_name].delete(record_id):
+                logger.warning("DELETE en %s con ID %s no afectó ninguna fila.", table_name, record_id)
+
+    def apply_table_changes(self, table_name: str, inserts: List[Dict[str, Any]],
+                            updates: List[Tuple[Any, Dict[str, Any]]], deletes: List[Any]) -> Dict[str, int]:
+        self._simulate("apply_table_changes")
+        table = self.tables[table_name]
+        inserts = [{k: to_driver_value(v) for k, v in record.items()} for record in inserts]
+        with self._data_lock:
+            # Validado antes de escribir: el lote se aplica entero o no se aplica
+            deleted = set(deletes)
+            duplicated = [record[table.pk] for record in inserts
+                          if record.get(table.pk) in table.rows and record.get(table.pk) not in deleted]
+            if duplicated:
+                raise ValueError(f"Claves primarias duplicadas en {table_name}: {duplicated[:5]}.")
+            for record_id in deletes:
+                table.delete(record_id)
+            for record_id, changes in updates:
+                if not table.update(record_id, {k: to_driver_value(v) for k, v in changes.items()}):
+                    logger.warning("UPDATE en %s con ID %s no afectó ninguna fila.", table_name, record_id)
+            for record in inserts:
+                table.insert(record)
+        return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+    def _lookup_one(self, operation: str, table_name: str, key: Any) -> Optional[tuple]:
+        self._simulate(operation)
+        with phase(FETCH):
+            rows = self.tables[table_name].lookup(get_primary_key(table_name), key)
+        return rows[0] if rows else None
+
+    def search_client(self, client_id: int = 1) -> Tuple[Any, float]:
+        return self.measure_time("search_client", self._lookup_one, "search_client", "Clientes", client_id)
+
+    def search_product(self, product_id: int = 1) -> Tuple[Any, float]:
+        return self.measure_time("search_product", self._lookup_one, "search_product", "Producto", product_id)
+
+    def generate_invoice(self, client_id: int, staff_id: int, products_json_str: str) -> Tuple[Any, float]:
+        def _generate():
+            self._simulate("generate_invoice")
+            result, _ = self.execute_sp("sp_generar_factura", (client_id, staff_id, products_json_str))
+            return result
+
+        return self.measure_time("generate_invoice", _generate)
+
+    def query_invoice(self, invoice_id: int = 1) -> Tuple[Any, float]:
+        return self.measure_time("query_invoice", self._lookup_one, "query_invoice", "Factura", invoice_id)
+
+    def _lookup_many(self, operation: str, record_ids: Sequence[Any]) -> List[tuple]:
+        # Una sola latencia simulada por lote: el coste de red se paga una vez, no por clave
+        table_name = BATCH_LOOKUPS[operation][0]
+        self._simulate(operation)
+        table, pk_col = self.tables[table_name], get_primary_key(table_name)
+        rows = []
+        with phase(FETCH):
+            for record_id in record_ids:
+                rows.extend(table.lookup(pk_col, record_id)[:1])
+        return rows
+
+    def sales_report(self) -> Tuple[Any, float]:
+        def _report():
+            self._simulate("sales_report")
+            detalle, producto = self.tables["Detalle_Factura"], self.tables["Producto"]
+            totals: Dict[str, List[float]] = {}
+            with phase(FETCH), self._data_lock:
+                for row in detalle.rows.values():
+                    product_row = producto.rows.get(detalle.value(row, "producto_id"))
+                    if product_row is None:
+                        continue
+                    acc = totals.setdefault(producto.value(product_row, "nombre"), [0, 0.0])
+                    acc[0] += detalle.value(row, "cantidad")
+                    acc[1] += detalle.value(row, "subtotal")
+            return sorted(((name, qty, revenue) for name, (qty, revenue) in totals.items()), key=lambda r: r[2], reverse=True)
+
+        return self.measure_time("sales_report", _report)
+
+    def count_records(self, table_name: str) -> int:
+        return len(self.tables[table_name].rows)
+
+    def max_primary_key(self, table_name: str) -> Optional[int]:
+        with self._data_lock:
+            numeric_keys = [int(pk) for pk in self.tables[table_name].rows if isinstance(pk, (int, np.integer))]
+        return max(numeric_keys) if numeric_keys else None
+
+    def is_table_empty(self, table_name: str) -> bool:
+        return not self.tables[table_name].rows
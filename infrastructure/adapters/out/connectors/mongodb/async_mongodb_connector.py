@@ -0,0 +1,134 @@
+import json
+from datetime import datetime
+from infrastructure.adapters.out.connectors.async_base_connector import AsyncBaseConnector
+from infrastructure.adapters.out.connectors.mongodb.id_sequences import COUNTERS_COLLECTION, ID_SEQUENCES
+
+
+class AsyncMongoDBConnector(AsyncBaseConnector):
+    """Conector asíncrono para MongoDB basado en motor."""
+
+    def __init__(self, db_type: str = "MongoDB"):
+        super().__init__(db_type)
+        self.client = None
+        self.db = None
+        self._return_after = None
+
+    async def connect(self, host, database, user, password, port, max_pool_size: int = 512):
+        try:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            from pymongo import ReturnDocument
+        except ImportError:
+            raise RuntimeError("El conector 'motor' no está instalado. Por favor, instala 'motor' (`pip install motor`).")
+
+        uri = f"mongodb://{user}:{password}@{host}:{port}/"
+        self.client = AsyncIOMotorClient(uri, maxPoolSize=max_pool_size)
+        self.db = self.client[database]
+        self.connection = self.client
+        self._return_after = ReturnDocument.AFTER
+        await self._seed_id_sequences()
+
+    async def _seed_id_sequences(self) -> None:
+        # $max solo sube el contador: los ids ya usados (datos de prueba, cargas masivas,
+        # el conector síncrono) no se vuelven a repartir
+        for sequence_name, (collection, field) in ID_SEQUENCES.items():
+            doc = await self.db[collection].find_one({}, {field: 1, "_id": 0}, sort=[(field, -1)])
+            max_id = int(doc[field]) if doc and doc.get(field) is not None else 0
+            await self.db[COUNTERS_COLLECTION].update_one({"_id": sequence_name}, {"$max": {"value": max_id}}, upsert=True)
+
+    async def disconnect(self):
+        if self.client:
+            self.client.close()
+            self.client = None
+            self.db = None
+            self.connection = None
+
+    async def search_client(self, client_id: int = 1):
+        return await self.measure_time(
+            "search_client", self.db["Clientes"].find_one, {"cliente_id": client_id}, {"_id": 0}
+        )
+
+    async def search_product(self, product_id: int = 1):
+        return await self.measure_time(
+            "search_product", self.db["Producto"].find_one, {"producto_id": product_id}, {"_id": 0}
+        )
+
+    async def _next_id(self, sequence_name: str) -> int:
+        # Contador atómico: count_documents()+1 colisiona en cuanto hay peticiones concurrentes
+        doc = await self.db[COUNTERS_COLLECTION].find_one_and_update(
+            {"_id": sequence_name}, {"$inc": {"value": 1}}, upsert=True, return_document=self._return_after
+        )
+        return doc["value"]
+
+    async def generate_invoice(self, client_id: int = 1, staff_id: int = 1, products_json_str: str = '[{"producto_id": 1, "cantidad": 1}]'):
+        async def _generate():
+            products = json.loads(products_json_str)
+            factura_id = await self._next_id("factura_id")
+            product_ids = [item["producto_id"] for item in products]
+            prices = {
+                doc["producto_id"]: float(doc.get("precio", 0))
+                async for doc in self.db["Producto"].find({"producto_id": {"$in": product_ids}}, {"_id": 0})
+            }
+            detalles = []
+            total = 0.0
+            for item in products:
+                precio = prices.get(item["producto_id"], 0.0)
+                subtotal = precio * float(item.get("cantidad", 0))
+                detalles.append({
+                    "detalle_id": await self._next_id("detalle_id"),
+                    "factura_id": factura_id,
+                    "producto_id": item["producto_id"],
+                    "cantidad": item["cantidad"],
+                    "precio_unitario": precio,
+                    "subtotal": subtotal,
+                })
+                total += subtotal
+            await self.db["Factura"].insert_one({
+                "factura_id": factura_id,
+                "cliente_id": client_id,
+                "personal_id": staff_id,
+                "fecha": datetime.utcnow(),
+                "total": total,
+            })
+            if detalles:
+                await self.db["Detalle_Factura"].insert_many(detalles)
+            return {"factura_id": factura_id, "total": total}
+
+        return await self.measure_time("generate_invoice", _generate)
+
+    async def query_invoice(self, invoice_id: int = 1):
+        return await self.measure_time(
+            "query_invoice", self.db["Factura"].find_one, {"factura_id": invoice_id}, {"_id": 0}
+        )
+
+    async def sales_report(self):
+        async def _report():
+            pipeline = [
+                {
+                    "$lookup": {
+                        "from": "Producto",
+                        "localField": "producto_id",
+                        "foreignField": "producto_id",
+                        "as": "prod",
+                    }
+                },
+                {"$unwind": "$prod"},
+                {
+                    "$group": {
+                        "_id": "$prod.nombre",
+                        "total_vendido": {"$sum": "$cantidad"},
+                        "ingresos_totales": {"$sum": "$subtotal"},
+                    }
+                },
+                {
+                    "$project": {
+                        "producto": "$_id",
+                        "total_vendido": 1,
+                        "ingresos_totales": 1,
+                        "_id": 0,
+                    }
+                },
+                {"$sort": {"ingresos_totales": -1}},
+            ]
+            return await self.db["Detalle_Factura"].aggregate(pipeline).to_list(length=None)
+
+        return await self.measure_time("sales_report", _report)
@@ -0,0 +1,12 @@
+# Ids de las altas de generate_invoice en MongoDB: un contador atómico por secuencia en la
+# colección COUNTERS_COLLECTION, compartido por el conector síncrono y el asíncrono para
+# que los dos (y cualquier número de clientes concurrentes) no repartan el mismo id.
+# Sin dependencias del controlador: el conector asíncrono lo importa antes de cargar motor.
+
+COUNTERS_COLLECTION = "counters"
+
+# Secuencia -> (colección, campo) cuyo máximo actual es el punto de partida del contador
+ID_SEQUENCES = {
+    "factura_id": ("Factura", "factura_id"),
+    "detalle_id": ("Detalle_Factura", "detalle_id"),
+}
@@ -1,13 +1,65 @@
-import time
 import json
-from datetime import datetime
+from datetime import date, datetime
 import pandas as pd
-from pymongo import MongoClient
-from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from pymongo import DeleteMany, InsertOne, MongoClient, ReturnDocument, UpdateOne
+from infrastructure.adapters.out.connectors.base_connector import BATCH_LOOKUPS, BENCHMARK_DEFAULT_PARAMS, BaseConnector
+from infrastructure.adapters.out.connectors.mongodb.id_sequences import COUNTERS_COLLECTION, ID_SEQUENCES
+from infrastructure.adapters.out.persistence.config.table_definitions import TABLE_DEFINITIONS, get_index_definitions, get_primary_key
+from infrastructure.adapters.out.persistence.utils.type_coercion import to_driver_value
+from shared.phase_timing import EXECUTE, FETCH, MATERIALIZE, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _to_bson(value):
+    """BSON no tiene tipo fecha sin hora ni admite tipos NumPy."""
+    value = to_driver_value(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime.combine(value, datetime.min.time())
+    return value
+
+# Agregación de sales_report (la misma que analiza explain_operation)
+SALES_REPORT_PIPELINE = [
+    {
+        "$lookup": {
+            "from": "Producto",
+            "localField": "producto_id",
+            "foreignField": "producto_id",
+            "as": "prod",
+        }
+    },
+    {"$unwind": "$prod"},
+    {
+        "$group": {
+            "_id": "$prod.nombre",
+            "total_vendido": {"$sum": "$cantidad"},
+            "ingresos_totales": {"$sum": "$subtotal"},
+        }
+    },
+    {
+        "$project": {
+            "producto": "$_id",
+            "total_vendido": 1,
+            "ingresos_totales": 1,
+            "_id": 0,
+        }
+    },
+    {"$sort": {"ingresos_totales": -1}},
+]
+
+# Colección y campo de las búsquedas por clave de las operaciones de benchmark
+BENCHMARK_LOOKUPS = {
+    "search_client": ("Clientes", "cliente_id"),
+    "search_product": ("Producto", "producto_id"),
+    "query_invoice": ("Factura", "factura_id"),
+}
 
 
 class MongoDBConnector(BaseConnector):
     """Simple connector using pymongo for basic operations."""
+    # Operaciones por bulk_write (el controlador ya parte cada uno según maxWriteBatchSize)
+    BATCH_CHUNK_SIZE = 10_000
 
     def __init__(self, db_type: str = "MongoDB"):
         super().__init__(db_type)
@@ -19,6 +71,31 @@ class MongoDBConnector(BaseConnector):
         self.client = MongoClient(uri)
         self.connection = self.client
         self.db = self.client[database]
+        self._seed_id_sequences()
+
+    def _seed_id_sequences(self):
+        # Contadores de id_sequences a partir del máximo actual ($max solo los sube)
+        for sequence_name, (collection, _field) in ID_SEQUENCES.items():
+            max_id = self.max_primary_key(collection) or 0
+            self.db[COUNTERS_COLLECTION].update_one({"_id": sequence_name}, {"$max": {"value": max_id}}, upsert=True)
+
+    def _reserve_ids(self, sequence_name, count):
+        # Mismo contador atómico que el conector asíncrono (count_documents()+1 colisiona
+        # con clientes concurrentes y con los ids de las cargas masivas); un solo $inc por lote
+        doc = self.db[COUNTERS_COLLECTION].find_one_and_update(
+            {"_id": sequence_name}, {"$inc": {"value": count}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return range(doc["value"] - count + 1, doc["value"] + 1)
+
+    def _next_id(self, sequence_name):
+        return self._reserve_ids(sequence_name, 1)[0]
+
+    def _raise_id_sequence(self, table_name, records):
+        # Tras insertar ids explícitos, el contador sube hasta el mayor ($max solo los sube)
+        for sequence_name, (collection, field) in ID_SEQUENCES.items():
+            if collection == table_name:
+                max_id = max((int(r[field]) for r in records if r.get(field) is not None), default=0)
+                self.db[COUNTERS_COLLECTION].update_one({"_id": sequence_name}, {"$max": {"value": max_id}}, upsert=True)
 
     def disconnect(self):
         if self.client:
@@ -35,15 +112,44 @@ class MongoDBConnector(BaseConnector):
     def execute_sp(self, sp_name, params):  # type: ignore[override]
         raise NotImplementedError("execute_sp is not supported for MongoDB")
 
-    def measure_time(self, operation_name, func, *args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        execution_time = (time.time() - start_time) * 1000
-        return result, execution_time
-
     def create_tables(self):
         # Collections are created automatically when inserting documents
-        pass
+        self.create_indexes()
+
+    def _index_specs(self):
+        """
+        (colección, nombre, campos) de los índices a mantener: las claves "primarias" del
+        modelo relacional (cliente_id, factura_id...) son campos normales en MongoDB, sin
+        índice propio, así que se indexan junto a los de INDEX_DEFINITIONS.
+        """
+        specs = [
+            (table, f"idx_{table.lower()}_{definition['pk']}", [definition['pk']])
+            for table, definition in TABLE_DEFINITIONS.items()
+        ]
+        specs.extend((index['table'], index['name'], index['columns']) for index in get_index_definitions())
+        return specs
+
+    def create_indexes(self):
+        created = []
+        for collection, name, fields in self._index_specs():
+            try:
+                # create_index es idempotente si el nombre y la definición coinciden
+                self.db[collection].create_index([(field, 1) for field in fields], name=name)
+                created.append(name)
+            except Exception as e:
+                logger.error("Error al crear el índice %s en MongoDB: %s", name, e)
+        return created
+
+    def drop_indexes(self):
+        dropped = []
+        for collection, name, _fields in self._index_specs():
+            try:
+                if name in self.db[collection].index_information():
+                    self.db[collection].drop_index(name)
+                    dropped.append(name)
+            except Exception as e:
+                logger.error("Error al eliminar el índice %s en MongoDB: %s", name, e)
+        return dropped
 
     def create_stored_procedures(self):
         # Not applicable for MongoDB
@@ -83,12 +189,43 @@ class MongoDBConnector(BaseConnector):
             self.db["Producto"].insert_many(productos)
 
     def fetch_all_records(self, table_name):
-        docs = list(self.db[table_name].find({}, {"_id": 0}))
-        return pd.DataFrame(docs)
+        # find() es perezoso: los lotes se piden al servidor al iterar el cursor
+        with phase(FETCH):
+            docs = list(self.db[table_name].find({}, {"_id": 0}))
+        with phase(MATERIALIZE):
+            return pd.DataFrame(docs)
+
+    def fetch_records_in_chunks(self, table_name, chunk_size=10000, start_after=None):
+        pk_col = get_primary_key(table_name)
+        query = {pk_col: {"$gt": start_after}} if pk_col and start_after is not None else {}
+        cursor = self.db[table_name].find(query, {"_id": 0}).batch_size(chunk_size)
+        if pk_col:
+            cursor = cursor.sort(pk_col, 1)
+        chunk = []
+        for doc in cursor:
+            chunk.append(doc)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk)
+
+    def bulk_insert_records(self, table_name, records):
+        if not records:
+            return 0
+        # insert_many modifica los diccionarios añadiendo '_id'; se insertan copias
+        result = self.db[table_name].insert_many([dict(r) for r in records], ordered=False)
+        self._raise_id_sequence(table_name, records)
+        return len(result.inserted_ids)
 
     def insert_record(self, table_name, data):
+        # Copia: insert_one añade _id al diccionario del llamador
+        data = dict(data)
+        pk_col = get_primary_key(table_name)
+        if pk_col in ID_SEQUENCES and pk_col not in data:
+            data[pk_col] = self._next_id(pk_col)
         result = self.db[table_name].insert_one(data)
-        return result.inserted_id
+        return data.get(pk_col, result.inserted_id)
 
     def update_record(self, table_name, record_id, data):
         pk_col_map = {
@@ -112,94 +249,130 @@ class MongoDBConnector(BaseConnector):
         pk_col = pk_col_map.get(table_name.lower(), "_id")
         self.db[table_name].delete_one({pk_col: record_id})
 
-    def search_client(self, client_id: int = 1):
-        return self.measure_time(
-            "search_client",
-            lambda cid: self.db["Clientes"].find_one({"cliente_id": cid}, {"_id": 0}),
-            client_id,
+    def apply_table_changes(self, table_name, inserts, updates, deletes):
+        # Un único bulk_write ordenado en lugar de una petición por fila. Las transacciones
+        # multi-documento exigen un conjunto de réplicas: si una operación falla, las
+        # anteriores quedan aplicadas y las siguientes no.
+        pk_col = get_primary_key(table_name) or "_id"
+        operations = []
+        if deletes:
+            operations.append(DeleteMany({pk_col: {"$in": [_to_bson(record_id) for record_id in deletes]}}))
+        operations.extend(
+            UpdateOne({pk_col: _to_bson(record_id)}, {"$set": {k: _to_bson(v) for k, v in changes.items()}})
+            for record_id, changes in updates
         )
+        inserts = [{k: _to_bson(v) for k, v in record.items()} for record in inserts]
+        # Igual que insert_record: las altas sin clave (el editor la quita) la toman del contador
+        if pk_col in ID_SEQUENCES:
+            without_id = [record for record in inserts if record.get(pk_col) is None]
+            if without_id:
+                for record, new_id in zip(without_id, self._reserve_ids(pk_col, len(without_id))):
+                    record[pk_col] = new_id
+        operations.extend(InsertOne(record) for record in inserts)
+        if operations:
+            with phase(EXECUTE):
+                self.db[table_name].bulk_write(operations, ordered=True)
+        self._raise_id_sequence(table_name, inserts)
+        return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+    def _find_one(self, collection, query):
+        # find_one es una sola ida y vuelta (consulta + decodificación BSON)
+        with phase(EXECUTE):
+            return self.db[collection].find_one(query, {"_id": 0})
+
+    def search_client(self, client_id: int = 1):
+        return self.measure_time("search_client", self._find_one, "Clientes", {"cliente_id": client_id})
 
     def search_product(self, product_id: int = 1):
-        return self.measure_time(
-            "search_product",
-            lambda pid: self.db["Producto"].find_one({"producto_id": pid}, {"_id": 0}),
-            product_id,
-        )
+        return self.measure_time("search_product", self._find_one, "Producto", {"producto_id": product_id})
 
     def generate_invoice(self, client_id: int, staff_id: int, products_json_str: str):
         def _generate():
-            products = json.loads(products_json_str)
-            factura_id = self.db["Factura"].count_documents({}) + 1
+            with phase(MATERIALIZE):
+                products = json.loads(products_json_str)
+            with phase(EXECUTE):
+                factura_id = self._next_id("factura_id")
             total = 0.0
-            self.db["Factura"].insert_one(
-                {
-                    "factura_id": factura_id,
-                    "cliente_id": client_id,
-                    "personal_id": staff_id,
-                    "fecha": datetime.utcnow(),
-                    "total": 0.0,
-                }
-            )
-            for item in products:
-                prod = self.db["Producto"].find_one({"producto_id": item["producto_id"]}) or {}
-                precio = float(prod.get("precio", 0))
-                subtotal = precio * float(item.get("cantidad", 0))
-                detalle_id = self.db["Detalle_Factura"].count_documents({}) + 1
-                self.db["Detalle_Factura"].insert_one(
+            with phase(EXECUTE):
+                self.db["Factura"].insert_one(
                     {
-                        "detalle_id": detalle_id,
                         "factura_id": factura_id,
-                        "producto_id": item["producto_id"],
-                        "cantidad": item["cantidad"],
-                        "precio_unitario": precio,
-                        "subtotal": subtotal,
+                        "cliente_id": client_id,
+                        "personal_id": staff_id,
+                        "fecha": datetime.utcnow(),
+                        "total": 0.0,
                     }
                 )
+            for item in products:
+                with phase(EXECUTE):
+                    prod = self.db["Producto"].find_one({"producto_id": item["producto_id"]}) or {}
+                precio = float(prod.get("precio", 0))
+                subtotal = precio * float(item.get("cantidad", 0))
+                with phase(EXECUTE):
+                    detalle_id = self._next_id("detalle_id")
+                    self.db["Detalle_Factura"].insert_one(
+                        {
+                            "detalle_id": detalle_id,
+                            "factura_id": factura_id,
+                            "producto_id": item["producto_id"],
+                            "cantidad": item["cantidad"],
+                            "precio_unitario": precio,
+                            "subtotal": subtotal,
+                        }
+                    )
                 total += subtotal
-            self.db["Factura"].update_one({"factura_id": factura_id}, {"$set": {"total": total}})
+            with phase(EXECUTE):
+                self.db["Factura"].update_one({"factura_id": factura_id}, {"$set": {"total": total}})
             return {"factura_id": factura_id, "total": total}
 
         return self.measure_time("generate_invoice", _generate)
 
     def query_invoice(self, invoice_id: int = 1):
-        return self.measure_time(
-            "query_invoice",
-            lambda iid: self.db["Factura"].find_one({"factura_id": iid}, {"_id": 0}),
-            invoice_id,
-        )
+        return self.measure_time("query_invoice", self._find_one, "Factura", {"factura_id": invoice_id})
+
+    def _lookup_many(self, operation, record_ids):
+        # Un find con $in sobre la clave: idas y vueltas por lote de cursor, no por clave
+        collection = BATCH_LOOKUPS[operation][0]
+        keys = [_to_bson(record_id) for record_id in record_ids]
+        with phase(EXECUTE):
+            cursor = self.db[collection].find({get_primary_key(collection): {"$in": keys}}, {"_id": 0})
+        with phase(FETCH):
+            return list(cursor)
 
     def sales_report(self):
         def _report():
-            pipeline = [
-                {
-                    "$lookup": {
-                        "from": "Producto",
-                        "localField": "producto_id",
-                        "foreignField": "producto_id",
-                        "as": "prod",
-                    }
-                },
-                {"$unwind": "$prod"},
-                {
-                    "$group": {
-                        "_id": "$prod.nombre",
-                        "total_vendido": {"$sum": "$cantidad"},
-                        "ingresos_totales": {"$sum": "$subtotal"},
-                    }
-                },
-                {
-                    "$project": {
-                        "producto": "$_id",
-                        "total_vendido": 1,
-                        "ingresos_totales": 1,
-                        "_id": 0,
-                    }
-                },
-                {"$sort": {"ingresos_totales": -1}},
-            ]
-            return list(self.db["Detalle_Factura"].aggregate(pipeline))
+            with phase(EXECUTE):
+                cursor = self.db["Detalle_Factura"].aggregate(SALES_REPORT_PIPELINE)
+            with phase(FETCH):
+                return list(cursor)
 
         return self.measure_time("sales_report", _report)
 
+    def explain_operation(self, operation):
+        """explain con verbosidad executionStats: etapas (IXSCAN / COLLSCAN), documentos examinados y tiempos."""
+        if operation == "sales_report":
+            command = {"aggregate": "Detalle_Factura", "pipeline": SALES_REPORT_PIPELINE, "cursor": {}}
+        elif operation in BENCHMARK_LOOKUPS:
+            collection, key = BENCHMARK_LOOKUPS[operation]
+            command = {
+                "find": collection,
+                "filter": {key: BENCHMARK_DEFAULT_PARAMS[operation][0]},
+                "projection": {"_id": 0},
+                "limit": 1,
+            }
+        else:
+            return None
+        plan = self.db.command("explain", command, verbosity="executionStats")
+        return {"format": "json", "plan": json.dumps(plan, indent=2, default=str)}
+
+    def count_records(self, table_name):
+        # Recuento de los metadatos de la colección: no recorre los documentos
+        return self.db[table_name].estimated_document_count()
+
+    def max_primary_key(self, table_name):
+        pk_col = get_primary_key(table_name)
+        doc = self.db[table_name].find_one({}, {pk_col: 1}, sort=[(pk_col, -1)])
+        return int(doc[pk_col]) if doc and doc.get(pk_col) is not None else None
+
     def is_table_empty(self, table_name):
         return self.db[table_name].count_documents({}) == 0
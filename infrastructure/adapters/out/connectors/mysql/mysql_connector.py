@@ -1,9 +1,35 @@
-import time
 from datetime import datetime, date
 import json
 import pandas as pd
 import numpy as np
-from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from infrastructure.adapters.out.connectors.base_connector import BATCH_LOOKUPS, BENCHMARK_DEFAULT_PARAMS, BaseConnector
+from infrastructure.adapters.out.persistence.config.table_definitions import get_index_definitions, get_primary_key
+from shared.instrumentation import instrumented
+from shared.phase_timing import COMMIT, EXECUTE, FETCH, MATERIALIZE, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Consultas de las operaciones de benchmark: explain_operation analiza exactamente las mismas
+SEARCH_CLIENT_QUERY = "SELECT * FROM Clientes WHERE cliente_id = %s LIMIT 1"
+SEARCH_PRODUCT_QUERY = "SELECT * FROM Producto WHERE producto_id = %s LIMIT 1"
+QUERY_INVOICE_QUERY = "SELECT * FROM Factura WHERE factura_id = %s LIMIT 1"
+SALES_REPORT_QUERY = """
+    SELECT
+        p.nombre AS producto,
+        SUM(df.cantidad) AS total_vendido,
+        SUM(df.subtotal) AS ingresos_totales
+    FROM Detalle_Factura df
+    JOIN Producto p ON df.producto_id = p.producto_id
+    GROUP BY p.nombre
+    ORDER BY ingresos_totales DESC
+"""
+BENCHMARK_QUERIES = {
+    "search_client": SEARCH_CLIENT_QUERY,
+    "search_product": SEARCH_PRODUCT_QUERY,
+    "query_invoice": QUERY_INVOICE_QUERY,
+    "sales_report": SALES_REPORT_QUERY,
+}
 
 class MySQLConnector(BaseConnector):
     def __init__(self, db_type="MySQL"):
@@ -35,50 +61,45 @@ class MySQLConnector(BaseConnector):
             self.connection = None
             self.cursor = None
 
+    @instrumented()
     def execute_query(self, query, params=None):
-        start_time = time.time()
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            execution_time = (time.time() - start_time) * 1000  # ms
-            return self.cursor, execution_time
+            with phase(EXECUTE):
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+            return self.cursor
         except Exception as e:
             if self.connection:
                 self.connection.rollback()
             raise # Re-lanzar la excepción para que la capa superior la maneje
 
+    @instrumented()
     def execute_sp(self, sp_name, params):
-        start_time = time.time()
         try:
             param_placeholders = ', '.join(['%s' for _ in params])
             query = f"CALL {sp_name}({param_placeholders})"
             
-            self.cursor.execute(query, params)
+            with phase(EXECUTE):
+                self.cursor.execute(query, params)
 
-            result = None
-            if self.cursor.description:
-                result = self.cursor.fetchone()
+            with phase(FETCH):
+                result = None
+                if self.cursor.description:
+                    result = self.cursor.fetchone()
 
-            # Consumir posibles resultados adicionales para evitar
-            # "Commands out of sync" en conexiones MySQL
-            while self.cursor.nextset():
-                pass
+                # Consumir posibles resultados adicionales para evitar
+                # "Commands out of sync" en conexiones MySQL
+                while self.cursor.nextset():
+                    pass
 
-            execution_time = (time.time() - start_time) * 1000  # ms
-            return result, execution_time
+            return result
         except Exception as e:
             if self.connection:
                 self.connection.rollback()
             raise # Re-lanzar la excepción para que la capa superior la maneje
 
-    def measure_time(self, operation_name, func, *args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        execution_time = (time.time() - start_time) * 1000  # ms
-        return result, execution_time
-
     def create_tables(self):
         queries = [
             """CREATE TABLE IF NOT EXISTS Clientes (
@@ -122,14 +143,62 @@ class MySQLConnector(BaseConnector):
 
         for query in queries:
             try:
-                print(f"DEBUG CONNECTOR: Ejecutando query de creación de tabla (IF NOT EXISTS): {query[:100]}...")
+                logger.debug("Ejecutando query de creación de tabla (IF NOT EXISTS): %s...", query[:100])
                 self.execute_query(query)
                 self.connection.commit()
-                print("DEBUG CONNECTOR: Commit realizado para creación de tabla.")
+                logger.debug("Commit realizado para creación de tabla.")
             except Exception as e:
-                print(f"ERROR CONNECTOR al ejecutar query de creación de tabla en MySQL: {e}")
+                logger.error("Error al ejecutar query de creación de tabla en MySQL: %s", e)
                 self.connection.rollback()
-                print("DEBUG CONNECTOR: Rollback realizado para creación de tabla.")
+                logger.debug("Rollback realizado para creación de tabla.")
+
+        self.create_indexes()
+
+    def _existing_indexes(self, table_name):
+        """Columnas (en orden) de cada índice de la tabla, según information_schema."""
+        self.cursor.execute(
+            "SELECT index_name, column_name FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s ORDER BY index_name, seq_in_index",
+            (table_name,)
+        )
+        indexes = {}
+        for index_name, column_name in self.cursor.fetchall():
+            indexes.setdefault(index_name, []).append(column_name.lower())
+        return indexes
+
+    def create_indexes(self):
+        """
+        Índices de INDEX_DEFINITIONS. InnoDB ya crea un índice por cada clave foránea: si
+        algún índice existente empieza por las mismas columnas, no se duplica.
+        """
+        created = []
+        for index in get_index_definitions():
+            columns = [column.lower() for column in index['columns']]
+            try:
+                existing = self._existing_indexes(index['table'])
+                covering = next((name for name, cols in existing.items() if cols[:len(columns)] == columns), None)
+                if covering is not None:
+                    if covering != index['name']:
+                        logger.debug("Índice %s cubierto por %s en %s.", index['name'], covering, index['table'])
+                    created.append(covering)
+                    continue
+                self.cursor.execute(f"CREATE INDEX {index['name']} ON {index['table']} ({', '.join(index['columns'])})")
+                created.append(index['name'])
+            except Exception as e:
+                logger.error("Error al crear el índice %s en MySQL: %s", index['name'], e)
+        return created
+
+    def drop_indexes(self):
+        """Elimina solo los índices creados con su nombre; los de las claves foráneas los exige InnoDB."""
+        dropped = []
+        for index in get_index_definitions():
+            try:
+                if index['name'] in self._existing_indexes(index['table']):
+                    self.cursor.execute(f"DROP INDEX {index['name']} ON {index['table']}")
+                    dropped.append(index['name'])
+            except Exception as e:
+                logger.error("Error al eliminar el índice %s en MySQL: %s", index['name'], e)
+        return dropped
 
     def create_stored_procedures(self):
         sp_query = """
@@ -196,7 +265,7 @@ class MySQLConnector(BaseConnector):
         sp_query_cleaned = sp_query.replace('DELIMITER //', '').replace('DELIMITER ;', '').strip()
 
         try:
-            print(f"DEBUG CONNECTOR: Ejecutando query de creación de SP en MySQL: {sp_query_cleaned[:100]}...")
+            logger.debug("Ejecutando query de creación de SP en MySQL: %s...", sp_query_cleaned[:100])
 
             for _ in self.cursor.execute(sp_query_cleaned, multi=True):
                 # Consumir todos los resultados intermedios de cada sentencia para
@@ -204,11 +273,11 @@ class MySQLConnector(BaseConnector):
                 pass
 
             self.connection.commit()
-            print("DEBUG CONNECTOR: Commit realizado para creación de SP.")
+            logger.debug("Commit realizado para creación de SP.")
         except Exception as e:
-            print(f"ERROR CONNECTOR al crear SP en MySQL: {e}")
+            logger.error("Error al crear SP en MySQL: %s", e)
             self.connection.rollback()
-            print("DEBUG CONNECTOR: Rollback realizado para creación de SP.")
+            logger.debug("Rollback realizado para creación de SP.")
 
     def generate_test_data(self):
         num_records = 500
@@ -223,45 +292,87 @@ class MySQLConnector(BaseConnector):
 
         try:
             if self.is_table_empty("Clientes"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Clientes.")
+                logger.debug("Insertando datos de prueba para Clientes.")
                 self.cursor.executemany(
                     "INSERT INTO Clientes (nombre, email, telefono, direccion) VALUES (%s, %s, %s, %s)",
                     clientes_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Clientes no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Clientes no está vacía, omitiendo inserción de datos de prueba.")
 
             if self.is_table_empty("Personal"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Personal.")
+                logger.debug("Insertando datos de prueba para Personal.")
                 self.cursor.executemany(
                     "INSERT INTO Personal (nombre, rol) VALUES (%s, %s)",
                     personal_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Personal no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Personal no está vacía, omitiendo inserción de datos de prueba.")
 
             if self.is_table_empty("Producto"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Producto.")
+                logger.debug("Insertando datos de prueba para Producto.")
                 self.cursor.executemany(
                     "INSERT INTO Producto (nombre, precio, stock) VALUES (%s, %s, %s)",
                     productos_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Producto no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Producto no está vacía, omitiendo inserción de datos de prueba.")
 
             self.connection.commit()
-            print("DEBUG CONNECTOR: Commit realizado para datos de prueba (si se insertaron).")
+            logger.debug("Commit realizado para datos de prueba (si se insertaron).")
         except Exception as e:
-            print(f"ERROR CONNECTOR al generar datos de prueba en MySQL: {e}")
+            logger.error("Error al generar datos de prueba en MySQL: %s", e)
             self.connection.rollback()
-            print("DEBUG CONNECTOR: Rollback realizado para datos de prueba.")
+            logger.debug("Rollback realizado para datos de prueba.")
 
     def fetch_all_records(self, table_name):
         query = f"SELECT * FROM {table_name}"
-        self.cursor.execute(query)
+        with phase(EXECUTE):
+            self.cursor.execute(query)
         columns = [desc[0] for desc in self.cursor.description]
-        data = self.cursor.fetchall()
-        return pd.DataFrame(data, columns=columns)
+        with phase(FETCH):
+            data = self.cursor.fetchall()
+        with phase(MATERIALIZE):
+            return pd.DataFrame(data, columns=columns)
+
+    def fetch_records_in_chunks(self, table_name, chunk_size=10000, start_after=None):
+        pk_col = get_primary_key(table_name)
+        order_clause = f" ORDER BY {pk_col}" if pk_col else ""
+        where_clause, params = "", None
+        if pk_col and start_after is not None:
+            where_clause, params = f" WHERE {pk_col} > %s", (start_after,)
+        # Cursor no bufferizado: las filas se leen del socket a medida que se piden,
+        # a diferencia del cursor principal (buffered=True) que carga todo el resultado.
+        cursor = self.connection.cursor(buffered=False)
+        try:
+            cursor.execute(f"SELECT * FROM {table_name}{where_clause}{order_clause}", params)
+            columns = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=columns)
+        finally:
+            cursor.close()
+
+    def bulk_insert_records(self, table_name, records):
+        if not records:
+            return 0
+        columns = list(records[0].keys())
+        values = [tuple(record.get(col) for col in columns) for record in records]
+        placeholders = ', '.join(['%s'] * len(columns))
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+        try:
+            # mysql-connector reescribe executemany de INSERT como un INSERT multi-fila;
+            # se trocea para no superar max_allowed_packet.
+            for start in range(0, len(values), 1000):
+                self.cursor.executemany(query, values[start:start + 1000])
+            self.connection.commit()
+        except Exception as e:
+            logger.error("Error al insertar en bloque en %s: %s", table_name, e)
+            self.connection.rollback()
+            raise
+        return len(values)
 
     def insert_record(self, table_name, data):
         processed_data = {}
@@ -279,14 +390,17 @@ class MySQLConnector(BaseConnector):
         placeholders = ', '.join(['%s'] * len(processed_data.values()))
         query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
         try:
-            print(f"DEBUG CONNECTOR: Intentando INSERT en {table_name}. Query: {query}. Params: {tuple(processed_data.values())}")
+            logger.debug("Intentando INSERT en %s. Query: %s. Params: %s", table_name, query, tuple(processed_data.values()))
             self.cursor.execute(query, tuple(processed_data.values()))
+            # Id explícito o el que generó AUTO_INCREMENT, para quien lo necesite (p. ej. replay)
+            created_id = processed_data.get(get_primary_key(table_name), self.cursor.lastrowid)
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para INSERT en {table_name}.")
+            logger.debug("Commit realizado para INSERT en %s.", table_name)
+            return created_id
         except Exception as e:
-            print(f"ERROR CONNECTOR al insertar registro en {table_name}: {e}")
+            logger.error("Error al insertar registro en %s: %s", table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para INSERT en {table_name}.")
+            logger.debug("Rollback realizado para INSERT en %s.", table_name)
             raise
 
     def update_record(self, table_name, record_id, data):
@@ -317,17 +431,17 @@ class MySQLConnector(BaseConnector):
         params_for_query = tuple(list(processed_data.values()) + [processed_record_id])
         
         try:
-            print(f"DEBUG CONNECTOR: Intentando UPDATE en {table_name} con ID {record_id}.")
-            print(f"DEBUG CONNECTOR: PK Columna: {pk_col}")
-            print(f"DEBUG CONNECTOR: Query de UPDATE: {query}")
-            print(f"DEBUG CONNECTOR: Parámetros de UPDATE: {params_for_query}")
+            logger.debug("Intentando UPDATE en %s con ID %s.", table_name, record_id)
+            logger.debug("PK Columna: %s", pk_col)
+            logger.debug("Query de UPDATE: %s", query)
+            logger.debug("Parámetros de UPDATE: %s", params_for_query)
             self.cursor.execute(query, params_for_query)
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para UPDATE en {table_name} ID {record_id}.")
+            logger.debug("Commit realizado para UPDATE en %s ID %s.", table_name, record_id)
         except Exception as e:
-            print(f"ERROR CONNECTOR al actualizar registro (ID: {record_id}) en {table_name}: {e}")
+            logger.error("Error al actualizar registro (ID: %s) en %s: %s", record_id, table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para UPDATE en {table_name} ID {record_id}.")
+            logger.debug("Rollback realizado para UPDATE en %s ID %s.", table_name, record_id)
             raise
 
     def delete_record(self, table_name, record_id):
@@ -346,53 +460,84 @@ class MySQLConnector(BaseConnector):
 
         query = f"DELETE FROM {table_name} WHERE {pk_col} = %s"
         try:
-            print(f"DEBUG CONNECTOR: Intentando DELETE en {table_name} con ID {final_record_id} (Tipo: {type(final_record_id)}). Query: {query}. PK Col: {pk_col}")
+            logger.debug("Intentando DELETE en %s con ID %s (Tipo: %s). Query: %s. PK Col: %s", table_name, final_record_id, type(final_record_id), query, pk_col)
             self.cursor.execute(query, (final_record_id,))
 
             if self.cursor.rowcount == 0:
-                print(f"ADVERTENCIA CONNECTOR: DELETE en {table_name} con ID {final_record_id} no afectó ninguna fila. El registro podría no existir o el ID es incorrecto.")
+                logger.warning("DELETE en %s con ID %s no afectó ninguna fila. El registro podría no existir o el ID es incorrecto.", table_name, final_record_id)
             
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para DELETE en {table_name} ID {final_record_id}. Filas afectadas: {self.cursor.rowcount}")
+            logger.debug("Commit realizado para DELETE en %s ID %s. Filas afectadas: %s", table_name, final_record_id, self.cursor.rowcount)
         except Exception as e:
-            print(f"ERROR CONNECTOR al eliminar registro (ID: {record_id}) en {table_name}: {e}")
+            logger.error("Error al eliminar registro (ID: %s) en %s: %s", record_id, table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para DELETE en {table_name} ID {record_id}.")
+            logger.debug("Rollback realizado para DELETE en %s ID %s.", table_name, record_id)
             raise
 
+    def apply_table_changes(self, table_name, inserts, updates, deletes):
+        return self._apply_changes_in_transaction(table_name, inserts, updates, deletes)
+
+    def update_records(self, table_name, updates):
+        return self._apply_changes_in_transaction(table_name, [], updates, [])["updated"]
+
+    def delete_records(self, table_name, record_ids):
+        return self._apply_changes_in_transaction(table_name, [], [], record_ids)["deleted"]
+
+    def _fetch_one(self, query, params):
+        cursor, _ = self.execute_query(query, params)
+        with phase(FETCH):
+            return cursor.fetchone()
+
     def search_client(self, client_id: int = 1):
-        query = "SELECT * FROM Clientes WHERE cliente_id = %s LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (client_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("search_client", self._fetch_one, SEARCH_CLIENT_QUERY, (client_id,))
 
     def search_product(self, product_id: int = 1):
-        query = "SELECT * FROM Producto WHERE producto_id = %s LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (product_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("search_product", self._fetch_one, SEARCH_PRODUCT_QUERY, (product_id,))
 
     def generate_invoice(self, client_id: int, staff_id: int, products_json_str: str):
-        result, exec_time = self.execute_sp("sp_generar_factura", (client_id, staff_id, products_json_str))
-        self.connection.commit()
-        return result, exec_time
+        def _generate():
+            result, _ = self.execute_sp("sp_generar_factura", (client_id, staff_id, products_json_str))
+            with phase(COMMIT):
+                self.connection.commit()
+            return result
+
+        return self.measure_time("generate_invoice", _generate)
 
     def query_invoice(self, invoice_id: int = 1):
-        query = "SELECT * FROM Factura WHERE factura_id = %s LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (invoice_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("query_invoice", self._fetch_one, QUERY_INVOICE_QUERY, (invoice_id,))
+
+    def _lookup_many(self, operation, record_ids):
+        return self._fetch_by_keys(BATCH_LOOKUPS[operation][0], record_ids)
 
     def sales_report(self):
-        query = """
-        SELECT 
-            p.nombre AS producto, 
-            SUM(df.cantidad) AS total_vendido, 
-            SUM(df.subtotal) AS ingresos_totales
-        FROM Detalle_Factura df
-        JOIN Producto p ON df.producto_id = p.producto_id
-        GROUP BY p.nombre
-        ORDER BY ingresos_totales DESC;
-        """
-        cursor, exec_time = self.execute_query(query)
-        return cursor.fetchall(), exec_time
+        def _report():
+            cursor, _ = self.execute_query(SALES_REPORT_QUERY)
+            with phase(FETCH):
+                return cursor.fetchall()
+
+        return self.measure_time("sales_report", _report)
+
+    def explain_operation(self, operation):
+        """EXPLAIN ANALYZE (MySQL 8.0.18+): árbol de iteradores con filas y tiempos reales."""
+        query = BENCHMARK_QUERIES.get(operation)
+        if query is None:
+            return None
+        try:
+            self.cursor.execute(f"EXPLAIN ANALYZE {query}", BENCHMARK_DEFAULT_PARAMS[operation])
+            plan = "\n".join(row[0] for row in self.cursor.fetchall())
+        finally:
+            # ANALYZE ejecuta de verdad la consulta: se cierra la transacción que abrió
+            self.connection.rollback()
+        return {"format": "text", "plan": plan}
+
+    def count_records(self, table_name):
+        self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        return self.cursor.fetchone()[0]
+
+    def max_primary_key(self, table_name):
+        self.cursor.execute(f"SELECT MAX({get_primary_key(table_name)}) FROM {table_name}")
+        max_key = self.cursor.fetchone()[0]
+        return int(max_key) if max_key is not None else None
 
     def is_table_empty(self, table_name):
         query = f"SELECT COUNT(*) FROM {table_name}"
@@ -0,0 +1,113 @@
+from infrastructure.adapters.out.connectors.async_base_connector import AsyncBaseConnector
+from shared.phase_timing import COMMIT, EXECUTE, POOL_WAIT, phase
+
+
+class AsyncPostgreSQLConnector(AsyncBaseConnector):
+    """Conector asíncrono para PostgreSQL basado en asyncpg, con un pool de conexiones."""
+
+    def __init__(self, db_type: str = "PostgreSQL"):
+        super().__init__(db_type)
+        self.pool = None
+
+    async def connect(self, host, database, user, password, port, min_pool_size: int = 4, max_pool_size: int = 64):
+        try:
+            import asyncpg
+        except ImportError:
+            raise RuntimeError("El conector 'asyncpg' no está instalado. Por favor, instala 'asyncpg' (`pip install asyncpg`).")
+
+        self.pool = await asyncpg.create_pool(
+            host=host,
+            database=database,
+            user=user,
+            password=password,
+            port=port,
+            min_size=min_pool_size,
+            max_size=max_pool_size,
+        )
+        self.connection = self.pool
+
+    async def disconnect(self):
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            self.connection = None
+
+    def pool_stats(self):
+        if self.pool is None:
+            return {}
+        return {"size": self.pool.get_size(), "idle": self.pool.get_idle_size(), "max": self.pool.get_max_size()}
+
+    async def _acquire(self):
+        # Con más corrutinas que conexiones, aquí es donde se hace cola
+        with phase(POOL_WAIT):
+            return await self.pool.acquire()
+
+    async def _fetchrow(self, query, *params):
+        conn = await self._acquire()
+        try:
+            # asyncpg ejecuta y lee las filas en la misma llamada
+            with phase(EXECUTE):
+                row = await conn.fetchrow(query, *params)
+            return tuple(row) if row else None
+        finally:
+            await self.pool.release(conn)
+
+    async def _fetch(self, query, *params):
+        conn = await self._acquire()
+        try:
+            with phase(EXECUTE):
+                rows = await conn.fetch(query, *params)
+            return [tuple(r) for r in rows]
+        finally:
+            await self.pool.release(conn)
+
+    async def search_client(self, client_id: int = 1):
+        return await self.measure_time(
+            "search_client", self._fetchrow, "SELECT * FROM Clientes WHERE cliente_id = $1 LIMIT 1", client_id
+        )
+
+    async def search_product(self, product_id: int = 1):
+        return await self.measure_time(
+            "search_product", self._fetchrow, "SELECT * FROM Producto WHERE producto_id = $1 LIMIT 1", product_id
+        )
+
+    async def generate_invoice(self, client_id: int = 1, staff_id: int = 1, products_json_str: str = '[{"producto_id": 1, "cantidad": 1}]'):
+        async def _generate():
+            conn = await self._acquire()
+            try:
+                transaction = conn.transaction()
+                await transaction.start()
+                try:
+                    # asyncpg codifica jsonb a partir de la cadena JSON tal cual
+                    with phase(EXECUTE):
+                        row = await conn.fetchrow(
+                            "SELECT * FROM sp_generar_factura($1, $2, $3::jsonb)", client_id, staff_id, products_json_str
+                        )
+                except Exception:
+                    await transaction.rollback()
+                    raise
+                with phase(COMMIT):
+                    await transaction.commit()
+                return tuple(row) if row else None
+            finally:
+                await self.pool.release(conn)
+
+        return await self.measure_time("generate_invoice", _generate)
+
+    async def query_invoice(self, invoice_id: int = 1):
+        return await self.measure_time(
+            "query_invoice", self._fetchrow, "SELECT * FROM Factura WHERE factura_id = $1 LIMIT 1", invoice_id
+        )
+
+    async def sales_report(self):
+        query = """
+        SELECT
+            p.nombre AS producto,
+            SUM(df.cantidad) AS total_vendido,
+            SUM(df.subtotal) AS ingresos_totales
+        FROM Detalle_Factura df
+        JOIN Producto p ON df.producto_id = p.producto_id
+        GROUP BY p.nombre
+        ORDER BY ingresos_totales DESC;
+        """
+        return await self.measure_time("sales_report", self._fetch, query)
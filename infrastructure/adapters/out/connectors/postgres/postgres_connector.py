@@ -1,10 +1,38 @@
-import time
 from datetime import datetime, date
 import json
 import pandas as pd
 import numpy as np
-from psycopg2.extras import Json
-from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from psycopg2.extras import Json, execute_values
+from infrastructure.adapters.out.connectors.base_connector import BATCH_LOOKUPS, BENCHMARK_DEFAULT_PARAMS, BaseConnector, group_by_columns
+from infrastructure.adapters.out.persistence.config.table_definitions import get_index_definitions, get_primary_key, get_table_definition
+from shared.instrumentation import instrumented
+from shared.phase_timing import COMMIT, EXECUTE, FETCH, MATERIALIZE, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Consultas de las operaciones de benchmark: explain_operation analiza exactamente las mismas
+SEARCH_CLIENT_QUERY = "SELECT * FROM Clientes WHERE cliente_id = %s LIMIT 1"
+SEARCH_PRODUCT_QUERY = "SELECT * FROM Producto WHERE producto_id = %s LIMIT 1"
+QUERY_INVOICE_QUERY = "SELECT * FROM Factura WHERE factura_id = %s LIMIT 1"
+SALES_REPORT_QUERY = """
+    SELECT
+        p.nombre AS producto,
+        SUM(df.cantidad) AS total_vendido,
+        SUM(df.subtotal) AS ingresos_totales
+    FROM Detalle_Factura df
+    JOIN Producto p ON df.producto_id = p.producto_id
+    GROUP BY p.nombre
+    ORDER BY ingresos_totales DESC
+"""
+BENCHMARK_QUERIES = {
+    "search_client": SEARCH_CLIENT_QUERY,
+    "search_product": SEARCH_PRODUCT_QUERY,
+    "query_invoice": QUERY_INVOICE_QUERY,
+    "sales_report": SALES_REPORT_QUERY,
+}
+# Tipo de TABLE_DEFINITIONS -> cast de los literales de UPDATE ... FROM (VALUES ...)
+PG_CAST_TYPES = {"int": "integer", "decimal": "numeric", "datetime": "timestamp", "str": "text"}
 
 class PostgreSQLConnector(BaseConnector):
     def __init__(self, db_type="PostgreSQL"):
@@ -12,6 +40,7 @@ class PostgreSQLConnector(BaseConnector):
         self.db_type = db_type
         self.connection = None
         self.cursor = None
+        self._conn_str = None
 
     def connect(self, host, database, user, password, port):
         try:
@@ -21,6 +50,8 @@ class PostgreSQLConnector(BaseConnector):
         
         conn_str = f"host={host} dbname={database} user={user} password={password} port={port}"
         self.connection = psycopg2.connect(conn_str)
+        # Para las conexiones propias de fetch_records_in_chunks
+        self._conn_str = conn_str
         self.cursor = self.connection.cursor()
 
     def disconnect(self):
@@ -29,39 +60,34 @@ class PostgreSQLConnector(BaseConnector):
             self.connection = None
             self.cursor = None
 
+    @instrumented()
     def execute_query(self, query, params=None):
-        start_time = time.time()
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            execution_time = (time.time() - start_time) * 1000  # ms
-            return self.cursor, execution_time
+            with phase(EXECUTE):
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+            return self.cursor
         except Exception as e:
             if self.connection:
                 self.connection.rollback()
             raise # Re-lanzar la excepción para que la capa superior la maneje
 
+    @instrumented()
     def execute_sp(self, sp_name, params):
-        start_time = time.time()
         try:
             query = f"SELECT * FROM {sp_name}({', '.join(['%s' for _ in params])})"
-            self.cursor.execute(query, params)
-            result = self.cursor.fetchone()
-            execution_time = (time.time() - start_time) * 1000  # ms
-            return result, execution_time
+            with phase(EXECUTE):
+                self.cursor.execute(query, params)
+            with phase(FETCH):
+                result = self.cursor.fetchone()
+            return result
         except Exception as e:
             if self.connection:
                 self.connection.rollback()
             raise # Re-lanzar la excepción para que la capa superior la maneje
 
-    def measure_time(self, operation_name, func, *args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        execution_time = (time.time() - start_time) * 1000  # ms
-        return result, execution_time
-
     def create_tables(self):
         queries = [
             """CREATE TABLE IF NOT EXISTS Clientes (
@@ -101,10 +127,10 @@ class PostgreSQLConnector(BaseConnector):
 
         for query in queries:
             try:
-                print(f"DEBUG CONNECTOR: Ejecutando query de creación de tabla (IF NOT EXISTS): {query[:100]}...")
+                logger.debug("Ejecutando query de creación de tabla (IF NOT EXISTS): %s...", query[:100])
                 self.execute_query(query)
                 self.connection.commit()
-                print("DEBUG CONNECTOR: Commit realizado para creación de tabla.")
+                logger.debug("Commit realizado para creación de tabla.")
                 
                 # Specific check for Clientes table after creation
                 if "CREATE TABLE IF NOT EXISTS Clientes" in query:
@@ -118,14 +144,43 @@ class PostgreSQLConnector(BaseConnector):
                         result = self.cursor.fetchone()
                         if not result:
                             raise RuntimeError("La columna 'cliente_id' no se encontró en la tabla 'Clientes' después de la creación. Verifique el esquema de la base de datos PostgreSQL.")
-                        print("DEBUG CONNECTOR: Verificación de columna 'cliente_id' en 'Clientes' exitosa.")
+                        logger.debug("Verificación de columna 'cliente_id' en 'Clientes' exitosa.")
                     except Exception as check_e:
-                        print(f"ERROR CONNECTOR: Falló la verificación de la tabla Clientes en PostgreSQL: {check_e}")
+                        logger.error("Falló la verificación de la tabla Clientes en PostgreSQL: %s", check_e)
                         raise # Re-lanzar para que el error sea visible
             except Exception as e:
-                print(f"ERROR CONNECTOR al ejecutar query de creación de tabla en PostgreSQL: {e}")
+                logger.error("Error al ejecutar query de creación de tabla en PostgreSQL: %s", e)
+                self.connection.rollback()
+                logger.debug("Rollback realizado para creación de tabla.")
+
+        self.create_indexes()
+
+    def create_indexes(self):
+        """Índices de INDEX_DEFINITIONS con CREATE INDEX IF NOT EXISTS (PostgreSQL no indexa las claves foráneas)."""
+        created = []
+        for index in get_index_definitions():
+            query = f"CREATE INDEX IF NOT EXISTS {index['name']} ON {index['table']} ({', '.join(index['columns'])})"
+            try:
+                self.cursor.execute(query)
+                self.connection.commit()
+                created.append(index['name'])
+            except Exception as e:
+                logger.error("Error al crear el índice %s en PostgreSQL: %s", index['name'], e)
                 self.connection.rollback()
-                print("DEBUG CONNECTOR: Rollback realizado para creación de tabla.")
+        return created
+
+    def drop_indexes(self):
+        dropped = []
+        for index in get_index_definitions():
+            try:
+                self.cursor.execute(f"DROP INDEX IF EXISTS {index['name']}")
+                self.connection.commit()
+                dropped.append(index['name'])
+            except Exception as e:
+                logger.error("Error al eliminar el índice %s en PostgreSQL: %s", index['name'], e)
+                self.connection.rollback()
+        return dropped
+
     def create_stored_procedures(self):
         sp_query = """
         DROP FUNCTION IF EXISTS sp_generar_factura(INT, INT, JSONB);
@@ -190,14 +245,14 @@ class PostgreSQLConnector(BaseConnector):
         $$ LANGUAGE plpgsql;
         """
         try:
-            print(f"DEBUG CONNECTOR: Ejecutando query de creación de SP: {sp_query[:100]}...")
+            logger.debug("Ejecutando query de creación de SP: %s...", sp_query[:100])
             self.execute_query(sp_query)
             self.connection.commit()
-            print("DEBUG CONNECTOR: Commit realizado para creación de SP.")
+            logger.debug("Commit realizado para creación de SP.")
         except Exception as e:
-            print(f"ERROR CONNECTOR al crear SP en PostgreSQL: {e}")
+            logger.error("Error al crear SP en PostgreSQL: %s", e)
             self.connection.rollback()
-            print("DEBUG CONNECTOR: Rollback realizado para creación de SP.")
+            logger.debug("Rollback realizado para creación de SP.")
 
     def generate_test_data(self):
         num_records = 500
@@ -215,45 +270,101 @@ class PostgreSQLConnector(BaseConnector):
         try:
             # Solo insertar datos de prueba si las tablas están vacías
             if self.is_table_empty("Clientes"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Clientes.")
+                logger.debug("Insertando datos de prueba para Clientes.")
                 self.cursor.executemany(
                     "INSERT INTO Clientes (nombre, email, telefono, direccion) VALUES (%s, %s, %s, %s)",
                     clientes_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Clientes no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Clientes no está vacía, omitiendo inserción de datos de prueba.")
 
             if self.is_table_empty("Personal"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Personal.")
+                logger.debug("Insertando datos de prueba para Personal.")
                 self.cursor.executemany(
                     "INSERT INTO Personal (nombre, rol) VALUES (%s, %s)",
                     personal_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Personal no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Personal no está vacía, omitiendo inserción de datos de prueba.")
 
             if self.is_table_empty("Producto"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Producto.")
+                logger.debug("Insertando datos de prueba para Producto.")
                 self.cursor.executemany(
                     "INSERT INTO Producto (nombre, precio, stock) VALUES (%s, %s, %s)",
                     productos_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Producto no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Producto no está vacía, omitiendo inserción de datos de prueba.")
 
             self.connection.commit()
-            print("DEBUG CONNECTOR: Commit realizado para datos de prueba (si se insertaron).")
+            logger.debug("Commit realizado para datos de prueba (si se insertaron).")
         except Exception as e:
-            print(f"ERROR CONNECTOR al generar datos de prueba en PostgreSQL: {e}")
+            logger.error("Error al generar datos de prueba en PostgreSQL: %s", e)
             self.connection.rollback()
-            print("DEBUG CONNECTOR: Rollback realizado para datos de prueba.")
+            logger.debug("Rollback realizado para datos de prueba.")
 
     def fetch_all_records(self, table_name):
         query = f"SELECT * FROM {table_name}"
-        self.cursor.execute(query)
+        with phase(EXECUTE):
+            self.cursor.execute(query)
         columns = [desc[0] for desc in self.cursor.description]
-        data = self.cursor.fetchall()
-        return pd.DataFrame(data, columns=columns)
+        with phase(FETCH):
+            data = self.cursor.fetchall()
+        with phase(MATERIALIZE):
+            return pd.DataFrame(data, columns=columns)
+
+    def fetch_records_in_chunks(self, table_name, chunk_size=10000, start_after=None):
+        pk_col = get_primary_key(table_name)
+        order_clause = f" ORDER BY {pk_col}" if pk_col else ""
+        where_clause, params = "", None
+        if pk_col and start_after is not None:
+            where_clause, params = f" WHERE {pk_col} > %s", (start_after,)
+        # Cursor con nombre (server-side): PostgreSQL envía las filas por bloques
+        # en lugar de materializar toda la tabla en el cliente. Cada recorrido usa una
+        # conexión propia de solo lectura: el cursor vive en su transacción, y en la conexión
+        # compartida el commit del primer lector en terminar cerraría los cursores de los
+        # demás (no son WITH HOLD) y confirmaría trabajo ajeno pendiente.
+        import psycopg2
+        connection = psycopg2.connect(self._conn_str)
+        connection.set_session(readonly=True)
+        cursor = connection.cursor(name=f"chunks_{table_name.lower()}")
+        cursor.itersize = chunk_size
+        try:
+            cursor.execute(f"SELECT * FROM {table_name}{where_clause}{order_clause}", params)
+            columns = None
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if columns is None:
+                    columns = [desc[0] for desc in cursor.description]
+                yield pd.DataFrame(rows, columns=columns)
+        finally:
+            cursor.close()
+            connection.close()
+
+    def bulk_insert_records(self, table_name, records):
+        if not records:
+            return 0
+        columns = list(records[0].keys())
+        values = [tuple(record.get(col) for col in columns) for record in records]
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s"
+        try:
+            execute_values(self.cursor, query, values, page_size=1000)
+            pk_col = get_primary_key(table_name)
+            if pk_col in columns:
+                # Las claves explícitas no avanzan la secuencia SERIAL; se sincroniza
+                # para que los INSERT posteriores no colisionen.
+                self.cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE((SELECT MAX({pk_col}) FROM {table_name}), 1))",
+                    (table_name.lower(), pk_col)
+                )
+            self.connection.commit()
+        except Exception as e:
+            logger.error("Error al insertar en bloque en %s: %s", table_name, e)
+            self.connection.rollback()
+            raise
+        return len(values)
 
     def insert_record(self, table_name, data):
         processed_data = {}
@@ -270,16 +381,21 @@ class PostgreSQLConnector(BaseConnector):
         # Asegurarse de no incluir la columna PK (serial) en el INSERT
         columns = ', '.join(processed_data.keys())
         placeholders = ', '.join(['%s'] * len(processed_data.values()))
-        query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+        pk_col = get_primary_key(table_name)
+        returning = f" RETURNING {pk_col}" if pk_col else ""
+        query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders}){returning}"
         try:
-            print(f"DEBUG CONNECTOR: Intentando INSERT en {table_name}. Query: {query}. Params: {tuple(processed_data.values())}")
+            logger.debug("Intentando INSERT en %s. Query: %s. Params: %s", table_name, query, tuple(processed_data.values()))
             self.cursor.execute(query, tuple(processed_data.values()))
+            # Id generado por el serial (o el explícito), para quien lo necesite (p. ej. replay)
+            created_id = self.cursor.fetchone()[0] if pk_col else None
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para INSERT en {table_name}.")
+            logger.debug("Commit realizado para INSERT en %s.", table_name)
+            return created_id
         except Exception as e:
-            print(f"ERROR CONNECTOR al insertar registro en {table_name}: {e}")
+            logger.error("Error al insertar registro en %s: %s", table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para INSERT en {table_name}.")
+            logger.debug("Rollback realizado para INSERT en %s.", table_name)
             raise
 
     def update_record(self, table_name, record_id, data):
@@ -313,17 +429,17 @@ class PostgreSQLConnector(BaseConnector):
         params_for_query = tuple(list(processed_data.values()) + [processed_record_id])
         
         try:
-            print(f"DEBUG CONNECTOR: Intentando UPDATE en {table_name} con ID {record_id}.")
-            print(f"DEBUG CONNECTOR: PK Columna: {pk_col}")
-            print(f"DEBUG CONNECTOR: Query de UPDATE: {query}")
-            print(f"DEBUG CONNECTOR: Parámetros de UPDATE: {params_for_query}")
+            logger.debug("Intentando UPDATE en %s con ID %s.", table_name, record_id)
+            logger.debug("PK Columna: %s", pk_col)
+            logger.debug("Query de UPDATE: %s", query)
+            logger.debug("Parámetros de UPDATE: %s", params_for_query)
             self.cursor.execute(query, params_for_query)
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para UPDATE en {table_name} ID {record_id}.")
+            logger.debug("Commit realizado para UPDATE en %s ID %s.", table_name, record_id)
         except Exception as e:
-            print(f"ERROR CONNECTOR al actualizar registro (ID: {record_id}) en {table_name}: {e}")
+            logger.error("Error al actualizar registro (ID: %s) en %s: %s", record_id, table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para UPDATE en {table_name} ID {record_id}.")
+            logger.debug("Rollback realizado para UPDATE en %s ID %s.", table_name, record_id)
             raise
 
     def delete_record(self, table_name, record_id):
@@ -364,7 +480,7 @@ class PostgreSQLConnector(BaseConnector):
             # Si una tabla no está en el mapeo, es un caso no manejado.
             # Por seguridad, si no se encuentra, lanzamos un error o usamos un default.
             # El error original es sobre 'Clientes', que sí está en el map.
-            print(f"ADVERTENCIA: Nombre de tabla '{table_name}' no encontrado en pk_col_map para delete_record. Usando un fallback genérico o podría fallar.")
+            logger.warning("Nombre de tabla '%s' no encontrado en pk_col_map para delete_record. Usando un fallback genérico o podría fallar.", table_name)
             # Podríamos usar un fallback como: pk_col = f"{table_name.lower()}_id" o simplemente 'id'
             # Pero es mejor ser explícito. El error original es sobre 'Clientes'.
             # El mapeo es la solución correcta para las tablas definidas.
@@ -386,57 +502,116 @@ class PostgreSQLConnector(BaseConnector):
 
         query = f"DELETE FROM {table_name} WHERE {pk_col} = %s"
         try:
-            print(f"DEBUG CONNECTOR: Intentando DELETE en {table_name} con ID {final_record_id} (Tipo: {type(final_record_id)}). Query: {query}. PK Col: {pk_col}")
+            logger.debug("Intentando DELETE en %s con ID %s (Tipo: %s). Query: %s. PK Col: %s", table_name, final_record_id, type(final_record_id), query, pk_col)
             self.cursor.execute(query, (final_record_id,))
 
             if self.cursor.rowcount == 0:
-                print(f"ADVERTENCIA CONNECTOR: DELETE en {table_name} con ID {final_record_id} no afectó ninguna fila. El registro podría no existir o el ID es incorrecto.")
+                logger.warning("DELETE en %s con ID %s no afectó ninguna fila. El registro podría no existir o el ID es incorrecto.", table_name, final_record_id)
             
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para DELETE en {table_name} ID {final_record_id}. Filas afectadas: {self.cursor.rowcount}")
+            logger.debug("Commit realizado para DELETE en %s ID %s. Filas afectadas: %s", table_name, final_record_id, self.cursor.rowcount)
         except Exception as e:
-            print(f"ERROR CONNECTOR al eliminar registro (ID: {record_id}) en {table_name}: {e}")
+            logger.error("Error al eliminar registro (ID: %s) en %s: %s", record_id, table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para DELETE en {table_name} ID {record_id}.")
+            logger.debug("Rollback realizado para DELETE en %s ID %s.", table_name, record_id)
             raise
 
+    def apply_table_changes(self, table_name, inserts, updates, deletes):
+        return self._apply_changes_in_transaction(table_name, inserts, updates, deletes)
+
+    def update_records(self, table_name, updates):
+        return self._apply_changes_in_transaction(table_name, [], updates, [])["updated"]
+
+    def delete_records(self, table_name, record_ids):
+        return self._apply_changes_in_transaction(table_name, [], [], record_ids)["deleted"]
+
+    def _delete_rows(self, table_name, record_ids):
+        # Un array por sentencia en lugar de una lista de parámetros: el plan no cambia con el tamaño
+        pk_col = get_primary_key(table_name)
+        values = [self._driver_value(record_id) for record_id in record_ids]
+        for start in range(0, len(values), self.BATCH_CHUNK_SIZE):
+            self.cursor.execute(f"DELETE FROM {table_name} WHERE {pk_col} = ANY(%s)", (values[start:start + self.BATCH_CHUNK_SIZE],))
+
+    def _update_rows(self, table_name, updates):
+        # UPDATE ... FROM (VALUES ...): una sentencia por trozo y combinación de columnas.
+        # Los literales de VALUES se tipan con un cast (un NULL sin tipo sería text).
+        pk_col = get_primary_key(table_name)
+        fields = get_table_definition(table_name)["fields"]
+        for columns, rows in group_by_columns((changes, record_id) for record_id, changes in updates).items():
+            all_columns = (pk_col,) + columns
+            template = "(" + ", ".join(f"%s::{PG_CAST_TYPES.get(fields.get(col), 'text')}" for col in all_columns) + ")"
+            set_clause = ", ".join(f"{col} = v.{col}" for col in columns)
+            query = (f"UPDATE {table_name} AS t SET {set_clause} FROM (VALUES %s) AS v({', '.join(all_columns)}) "
+                     f"WHERE t.{pk_col} = v.{pk_col}")
+            values = [tuple(self._driver_value(value) for value in (record_id,) + tuple(changes[col] for col in columns))
+                      for changes, record_id in rows]
+            execute_values(self.cursor, query, values, template=template, page_size=self.BATCH_CHUNK_SIZE)
+
+    def _fetch_one(self, query, params):
+        cursor, _ = self.execute_query(query, params)
+        with phase(FETCH):
+            return cursor.fetchone()
+
     def search_client(self, client_id: int = 1):
-        query = "SELECT * FROM Clientes WHERE cliente_id = %s LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (client_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("search_client", self._fetch_one, SEARCH_CLIENT_QUERY, (client_id,))
 
     def search_product(self, product_id: int = 1):
-        query = "SELECT * FROM Producto WHERE producto_id = %s LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (product_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("search_product", self._fetch_one, SEARCH_PRODUCT_QUERY, (product_id,))
 
     def generate_invoice(self, client_id: int, staff_id: int, products_json_str: str):
-        # Convertir la cadena JSON a un objeto Json de psycopg2 para PostgreSQL
-        productos_json_obj = Json(json.loads(products_json_str))
-        
-        # Llamar al procedimiento almacenado
-        result, exec_time = self.execute_sp("sp_generar_factura", (client_id, staff_id, productos_json_obj))
-        self.connection.commit() # Asegurar que la transacción se confirme
-        return result, exec_time # execute_sp ya devuelve el resultado y el tiempo
+        def _generate():
+            # Convertir la cadena JSON a un objeto Json de psycopg2 para PostgreSQL
+            with phase(MATERIALIZE):
+                productos_json_obj = Json(json.loads(products_json_str))
+
+            # Llamar al procedimiento almacenado
+            result, _ = self.execute_sp("sp_generar_factura", (client_id, staff_id, productos_json_obj))
+            with phase(COMMIT):
+                self.connection.commit() # Asegurar que la transacción se confirme
+            return result
+
+        return self.measure_time("generate_invoice", _generate)
 
     def query_invoice(self, invoice_id: int = 1):
-        query = "SELECT * FROM Factura WHERE factura_id = %s LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (invoice_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("query_invoice", self._fetch_one, QUERY_INVOICE_QUERY, (invoice_id,))
+
+    def _lookup_many(self, operation, record_ids):
+        # Una sola consulta con las claves como array: el plan es el mismo con 1 o 1.000 claves
+        table_name = BATCH_LOOKUPS[operation][0]
+        query = f"SELECT * FROM {table_name} WHERE {get_primary_key(table_name)} = ANY(%s)"
+        cursor, _ = self.execute_query(query, ([self._driver_value(record_id) for record_id in record_ids],))
+        with phase(FETCH):
+            return cursor.fetchall()
 
     def sales_report(self):
-        query = """
-        SELECT 
-            p.nombre AS producto, 
-            SUM(df.cantidad) AS total_vendido, 
-            SUM(df.subtotal) AS ingresos_totales
-        FROM Detalle_Factura df
-        JOIN Producto p ON df.producto_id = p.producto_id
-        GROUP BY p.nombre
-        ORDER BY ingresos_totales DESC;
-        """
-        cursor, exec_time = self.execute_query(query)
-        return cursor.fetchall(), exec_time
+        def _report():
+            cursor, _ = self.execute_query(SALES_REPORT_QUERY)
+            with phase(FETCH):
+                return cursor.fetchall()
+
+        return self.measure_time("sales_report", _report)
+
+    def explain_operation(self, operation):
+        """EXPLAIN (ANALYZE, BUFFERS) en texto: tiempos reales por nodo y bloques leídos de caché o disco."""
+        query = BENCHMARK_QUERIES.get(operation)
+        if query is None:
+            return None
+        try:
+            self.cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}", BENCHMARK_DEFAULT_PARAMS[operation])
+            plan = "\n".join(row[0] for row in self.cursor.fetchall())
+        finally:
+            # ANALYZE ejecuta de verdad la consulta: se cierra la transacción que abrió
+            self.connection.rollback()
+        return {"format": "text", "plan": plan}
+
+    def count_records(self, table_name):
+        self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        return self.cursor.fetchone()[0]
+
+    def max_primary_key(self, table_name):
+        self.cursor.execute(f"SELECT MAX({get_primary_key(table_name)}) FROM {table_name}")
+        max_key = self.cursor.fetchone()[0]
+        return int(max_key) if max_key is not None else None
 
     def is_table_empty(self, table_name):
         query = f"SELECT COUNT(*) FROM {table_name}"
@@ -0,0 +1,122 @@
+import json
+from typing import Any
+from infrastructure.adapters.out.connectors.async_base_connector import AsyncBaseConnector
+
+
+class AsyncRedisConnector(AsyncBaseConnector):
+    """
+    Conector asíncrono para Redis basado en redis.asyncio. Usa el mismo layout de claves
+    que RedisConnector ("clientes:<id>", "productos:<id>", "facturas:<id>"...).
+    """
+
+    def __init__(self, db_type: str = "Redis"):
+        super().__init__(db_type)
+        self.client = None
+
+    async def connect(self, **kwargs: Any) -> None:
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("El conector 'redis' no está instalado. Por favor, instala 'redis' (`pip install redis`).")
+
+        host = kwargs.get("host")
+        port = kwargs.get("port")
+        if not host or port is None:
+            raise ValueError("El host y el puerto de Redis son obligatorios.")
+        self.client = aioredis.Redis(
+            host=str(host),
+            port=port,
+            password=kwargs.get("password") or None,
+            db=kwargs.get("database", 0),
+            decode_responses=True,
+            max_connections=kwargs.get("max_connections", 512),
+        )
+        await self.client.ping()
+        self.connection = self.client
+
+    async def disconnect(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+            self.connection = None
+
+    def pool_stats(self):
+        if self.client is None:
+            return {}
+        pool = self.client.connection_pool
+        # redis-py no publica estos contadores; se leen de sus listas internas si existen
+        idle = len(getattr(pool, "_available_connections", []))
+        in_use = len(getattr(pool, "_in_use_connections", []))
+        return {"size": idle + in_use, "idle": idle, "max": pool.max_connections}
+
+    async def search_client(self, client_id: int = 1):
+        return await self.measure_time("search_client", self.client.hgetall, f"clientes:{client_id}")
+
+    async def search_product(self, product_id: int = 1):
+        return await self.measure_time("search_product", self.client.hgetall, f"productos:{product_id}")
+
+    async def generate_invoice(self, client_id: int = 1, staff_id: int = 1, products_json_str: str = '[{"producto_id": 1, "cantidad": 1}]'):
+        async def _generate():
+            products = json.loads(products_json_str)
+            invoice_id = await self.client.incr("facturas:next_id")
+            invoice_key = f"facturas:{invoice_id}"
+
+            # Precios de todos los productos en un solo viaje de red
+            pipe = self.client.pipeline(transaction=False)
+            for item in products:
+                pipe.hget(f"productos:{item.get('producto_id')}", "precio")
+            prices = await pipe.execute()
+
+            total = 0.0
+            pipe = self.client.pipeline(transaction=True)
+            for item, price in zip(products, prices):
+                precio = float(price or 0)
+                cantidad = float(item.get("cantidad", 0))
+                subtotal = precio * cantidad
+                detail_id = await self.client.incr("detalles_factura:next_id")
+                pipe.hset(
+                    f"detalles_factura:{detail_id}",
+                    mapping={
+                        "id": str(detail_id),
+                        "factura_id": str(invoice_id),
+                        "producto_id": str(item.get("producto_id")),
+                        "cantidad": str(cantidad),
+                        "precio_unitario": str(precio),
+                    },
+                )
+                total += subtotal
+            pipe.hset(
+                invoice_key,
+                mapping={
+                    "id": str(invoice_id),
+                    "cliente_id": str(client_id),
+                    "personal_id": str(staff_id),
+                    "fecha": "2023-01-01",
+                    "total": str(total),
+                },
+            )
+            await pipe.execute()
+            return {"factura_id": invoice_id, "total": total}
+
+        return await self.measure_time("generate_invoice", _generate)
+
+    async def _scan_hashes(self, pattern: str):
+        keys = [key async for key in self.client.scan_iter(match=pattern, count=1000) if not key.endswith(":next_id")]
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        return [data for data in await pipe.execute() if data]
+
+    async def query_invoice(self, invoice_id: int = 1):
+        async def _query():
+            invoice = await self.client.hgetall(f"facturas:{invoice_id}")
+            if invoice:
+                # Igual que RedisConnector: los detalles se filtran recorriendo el espacio de claves
+                details = await self._scan_hashes("detalles_factura:*")
+                invoice["detalles"] = [d for d in details if d.get("factura_id") == str(invoice_id)]
+            return invoice
+
+        return await self.measure_time("query_invoice", _query)
+
+    async def sales_report(self):
+        return await self.measure_time("sales_report", self._scan_hashes, "facturas:*")
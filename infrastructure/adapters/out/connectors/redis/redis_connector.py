@@ -1,11 +1,31 @@
 import redis
 import json
-import time
 import pandas as pd
-from typing import Any, Dict, List, Optional, Tuple, Callable
-from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Callable
+from infrastructure.adapters.out.connectors.base_connector import BATCH_LOOKUPS, BaseConnector
+from infrastructure.adapters.out.persistence.config.table_definitions import get_primary_key
+from infrastructure.adapters.out.persistence.utils.type_coercion import to_driver_value
+from shared.phase_timing import EXECUTE, FETCH, MATERIALIZE, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _redis_mapping(data: Dict[str, Any]) -> Dict[str, str]:
+    """Campos de un hash: Redis guarda texto y no admite None."""
+    values = {k: to_driver_value(v) for k, v in data.items()}
+    return {k: str(v) for k, v in values.items() if v is not None}
 
 class RedisConnector(BaseConnector):
+    # Prefijo de clave usado para cada tabla de TABLE_DEFINITIONS (clave: "<prefijo>:<id>")
+    KEY_PREFIXES = {
+        "clientes": "clientes",
+        "personal": "personal",
+        "producto": "productos",
+        "factura": "facturas",
+        "detalle_factura": "detalles_factura",
+    }
+
     def __init__(self):
         super().__init__("redis") # Call the constructor of the base class
         self.client = None
@@ -35,7 +55,7 @@ class RedisConnector(BaseConnector):
                 decode_responses=True
             )
             self.client.ping()
-            print(f"Conectado a Redis en {self.host}:{self.port}")
+            logger.info("Conectado a Redis en %s:%s", self.host, self.port)
         except redis.exceptions.ConnectionError as e:
             raise ConnectionError(f"No se pudo conectar a Redis: {e}")
         except Exception as e:
@@ -45,14 +65,11 @@ class RedisConnector(BaseConnector):
         if self.client:
             self.client.close()
             self.client = None
-            print("Desconectado de Redis.")
+            logger.info("Desconectado de Redis.")
 
     def measure_time(self, operation_name: str, func: Callable, *args: Any, **kwargs: Any) -> Tuple[Any, float]:
-        start_time = time.perf_counter()
-        result = func(*args, **kwargs)
-        end_time = time.perf_counter()
-        execution_time = (end_time - start_time) * 1000  # Convert to milliseconds
-        print(f"Tiempo de ejecución para {operation_name}: {execution_time:.2f} ms")
+        result, execution_time = super().measure_time(operation_name, func, *args, **kwargs)
+        logger.debug("Tiempo de ejecución para %s: %.2f ms", operation_name, execution_time)
         return result, execution_time
 
     def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> Any:
@@ -119,7 +136,7 @@ class RedisConnector(BaseConnector):
         return self.measure_time(f"execute_sp_{sp_name}", self.call_stored_procedure, sp_name, params)
 
     def create_tables(self) -> None:
-        print("Simulando creación de 'tablas' en Redis. Redis no tiene el concepto de tablas SQL.")
+        logger.info("Simulando creación de 'tablas' en Redis. Redis no tiene el concepto de tablas SQL.")
         # Aquí podrías inicializar contadores o claves de esquema si fuera necesario
         # Por ejemplo, para asegurar que los contadores de ID existen
         self.client.setnx("clientes:next_id", 1)
@@ -129,14 +146,85 @@ class RedisConnector(BaseConnector):
         self.client.setnx("detalles_factura:next_id", 1)
 
     def create_stored_procedures(self) -> None:
-        print("Simulando creación de 'procedimientos almacenados' en Redis. Se usarán scripts Lua.")
+        logger.info("Simulando creación de 'procedimientos almacenados' en Redis. Se usarán scripts Lua.")
         # Aquí podrías cargar scripts Lua predefinidos si los tuvieras
         # Por ejemplo:
         # self.create_stored_procedure("my_lua_script", "return redis.call('GET', KEYS[1])")
 
     def fetch_all_records(self, table_name: str) -> pd.DataFrame:
         results, exec_time = self.measure_time(f"fetch_all_records_{table_name}", self.fetch_data, table_name)
-        return pd.DataFrame(results)
+        with phase(MATERIALIZE):
+            return pd.DataFrame(results)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Aciertos y fallos de lectura de claves desde el arranque del servidor (INFO stats)."""
+        info = self.client.info("stats")
+        return {"hits": int(info.get("keyspace_hits", 0)), "misses": int(info.get("keyspace_misses", 0))}
+
+    def key_prefix(self, table_name: str) -> str:
+        """Devuelve el prefijo de clave de una tabla (ej. 'Producto' -> 'productos')."""
+        return self.KEY_PREFIXES.get(table_name.lower(), table_name)
+
+    @staticmethod
+    def _id_sort_key(record_id: Any) -> Tuple[int, Any]:
+        record_id = str(record_id)
+        return (0, int(record_id)) if record_id.isdigit() else (1, record_id)
+
+    def _scan_ids(self, prefix: str) -> List[str]:
+        ids = []
+        for key in self.client.scan_iter(match=f"{prefix}:*", count=1000):
+            record_id = key.split(":", 1)[1]
+            if record_id != "next_id":
+                ids.append(record_id)
+        # Orden numérico cuando los IDs lo permiten, para que los bloques sean deterministas
+        return sorted(ids, key=self._id_sort_key)
+
+    def fetch_records_in_chunks(self, table_name: str, chunk_size: int = 10000, start_after: Any = None):
+        prefix = self.key_prefix(table_name)
+        pk_col = get_primary_key(table_name) or "id"
+        ids = self._scan_ids(prefix)
+        if start_after is not None:
+            start_key = self._id_sort_key(start_after)
+            ids = [i for i in ids if self._id_sort_key(i) > start_key]
+        for start in range(0, len(ids), chunk_size):
+            chunk_ids = ids[start:start + chunk_size]
+            pipe = self.client.pipeline(transaction=False)
+            for record_id in chunk_ids:
+                pipe.hgetall(f"{prefix}:{record_id}")
+            rows = []
+            for record_id, data in zip(chunk_ids, pipe.execute()):
+                if data:
+                    row = dict(data)
+                    row[pk_col] = row.pop("id", record_id)
+                    rows.append(row)
+            if rows:
+                yield pd.DataFrame(rows)
+
+    def bulk_insert_records(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        if not records:
+            return 0
+        prefix = self.key_prefix(table_name)
+        pk_col = get_primary_key(table_name) or "id"
+        max_id = None
+        pipe = self.client.pipeline(transaction=False)
+        for i, record in enumerate(records, start=1):
+            record_id = record.get(pk_col)
+            if record_id is None:
+                record_id = self.client.incr(f"{prefix}:next_id")
+            mapping = {k: str(v) for k, v in record.items() if v is not None and k != pk_col}
+            mapping["id"] = str(record_id)
+            pipe.hset(f"{prefix}:{record_id}", mapping=mapping)
+            if isinstance(record_id, int):
+                max_id = record_id if max_id is None else max(max_id, record_id)
+            if i % 1000 == 0:
+                pipe.execute()
+        pipe.execute()
+        if max_id is not None:
+            # Mantener el contador por encima de los IDs importados
+            current = self.client.get(f"{prefix}:next_id")
+            if current is None or int(current) < max_id:
+                self.client.set(f"{prefix}:next_id", max_id)
+        return len(records)
 
     def insert_record(self, table_name: str, data: dict) -> Any:
         return self.measure_time(f"insert_record_{table_name}", self.insert_data, table_name, data)[0]
@@ -147,6 +235,54 @@ class RedisConnector(BaseConnector):
     def delete_record(self, table_name: str, record_id: Any) -> None:
         self.measure_time(f"delete_record_{table_name}", self.delete_data, table_name, "id", record_id)
 
+    def apply_table_changes(self, table_name: str, inserts: List[Dict[str, Any]],
+                            updates: List[Tuple[Any, Dict[str, Any]]], deletes: List[Any]) -> Dict[str, int]:
+        # Mismo prefijo de clave que bulk_insert_records y fetch_records_in_chunks, en un MULTI/EXEC
+        prefix = self.key_prefix(table_name)
+        pk_col = get_primary_key(table_name) or "id"
+        keys_to_update = [f"{prefix}:{record_id}" for record_id, _ in updates]
+        if keys_to_update:
+            check = self.client.pipeline(transaction=False)
+            for key in keys_to_update:
+                check.exists(key)
+            missing = [key for key, exists in zip(keys_to_update, check.execute()) if not exists]
+            if missing:
+                raise ValueError(f"Las claves {missing[:5]} no existen para actualizar.")
+        mappings = []
+        for record in inserts:
+            mapping = _redis_mapping({k: v for k, v in record.items() if k != pk_col})
+            record_id = record.get(pk_col, record.get("id"))
+            if record_id is not None:
+                mapping["id"] = str(to_driver_value(record_id))
+            mappings.append(mapping)
+        without_id = sum(1 for mapping in mappings if "id" not in mapping)
+        next_ids = iter(())
+        if without_id:
+            last_id = self.client.incrby(f"{prefix}:next_id", without_id)
+            next_ids = iter(range(last_id - without_id + 1, last_id + 1))
+
+        pipe = self.client.pipeline(transaction=True)
+        if deletes:
+            pipe.delete(*[f"{prefix}:{record_id}" for record_id in deletes])
+        for key, (_, changes) in zip(keys_to_update, updates):
+            pipe.hset(key, mapping=_redis_mapping(changes))
+        for mapping in mappings:
+            # No setdefault: evaluaría next() también para las altas que ya traen id
+            if "id" not in mapping:
+                mapping["id"] = str(next(next_ids))
+            pipe.hset(f"{prefix}:{mapping['id']}", mapping=mapping)
+        with phase(EXECUTE):
+            pipe.execute()
+        return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+    def count_records(self, table_name: str) -> int:
+        # Solo se recorren las claves (SCAN), sin leer los hashes como count_data
+        return len(self._scan_ids(self.key_prefix(table_name)))
+
+    def max_primary_key(self, table_name: str) -> Optional[int]:
+        numeric_ids = [int(record_id) for record_id in self._scan_ids(self.key_prefix(table_name)) if record_id.isdigit()]
+        return max(numeric_ids) if numeric_ids else None
+
     def is_table_empty(self, table_name: str) -> bool:
         count, exec_time = self.measure_time(f"count_data_{table_name}", self.count_data, table_name)
         return count == 0
@@ -182,40 +318,40 @@ class RedisConnector(BaseConnector):
         # Redis no tiene un concepto de "esquema de tabla" como las bases de datos relacionales.
         # Esto es un placeholder. Podría implementarse para devolver un esquema esperado
         # basado en convenciones de la aplicación o metadatos almacenados en Redis.
-        print(f"Advertencia: get_table_schema no es aplicable directamente a Redis para la tabla {table_name}.")
+        logger.warning("get_table_schema no es aplicable directamente a Redis para la tabla %s.", table_name)
         return {}
 
     def get_existing_tables(self) -> List[str]:
         # Redis no tiene "tablas". Podríamos listar claves que sigan un patrón
         # o que representen colecciones lógicas.
         # Por ahora, devuelve una lista vacía o un placeholder.
-        print("Advertencia: get_existing_tables no es aplicable directamente a Redis.")
+        logger.warning("get_existing_tables no es aplicable directamente a Redis.")
         return []
 
     def create_table(self, table_name: str, columns: Dict[str, str]):
         # En Redis, "crear una tabla" podría significar establecer una convención de claves
         # o inicializar un HASH/SET/LIST vacío para esa "tabla".
-        print(f"Simulando creación de 'tabla' {table_name} en Redis. No hay concepto de tabla SQL.")
+        logger.info("Simulando creación de 'tabla' %s en Redis. No hay concepto de tabla SQL.", table_name)
         # Podríamos, por ejemplo, crear una clave para indicar la existencia de esta "tabla"
         self.client.set(f"schema:{table_name}:exists", "true")
 
     def drop_table(self, table_name: str):
         # En Redis, "eliminar una tabla" podría significar eliminar todas las claves
         # que pertenecen a esa "tabla" o la clave de convención de esquema.
-        print(f"Simulando eliminación de 'tabla' {table_name} en Redis. No hay concepto de tabla SQL.")
+        logger.info("Simulando eliminación de 'tabla' %s en Redis. No hay concepto de tabla SQL.", table_name)
         # Eliminar la clave de existencia y cualquier clave asociada si se sigue una convención
-        keys_to_delete = self.client.keys(f"{table_name}:*")
+        keys_to_delete = self.client.keys(f"{self.key_prefix(table_name)}:*")
         if keys_to_delete:
             self.client.delete(*keys_to_delete)
         self.client.delete(f"schema:{table_name}:exists")
 
     def create_index(self, table_name: str, column_name: str):
         # Redis tiene índices específicos (ej. RediSearch). Esto es un placeholder.
-        print(f"Advertencia: create_index no es aplicable directamente a Redis sin RediSearch para {table_name}.{column_name}.")
+        logger.warning("create_index no es aplicable directamente a Redis sin RediSearch para %s.%s.", table_name, column_name)
 
     def create_stored_procedure(self, procedure_name: str, definition: str):
         # Redis no tiene procedimientos almacenados SQL. Podríamos usar scripts Lua.
-        print(f"Simulando creación de 'procedimiento almacenado' {procedure_name} en Redis usando scripts Lua.")
+        logger.info("Simulando creación de 'procedimiento almacenado' %s en Redis usando scripts Lua.", procedure_name)
         # Almacenar el script Lua en Redis para su posterior ejecución
         self.client.set(f"lua_script:{procedure_name}", definition)
 
@@ -236,106 +372,121 @@ class RedisConnector(BaseConnector):
         # Ejemplo muy simplificado: asume que el script no necesita KEYS y solo ARGV
         return self.client.eval(script, 0, *args)
 
+    def _hgetall(self, key: str) -> Dict[str, Any]:
+        # Un HGETALL es una sola ida y vuelta: envío, ejecución y respuesta
+        with phase(EXECUTE):
+            return self.client.hgetall(key)
+
     def search_client(self, client_id: int = 1) -> Tuple[Any, float]:
         key = f"clientes:{client_id}"
-        return self.measure_time("search_client", self.client.hgetall, key)
+        return self.measure_time("search_client", self._hgetall, key)
 
     def search_product(self, product_id: int = 1) -> Tuple[Any, float]:
         key = f"productos:{product_id}"
-        return self.measure_time("search_product", self.client.hgetall, key)
+        return self.measure_time("search_product", self._hgetall, key)
 
     def generate_invoice(self, client_id: int, staff_id: int, products_json_str: str) -> Tuple[Any, float]:
         def _generate():
-            products = json.loads(products_json_str)
-            invoice_id = self.client.incr("facturas:next_id")
+            with phase(MATERIALIZE):
+                products = json.loads(products_json_str)
+            with phase(EXECUTE):
+                invoice_id = self.client.incr("facturas:next_id")
             invoice_key = f"facturas:{invoice_id}"
 
             total = 0.0
-            self.client.hset(
-                invoice_key,
-                mapping={
-                    "id": str(invoice_id),
-                    "cliente_id": str(client_id),
-                    "personal_id": str(staff_id),
-                    "fecha": "2023-01-01",
-                    "total": "0",
-                },
-            )
+            with phase(EXECUTE):
+                self.client.hset(
+                    invoice_key,
+                    mapping={
+                        "id": str(invoice_id),
+                        "cliente_id": str(client_id),
+                        "personal_id": str(staff_id),
+                        "fecha": "2023-01-01",
+                        "total": "0",
+                    },
+                )
 
             for item in products:
-                prod = self.client.hgetall(f"productos:{item.get('producto_id')}")
+                prod = self._hgetall(f"productos:{item.get('producto_id')}")
                 precio = float(prod.get("precio", 0))
                 cantidad = float(item.get("cantidad", 0))
                 subtotal = precio * cantidad
-                detail_id = self.client.incr("detalles_factura:next_id")
-                detail_key = f"detalles_factura:{detail_id}"
-                self.client.hset(
-                    detail_key,
-                    mapping={
-                        "id": str(detail_id),
-                        "factura_id": str(invoice_id),
-                        "producto_id": str(item.get("producto_id")),
-                        "cantidad": str(cantidad),
-                        "precio_unitario": str(precio),
-                    },
-                )
+                with phase(EXECUTE):
+                    detail_id = self.client.incr("detalles_factura:next_id")
+                    detail_key = f"detalles_factura:{detail_id}"
+                    self.client.hset(
+                        detail_key,
+                        mapping={
+                            "id": str(detail_id),
+                            "factura_id": str(invoice_id),
+                            "producto_id": str(item.get("producto_id")),
+                            "cantidad": str(cantidad),
+                            "precio_unitario": str(precio),
+                        },
+                    )
                 total += subtotal
 
-            self.client.hset(invoice_key, mapping={"total": str(total)})
+            with phase(EXECUTE):
+                self.client.hset(invoice_key, mapping={"total": str(total)})
             return {"factura_id": invoice_id, "total": total}
 
         return self.measure_time("generate_invoice", _generate)
 
     def insert_data(self, table_name: str, data: Dict[str, Any]):
         # En Redis, esto podría ser HMSET para HASHes o LPUSH para LISTAs, etc.
-        # Asumimos que 'table_name' es un prefijo de clave y 'data' es un diccionario para un HASH.
-        key = f"{table_name}:{data.get('id', self.client.incr(f'{table_name}:next_id'))}"
+        # 'table_name' es una tabla o directamente su prefijo de clave (ej. 'Producto' o 'productos')
+        prefix = self.key_prefix(table_name)
+        key = f"{prefix}:{data['id'] if 'id' in data else self.client.incr(f'{prefix}:next_id')}"
         if 'id' not in data:
             data['id'] = key.split(':')[-1] # Asegurar que el ID se guarda en los datos
         self.client.hset(key, mapping=data)
-        print(f"Datos insertados en Redis bajo la clave {key}")
+        logger.debug("Datos insertados en Redis bajo la clave %s", key)
         return data['id']
 
     def update_data(self, table_name: str, identifier_column: str, identifier_value: Any, data: Dict[str, Any]):
         # Asumimos que 'identifier_column' es 'id' y 'identifier_value' es el ID de la clave.
-        key = f"{table_name}:{identifier_value}"
+        key = f"{self.key_prefix(table_name)}:{identifier_value}"
         if not self.client.exists(key):
             raise ValueError(f"La clave {key} no existe para actualizar.")
         self.client.hset(key, mapping=data)
-        print(f"Datos actualizados en Redis bajo la clave {key}")
+        logger.debug("Datos actualizados en Redis bajo la clave %s", key)
 
     def delete_data(self, table_name: str, identifier_column: str, identifier_value: Any):
         # Asumimos que 'identifier_column' es 'id' y 'identifier_value' es el ID de la clave.
-        key = f"{table_name}:{identifier_value}"
+        key = f"{self.key_prefix(table_name)}:{identifier_value}"
         if not self.client.exists(key):
             raise ValueError(f"La clave {key} no existe para eliminar.")
         self.client.delete(key)
-        print(f"Datos eliminados de Redis bajo la clave {key}")
+        logger.debug("Datos eliminados de Redis bajo la clave %s", key)
 
     def fetch_data(self, table_name: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         # Esto es complejo en Redis sin RediSearch.
         # Una implementación simple podría ser obtener todas las claves que coincidan con un patrón
         # y luego filtrar en el lado del cliente. Esto no es eficiente para grandes datasets.
-        pattern = f"{table_name}:*"
-        keys = self.client.keys(pattern)
+        pattern = f"{self.key_prefix(table_name)}:*"
+        with phase(EXECUTE):
+            # El contador "<tabla>:next_id" es un string, no un hash
+            keys = [key for key in self.client.keys(pattern) if not key.endswith(":next_id")]
+        with phase(FETCH):
+            hashes = [self.client.hgetall(key) for key in keys]
         results = []
-        for key in keys:
-            data = self.client.hgetall(key)
-            if data:
-                # Convertir valores a tipos apropiados si es necesario (Redis devuelve strings)
-                # Aquí se asume que los valores son strings y se mantienen así.
-                item = {k: v for k, v in data.items()}
-                
-                # Aplicar filtros si existen
-                match = True
-                if filters:
-                    for f_key, f_value in filters.items():
-                        if f_key not in item or str(item[f_key]) != str(f_value):
-                            match = False
-                            break
-                if match:
-                    results.append(item)
-        print(f"Datos obtenidos de Redis para la 'tabla' {table_name} con filtros {filters}")
+        with phase(MATERIALIZE):
+            for data in hashes:
+                if data:
+                    # Convertir valores a tipos apropiados si es necesario (Redis devuelve strings)
+                    # Aquí se asume que los valores son strings y se mantienen así.
+                    item = {k: v for k, v in data.items()}
+                    
+                    # Aplicar filtros si existen
+                    match = True
+                    if filters:
+                        for f_key, f_value in filters.items():
+                            if f_key not in item or str(item[f_key]) != str(f_value):
+                                match = False
+                                break
+                    if match:
+                        results.append(item)
+        logger.debug("Datos obtenidos de Redis para la 'tabla' %s con filtros %s", table_name, filters)
         return results
 
     def count_data(self, table_name: str, filters: Optional[Dict[str, Any]] = None) -> int:
@@ -345,12 +496,12 @@ class RedisConnector(BaseConnector):
     def get_last_inserted_id(self, table_name: str) -> Optional[Any]:
         # Para Redis, esto podría ser el último ID de un contador si se usa uno.
         # Asumimos que usamos un contador `table_name:next_id`.
-        last_id = self.client.get(f"{table_name}:next_id")
+        last_id = self.client.get(f"{self.key_prefix(table_name)}:next_id")
         return int(last_id) - 1 if last_id else None
 
     def generate_test_data(self) -> None:
         num_records_per_table = 10 # Valor por defecto
-        print(f"Generando datos de prueba para Redis (simulado, {num_records_per_table} registros por 'tabla')...")
+        logger.info("Generando datos de prueba para Redis (simulado, %s registros por 'tabla')...", num_records_per_table)
         
         # Limpiar datos existentes para evitar duplicados en cada ejecución
         self.client.delete("clientes:next_id", "productos:next_id", "personal:next_id", "facturas:next_id", "detalles_factura:next_id")
@@ -418,21 +569,38 @@ class RedisConnector(BaseConnector):
         return None
 
     def query_invoice(self, invoice_id: int) -> Tuple[Any, float]:
-        key = f"facturas:{invoice_id}"
-        invoice, exec_time = self.measure_time(f"query_invoice_{invoice_id}", self.fetch_one, f"HGETALL {key}")
-        if invoice:
-            # También obtener detalles de la factura
-            details = self.fetch_data("detalles_factura", {"factura_id": str(invoice_id)})
-            invoice["detalles"] = details
-        return invoice, exec_time
+        def _query():
+            invoice = self._hgetall(f"facturas:{invoice_id}")
+            if invoice:
+                # También obtener detalles de la factura (dentro del tiempo medido)
+                details = self.fetch_data("detalles_factura", {"factura_id": str(invoice_id)})
+                invoice["detalles"] = details
+            return invoice
+
+        return self.measure_time(f"query_invoice_{invoice_id}", _query)
+
+    def _lookup_many(self, operation: str, record_ids: Sequence[Any]) -> List[Dict[str, Any]]:
+        # Todos los HGETALL en un pipeline: una ida y vuelta para el lote en lugar de una por clave
+        table_name = BATCH_LOOKUPS[operation][0]
+        prefix = self.KEY_PREFIXES[table_name.lower()]
+        keys = [str(to_driver_value(record_id)) for record_id in record_ids]
+        with phase(EXECUTE):
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(f"{prefix}:{key}")
+            hashes = pipe.execute()
+        found = [(key, data) for key, data in zip(keys, hashes) if data]
+        if operation == "query_invoices" and found:
+            # Un solo recorrido de los detalles para todo el lote (query_invoice hace uno por factura)
+            details_by_invoice: Dict[str, List[Dict[str, Any]]] = {}
+            for detail in self.fetch_data("detalles_factura"):
+                details_by_invoice.setdefault(str(detail.get("factura_id")), []).append(detail)
+            with phase(MATERIALIZE):
+                for key, invoice in found:
+                    invoice["detalles"] = details_by_invoice.get(key, [])
+        return [data for _, data in found]
 
     def sales_report(self) -> Tuple[Any, float]:
         # Simular un informe de ventas. Esto podría ser costoso en Redis sin RediSearch.
         # Aquí, simplemente recuperamos todas las facturas y las devolvemos.
-        all_invoices_keys = self.client.keys("facturas:*")
-        sales_data = []
-        for key in all_invoices_keys:
-            invoice = self.client.hgetall(key)
-            if invoice:
-                sales_data.append(invoice)
-        return sales_data, 0.0 # Return 0.0 for execution time for now
+        return self.measure_time("sales_report", self.fetch_data, "facturas")
@@ -0,0 +1,432 @@
+import json
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from infrastructure.adapters.out.connectors.base_connector import BATCH_LOOKUPS, BENCHMARK_DEFAULT_PARAMS, BaseConnector
+from infrastructure.adapters.out.persistence.config.table_definitions import TABLE_DEFINITIONS, get_index_definitions, get_primary_key
+from shared.instrumentation import instrumented
+from shared.phase_timing import COMMIT, EXECUTE, FETCH, MATERIALIZE, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_DATABASE = "multi_spaces.sqlite3"
+
+# Tipos de TABLE_DEFINITIONS -> afinidad de columna en SQLite (las fechas van como texto ISO)
+SQLITE_TYPES = {"int": "INTEGER", "str": "TEXT", "decimal": "NUMERIC", "datetime": "TEXT"}
+
+SEARCH_CLIENT_QUERY = "SELECT * FROM Clientes WHERE cliente_id = ? LIMIT 1"
+SEARCH_PRODUCT_QUERY = "SELECT * FROM Producto WHERE producto_id = ? LIMIT 1"
+QUERY_INVOICE_QUERY = "SELECT * FROM Factura WHERE factura_id = ? LIMIT 1"
+SALES_REPORT_QUERY = """
+    SELECT
+        p.nombre AS producto,
+        SUM(df.cantidad) AS total_vendido,
+        SUM(df.subtotal) AS ingresos_totales
+    FROM Detalle_Factura df
+    JOIN Producto p ON df.producto_id = p.producto_id
+    GROUP BY p.nombre
+    ORDER BY ingresos_totales DESC
+"""
+BENCHMARK_QUERIES = {
+    "search_client": SEARCH_CLIENT_QUERY,
+    "search_product": SEARCH_PRODUCT_QUERY,
+    "query_invoice": QUERY_INVOICE_QUERY,
+    "sales_report": SALES_REPORT_QUERY,
+}
+
+
+def _to_sqlite(value):
+    """sqlite3 no acepta tipos NumPy, Decimal ni fechas de pandas: se pasan a nativos."""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (np.floating, Decimal)):
+        return float(value)
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _foreign_keys(table_name):
+    """
+    Claves foráneas deducidas de TABLE_DEFINITIONS: una columna que es la clave primaria
+    de otra tabla la referencia (ej. Factura.cliente_id -> Clientes).
+    """
+    pk_owner = {definition["pk"]: name for name, definition in TABLE_DEFINITIONS.items()}
+    own_pk = TABLE_DEFINITIONS[table_name]["pk"]
+    return [
+        (field_name, pk_owner[field_name])
+        for field_name in TABLE_DEFINITIONS[table_name]["fields"]
+        if field_name != own_pk and field_name in pk_owner
+    ]
+
+
+class SQLiteConnector(BaseConnector):
+    """
+    Conector embebido (sqlite3 de la biblioteca estándar): sin red ni servidor, sirve de
+    línea base del coste del lado cliente frente al que comparar los backends remotos.
+    El procedimiento sp_generar_factura se emula en Python dentro de una transacción.
+    """
+    PARAM_PLACEHOLDER = "?"
+    # Por debajo del límite de 999 parámetros por sentencia de SQLite anteriores a 3.32
+    BATCH_CHUNK_SIZE = 500
+
+    def __init__(self, db_type="SQLite"):
+        super().__init__(db_type)
+        self.database = None
+
+    def connect(self, database=DEFAULT_DATABASE, **_ignored):
+        # check_same_thread=False: Streamlit puede re-ejecutar el script en otro hilo
+        self.connection = sqlite3.connect(database or DEFAULT_DATABASE, check_same_thread=False)
+        self.database = database or DEFAULT_DATABASE
+        self.cursor = self.connection.cursor()
+        self.cursor.execute("PRAGMA foreign_keys = ON")
+        if self.database != ":memory:":
+            # WAL: los lectores no bloquean al escritor y el commit no reescribe la página entera
+            self.cursor.execute("PRAGMA journal_mode = WAL")
+            self.cursor.execute("PRAGMA synchronous = NORMAL")
+
+    def disconnect(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+            self.cursor = None
+
+    @instrumented()
+    def execute_query(self, query, params=None):
+        try:
+            with phase(EXECUTE):
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+            return self.cursor
+        except Exception as e:
+            if self.connection:
+                self.connection.rollback()
+            raise # Re-lanzar la excepción para que la capa superior la maneje
+
+    @instrumented()
+    def execute_sp(self, sp_name, params):
+        handlers = {"sp_generar_factura": self._sp_generar_factura}
+        if sp_name not in handlers:
+            raise NotImplementedError(f"SQLite no tiene procedimientos almacenados y '{sp_name}' no está emulado.")
+        try:
+            return handlers[sp_name](*params)
+        except Exception as e:
+            if self.connection:
+                self.connection.rollback()
+            raise # Re-lanzar la excepción para que la capa superior la maneje
+
+    def _sp_generar_factura(self, cliente_id, personal_id, productos_json):
+        """Misma lógica que sp_generar_factura de PostgreSQL; devuelve (factura_id, total)."""
+        with phase(MATERIALIZE):
+            productos = json.loads(productos_json) if isinstance(productos_json, str) else productos_json
+        with phase(EXECUTE):
+            self.cursor.execute("SELECT COALESCE(MAX(factura_id), 0) + 1 FROM Factura")
+            factura_id = self.cursor.fetchone()[0]
+            self.cursor.execute(
+                "INSERT INTO Factura (factura_id, cliente_id, personal_id, fecha, total) VALUES (?, ?, ?, ?, 0)",
+                (factura_id, cliente_id, personal_id, datetime.now().isoformat(sep=" ", timespec="seconds"))
+            )
+            total = 0.0
+            for item in productos:
+                self.cursor.execute("SELECT precio FROM Producto WHERE producto_id = ?", (item["producto_id"],))
+                row = self.cursor.fetchone()
+                if row is None:
+                    raise ValueError(f"Producto con ID {item['producto_id']} no encontrado.")
+                precio_unitario = float(row[0])
+                subtotal = item["cantidad"] * precio_unitario
+                self.cursor.execute(
+                    "INSERT INTO Detalle_Factura (factura_id, producto_id, cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?)",
+                    (factura_id, item["producto_id"], item["cantidad"], precio_unitario, subtotal)
+                )
+                total += subtotal
+            self.cursor.execute("UPDATE Factura SET total = ? WHERE factura_id = ?", (total, factura_id))
+        return (factura_id, total)
+
+    def create_tables(self):
+        for table_name, definition in TABLE_DEFINITIONS.items():
+            columns = [
+                f"{field_name} {SQLITE_TYPES[field_type]}" + (" PRIMARY KEY" if field_name == definition["pk"] else "")
+                for field_name, field_type in definition["fields"].items()
+            ]
+            columns.extend(
+                f"FOREIGN KEY ({column}) REFERENCES {referenced}({column})" for column, referenced in _foreign_keys(table_name)
+            )
+            query = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(columns)})"
+            try:
+                logger.debug("Ejecutando query de creación de tabla (IF NOT EXISTS): %s...", query[:100])
+                self.cursor.execute(query)
+                self.connection.commit()
+            except Exception as e:
+                logger.error("Error al ejecutar query de creación de tabla en SQLite: %s", e)
+                self.connection.rollback()
+
+        self.create_indexes()
+
+    def create_indexes(self):
+        created = []
+        for index in get_index_definitions():
+            try:
+                self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {index['name']} ON {index['table']} ({', '.join(index['columns'])})")
+                self.connection.commit()
+                created.append(index['name'])
+            except Exception as e:
+                logger.error("Error al crear el índice %s en SQLite: %s", index['name'], e)
+                self.connection.rollback()
+        return created
+
+    def drop_indexes(self):
+        dropped = []
+        for index in get_index_definitions():
+            try:
+                self.cursor.execute(f"DROP INDEX IF EXISTS {index['name']}")
+                self.connection.commit()
+                dropped.append(index['name'])
+            except Exception as e:
+                logger.error("Error al eliminar el índice %s en SQLite: %s", index['name'], e)
+                self.connection.rollback()
+        return dropped
+
+    def create_stored_procedures(self):
+        # SQLite no tiene procedimientos almacenados: sp_generar_factura se emula en execute_sp
+        logger.info("SQLite no admite procedimientos almacenados; sp_generar_factura se emula en el conector.")
+
+    def generate_test_data(self, num_records_per_table=10):
+        seeds = {
+            "Clientes": ("INSERT INTO Clientes (nombre, email, telefono, direccion) VALUES (?, ?, ?, ?)",
+                         [(f'Cliente {i}', f'cliente{i}@example.com', f'111-222-{i:04d}', f'Dir {i}') for i in range(1, num_records_per_table + 1)]),
+            "Personal": ("INSERT INTO Personal (nombre, rol) VALUES (?, ?)",
+                         [(f'Vendedor {i}', 'Vendedor') for i in range(1, num_records_per_table + 1)]),
+            "Producto": ("INSERT INTO Producto (nombre, precio, stock) VALUES (?, ?, ?)",
+                         [(f'Producto {i}', 10.00 + i * 0.5, 100 + i) for i in range(1, num_records_per_table + 1)]),
+        }
+        try:
+            for table_name, (query, rows) in seeds.items():
+                if self.is_table_empty(table_name):
+                    logger.debug("Insertando datos de prueba para %s.", table_name)
+                    self.cursor.executemany(query, rows)
+                else:
+                    logger.debug("La tabla %s no está vacía, omitiendo inserción de datos de prueba.", table_name)
+            self.connection.commit()
+        except Exception as e:
+            logger.error("Error al generar datos de prueba en SQLite: %s", e)
+            self.connection.rollback()
+
+    def fetch_all_records(self, table_name):
+        with phase(EXECUTE):
+            self.cursor.execute(f"SELECT * FROM {table_name}")
+        columns = [desc[0] for desc in self.cursor.description]
+        with phase(FETCH):
+            data = self.cursor.fetchall()
+        with phase(MATERIALIZE):
+            return pd.DataFrame(data, columns=columns)
+
+    def fetch_records_in_chunks(self, table_name, chunk_size=10000, start_after=None):
+        pk_col = get_primary_key(table_name)
+        order_clause = f" ORDER BY {pk_col}" if pk_col else ""
+        where_clause, params = "", ()
+        if pk_col and start_after is not None:
+            where_clause, params = f" WHERE {pk_col} > ?", (_to_sqlite(start_after),)
+        # Cursor propio: sqlite3 avanza por el resultado paso a paso sin materializar la tabla
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SELECT * FROM {table_name}{where_clause}{order_clause}", params)
+            columns = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=columns)
+        finally:
+            cursor.close()
+
+    def bulk_insert_records(self, table_name, records):
+        if not records:
+            return 0
+        columns = list(records[0].keys())
+        values = [tuple(_to_sqlite(record.get(col)) for col in columns) for record in records]
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+        try:
+            self.cursor.executemany(query, values)
+            self.connection.commit()
+        except Exception as e:
+            logger.error("Error al insertar en bloque en %s: %s", table_name, e)
+            self.connection.rollback()
+            raise
+        return len(values)
+
+    def insert_record(self, table_name, data):
+        processed_data = {k: _to_sqlite(v) for k, v in data.items()}
+        columns = ', '.join(processed_data.keys())
+        placeholders = ', '.join(['?'] * len(processed_data))
+        query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+        try:
+            logger.debug("Intentando INSERT en %s. Query: %s. Params: %s", table_name, query, tuple(processed_data.values()))
+            self.cursor.execute(query, tuple(processed_data.values()))
+            self.connection.commit()
+            return self.cursor.lastrowid
+        except Exception as e:
+            logger.error("Error al insertar registro en %s: %s", table_name, e)
+            self.connection.rollback()
+            raise
+
+    def update_record(self, table_name, record_id, data):
+        processed_data = {k: _to_sqlite(v) for k, v in data.items()}
+        pk_col = get_primary_key(table_name)
+        set_clause = ', '.join([f"{col} = ?" for col in processed_data.keys()])
+        query = f"UPDATE {table_name} SET {set_clause} WHERE {pk_col} = ?"
+        try:
+            logger.debug("Intentando UPDATE en %s con ID %s.", table_name, record_id)
+            self.cursor.execute(query, tuple(processed_data.values()) + (_to_sqlite(record_id),))
+            self.connection.commit()
+        except Exception as e:
+            logger.error("Error al actualizar registro (ID: %s) en %s: %s", record_id, table_name, e)
+            self.connection.rollback()
+            raise
+
+    def delete_record(self, table_name, record_id):
+        pk_col = get_primary_key(table_name)
+        query = f"DELETE FROM {table_name} WHERE {pk_col} = ?"
+        try:
+            self.cursor.execute(query, (_to_sqlite(record_id),))
+            if self.cursor.rowcount == 0:
+                logger.warning("DELETE en %s con ID %s no afectó ninguna fila. El registro podría no existir o el ID es incorrecto.", table_name, record_id)
+            self.connection.commit()
+        except Exception as e:
+            logger.error("Error al eliminar registro (ID: %s) en %s: %s", record_id, table_name, e)
+            self.connection.rollback()
+            raise
+
+    def apply_table_changes(self, table_name, inserts, updates, deletes):
+        return self._apply_changes_in_transaction(table_name, inserts, updates, deletes)
+
+    def update_records(self, table_name, updates):
+        return self._apply_changes_in_transaction(table_name, [], updates, [])["updated"]
+
+    def delete_records(self, table_name, record_ids):
+        return self._apply_changes_in_transaction(table_name, [], [], record_ids)["deleted"]
+
+    def _driver_value(self, value):
+        return _to_sqlite(super()._driver_value(value))
+
+    def _fetch_one(self, query, params):
+        cursor, _ = self.execute_query(query, params)
+        with phase(FETCH):
+            return cursor.fetchone()
+
+    def search_client(self, client_id: int = 1):
+        return self.measure_time("search_client", self._fetch_one, SEARCH_CLIENT_QUERY, (client_id,))
+
+    def search_product(self, product_id: int = 1):
+        return self.measure_time("search_product", self._fetch_one, SEARCH_PRODUCT_QUERY, (product_id,))
+
+    def generate_invoice(self, client_id: int, staff_id: int, products_json_str: str):
+        def _generate():
+            result, _ = self.execute_sp("sp_generar_factura", (client_id, staff_id, products_json_str))
+            with phase(COMMIT):
+                self.connection.commit()
+            return result
+
+        return self.measure_time("generate_invoice", _generate)
+
+    def query_invoice(self, invoice_id: int = 1):
+        return self.measure_time("query_invoice", self._fetch_one, QUERY_INVOICE_QUERY, (invoice_id,))
+
+    def _lookup_many(self, operation, record_ids):
+        return self._fetch_by_keys(BATCH_LOOKUPS[operation][0], record_ids)
+
+    def sales_report(self):
+        def _report():
+            cursor, _ = self.execute_query(SALES_REPORT_QUERY)
+            with phase(FETCH):
+                return cursor.fetchall()
+
+        return self.measure_time("sales_report", _report)
+
+    def explain_operation(self, operation):
+        """EXPLAIN QUERY PLAN: árbol de SCAN (recorrido completo) / SEARCH (por índice) de SQLite."""
+        query = BENCHMARK_QUERIES.get(operation)
+        if query is None:
+            return None
+        self.cursor.execute(f"EXPLAIN QUERY PLAN {query}", BENCHMARK_DEFAULT_PARAMS[operation] or ())
+        depth = {0: -1}
+        lines = []
+        for node_id, parent_id, _unused, detail in self.cursor.fetchall():
+            depth[node_id] = depth.get(parent_id, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return {"format": "text", "plan": "\n".join(lines)}
+
+    def count_records(self, table_name):
+        self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        return self.cursor.fetchone()[0]
+
+    def max_primary_key(self, table_name):
+        self.cursor.execute(f"SELECT MAX({get_primary_key(table_name)}) FROM {table_name}")
+        max_key = self.cursor.fetchone()[0]
+        return int(max_key) if max_key is not None else None
+
+    def is_table_empty(self, table_name):
+        self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        return self.cursor.fetchone()[0] == 0
+
+
+class SQLiteDuckDBConnector(SQLiteConnector):
+    """
+    SQLite para las operaciones OLTP y DuckDB (motor columnar y vectorizado) para el
+    reporte de ventas, leyendo el mismo fichero con su extensión sqlite. Requiere una
+    base de datos en fichero: DuckDB no puede ver una base :memory: de sqlite3.
+    """
+    def __init__(self, db_type="SQLite+DuckDB"):
+        super().__init__(db_type)
+        self.report_connection = None
+
+    def connect(self, database=DEFAULT_DATABASE, **_ignored):
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("El módulo 'duckdb' no está instalado. Por favor, instala 'duckdb' (`pip install duckdb`).")
+        if (database or DEFAULT_DATABASE) == ":memory:":
+            raise RuntimeError("SQLite+DuckDB necesita una base de datos en fichero; ':memory:' no es visible para DuckDB.")
+        super().connect(database)
+        self.report_connection = duckdb.connect()
+        try:
+            self.report_connection.execute("LOAD sqlite")
+        except duckdb.Error:
+            try:
+                # La primera vez se descarga la extensión; después queda en la caché local de DuckDB
+                self.report_connection.execute("INSTALL sqlite")
+                self.report_connection.execute("LOAD sqlite")
+            except duckdb.Error as e:
+                self.disconnect()
+                raise RuntimeError(f"No se pudo cargar la extensión sqlite de DuckDB ({e}). Instálala una vez con red: `INSTALL sqlite`.")
+        # El alias permite lanzar la misma consulta del reporte sin prefijos de esquema
+        self.report_connection.execute(f"ATTACH '{self.database}' AS tienda (TYPE sqlite, READ_ONLY)")
+        self.report_connection.execute("USE tienda")
+
+    def disconnect(self):
+        if self.report_connection is not None:
+            self.report_connection.close()
+            self.report_connection = None
+        super().disconnect()
+
+    def sales_report(self):
+        def _report():
+            # DuckDB lee lo confirmado en el fichero: el reporte no ve transacciones abiertas
+            with phase(EXECUTE):
+                result = self.report_connection.execute(SALES_REPORT_QUERY)
+            with phase(FETCH):
+                return result.fetchall()
+
+        return self.measure_time("sales_report", _report)
+
+    def explain_operation(self, operation):
+        if operation != "sales_report":
+            return super().explain_operation(operation)
+        rows = self.report_connection.execute(f"EXPLAIN ANALYZE {SALES_REPORT_QUERY}").fetchall()
+        return {"format": "text", "plan": "\n".join(str(row[-1]) for row in rows)}
@@ -1,11 +1,39 @@
-import time
 from datetime import datetime, date
 import json
 import pandas as pd
 import numpy as np
-from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from infrastructure.adapters.out.connectors.base_connector import BATCH_LOOKUPS, BENCHMARK_DEFAULT_PARAMS, BaseConnector
+from infrastructure.adapters.out.persistence.config.table_definitions import get_index_definitions, get_primary_key
+from shared.instrumentation import instrumented
+from shared.phase_timing import COMMIT, EXECUTE, FETCH, MATERIALIZE, phase
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Consultas de las operaciones de benchmark: explain_operation analiza exactamente las mismas
+SEARCH_CLIENT_QUERY = "SELECT TOP 1 * FROM Clientes WHERE cliente_id = ?"
+SEARCH_PRODUCT_QUERY = "SELECT TOP 1 * FROM Producto WHERE producto_id = ?"
+QUERY_INVOICE_QUERY = "SELECT TOP 1 * FROM Factura WHERE factura_id = ?"
+SALES_REPORT_QUERY = """
+    SELECT
+        p.nombre AS producto,
+        SUM(df.cantidad) AS total_vendido,
+        SUM(df.subtotal) AS ingresos_totales
+    FROM Detalle_Factura df
+    JOIN Producto p ON df.producto_id = p.producto_id
+    GROUP BY p.nombre
+    ORDER BY ingresos_totales DESC
+"""
+BENCHMARK_QUERIES = {
+    "search_client": SEARCH_CLIENT_QUERY,
+    "search_product": SEARCH_PRODUCT_QUERY,
+    "query_invoice": QUERY_INVOICE_QUERY,
+    "sales_report": SALES_REPORT_QUERY,
+}
 
 class SQLServerConnector(BaseConnector):
+    PARAM_PLACEHOLDER = "?"
+
     def __init__(self, db_type="SQLServer"):
         super().__init__(db_type)
 
@@ -32,22 +60,22 @@ class SQLServerConnector(BaseConnector):
             self.connection = None
             self.cursor = None
 
+    @instrumented()
     def execute_query(self, query, params=None):
-        start_time = time.time()
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            execution_time = (time.time() - start_time) * 1000  # ms
-            return self.cursor, execution_time
+            with phase(EXECUTE):
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+            return self.cursor
         except Exception as e:
             if self.connection:
                 self.connection.rollback()
             raise # Re-lanzar la excepción para que la capa superior la maneje
 
+    @instrumented()
     def execute_sp(self, sp_name, params):
-        start_time = time.time()
         try:
             # SQL Server usa EXEC para procedimientos almacenados
             # Los parámetros se pasan directamente o como @param_name = ?
@@ -59,26 +87,21 @@ class SQLServerConnector(BaseConnector):
             param_placeholders = ', '.join(['?' for _ in params])
             query = f"EXEC {sp_name} {param_placeholders}"
             
-            self.cursor.execute(query, params)
+            with phase(EXECUTE):
+                self.cursor.execute(query, params)
             
             # Intentar obtener el primer conjunto de resultados si el SP devuelve algo
             result = None
-            if self.cursor.description: # Si hay resultados disponibles
-                result = self.cursor.fetchone()
+            with phase(FETCH):
+                if self.cursor.description: # Si hay resultados disponibles
+                    result = self.cursor.fetchone()
             
-            execution_time = (time.time() - start_time) * 1000  # ms
-            return result, execution_time
+            return result
         except Exception as e:
             if self.connection:
                 self.connection.rollback()
             raise # Re-lanzar la excepción para que la capa superior la maneje
 
-    def measure_time(self, operation_name, func, *args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        execution_time = (time.time() - start_time) * 1000  # ms
-        return result, execution_time
-
     def create_tables(self):
         queries = [
             """IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='Clientes' and xtype='U')
@@ -123,14 +146,49 @@ class SQLServerConnector(BaseConnector):
 
         for query in queries:
             try:
-                print(f"DEBUG CONNECTOR: Ejecutando query de creación de tabla (IF NOT EXISTS): {query[:100]}...")
+                logger.debug("Ejecutando query de creación de tabla (IF NOT EXISTS): %s...", query[:100])
                 self.execute_query(query)
                 self.connection.commit()
-                print("DEBUG CONNECTOR: Commit realizado para creación de tabla.")
+                logger.debug("Commit realizado para creación de tabla.")
+            except Exception as e:
+                logger.error("Error al ejecutar query de creación de tabla en SQL Server: %s", e)
+                self.connection.rollback()
+                logger.debug("Rollback realizado para creación de tabla.")
+
+        self.create_indexes()
+
+    def create_indexes(self):
+        """Índices de INDEX_DEFINITIONS si no existen (SQL Server no indexa las claves foráneas)."""
+        created = []
+        for index in get_index_definitions():
+            query = (
+                f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = ? AND object_id = OBJECT_ID(?)) "
+                f"CREATE INDEX {index['name']} ON {index['table']} ({', '.join(index['columns'])})"
+            )
+            try:
+                self.cursor.execute(query, (index['name'], index['table']))
+                self.connection.commit()
+                created.append(index['name'])
             except Exception as e:
-                print(f"ERROR CONNECTOR al ejecutar query de creación de tabla en SQL Server: {e}")
+                logger.error("Error al crear el índice %s en SQL Server: %s", index['name'], e)
                 self.connection.rollback()
-                print("DEBUG CONNECTOR: Rollback realizado para creación de tabla.")
+        return created
+
+    def drop_indexes(self):
+        dropped = []
+        for index in get_index_definitions():
+            query = (
+                f"IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = ? AND object_id = OBJECT_ID(?)) "
+                f"DROP INDEX {index['name']} ON {index['table']}"
+            )
+            try:
+                self.cursor.execute(query, (index['name'], index['table']))
+                self.connection.commit()
+                dropped.append(index['name'])
+            except Exception as e:
+                logger.error("Error al eliminar el índice %s en SQL Server: %s", index['name'], e)
+                self.connection.rollback()
+        return dropped
 
     def create_stored_procedures(self):
         sp_query = """
@@ -190,14 +248,14 @@ class SQLServerConnector(BaseConnector):
             cmd = cmd.strip()
             if cmd:
                 try:
-                    print(f"DEBUG CONNECTOR: Ejecutando query de creación de SP en SQL Server: {cmd[:100]}...")
+                    logger.debug("Ejecutando query de creación de SP en SQL Server: %s...", cmd[:100])
                     self.execute_query(cmd)
                     self.connection.commit()
-                    print("DEBUG CONNECTOR: Commit realizado para creación de SP.")
+                    logger.debug("Commit realizado para creación de SP.")
                 except Exception as e:
-                    print(f"ERROR CONNECTOR al crear SP en SQL Server: {e}")
+                    logger.error("Error al crear SP en SQL Server: %s", e)
                     self.connection.rollback()
-                    print("DEBUG CONNECTOR: Rollback realizado para creación de SP.")
+                    logger.debug("Rollback realizado para creación de SP.")
 
     def generate_test_data(self):
         num_records = 500
@@ -212,45 +270,96 @@ class SQLServerConnector(BaseConnector):
 
         try:
             if self.is_table_empty("Clientes"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Clientes.")
+                logger.debug("Insertando datos de prueba para Clientes.")
                 self.cursor.executemany(
                     "INSERT INTO Clientes (nombre, email, telefono, direccion) VALUES (?, ?, ?, ?)",
                     clientes_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Clientes no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Clientes no está vacía, omitiendo inserción de datos de prueba.")
 
             if self.is_table_empty("Personal"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Personal.")
+                logger.debug("Insertando datos de prueba para Personal.")
                 self.cursor.executemany(
                     "INSERT INTO Personal (nombre, rol) VALUES (?, ?)",
                     personal_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Personal no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Personal no está vacía, omitiendo inserción de datos de prueba.")
 
             if self.is_table_empty("Producto"):
-                print("DEBUG CONNECTOR: Insertando datos de prueba para Producto.")
+                logger.debug("Insertando datos de prueba para Producto.")
                 self.cursor.executemany(
                     "INSERT INTO Producto (nombre, precio, stock) VALUES (?, ?, ?)",
                     productos_data
                 )
             else:
-                print("DEBUG CONNECTOR: La tabla Producto no está vacía, omitiendo inserción de datos de prueba.")
+                logger.debug("La tabla Producto no está vacía, omitiendo inserción de datos de prueba.")
 
             self.connection.commit()
-            print("DEBUG CONNECTOR: Commit realizado para datos de prueba (si se insertaron).")
+            logger.debug("Commit realizado para datos de prueba (si se insertaron).")
         except Exception as e:
-            print(f"ERROR CONNECTOR al generar datos de prueba en SQL Server: {e}")
+            logger.error("Error al generar datos de prueba en SQL Server: %s", e)
             self.connection.rollback()
-            print("DEBUG CONNECTOR: Rollback realizado para datos de prueba.")
+            logger.debug("Rollback realizado para datos de prueba.")
 
     def fetch_all_records(self, table_name):
         query = f"SELECT * FROM {table_name}"
-        self.cursor.execute(query)
+        with phase(EXECUTE):
+            self.cursor.execute(query)
         columns = [desc[0] for desc in self.cursor.description]
-        data = self.cursor.fetchall()
-        return pd.DataFrame.from_records(data, columns=columns)
+        with phase(FETCH):
+            data = self.cursor.fetchall()
+        with phase(MATERIALIZE):
+            return pd.DataFrame.from_records(data, columns=columns)
+
+    def fetch_records_in_chunks(self, table_name, chunk_size=10000, start_after=None):
+        pk_col = get_primary_key(table_name)
+        order_clause = f" ORDER BY {pk_col}" if pk_col else ""
+        where_clause, params = "", ()
+        if pk_col and start_after is not None:
+            where_clause, params = f" WHERE {pk_col} > ?", (start_after,)
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SELECT * FROM {table_name}{where_clause}{order_clause}", *params)
+            columns = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=columns)
+        finally:
+            cursor.close()
+
+    def bulk_insert_records(self, table_name, records):
+        if not records:
+            return 0
+        columns = list(records[0].keys())
+        values = [tuple(record.get(col) for col in columns) for record in records]
+        placeholders = ', '.join(['?' for _ in columns])
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+        # Las columnas IDENTITY solo aceptan valores explícitos con IDENTITY_INSERT activo
+        identity_insert = get_primary_key(table_name) in columns
+        try:
+            if identity_insert:
+                self.cursor.execute(f"SET IDENTITY_INSERT {table_name} ON")
+            self.cursor.fast_executemany = True
+            self.cursor.executemany(query, values)
+            self.connection.commit()
+        except Exception as e:
+            logger.error("Error al insertar en bloque en %s: %s", table_name, e)
+            self.connection.rollback()
+            raise
+        finally:
+            self.cursor.fast_executemany = False
+            # IDENTITY_INSERT es de sesión (el rollback no lo deshace) y solo una tabla por
+            # sesión puede tenerlo activo: se desactiva también si la inserción falla
+            if identity_insert:
+                try:
+                    self.cursor.execute(f"SET IDENTITY_INSERT {table_name} OFF")
+                except Exception as e:
+                    logger.error("No se pudo desactivar IDENTITY_INSERT en %s: %s", table_name, e)
+        return len(values)
 
     def insert_record(self, table_name, data):
         processed_data = {}
@@ -266,16 +375,21 @@ class SQLServerConnector(BaseConnector):
 
         columns = ', '.join(processed_data.keys())
         placeholders = ', '.join(['?' for _ in processed_data.values()])
-        query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+        pk_col = get_primary_key(table_name)
+        output = f" OUTPUT INSERTED.{pk_col}" if pk_col else ""
+        query = f"INSERT INTO {table_name} ({columns}){output} VALUES ({placeholders})"
         try:
-            print(f"DEBUG CONNECTOR: Intentando INSERT en {table_name}. Query: {query}. Params: {tuple(processed_data.values())}")
+            logger.debug("Intentando INSERT en %s. Query: %s. Params: %s", table_name, query, tuple(processed_data.values()))
             self.cursor.execute(query, tuple(processed_data.values()))
+            # Id generado por IDENTITY (o el explícito), para quien lo necesite (p. ej. replay)
+            created_id = self.cursor.fetchone()[0] if pk_col else None
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para INSERT en {table_name}.")
+            logger.debug("Commit realizado para INSERT en %s.", table_name)
+            return created_id
         except Exception as e:
-            print(f"ERROR CONNECTOR al insertar registro en {table_name}: {e}")
+            logger.error("Error al insertar registro en %s: %s", table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para INSERT en {table_name}.")
+            logger.debug("Rollback realizado para INSERT en %s.", table_name)
             raise
 
     def update_record(self, table_name, record_id, data):
@@ -306,17 +420,17 @@ class SQLServerConnector(BaseConnector):
         params_for_query = tuple(list(processed_data.values()) + [processed_record_id])
         
         try:
-            print(f"DEBUG CONNECTOR: Intentando UPDATE en {table_name} con ID {record_id}.")
-            print(f"DEBUG CONNECTOR: PK Columna: {pk_col}")
-            print(f"DEBUG CONNECTOR: Query de UPDATE: {query}")
-            print(f"DEBUG CONNECTOR: Parámetros de UPDATE: {params_for_query}")
+            logger.debug("Intentando UPDATE en %s con ID %s.", table_name, record_id)
+            logger.debug("PK Columna: %s", pk_col)
+            logger.debug("Query de UPDATE: %s", query)
+            logger.debug("Parámetros de UPDATE: %s", params_for_query)
             self.cursor.execute(query, params_for_query)
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para UPDATE en {table_name} ID {record_id}.")
+            logger.debug("Commit realizado para UPDATE en %s ID %s.", table_name, record_id)
         except Exception as e:
-            print(f"ERROR CONNECTOR al actualizar registro (ID: {record_id}) en {table_name}: {e}")
+            logger.error("Error al actualizar registro (ID: %s) en %s: %s", record_id, table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para UPDATE en {table_name} ID {record_id}.")
+            logger.debug("Rollback realizado para UPDATE en %s ID %s.", table_name, record_id)
             raise
 
     def delete_record(self, table_name, record_id):
@@ -335,55 +449,109 @@ class SQLServerConnector(BaseConnector):
 
         query = f"DELETE FROM {table_name} WHERE {pk_col} = ?"
         try:
-            print(f"DEBUG CONNECTOR: Intentando DELETE en {table_name} con ID {final_record_id} (Tipo: {type(final_record_id)}). Query: {query}. PK Col: {pk_col}")
+            logger.debug("Intentando DELETE en %s con ID %s (Tipo: %s). Query: %s. PK Col: %s", table_name, final_record_id, type(final_record_id), query, pk_col)
             self.cursor.execute(query, (final_record_id,))
 
             if self.cursor.rowcount == 0:
-                print(f"ADVERTENCIA CONNECTOR: DELETE en {table_name} con ID {final_record_id} no afectó ninguna fila. El registro podría no existir o el ID es incorrecto.")
+                logger.warning("DELETE en %s con ID %s no afectó ninguna fila. El registro podría no existir o el ID es incorrecto.", table_name, final_record_id)
             
             self.connection.commit()
-            print(f"DEBUG CONNECTOR: Commit realizado para DELETE en {table_name} ID {final_record_id}. Filas afectadas: {self.cursor.rowcount}")
+            logger.debug("Commit realizado para DELETE en %s ID %s. Filas afectadas: %s", table_name, final_record_id, self.cursor.rowcount)
         except Exception as e:
-            print(f"ERROR CONNECTOR al eliminar registro (ID: {record_id}) en {table_name}: {e}")
+            logger.error("Error al eliminar registro (ID: %s) en %s: %s", record_id, table_name, e)
             self.connection.rollback()
-            print(f"DEBUG CONNECTOR: Rollback realizado para DELETE en {table_name} ID {record_id}.")
+            logger.debug("Rollback realizado para DELETE en %s ID %s.", table_name, record_id)
             raise
 
+    def apply_table_changes(self, table_name, inserts, updates, deletes):
+        return self._apply_changes_in_transaction(table_name, inserts, updates, deletes)
+
+    def update_records(self, table_name, updates):
+        return self._apply_changes_in_transaction(table_name, [], updates, [])["updated"]
+
+    def delete_records(self, table_name, record_ids):
+        return self._apply_changes_in_transaction(table_name, [], [], record_ids)["deleted"]
+
+    def _update_rows(self, table_name, updates):
+        # Array binding de ODBC: cada executemany viaja en un único lote, no fila a fila
+        self.cursor.fast_executemany = True
+        try:
+            super()._update_rows(table_name, updates)
+        finally:
+            self.cursor.fast_executemany = False
+
+    def _fetch_one(self, query, params):
+        cursor, _ = self.execute_query(query, params)
+        with phase(FETCH):
+            return cursor.fetchone()
+
     def search_client(self, client_id: int = 1):
-        query = "SELECT * FROM Clientes WHERE cliente_id = ? LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (client_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("search_client", self._fetch_one, SEARCH_CLIENT_QUERY, (client_id,))
 
     def search_product(self, product_id: int = 1):
-        query = "SELECT * FROM Producto WHERE producto_id = ? LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (product_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("search_product", self._fetch_one, SEARCH_PRODUCT_QUERY, (product_id,))
 
     def generate_invoice(self, client_id: int, staff_id: int, products_json_str: str):
-        # Para SQL Server, el JSON se pasa como NVARCHAR(MAX)
-        # El SP en SQL Server usará OPENJSON para parsearlo.
-        result, exec_time = self.execute_sp("sp_generar_factura", (client_id, staff_id, products_json_str))
-        self.connection.commit()
-        return result, exec_time
+        def _generate():
+            # Para SQL Server, el JSON se pasa como NVARCHAR(MAX)
+            # El SP en SQL Server usará OPENJSON para parsearlo.
+            result, _ = self.execute_sp("sp_generar_factura", (client_id, staff_id, products_json_str))
+            with phase(COMMIT):
+                self.connection.commit()
+            return result
+
+        return self.measure_time("generate_invoice", _generate)
 
     def query_invoice(self, invoice_id: int = 1):
-        query = "SELECT * FROM Factura WHERE factura_id = ? LIMIT 1"
-        cursor, exec_time = self.execute_query(query, (invoice_id,))
-        return cursor.fetchone(), exec_time
+        return self.measure_time("query_invoice", self._fetch_one, QUERY_INVOICE_QUERY, (invoice_id,))
+
+    def _lookup_many(self, operation, record_ids):
+        return self._fetch_by_keys(BATCH_LOOKUPS[operation][0], record_ids)
 
     def sales_report(self):
-        query = """
-        SELECT 
-            p.nombre AS producto, 
-            SUM(df.cantidad) AS total_vendido, 
-            SUM(df.subtotal) AS ingresos_totales
-        FROM Detalle_Factura df
-        JOIN Producto p ON df.producto_id = p.producto_id
-        GROUP BY p.nombre
-        ORDER BY ingresos_totales DESC;
+        def _report():
+            cursor, _ = self.execute_query(SALES_REPORT_QUERY)
+            with phase(FETCH):
+                return cursor.fetchall()
+
+        return self.measure_time("sales_report", _report)
+
+    def explain_operation(self, operation):
         """
-        cursor, exec_time = self.execute_query(query)
-        return cursor.fetchall(), exec_time
+        Plan real en XML (SET STATISTICS XML ON): el servidor devuelve un conjunto de
+        resultados adicional con el showplan después de los de la consulta.
+        """
+        query = BENCHMARK_QUERIES.get(operation)
+        if query is None:
+            return None
+        params = BENCHMARK_DEFAULT_PARAMS[operation]
+        plan = None
+        self.cursor.execute("SET STATISTICS XML ON")
+        try:
+            if params:
+                self.cursor.execute(query, params)
+            else:
+                self.cursor.execute(query)
+            while True:
+                if self.cursor.description and "Showplan" in self.cursor.description[0][0]:
+                    plan = self.cursor.fetchone()[0]
+                if not self.cursor.nextset():
+                    break
+        finally:
+            self.cursor.execute("SET STATISTICS XML OFF")
+            self.connection.rollback()
+        if plan is None:
+            return None
+        return {"format": "xml", "plan": plan}
+
+    def count_records(self, table_name):
+        self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        return self.cursor.fetchone()[0]
+
+    def max_primary_key(self, table_name):
+        self.cursor.execute(f"SELECT MAX({get_primary_key(table_name)}) FROM {table_name}")
+        max_key = self.cursor.fetchone()[0]
+        return int(max_key) if max_key is not None else None
 
     def is_table_empty(self, table_name):
         query = f"SELECT COUNT(*) FROM {table_name}"
@@ -0,0 +1,207 @@
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from shared.latency_histogram import LatencyHistogram
+from shared.logger import get_logger
+from shared.metrics_recorder import METRICS_RECORDER, MetricsRecorder
+from shared.performance_data import get_performance_histograms
+
+logger = get_logger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9464
+METRIC_PREFIX = "multi_spaces"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Límites "le" en segundos (unidad base de Prometheus); los histogramas internos van en ms
+LATENCY_BUCKETS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Familia de métricas: (nombre, tipo, ayuda, [(etiquetas, valor)])
+Sample = Tuple[Dict[str, str], float]
+MetricFamily = Tuple[str, str, str, List[Sample]]
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else f"{bound:g}"
+
+
+def histogram_lines(name: str, labels: Dict[str, str], histogram: LatencyHistogram) -> List[str]:
+    """Líneas _bucket/_sum/_count de un histograma de latencias, convertido a segundos."""
+    cumulative = histogram.cumulative_counts([bound * 1000 for bound in LATENCY_BUCKETS_S])
+    lines = [
+        f"{name}_bucket{_format_labels({**labels, 'le': _format_bound(bound)})} {int(count)}"
+        for bound, count in zip(LATENCY_BUCKETS_S, cumulative)
+    ]
+    lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {histogram.total_count}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum_ms / 1000)}")
+    lines.append(f"{name}_count{_format_labels(labels)} {histogram.total_count}")
+    return lines
+
+
+def pool_collector(connector: Any) -> Collector:
+    """Tamaño del pool de un conector (total, libres y máximo) según su pool_stats()."""
+    def _collect() -> Iterable[MetricFamily]:
+        stats = connector.pool_stats()
+        samples = [({"database": connector.db_type, "state": state}, float(value)) for state, value in stats.items()]
+        yield (f"{METRIC_PREFIX}_pool_connections", "gauge", "Conexiones del pool por estado", samples)
+    return _collect
+
+
+def cache_collector(connector: Any) -> Collector:
+    """Aciertos, fallos y tasa de acierto de la caché según cache_stats() del conector (ej. Redis)."""
+    def _collect() -> Iterable[MetricFamily]:
+        stats = connector.cache_stats()
+        labels = {"database": connector.db_type}
+        hits, misses = float(stats.get("hits", 0)), float(stats.get("misses", 0))
+        yield (f"{METRIC_PREFIX}_cache_hits_total", "counter", "Lecturas de caché con acierto", [(labels, hits)])
+        yield (f"{METRIC_PREFIX}_cache_misses_total", "counter", "Lecturas de caché sin acierto", [(labels, misses)])
+        ratio = hits / (hits + misses) if hits + misses else float("nan")
+        yield (f"{METRIC_PREFIX}_cache_hit_ratio", "gauge", "Tasa de acierto de la caché (0-1)", [(labels, ratio)])
+    return _collect
+
+
+def cdc_collector(cdc: Any) -> Collector:
+    """Retraso y cambios aplicados de una replicación CDC (ej. PostgresToRedisCDC)."""
+    def _collect() -> Iterable[MetricFamily]:
+        lag_s = cdc.last_lag_ms / 1000 if cdc.last_lag_ms is not None else float("nan")
+        yield (f"{METRIC_PREFIX}_cdc_lag_seconds", "gauge", "Retraso del último lote replicado", [({}, lag_s)])
+        yield (f"{METRIC_PREFIX}_cdc_applied_changes_total", "counter", "Cambios replicados", [({}, float(cdc.applied_changes))])
+    return _collect
+
+
+class PrometheusExporter:
+    """
+    Publica en formato de texto de Prometheus, en /metrics, los histogramas del almacén de
+    rendimiento (los mismos que alimenta el METRICS_RECORDER de PerformanceService) y las
+    métricas de los colectores registrados (pools, cachés, CDC). Sirve desde un
+    http.server propio en un hilo demonio, así que no depende de Streamlit.
+    """
+    def __init__(self, recorder: MetricsRecorder = METRICS_RECORDER):
+        self.recorder = recorder
+        self._collectors: Dict[str, Collector] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def register_collector(self, key: str, collector: Collector) -> None:
+        """Registra (o reemplaza, si la clave ya existe) un colector de métricas adicional."""
+        with self._lock:
+            self._collectors[key] = collector
+
+    def unregister_collector(self, key: str) -> None:
+        with self._lock:
+            self._collectors.pop(key, None)
+
+    def render(self) -> str:
+        """Texto completo de /metrics."""
+        # Lo que aún está en los búferes por hilo también debe verse en la consulta
+        self.recorder.flush()
+        histograms = get_performance_histograms()
+
+        latency_name = f"{METRIC_PREFIX}_operation_duration_seconds"
+        errors_name = f"{METRIC_PREFIX}_operation_errors_total"
+        lines = [
+            f"# HELP {latency_name} Latencia de las operaciones por base de datos, operación y fase",
+            f"# TYPE {latency_name} histogram",
+        ]
+        error_lines = [
+            f"# HELP {errors_name} Operaciones fallidas por base de datos y operación",
+            f"# TYPE {errors_name} counter",
+        ]
+        for (database, operation, phase_name), histogram in sorted(histograms.items()):
+            labels = {"database": database, "operation": operation, "phase": phase_name}
+            lines.extend(histogram_lines(latency_name, labels, histogram))
+            if histogram.error_count:
+                error_lines.append(f"{errors_name}{_format_labels({'database': database, 'operation': operation})} {histogram.error_count}")
+        lines.extend(error_lines)
+
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for key, collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                # Un colector roto (conexión cerrada, etc.) no debe tumbar toda la consulta
+                logger.warning("Colector de métricas '%s' falló: %s", key, e)
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+    def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> "PrometheusExporter":
+        """Arranca el servidor HTTP en segundo plano (no hace nada si ya está arrancado)."""
+        if self._server is not None:
+            return self
+        exporter = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("%s - %s", self.address_string(), format % args)
+
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="prometheus-exporter", daemon=True)
+        self._thread.start()
+        logger.info("Exportador Prometheus escuchando en http://%s:%s/metrics", host, self.port)
+        return self
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._server.server_address[1] if self._server is not None else None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+
+# Exportador compartido del proceso (un solo puerto aunque Streamlit re-ejecute el script)
+_EXPORTER: Optional[PrometheusExporter] = None
+_EXPORTER_LOCK = threading.Lock()
+
+
+def get_exporter() -> PrometheusExporter:
+    global _EXPORTER
+    with _EXPORTER_LOCK:
+        if _EXPORTER is None:
+            _EXPORTER = PrometheusExporter()
+        return _EXPORTER
@@ -1,3 +1,9 @@
+from typing import Dict, List, Optional
+
+# Precisión y escala de los campos "decimal" (DECIMAL(10,2) en los DDL de los backends SQL)
+DECIMAL_PRECISION = 10
+DECIMAL_SCALE = 2
+
 CLIENTES_FIELDS = {
     "cliente_id": "int", 
     "nombre": "str", 
@@ -43,3 +49,48 @@ TABLE_DEFINITIONS = {
     "Factura": {"pk": "factura_id", "fields": FACTURA_FIELDS},
     "Detalle_Factura": {"pk": "detalle_id", "fields": DETALLE_FACTURA_FIELDS} # Corregido el nombre de la tabla
 }
+
+# Índices secundarios por tabla (además de la clave primaria). Las claves foráneas no
+# crean índice en PostgreSQL ni en SQL Server: sin estos, la consulta de detalles de una
+# factura, el reporte de ventas y el borrado en cascada recorren la tabla entera.
+INDEX_DEFINITIONS: Dict[str, List[dict]] = {
+    "Factura": [
+        {"name": "idx_factura_cliente_id", "columns": ["cliente_id"]},
+    ],
+    "Detalle_Factura": [
+        {"name": "idx_detalle_factura_factura_id", "columns": ["factura_id"]},
+        {"name": "idx_detalle_factura_producto_id", "columns": ["producto_id"]},
+    ],
+}
+
+
+def get_table_definition(table_name: str) -> dict:
+    """
+    Devuelve la definición de una tabla sin distinguir mayúsculas/minúsculas
+    (Cassandra y PostgreSQL devuelven los nombres en minúsculas).
+    """
+    for name, definition in TABLE_DEFINITIONS.items():
+        if name.lower() == table_name.lower():
+            return definition
+    raise KeyError(f"La tabla '{table_name}' no está definida en TABLE_DEFINITIONS.")
+
+
+def get_primary_key(table_name: str) -> Optional[str]:
+    """Devuelve la columna de clave primaria de una tabla o None si no está definida."""
+    try:
+        return get_table_definition(table_name)["pk"]
+    except KeyError:
+        return None
+
+
+def get_index_definitions(table_name: Optional[str] = None) -> List[dict]:
+    """
+    Índices declarados, como {"table", "name", "columns"}: todos o solo los de una tabla
+    (sin distinguir mayúsculas/minúsculas).
+    """
+    return [
+        {"table": name, **index}
+        for name, indexes in INDEX_DEFINITIONS.items()
+        if table_name is None or name.lower() == table_name.lower()
+        for index in indexes
+    ]
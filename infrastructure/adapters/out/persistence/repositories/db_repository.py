@@ -1,8 +1,11 @@
 import time
 import pandas as pd
-from typing import Any, Callable, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 from application.ports.out.repository_port import RepositoryPort
 from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from shared.instrumentation import measure
+from shared.tracing import span
+from shared.workload_capture import CaptureWriter
 
 class DbRepository(RepositoryPort):
     """
@@ -10,6 +13,8 @@ class DbRepository(RepositoryPort):
     """
     def __init__(self, connector_instance: BaseConnector):
         self.connector: BaseConnector = connector_instance
+        # Captura de carga activa (ver start_capture); None = sin coste en cada llamada
+        self._capture: Optional[CaptureWriter] = None
         # La verificación de métodos se puede omitir si confiamos en la interfaz de BaseConnector
         # y en que las implementaciones de los conectores la cumplen.
 
@@ -52,6 +57,12 @@ class DbRepository(RepositoryPort):
         self.connector.create_tables()
 
 
+    def create_indexes(self) -> List[str]:
+        return self.connector.create_indexes()
+
+    def drop_indexes(self) -> List[str]:
+        return self.connector.drop_indexes()
+
     def create_stored_procedures(self) -> None:
         self.connector.create_stored_procedures()
 
@@ -68,20 +79,100 @@ class DbRepository(RepositoryPort):
             except TypeError: # El conector podría no aceptar el argumento
                  self.connector.generate_test_data()
 
+    def start_capture(self, path: str) -> None:
+        """
+        Registra en `path` (anexando; .gz para comprimir) cada llamada de datos del
+        repositorio con sus argumentos, para reproducirla después con WorkloadReplayService.
+        """
+        self.stop_capture()
+        self._capture = CaptureWriter(path, self.connector.db_type)
+
+    def stop_capture(self) -> int:
+        """Cierra la captura activa y devuelve cuántas llamadas registró (0 si no había)."""
+        capture, self._capture = self._capture, None
+        return capture.close() if capture is not None else 0
+
+    @property
+    def capturing(self) -> bool:
+        return self._capture is not None
+
+    def capture_status(self) -> Optional[Dict[str, Any]]:
+        """Fichero y llamadas registradas de la captura activa (None si no hay)."""
+        if self._capture is None:
+            return None
+        return {"path": self._capture.path, "calls": self._capture.count}
+
+    def _captured(self, operation: str, args: Dict[str, Any], func: Callable[[], Any], timed: bool = False) -> Any:
+        """Ejecuta func y, si hay captura activa, registra la llamada (también si falla)."""
+        capture = self._capture
+        if capture is None:
+            return func()
+        started = time.time()
+        try:
+            result = func()
+        except Exception as e:
+            capture.write(operation, args, started, error=f"{type(e).__name__}: {e}")
+            raise
+        latency_ms = result[1] if timed else None
+        created_id = None
+        if operation == "generate_invoice":
+            # (factura_id, total) en los backends con procedimiento; otros devuelven solo el id
+            invoice = result[0]
+            created_id = invoice[0] if isinstance(invoice, (tuple, list)) and invoice else invoice
+        elif operation == "insert_record":
+            created_id = result
+        capture.write(operation, args, started, latency_ms, created_id)
+        return result
+
     def fetch_all_records(self, table_name: str) -> pd.DataFrame:
-        return self.connector.fetch_all_records(table_name)
+        return self._captured("fetch_all_records", {"table_name": table_name},
+                              lambda: self.connector.fetch_all_records(table_name))
+
+    def fetch_records_in_chunks(self, table_name: str, chunk_size: int = 10000, start_after: Any = None) -> Iterator[pd.DataFrame]:
+        return self.connector.fetch_records_in_chunks(table_name, chunk_size, start_after)
+
+    def bulk_insert_records(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        return self.connector.bulk_insert_records(table_name, records)
+
+    def count_records(self, table_name: str) -> int:
+        return self.connector.count_records(table_name)
+
+    def max_primary_key(self, table_name: str) -> Optional[int]:
+        return self.connector.max_primary_key(table_name)
 
     def insert_record(self, table_name: str, data: dict) -> Any:
-        return self.connector.insert_record(table_name, data)
+        return self._captured("insert_record", {"table_name": table_name, "data": data},
+                              lambda: self.connector.insert_record(table_name, data))
 
     def update_record(self, table_name: str, record_id: Any, data: dict) -> None:
-        self.connector.update_record(table_name, record_id, data)
+        self._captured("update_record", {"table_name": table_name, "record_id": record_id, "data": data},
+                       lambda: self.connector.update_record(table_name, record_id, data))
 
     def delete_record(self, table_name: str, record_id: Any) -> None:
         # El conector original no tiene un método delete_record(table_name, record_id)
         # sino delete_record(table_name, pk_value) donde pk_value es el ID.
         # Asumimos que record_id es pk_value.
-        self.connector.delete_record(table_name, record_id)
+        self._captured("delete_record", {"table_name": table_name, "record_id": record_id},
+                       lambda: self.connector.delete_record(table_name, record_id))
+
+    def update_records(self, table_name: str, updates: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        with span("DbRepository.update_records", database=self.connector.db_type, table=table_name):
+            return self._captured("update_records", {"table_name": table_name, "updates": updates},
+                                  lambda: self.connector.update_records(table_name, updates))
+
+    def delete_records(self, table_name: str, record_ids: List[Any]) -> int:
+        with span("DbRepository.delete_records", database=self.connector.db_type, table=table_name):
+            return self._captured("delete_records", {"table_name": table_name, "record_ids": record_ids},
+                                  lambda: self.connector.delete_records(table_name, record_ids))
+
+    def apply_table_changes(self, table_name: str, inserts: List[Dict[str, Any]],
+                            updates: List[Tuple[Any, Dict[str, Any]]], deletes: List[Any]) -> Dict[str, int]:
+        with span("DbRepository.apply_table_changes", database=self.connector.db_type, table=table_name):
+            return self._captured(
+                "apply_table_changes",
+                {"table_name": table_name, "inserts": inserts, "updates": updates, "deletes": deletes},
+                lambda: self.connector.apply_table_changes(table_name, inserts, updates, deletes),
+            )
 
 
     def execute_sp(self, sp_name: str, params: tuple = ()) -> Any:
@@ -90,53 +181,36 @@ class DbRepository(RepositoryPort):
         # Necesitamos decidir cuál usar o si RepositoryPort necesita dos métodos.
         # Por ahora, asumimos que execute_sp es para SPs que pueden o no devolver resultados.
         # Si el SP devuelve resultados, el conector debería manejarlos.
-        return self.connector.execute_sp(sp_name, params)
+        with span("DbRepository.execute_sp", database=self.connector.db_type):
+            return self.connector.execute_sp(sp_name, params)
 
     def measure_time(self, operation_name: str, func_to_measure: Callable, *args: Any, **kwargs: Any) -> Tuple[Any, float]:
         """
-        Mide el tiempo de ejecución de una función o método del conector.
+        Mide el tiempo de ejecución de una función o método del conector con la misma
+        instrumentación que usan los conectores (ver shared.instrumentation).
         """
-        # Esta función es un poco genérica. Si func_to_measure es un método del propio conector,
-        # el conector debería tener su propio método measure_time como en el main.py original.
-        # Si el conector tiene `measure_time(self, operation_name, method_name_str_or_callable, *args)`
-        # podríamos usar eso.
-        
-        # Replicando la lógica de measure_time del conector original:
-        if hasattr(self.connector, operation_name) and callable(getattr(self.connector, operation_name)):
-            # Si operation_name es un método directo del conector (ej. 'search_client')
-            target_method = getattr(self.connector, operation_name)
-            
-            start_time = time.perf_counter()
-            # Los argumentos para estos métodos específicos (search_client, etc.)
-            # deben pasarse a través de *args o **kwargs si es necesario.
-            # El puerto los define con parámetros por defecto.
-            # Aquí, *args y **kwargs serían los parámetros para el método específico.
-            result = target_method(*args, **kwargs)
-            end_time = time.perf_counter()
-            exec_time_ms = (end_time - start_time) * 1000
-            return result, exec_time_ms
-        elif func_to_measure: # Si se pasa una función explícita (podría ser un método del conector)
-            start_time = time.perf_counter()
-            result = func_to_measure(*args, **kwargs)
-            end_time = time.perf_counter()
-            exec_time_ms = (end_time - start_time) * 1000
-            return result, exec_time_ms
-        else:
-            raise ValueError(f"No se pudo medir el tiempo para '{operation_name}'. Ni el método existe en el conector ni se proporcionó func_to_measure.")
+        if func_to_measure is None:
+            if not (hasattr(self.connector, operation_name) and callable(getattr(self.connector, operation_name))):
+                raise ValueError(f"No se pudo medir el tiempo para '{operation_name}'. Ni el método existe en el conector ni se proporcionó func_to_measure.")
+            func_to_measure = getattr(self.connector, operation_name)
+        return measure(operation_name, func_to_measure, *args, **kwargs)
 
     # Implementación de métodos específicos para pruebas de rendimiento
-    # Estos llamarán a measure_time con el método correspondiente del conector.
+    # El conector ya mide cada operación y devuelve (resultado, tiempo_ms); volver a medirla
+    # aquí solo añadiría el coste del envoltorio y un segundo nivel de (resultado, tiempo).
     # Los argumentos por defecto vienen del RepositoryPort.
 
     def search_client(self, client_id: int = 1) -> Tuple[Any, float]:
         if not hasattr(self.connector, 'search_client'):
             raise NotImplementedError("El método 'search_client' no está implementado en el conector.")
-        return self.measure_time('search_client', getattr(self.connector, 'search_client'), client_id)
+        with span("DbRepository.search_client", database=self.connector.db_type):
+            return self._captured("search_client", {"client_id": client_id}, lambda: self.connector.search_client(client_id), timed=True)
 
     def search_product(self, product_id: int = 1) -> Tuple[Any, float]:
         if not hasattr(self.connector, 'search_product'):
             raise NotImplementedError("El método 'search_product' no está implementado en el conector.")
-        return self.measure_time('search_product', getattr(self.connector, 'search_product'), product_id)
+        with span("DbRepository.search_product", database=self.connector.db_type):
+            return self._captured("search_product", {"product_id": product_id}, lambda: self.connector.search_product(product_id), timed=True)
 
     def generate_invoice(self, client_id: int = 1, staff_id: int = 1, products_json_str: str = '[{"producto_id": 1, "cantidad": 1}]') -> Tuple[Any, float]:
         # El conector original tiene `generate_invoice` que llama a `sp_generar_factura`.
@@ -148,14 +222,41 @@ class DbRepository(RepositoryPort):
             raise NotImplementedError("El método 'generate_invoice' no está implementado en el conector.")
         
         # El método del conector `generate_invoice` espera (cliente_id, personal_id, productos_json_str)
-        return self.measure_time('generate_invoice', getattr(self.connector, 'generate_invoice'), client_id, staff_id, products_json_str)
+        with span("DbRepository.generate_invoice", database=self.connector.db_type):
+            return self._captured(
+                "generate_invoice",
+                {"client_id": client_id, "staff_id": staff_id, "products_json_str": products_json_str},
+                lambda: self.connector.generate_invoice(client_id, staff_id, products_json_str),
+                timed=True,
+            )
 
     def query_invoice(self, invoice_id: int = 1) -> Tuple[Any, float]:
         if not hasattr(self.connector, 'query_invoice'):
             raise NotImplementedError("El método 'query_invoice' no está implementado en el conector.")
-        return self.measure_time('query_invoice', getattr(self.connector, 'query_invoice'), invoice_id)
+        with span("DbRepository.query_invoice", database=self.connector.db_type):
+            return self._captured("query_invoice", {"invoice_id": invoice_id}, lambda: self.connector.query_invoice(invoice_id), timed=True)
 
     def sales_report(self) -> Tuple[Any, float]:
         if not hasattr(self.connector, 'sales_report'):
             raise NotImplementedError("El método 'sales_report' no está implementado en el conector.")
-        return self.measure_time('sales_report', getattr(self.connector, 'sales_report'))
+        with span("DbRepository.sales_report", database=self.connector.db_type):
+            return self._captured("sales_report", {}, self.connector.sales_report, timed=True)
+
+    def search_clients(self, client_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        client_ids = list(client_ids)
+        with span("DbRepository.search_clients", database=self.connector.db_type, keys=len(client_ids)):
+            return self._captured("search_clients", {"client_ids": client_ids}, lambda: self.connector.search_clients(client_ids), timed=True)
+
+    def search_products(self, product_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        product_ids = list(product_ids)
+        with span("DbRepository.search_products", database=self.connector.db_type, keys=len(product_ids)):
+            return self._captured("search_products", {"product_ids": product_ids}, lambda: self.connector.search_products(product_ids), timed=True)
+
+    def query_invoices(self, invoice_ids: Sequence[int] = (1,)) -> Tuple[Any, float]:
+        invoice_ids = list(invoice_ids)
+        with span("DbRepository.query_invoices", database=self.connector.db_type, keys=len(invoice_ids)):
+            return self._captured("query_invoices", {"invoice_ids": invoice_ids}, lambda: self.connector.query_invoices(invoice_ids), timed=True)
+
+    def explain_operation(self, operation: str) -> Optional[Dict[str, Any]]:
+        with span("DbRepository.explain_operation", database=self.connector.db_type, operation=operation):
+            return self.connector.explain_operation(operation)
@@ -0,0 +1,172 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from application.ports.out.repository_port import RepositoryPort
+from infrastructure.adapters.out.persistence.config.table_definitions import (
+    DECIMAL_PRECISION, DECIMAL_SCALE, TABLE_DEFINITIONS, get_table_definition,
+)
+from infrastructure.adapters.out.persistence.utils.type_coercion import normalize_records
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Extensión de archivo por formato soportado
+FILE_EXTENSIONS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("La librería 'pyarrow' no está instalada. Por favor, instálala (`pip install pyarrow`) para exportar/importar en Arrow o Parquet.")
+    return pyarrow
+
+
+def _format_from_path(path: Path) -> str:
+    for file_format, extension in FILE_EXTENSIONS.items():
+        if path.suffix.lower() == extension:
+            return file_format
+    if path.suffix.lower() in (".feather", ".ipc"):
+        return "arrow"
+    raise ValueError(f"No se pudo deducir el formato del archivo '{path}'. Use .parquet o .arrow.")
+
+
+def table_schema(table_name: str, decimal_as_float: bool = False):
+    """
+    Construye el esquema Arrow de una tabla a partir de TABLE_DEFINITIONS. Los importes
+    se guardan como decimal128(DECIMAL_PRECISION, DECIMAL_SCALE), como en los DDL SQL;
+    con decimal_as_float, como float64 (el tipo canónico de normalize_records).
+    """
+    pa = _require_pyarrow()
+    arrow_types = {
+        "int": pa.int64(),
+        "str": pa.string(),
+        "decimal": pa.float64() if decimal_as_float else pa.decimal128(DECIMAL_PRECISION, DECIMAL_SCALE),
+        "datetime": pa.timestamp("us"),
+    }
+    fields = get_table_definition(table_name)["fields"]
+    return pa.schema([(name, arrow_types.get(field_type, pa.string())) for name, field_type in fields.items()])
+
+
+def _decimals_to_float(batch):
+    # Los conectores reciben los importes como float (Decimal no es serializable en BSON);
+    # los archivos exportados antes de usar decimal128 ya traen float64
+    pa = _require_pyarrow()
+    if not any(pa.types.is_decimal(field.type) for field in batch.schema):
+        return batch
+    schema = pa.schema([
+        (field.name, pa.float64() if pa.types.is_decimal(field.type) else field.type) for field in batch.schema
+    ])
+    return batch.cast(schema)
+
+
+def export_table(repository: RepositoryPort, table_name: str, path: Any, file_format: Optional[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Exporta una tabla a un archivo Parquet o Arrow IPC escribiendo un record batch por
+    cada bloque leído del conector, de modo que nunca se materializa la tabla completa.
+    Devuelve el número de filas exportadas.
+    """
+    pa = _require_pyarrow()
+    path = Path(path)
+    file_format = file_format or _format_from_path(path)
+    schema = table_schema(table_name)
+    # normalize_records entrega los importes como float: se convierten a decimal128 por
+    # columnas, redondeando a DECIMAL_SCALE (falla si no caben en DECIMAL_PRECISION)
+    float_schema = table_schema(table_name, decimal_as_float=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if file_format == "parquet":
+        writer = pa.parquet.ParquetWriter(str(path), schema)
+    elif file_format == "arrow":
+        writer = pa.ipc.new_file(str(path), schema)
+    else:
+        raise ValueError(f"Formato de exportación no soportado: {file_format}")
+
+    total_rows = 0
+    try:
+        for chunk_df in repository.fetch_records_in_chunks(table_name, chunk_size):
+            records = normalize_records(table_name, chunk_df)
+            if not records:
+                continue
+            writer.write_batch(pa.RecordBatch.from_pylist(records, schema=float_schema).cast(schema))
+            total_rows += len(records)
+    finally:
+        writer.close()
+    logger.info("Exportación: %s filas de %s escritas en %s", total_rows, table_name, path)
+    return total_rows
+
+
+def iter_file_batches(path: Any, file_format: Optional[str] = None,
+                      batch_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Lee un archivo Parquet o Arrow IPC por record batches y los devuelve como listas de
+    registros, con los importes decimal128 convertidos a float.
+    """
+    pa = _require_pyarrow()
+    path = Path(path)
+    file_format = file_format or _format_from_path(path)
+
+    if file_format == "parquet":
+        parquet_file = pa.parquet.ParquetFile(str(path))
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield _decimals_to_float(batch).to_pylist()
+    elif file_format == "arrow":
+        # El archivo IPC se mapea en memoria: cada batch se lee sin copiar el resto
+        with pa.memory_map(str(path), "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for start in range(0, batch.num_rows, batch_size):
+                    yield _decimals_to_float(batch.slice(start, batch_size)).to_pylist()
+    else:
+        raise ValueError(f"Formato de importación no soportado: {file_format}")
+
+
+def import_table(repository: RepositoryPort, table_name: str, path: Any, file_format: Optional[str] = None,
+                 batch_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Importa un archivo Parquet o Arrow IPC en una tabla usando la vía masiva del conector
+    (bulk_insert_records), un record batch a la vez. Devuelve el número de filas importadas.
+    """
+    total_rows = 0
+    for records in iter_file_batches(path, file_format, batch_size):
+        if records:
+            total_rows += repository.bulk_insert_records(table_name, records)
+    logger.info("Importación: %s filas cargadas en %s desde %s", total_rows, table_name, path)
+    return total_rows
+
+
+def export_all_tables(repository: RepositoryPort, directory: Any, file_format: str = "parquet",
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """Exporta todas las tablas de TABLE_DEFINITIONS a `directory` (un archivo por tabla)."""
+    directory = Path(directory)
+    extension = FILE_EXTENSIONS[file_format]
+    return {
+        table_name: export_table(repository, table_name, directory / f"{table_name}{extension}", file_format, chunk_size)
+        for table_name in TABLE_DEFINITIONS
+    }
+
+
+def import_all_tables(repository: RepositoryPort, directory: Any, file_format: str = "parquet",
+                      batch_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Importa todas las tablas de TABLE_DEFINITIONS desde `directory`. Se respeta el orden
+    de TABLE_DEFINITIONS para que las claves foráneas apunten a filas ya cargadas.
+    """
+    directory = Path(directory)
+    extension = FILE_EXTENSIONS[file_format]
+    results = {}
+    for table_name in TABLE_DEFINITIONS:
+        path = directory / f"{table_name}{extension}"
+        if not path.exists():
+            logger.info("Importación: no se encontró %s, se omite %s.", path, table_name)
+            continue
+        results[table_name] = import_table(repository, table_name, path, file_format, batch_size)
+    return results
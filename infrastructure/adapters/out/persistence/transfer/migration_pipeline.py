@@ -0,0 +1,226 @@
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from infrastructure.adapters.out.connectors.base_connector import BaseConnector
+from infrastructure.adapters.out.persistence.config.table_definitions import TABLE_DEFINITIONS, get_primary_key
+from infrastructure.adapters.out.persistence.utils.type_coercion import normalize_records
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+_END_OF_TABLE = object()
+
+
+class StageStats:
+    """Filas procesadas y tiempo activo de una etapa del pipeline."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.busy_seconds = 0.0
+
+    def add(self, rows: int, seconds: float) -> None:
+        self.rows += rows
+        self.busy_seconds += seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "rows": self.rows,
+            "busy_s": round(self.busy_seconds, 3),
+            "rows_per_s": round(self.rows_per_second, 1),
+        }
+
+
+class MigrationCheckpoint:
+    """
+    Checkpoint persistente por destino y tabla: guarda la clave primaria de la última
+    fila escrita. El archivo se reescribe de forma atómica tras cada bloque confirmado.
+    """
+
+    def __init__(self, path: Optional[Any] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {}
+        if self.path and self.path.exists():
+            with open(self.path, "r") as f:
+                self._data = json.load(f)
+
+    def get(self, target_name: str, table_name: str) -> Any:
+        with self._lock:
+            return self._data.get(target_name, {}).get(table_name)
+
+    def update(self, target_name: str, table_name: str, last_pk: Any) -> None:
+        with self._lock:
+            self._data.setdefault(target_name, {})[table_name] = last_pk
+            if self.path:
+                tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(self._data, f)
+                tmp_path.replace(self.path)
+
+
+class MigrationPipeline:
+    """
+    Copia todas las tablas de TABLE_DEFINITIONS desde un conector origen hacia uno o
+    varios conectores destino. Un hilo lector recorre el origen por bloques, convierte
+    los tipos al formato canónico de TABLE_DEFINITIONS y reparte cada bloque en colas
+    acotadas; un hilo escritor por destino consume su cola con bulk_insert_records
+    (cada conector adapta los tipos canónicos a su backend).
+    """
+
+    def __init__(self, source: BaseConnector, targets: Dict[str, BaseConnector],
+                 checkpoint_path: Optional[Any] = None, chunk_size: int = 5000,
+                 queue_size: int = 4, tables: Optional[List[str]] = None):
+        if not targets:
+            raise ValueError("Se requiere al menos un conector destino.")
+        self.source = source
+        self.targets = targets
+        self.checkpoint = MigrationCheckpoint(checkpoint_path)
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        # El orden de TABLE_DEFINITIONS respeta las claves foráneas
+        self.tables = tables or list(TABLE_DEFINITIONS.keys())
+        # Las etapas se crean antes de arrancar los hilos para no mutar el dict en paralelo
+        self.stats: Dict[str, StageStats] = {
+            name: StageStats(name) for name in ["read", "convert"] + [f"write:{t}" for t in targets]
+        }
+        self._stop = threading.Event()
+        self._errors: List[str] = []
+
+    def _put(self, q: "queue.Queue", item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_table(self, table_name: str, queues: Dict[str, "queue.Queue"], start_after: Any) -> None:
+        read_stats = self.stats["read"]
+        convert_stats = self.stats["convert"]
+        pk_col = get_primary_key(table_name)
+        chunks = self.source.fetch_records_in_chunks(table_name, self.chunk_size, start_after)
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                chunk_df = next(chunks, None)
+                if chunk_df is None:
+                    break
+                read_stats.add(len(chunk_df), time.perf_counter() - start)
+
+                start = time.perf_counter()
+                records = normalize_records(table_name, chunk_df)
+                convert_stats.add(len(records), time.perf_counter() - start)
+                if not records:
+                    continue
+                last_pk = records[-1].get(pk_col)
+                for q in queues.values():
+                    if not self._put(q, (records, last_pk)):
+                        return
+        except Exception as e:
+            self._errors.append(f"Lectura de {table_name} en {self.source.db_type}: {e}")
+            self._stop.set()
+        finally:
+            chunks.close()
+            for q in queues.values():
+                self._put(q, _END_OF_TABLE)
+
+    def _write_table(self, target_name: str, target: BaseConnector, table_name: str,
+                     q: "queue.Queue", resume_after: Any) -> None:
+        write_stats = self.stats[f"write:{target_name}"]
+        pk_col = get_primary_key(table_name)
+        while True:
+            try:
+                item = q.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _END_OF_TABLE:
+                return
+            records, last_pk = item
+            if resume_after is not None:
+                # Este destino ya había avanzado más que el lector: se descartan las filas
+                # hasta su checkpoint. El origen lee por clave primaria ascendente (ver
+                # migrate_table), así que basta comparar, aunque la fila del checkpoint ya
+                # no exista en el origen.
+                records = [r for r in records if r.get(pk_col) > resume_after]
+                if not records:
+                    continue
+                resume_after = None
+            try:
+                start = time.perf_counter()
+                written = target.bulk_insert_records(table_name, records)
+                write_stats.add(written, time.perf_counter() - start)
+                self.checkpoint.update(target_name, table_name, last_pk)
+            except Exception as e:
+                self._errors.append(f"Escritura de {table_name} en {target_name}: {e}")
+                self._stop.set()
+                return
+
+    def migrate_table(self, table_name: str) -> None:
+        checkpoints = {name: self.checkpoint.get(name, table_name) for name in self.targets}
+        pending = list(checkpoints.values())
+        if len(set(pending)) > 1 and not self.source.CHUNKS_IN_PK_ORDER:
+            # En otro orden de recorrido (el de token de Cassandra) la menor clave primaria
+            # no es el destino más atrasado ni "pk > checkpoint" las filas pendientes
+            self._errors.append(
+                f"Los destinos tienen checkpoints distintos para {table_name} ({checkpoints}) y "
+                f"{self.source.db_type} no lee en orden de clave primaria: no se puede reanudar."
+            )
+            self._stop.set()
+            return
+        # El lector arranca desde el destino más atrasado (menor clave primaria); si alguno
+        # no tiene checkpoint, desde el principio.
+        start_after = None
+        if all(c is not None for c in pending):
+            start_after = min(pending)
+        queues = {name: queue.Queue(maxsize=self.queue_size) for name in self.targets}
+        writers = [
+            threading.Thread(
+                target=self._write_table,
+                args=(name, target, table_name, queues[name],
+                      checkpoints[name] if checkpoints[name] != start_after else None),
+                name=f"migration-writer-{name}",
+                daemon=True,
+            )
+            for name, target in self.targets.items()
+        ]
+        for writer in writers:
+            writer.start()
+        self._read_table(table_name, queues, start_after)
+        for writer in writers:
+            writer.join()
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Ejecuta la migración completa y devuelve las estadísticas por etapa
+        (filas, tiempo activo y filas/s) junto con los errores encontrados.
+        """
+        wall_start = time.perf_counter()
+        for table_name in self.tables:
+            if self._stop.is_set():
+                break
+            logger.info("Copiando %s desde %s hacia %s...", table_name, self.source.db_type, ', '.join(self.targets))
+            self.migrate_table(table_name)
+        wall_seconds = time.perf_counter() - wall_start
+
+        report = {
+            "wall_s": round(wall_seconds, 3),
+            "stages": [stats.as_dict() for stats in self.stats.values()],
+            "errors": list(self._errors),
+        }
+        for stage in report["stages"]:
+            logger.info("Etapa %s: %s filas, %s filas/s", stage['stage'], stage['rows'], stage['rows_per_s'])
+        for error in report["errors"]:
+            logger.error("Error en la migración: %s", error)
+        return report
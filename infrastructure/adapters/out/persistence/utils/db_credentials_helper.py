@@ -58,4 +58,10 @@ def get_db_credentials(db_type: str, host: str, port: str, dbname: str, user: st
             "password": password,
             "database": int(dbname) if dbname else 0 # DB por defecto de Redis
         }
+    elif db_type in ("SQLite", "SQLite+DuckDB"):
+        # Base embebida: solo importa la ruta del fichero (o ":memory:")
+        return {"database": dbname or "multi_spaces.sqlite3"}
+    elif db_type == "InMemory":
+        # Backend simulado: "Base de Datos" es el perfil de latencia (LATENCY_PRESETS)
+        return {"database": dbname or "sin_latencia"}
     return {}
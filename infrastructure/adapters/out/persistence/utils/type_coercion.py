@@ -0,0 +1,95 @@
+from datetime import date, datetime
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+from infrastructure.adapters.out.persistence.config.table_definitions import get_table_definition
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None:
+        return True
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def coerce_value(value: Any, field_type: str) -> Any:
+    """
+    Convierte un valor leído de cualquier backend (tipos NumPy, Decimal, cadenas de Redis...)
+    al tipo nativo de Python que corresponde al tipo declarado en TABLE_DEFINITIONS.
+    """
+    if _is_missing(value):
+        return None
+    if field_type == "int":
+        return int(float(value)) if isinstance(value, str) else int(value)
+    if field_type == "decimal":
+        return float(value)
+    if field_type == "datetime":
+        if isinstance(value, pd.Timestamp):
+            return value.to_pydatetime()
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime.combine(value, datetime.min.time())
+        return pd.to_datetime(value).to_pydatetime()
+    return str(value)
+
+
+def to_driver_value(value: Any) -> Any:
+    """
+    Tipos de pandas / NumPy (lo que devuelve un DataFrame) a nativos de Python que los
+    controladores DB-API aceptan como parámetros. NaN / NaT / None pasan a None.
+    """
+    if _is_missing(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _coerce_column(series: pd.Series, field_type: str) -> np.ndarray:
+    """
+    coerce_value aplicado a una columna entera: las conversiones son vectorizadas y los
+    valores ausentes (None / NaN / NaT) quedan como None. Devuelve un array de objetos
+    con tipos nativos de Python.
+    """
+    missing = series.isna().to_numpy()
+    values = np.full(len(series), None, dtype=object)
+    present = series[~missing]
+    if present.empty:
+        return values
+    if field_type == "int":
+        # to_numeric admite cadenas ("3" / "3.0") y Decimal; int64 trunca como int(float(x))
+        converted = pd.to_numeric(present).to_numpy().astype(np.int64)
+    elif field_type == "decimal":
+        converted = pd.to_numeric(present).to_numpy().astype(np.float64)
+    elif field_type == "datetime":
+        converted = np.asarray(pd.to_datetime(present).dt.to_pydatetime(), dtype=object)
+    else:
+        converted = np.array([str(value) for value in present], dtype=object)
+    # astype(object) convierte los escalares NumPy en int / float de Python
+    values[~missing] = converted.astype(object)
+    return values
+
+
+def normalize_records(table_name: str, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convierte un bloque de registros en una lista de diccionarios con las columnas
+    y tipos de TABLE_DEFINITIONS. Las columnas ausentes se completan con None y las
+    columnas que no forman parte de la definición (ej. '_id' de MongoDB) se descartan.
+    La conversión se hace por columnas (ver _coerce_column), no celda a celda.
+    """
+    fields = get_table_definition(table_name)["fields"]
+    source_columns = {str(col).lower(): col for col in df.columns}
+    columns = []
+    for field_name, field_type in fields.items():
+        source_col = source_columns.get(field_name)
+        if source_col is None:
+            columns.append([None] * len(df))
+        else:
+            columns.append(_coerce_column(df[source_col], field_type).tolist())
+    names = list(fields)
+    return [dict(zip(names, row)) for row in zip(*columns)]
@@ -0,0 +1,285 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from infrastructure.adapters.out.connectors.postgres.postgres_connector import PostgreSQLConnector
+from infrastructure.adapters.out.connectors.redis.redis_connector import RedisConnector
+from infrastructure.adapters.out.persistence.config.table_definitions import TABLE_DEFINITIONS, get_table_definition
+from infrastructure.adapters.out.persistence.utils.type_coercion import normalize_records
+from shared.performance_data import add_performance_metric
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+CDC_DATABASE_LABEL = "PostgreSQL→Redis"
+CDC_LAG_OPERATION = "Lag de replicación CDC"
+CHECKPOINT_KEY = "cdc:postgres:last_change_id"
+SNAPSHOT_QUERY = "SELECT txid_snapshot_xmin(s), txid_snapshot_xmax(s) FROM txid_current_snapshot() AS s"
+
+CHANGE_LOG_DDL = """
+CREATE TABLE IF NOT EXISTS cdc_change_log (
+    change_id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    operation CHAR(1) NOT NULL,
+    record_id INT NOT NULL,
+    row_data JSONB,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE OR REPLACE FUNCTION fn_cdc_capture() RETURNS TRIGGER AS $$
+DECLARE
+    v_pk_col TEXT := TG_ARGV[0];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO cdc_change_log (table_name, operation, record_id, row_data)
+        VALUES (TG_TABLE_NAME, 'D', (to_jsonb(OLD) ->> v_pk_col)::INT, NULL);
+        RETURN OLD;
+    END IF;
+
+    -- Si un UPDATE cambia la clave primaria, la clave anterior desaparece del caché
+    IF TG_OP = 'UPDATE' AND (to_jsonb(OLD) ->> v_pk_col) IS DISTINCT FROM (to_jsonb(NEW) ->> v_pk_col) THEN
+        INSERT INTO cdc_change_log (table_name, operation, record_id, row_data)
+        VALUES (TG_TABLE_NAME, 'D', (to_jsonb(OLD) ->> v_pk_col)::INT, NULL);
+    END IF;
+
+    INSERT INTO cdc_change_log (table_name, operation, record_id, row_data)
+    VALUES (TG_TABLE_NAME, LEFT(TG_OP, 1), (to_jsonb(NEW) ->> v_pk_col)::INT, to_jsonb(NEW));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class PostgresToRedisCDC:
+    """
+    Sincroniza las tablas de PostgreSQL (sistema de registro) hacia el layout de hashes de
+    RedisConnector ("<prefijo>:<id>" con el campo "id"), para que search_client,
+    search_product y query_invoice puedan servirse desde Redis.
+
+    Los cambios se capturan con triggers en una tabla cdc_change_log y se aplican en lotes
+    dentro de un pipeline MULTI/EXEC que también guarda el último change_id aplicado, de modo
+    que el checkpoint y los datos avanzan juntos. Cada cambio reescribe la fila completa,
+    así que reaplicar un lote es idempotente.
+
+    Redis actúa solo como nivel de lectura: las escrituras deben ir a PostgreSQL.
+    """
+
+    def __init__(self, pg_connector: PostgreSQLConnector, redis_connector: RedisConnector,
+                 batch_size: int = 500, poll_interval_s: float = 0.5):
+        self.pg = pg_connector
+        self.redis = redis_connector
+        self.batch_size = batch_size
+        self.poll_interval_s = poll_interval_s
+        self.last_lag_ms: Optional[float] = None
+        self.applied_changes = 0
+        # Barrera de txid para huecos en change_id (ver _consumable_prefix)
+        self._gap_barrier: Optional[int] = None
+
+    def install(self) -> None:
+        """Crea la tabla de cambios, la función de captura y un trigger por tabla."""
+        cursor = self.pg.connection.cursor()
+        try:
+            cursor.execute(CHANGE_LOG_DDL)
+            for table_name, definition in TABLE_DEFINITIONS.items():
+                trigger_name = f"trg_cdc_{table_name.lower()}"
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name} ON {table_name}")
+                cursor.execute(
+                    f"CREATE TRIGGER {trigger_name} AFTER INSERT OR UPDATE OR DELETE ON {table_name} "
+                    f"FOR EACH ROW EXECUTE FUNCTION fn_cdc_capture('{definition['pk']}')"
+                )
+            self.pg.connection.commit()
+            logger.info("Triggers de captura instalados en PostgreSQL.")
+        except Exception as e:
+            self.pg.connection.rollback()
+            logger.error("Error al instalar triggers: %s", e)
+            raise
+        finally:
+            cursor.close()
+
+    def uninstall(self) -> None:
+        """Elimina los triggers de captura (la tabla de cambios se conserva)."""
+        cursor = self.pg.connection.cursor()
+        try:
+            for table_name in TABLE_DEFINITIONS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS trg_cdc_{table_name.lower()} ON {table_name}")
+            self.pg.connection.commit()
+        except Exception:
+            self.pg.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def get_checkpoint(self) -> int:
+        value = self.redis.client.get(CHECKPOINT_KEY)
+        return int(value) if value else 0
+
+    def _current_snapshot(self) -> Tuple[int, int]:
+        """(xmin, xmax) de un snapshot nuevo: txid activo más antiguo y primer txid sin asignar."""
+        cursor = self.pg.connection.cursor()
+        try:
+            cursor.execute(SNAPSHOT_QUERY)
+            xmin, xmax = cursor.fetchone()
+            self.pg.connection.commit()
+            return xmin, xmax
+        finally:
+            cursor.close()
+
+    def _wait_for_transactions(self, barrier: int) -> None:
+        """Espera a que terminen (commit o rollback) todas las transacciones con txid < barrier."""
+        while self._current_snapshot()[0] < barrier:
+            time.sleep(self.poll_interval_s)
+
+    def snapshot(self, chunk_size: int = 10000) -> Dict[str, int]:
+        """
+        Carga inicial: copia todas las tablas a Redis y fija el checkpoint en el último
+        change_id existente antes de la copia. Un change_id menor puede pertenecer a una
+        transacción todavía en curso, así que antes de copiar se espera a que terminen las
+        transacciones activas al leer el máximo: la copia ya incluye sus filas. Los cambios
+        concurrentes con la copia se vuelven a aplicar después, lo que es seguro porque cada
+        cambio trae la fila completa.
+        """
+        cursor = self.pg.connection.cursor()
+        try:
+            cursor.execute("SELECT COALESCE(MAX(change_id), 0) FROM cdc_change_log")
+            start_change_id = cursor.fetchone()[0]
+            cursor.execute(SNAPSHOT_QUERY)
+            _xmin, barrier = cursor.fetchone()
+            self.pg.connection.commit()
+        finally:
+            cursor.close()
+        self._wait_for_transactions(barrier)
+
+        copied = {}
+        for table_name in TABLE_DEFINITIONS:
+            copied[table_name] = 0
+            for chunk_df in self.pg.fetch_records_in_chunks(table_name, chunk_size):
+                copied[table_name] += self.redis.bulk_insert_records(table_name, normalize_records(table_name, chunk_df))
+        self.redis.client.set(CHECKPOINT_KEY, start_change_id)
+        logger.info("Snapshot inicial completado (%s); checkpoint en change_id %s.", copied, start_change_id)
+        return copied
+
+    def _read_changes(self, after_change_id: int):
+        """
+        Lee un lote de cambios entre dos snapshots de txid. En READ COMMITTED cada sentencia
+        ve un snapshot propio, así que:
+        - xmin se toma antes de la lectura: si xmin >= barrera, las transacciones de la
+          barrera ya habían terminado cuando empezó la lectura y sus filas están en ella;
+        - xmax se toma después: cualquier transacción en curso durante la lectura (la que
+          tiene un hueco ya escribió la fila de su tabla, así que tiene txid) es menor.
+        """
+        cursor = self.pg.connection.cursor()
+        try:
+            cursor.execute(SNAPSHOT_QUERY)
+            xmin, _xmax = cursor.fetchone()
+            cursor.execute(
+                """SELECT change_id, table_name, operation, record_id, row_data,
+                          EXTRACT(EPOCH FROM (clock_timestamp() - changed_at)) * 1000
+                   FROM cdc_change_log
+                   WHERE change_id > %s
+                   ORDER BY change_id
+                   LIMIT %s""",
+                (after_change_id, self.batch_size)
+            )
+            rows = cursor.fetchall()
+            cursor.execute(SNAPSHOT_QUERY)
+            _xmin, xmax = cursor.fetchone()
+            self.pg.connection.commit()
+            return rows, xmin, xmax
+        finally:
+            cursor.close()
+
+    def _consumable_prefix(self, rows: List[tuple], last_change_id: int, xmin: int, xmax: int) -> List[tuple]:
+        """
+        change_id sale de una secuencia, que no respeta el orden de commit: un hueco puede ser
+        una transacción todavía en curso o un rollback. Ante un hueco se detiene el consumo y se
+        espera a que todas las transacciones activas en esa lectura terminen (xmin >= barrera,
+        con el xmin tomado antes de la lectura; ver _read_changes); a partir de ahí el hueco es
+        definitivo y se puede saltar.
+        """
+        consumable = []
+        expected = last_change_id + 1
+        for row in rows:
+            change_id = row[0]
+            if change_id == expected:
+                self._gap_barrier = None
+            else:
+                if self._gap_barrier is None:
+                    self._gap_barrier = xmax
+                    break
+                if xmin < self._gap_barrier:
+                    break
+                self._gap_barrier = None
+            consumable.append(row)
+            expected = change_id + 1
+        return consumable
+
+    def _apply(self, changes: List[tuple]) -> None:
+        pipe = self.redis.client.pipeline(transaction=True)
+        for _change_id, table_name, operation, record_id, row_data, _age_ms in changes:
+            definition = get_table_definition(table_name)
+            key = f"{self.redis.key_prefix(table_name)}:{record_id}"
+            pipe.delete(key)
+            if operation != "D" and row_data:
+                mapping = {k: str(v) for k, v in row_data.items() if v is not None and k != definition["pk"]}
+                mapping["id"] = str(record_id)
+                pipe.hset(key, mapping=mapping)
+        pipe.set(CHECKPOINT_KEY, changes[-1][0])
+        pipe.execute()
+
+    def poll_once(self) -> int:
+        """Lee y aplica un lote de cambios. Devuelve el número de cambios aplicados."""
+        last_change_id = self.get_checkpoint()
+        read_start = time.perf_counter()
+        rows, xmin, xmax = self._read_changes(last_change_id)
+        changes = self._consumable_prefix(rows, last_change_id, xmin, xmax)
+        if not changes:
+            return 0
+        self._apply(changes)
+        # Lag = antigüedad del último cambio al leerlo + lo que tardó en aplicarse
+        self.last_lag_ms = float(changes[-1][5]) + (time.perf_counter() - read_start) * 1000
+        self.applied_changes += len(changes)
+        add_performance_metric(CDC_DATABASE_LABEL, CDC_LAG_OPERATION, self.last_lag_ms)
+        return len(changes)
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Bucle de replicación: aplica lotes mientras haya cambios y espera cuando no los hay."""
+        stop_event = stop_event or threading.Event()
+        logger.info("Replicación PostgreSQL → Redis iniciada.")
+        while not stop_event.is_set():
+            try:
+                if self.poll_once() < self.batch_size:
+                    stop_event.wait(self.poll_interval_s)
+            except Exception as e:
+                logger.error("Error durante la replicación: %s", e)
+                stop_event.wait(self.poll_interval_s)
+        logger.info("Replicación detenida (%s cambios aplicados).", self.applied_changes)
+
+    def start_background(self) -> threading.Event:
+        """Arranca run() en un hilo daemon y devuelve el evento para detenerlo."""
+        stop_event = threading.Event()
+        threading.Thread(target=self.run, args=(stop_event,), name="cdc-postgres-redis", daemon=True).start()
+        return stop_event
+
+    def prune_applied(self) -> int:
+        """Elimina de cdc_change_log los cambios ya aplicados en Redis."""
+        cursor = self.pg.connection.cursor()
+        try:
+            cursor.execute("DELETE FROM cdc_change_log WHERE change_id <= %s", (self.get_checkpoint(),))
+            deleted = cursor.rowcount
+            self.pg.connection.commit()
+            return deleted
+        except Exception:
+            self.pg.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def backlog(self) -> int:
+        """Cambios pendientes de aplicar."""
+        cursor = self.pg.connection.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM cdc_change_log WHERE change_id > %s", (self.get_checkpoint(),))
+            count = cursor.fetchone()[0]
+            self.pg.connection.commit()
+            return count
+        finally:
+            cursor.close()
@@ -0,0 +1,139 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+from shared.phase_timing import collect_phases
+from shared.tracing import span
+
+# Fase sintética con el tiempo de CPU del hilo cliente (no forma parte del reparto del total)
+CLIENT_CPU_PHASE = "client_cpu"
+
+
+class Measurement(NamedTuple):
+    """Resultado de la medición más externa: tiempo de pared y de CPU del cliente (ms)."""
+    operation: str
+    wall_ms: float
+    cpu_ms: Optional[float]
+
+
+# Profundidad de mediciones anidadas en el hilo / tarea actual
+_depth: ContextVar[int] = ContextVar("instrumentation_depth", default=0)
+_last_measurement: ContextVar[Optional[Measurement]] = ContextVar("last_measurement", default=None)
+
+_timer_overhead_ns: Optional[int] = None
+
+
+def calibrate_timer_overhead(samples: int = 20_000) -> int:
+    """
+    Mide el coste de dos lecturas consecutivas de perf_counter_ns (mediana, en ns). Es lo
+    que cualquier medición añade por sí misma y se descuenta del tiempo de pared.
+    """
+    global _timer_overhead_ns
+    counter = time.perf_counter_ns
+    deltas = []
+    for _ in range(samples):
+        start = counter()
+        deltas.append(counter() - start)
+    deltas.sort()
+    _timer_overhead_ns = deltas[len(deltas) // 2]
+    return _timer_overhead_ns
+
+
+def timer_overhead_ns() -> int:
+    """Sobrecoste del temporizador; se calibra la primera vez que se pide."""
+    if _timer_overhead_ns is None:
+        return calibrate_timer_overhead()
+    return _timer_overhead_ns
+
+
+def _wall_ms(elapsed_ns: int) -> float:
+    return max(0, elapsed_ns - timer_overhead_ns()) / 1e6
+
+
+def measure(operation_name: str, func: Callable, *args: Any, **kwargs: Any) -> Tuple[Any, float]:
+    """
+    Ejecuta func y devuelve (resultado, tiempo_ms) con perf_counter_ns, descontando el
+    sobrecoste del temporizador. Solo la medición más externa registra el tiempo de CPU
+    del hilo y publica get_last_measurement(); las anidadas (p. ej. execute_sp dentro de
+    generate_invoice) solo cronometran, para no contar dos veces ni pagar dos veces el coste.
+    """
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    try:
+        with span(operation_name):
+            return _measure(operation_name, depth, func, *args, **kwargs)
+    finally:
+        _depth.reset(token)
+
+
+def _measure(operation_name: str, depth: int, func: Callable, *args: Any, **kwargs: Any) -> Tuple[Any, float]:
+    if depth:
+        start = time.perf_counter_ns()
+        result = func(*args, **kwargs)
+        return result, _wall_ms(time.perf_counter_ns() - start)
+
+    with collect_phases():
+        cpu_start = time.thread_time_ns()
+        start = time.perf_counter_ns()
+        result = func(*args, **kwargs)
+        elapsed_ns = time.perf_counter_ns() - start
+        cpu_ns = time.thread_time_ns() - cpu_start
+    wall_ms = _wall_ms(elapsed_ns)
+    _last_measurement.set(Measurement(operation_name, wall_ms, cpu_ns / 1e6))
+    return result, wall_ms
+
+
+async def measure_async(operation_name: str, func: Callable, *args: Any, **kwargs: Any) -> Tuple[Any, float]:
+    """
+    Versión para corrutinas de measure(). No registra CPU: mientras la corrutina espera,
+    el hilo ejecuta otras tareas y thread_time no se podría atribuir a esta operación.
+    """
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    try:
+        with span(operation_name):
+            if depth:
+                start = time.perf_counter_ns()
+                result = await func(*args, **kwargs)
+                return result, _wall_ms(time.perf_counter_ns() - start)
+
+            # Las variables de contexto son por tarea: las fases de corrutinas concurrentes no se mezclan
+            with collect_phases():
+                start = time.perf_counter_ns()
+                result = await func(*args, **kwargs)
+                elapsed_ns = time.perf_counter_ns() - start
+            wall_ms = _wall_ms(elapsed_ns)
+            _last_measurement.set(Measurement(operation_name, wall_ms, None))
+            return result, wall_ms
+    finally:
+        _depth.reset(token)
+
+
+def instrumented(operation_name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorador: el método decorado devuelve su resultado sin más y la versión envuelta
+    devuelve (resultado, tiempo_ms) medido con measure() / measure_async().
+    """
+    def decorator(func: Callable) -> Callable:
+        name = operation_name or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Tuple[Any, float]:
+                return await measure_async(name, func, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Tuple[Any, float]:
+            return measure(name, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def reset_last_measurement() -> None:
+    _last_measurement.set(None)
+
+
+def get_last_measurement() -> Optional[Measurement]:
+    """Última medición externa terminada en el hilo o tarea actual (None si no hubo)."""
+    return _last_measurement.get()
@@ -0,0 +1,138 @@
+import math
+from typing import Any, Dict, Iterable, Sequence
+import numpy as np
+
+# Rango cubierto: de 1 µs a 1 hora, con un error relativo máximo del 1% por valor
+MIN_TRACKABLE_MS = 0.001
+MAX_TRACKABLE_MS = 3_600_000.0
+RELATIVE_PRECISION = 0.01
+
+_LOG_BASE = math.log1p(RELATIVE_PRECISION)
+BUCKET_COUNT = int(math.ceil(math.log(MAX_TRACKABLE_MS / MIN_TRACKABLE_MS) / _LOG_BASE)) + 1
+
+
+def _bucket_index(values_ms: np.ndarray) -> np.ndarray:
+    clipped = np.clip(values_ms, MIN_TRACKABLE_MS, MAX_TRACKABLE_MS)
+    return np.floor(np.log(clipped / MIN_TRACKABLE_MS) / _LOG_BASE).astype(np.int64)
+
+
+def _bucket_value(index: np.ndarray) -> np.ndarray:
+    # Punto medio geométrico del cubo: error relativo <= RELATIVE_PRECISION / 2
+    return MIN_TRACKABLE_MS * np.exp((index + 0.5) * _LOG_BASE)
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias con cubos logarítmicos (estilo HDR) sobre un array de NumPy.
+    Ocupa memoria fija sin importar cuántas muestras se registren, se fusiona sumando
+    contadores (entre hilos o procesos) y responde percentiles en O(cubos).
+    Los tiempos negativos (convención -1.0 de error en el almacén) se cuentan como errores.
+    """
+    def __init__(self):
+        self.counts = np.zeros(BUCKET_COUNT, dtype=np.int64)
+        self.total_count = 0
+        self.error_count = 0
+        self.sum_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = -math.inf
+
+    def record(self, value_ms: float) -> None:
+        if value_ms < 0:
+            self.error_count += 1
+            return
+        index = int(math.log(min(max(value_ms, MIN_TRACKABLE_MS), MAX_TRACKABLE_MS) / MIN_TRACKABLE_MS) / _LOG_BASE)
+        self.counts[index] += 1
+        self.total_count += 1
+        self.sum_ms += value_ms
+        if value_ms < self.min_ms:
+            self.min_ms = value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def record_many(self, values_ms: Iterable[float]) -> None:
+        """Registro vectorizado de un lote de muestras."""
+        values = np.asarray(values_ms if isinstance(values_ms, np.ndarray) else list(values_ms), dtype=np.float64)
+        if values.size == 0:
+            return
+        valid = values[values >= 0]
+        self.error_count += int(values.size - valid.size)
+        if valid.size == 0:
+            return
+        self.counts += np.bincount(_bucket_index(valid), minlength=BUCKET_COUNT)
+        self.total_count += int(valid.size)
+        self.sum_ms += float(valid.sum())
+        self.min_ms = min(self.min_ms, float(valid.min()))
+        self.max_ms = max(self.max_ms, float(valid.max()))
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Suma los contadores de otro histograma en este y lo devuelve."""
+        self.counts += other.counts
+        self.total_count += other.total_count
+        self.error_count += other.error_count
+        self.sum_ms += other.sum_ms
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+        return self
+
+    @property
+    def mean_ms(self) -> float:
+        return self.sum_ms / self.total_count if self.total_count else float("nan")
+
+    def percentiles(self, percents: Sequence[float]) -> np.ndarray:
+        """Percentiles (0-100) aproximados con el error relativo del cubo."""
+        if self.total_count == 0:
+            return np.full(len(percents), np.nan)
+        cumulative = np.cumsum(self.counts)
+        ranks = np.ceil(np.asarray(percents, dtype=np.float64) / 100.0 * self.total_count).clip(1, self.total_count)
+        values = _bucket_value(np.searchsorted(cumulative, ranks))
+        return np.clip(values, self.min_ms, self.max_ms)
+
+    def percentile(self, percent: float) -> float:
+        return float(self.percentiles([percent])[0])
+
+    def cumulative_counts(self, bounds_ms: Sequence[float]) -> np.ndarray:
+        """
+        Número de muestras <= cada límite (en orden creciente), p. ej. para los cubos
+        "le" de Prometheus. El cubo que contiene el límite cuenta entero: error relativo
+        del propio cubo.
+        """
+        cumulative = np.cumsum(self.counts)
+        return cumulative[_bucket_index(np.asarray(bounds_ms, dtype=np.float64))]
+
+    def summary(self) -> Dict[str, float]:
+        p50, p90, p95, p99, p999 = (float(v) for v in self.percentiles([50, 90, 95, 99, 99.9]))
+        return {
+            "count": self.total_count,
+            "errors": self.error_count,
+            "mean_ms": self.mean_ms,
+            "min_ms": self.min_ms if self.total_count else float("nan"),
+            "p50_ms": p50,
+            "p90_ms": p90,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "p999_ms": p999,
+            "max_ms": self.max_ms if self.total_count else float("nan"),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forma compacta y serializable (solo cubos no vacíos) para enviar entre procesos."""
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            "buckets": nonzero.tolist(),
+            "counts": self.counts[nonzero].tolist(),
+            "errors": self.error_count,
+            "sum_ms": self.sum_ms,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts[np.asarray(data["buckets"], dtype=np.int64)] = np.asarray(data["counts"], dtype=np.int64)
+        histogram.total_count = int(histogram.counts.sum())
+        histogram.error_count = int(data.get("errors", 0))
+        histogram.sum_ms = float(data["sum_ms"])
+        histogram.min_ms = float(data["min_ms"])
+        histogram.max_ms = float(data["max_ms"])
+        return histogram
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Tuple
+from shared.latency_histogram import LatencyHistogram
+from shared.performance_data import TOTAL_PHASE, add_performance_metrics_batch
+
+MetricRow = Tuple[str, str, str, float]
+
+
+class MetricsRecorder:
+    """
+    Registro de métricas para benchmarks concurrentes. Cada hilo escribe en su propio
+    búfer (un deque: append y popleft son atómicos, sin lock en la ruta caliente) y los
+    búferes se vuelcan por lotes al agregador central. Cada muestra viaja como una sola
+    tupla (base de datos, operación, fase, tiempo_ms), así que las columnas no pueden
+    desalinearse.
+    """
+    def __init__(self, flush_size: int = 4096, sink: Callable[[Iterable[MetricRow]], None] = add_performance_metrics_batch):
+        self.flush_size = flush_size
+        self.sink = sink
+        self._local = threading.local()
+        self._registry_lock = threading.Lock()
+        self._buffers: List[Tuple[threading.Thread, deque]] = []
+
+    def _new_buffer(self) -> deque:
+        buffer = deque()
+        self._local.buffer = buffer
+        with self._registry_lock:
+            self._buffers.append((threading.current_thread(), buffer))
+        return buffer
+
+    def record(self, database: str, operation: str, time_ms: float, phase: str = TOTAL_PHASE) -> None:
+        """Registra una muestra en el búfer del hilo actual."""
+        try:
+            buffer = self._local.buffer
+        except AttributeError:
+            buffer = self._new_buffer()
+        buffer.append((database, operation, phase, time_ms))
+        if len(buffer) >= self.flush_size:
+            self._drain(buffer)
+
+    def _drain(self, buffer: deque) -> int:
+        # popleft es atómico: otro hilo puede estar drenando el mismo búfer sin perder ni duplicar filas
+        rows = []
+        try:
+            while True:
+                rows.append(buffer.popleft())
+        except IndexError:
+            pass
+        if rows:
+            self.sink(rows)
+        return len(rows)
+
+    def flush(self) -> int:
+        """Vuelca los búferes de todos los hilos y descarta los de hilos ya terminados."""
+        with self._registry_lock:
+            buffers = list(self._buffers)
+        flushed = sum(self._drain(buffer) for _thread, buffer in buffers)
+        with self._registry_lock:
+            self._buffers = [(thread, buffer) for thread, buffer in self._buffers if thread.is_alive() or buffer]
+        return flushed
+
+    def discard(self) -> None:
+        """Vacía los búferes sin volcarlos (p. ej. al limpiar los resultados)."""
+        with self._registry_lock:
+            for _thread, buffer in self._buffers:
+                buffer.clear()
+
+    def pending(self) -> int:
+        with self._registry_lock:
+            return sum(len(buffer) for _thread, buffer in self._buffers)
+
+
+# Instancia compartida por los servicios de benchmark
+METRICS_RECORDER = MetricsRecorder()
+
+
+def record_metric(database: str, operation: str, time_ms: float, phase: str = TOTAL_PHASE) -> None:
+    """Atajo a METRICS_RECORDER.record."""
+    METRICS_RECORDER.record(database, operation, time_ms, phase)
+
+
+def measure_recording_overhead(samples: int = 200_000, threads: int = 1) -> Dict[str, float]:
+    """
+    Mide el coste por muestra de record() (ruta caliente, sin agregación) y el coste
+    amortizado del volcado a histogramas, con un recorder privado que no toca el almacén.
+    """
+    def _histogram_sink(rows: Iterable[MetricRow]) -> None:
+        grouped: Dict[Tuple[str, str, str], List[float]] = {}
+        for database, operation, phase, time_ms in rows:
+            grouped.setdefault((database, operation, phase), []).append(time_ms)
+        for values in grouped.values():
+            LatencyHistogram().record_many(values)
+
+    def _run(recorder: MetricsRecorder, per_thread: int) -> None:
+        record = recorder.record
+        for _ in range(per_thread):
+            record("bench", "overhead", 1.0)
+
+    per_thread = samples // threads
+    measurements = {}
+    for label, sink in (("record_ns", lambda rows: None), ("record_and_flush_ns", _histogram_sink)):
+        recorder = MetricsRecorder(sink=sink)
+        workers = [threading.Thread(target=_run, args=(recorder, per_thread)) for _ in range(threads)]
+        # Tiempo de pared sobre el total de muestras: con el GIL los hilos se alternan,
+        # así que es el coste real por muestra y no incluye esperas por el GIL
+        start = time.perf_counter_ns()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        recorder.flush()
+        measurements[label] = (time.perf_counter_ns() - start) / (per_thread * threads)
+    return measurements
@@ -1,23 +1,148 @@
 # facturacion_app/shared/performance_data.py
+import random
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from shared.latency_histogram import LatencyHistogram
 
-PERFORMANCE_DATA_STORE = {
-    'database': [],
-    'operation': [],
-    'time_ms': []
-}
+# Fase por defecto: la latencia total de la operación
+TOTAL_PHASE = "total"
 
-def add_performance_metric(database: str, operation: str, time_ms: float):
+# Muestras crudas conservadas por (base de datos, operación, fase); 0 desactiva el reservorio
+DEFAULT_RESERVOIR_SIZE = 1000
+
+MetricKey = Tuple[str, str, str]
+
+# Histogramas por (base de datos, operación, fase): memoria fija sin importar el número de muestras
+PERFORMANCE_HISTOGRAMS: Dict[MetricKey, LatencyHistogram] = {}
+
+# Último plan de ejecución capturado por (base de datos, operación) en modo explain
+QUERY_PLANS: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+# Protege histogramas y reservorios: cada muestra se registra completa o no se registra
+_STORE_LOCK = threading.Lock()
+
+
+class SampleReservoir:
+    """Muestreo de reservorio (algoritmo R): una muestra uniforme y acotada de los valores vistos."""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.samples: List[float] = []
+        self.seen = 0
+
+    def add(self, value: float) -> None:
+        self.seen += 1
+        if len(self.samples) < self.capacity:
+            self.samples.append(value)
+            return
+        slot = random.randrange(self.seen)
+        if slot < self.capacity:
+            self.samples[slot] = value
+
+
+PERFORMANCE_RESERVOIRS: Dict[MetricKey, SampleReservoir] = {}
+_reservoir_size = DEFAULT_RESERVOIR_SIZE
+
+
+def set_reservoir_size(size: int) -> None:
+    """Fija el tamaño del reservorio de muestras crudas para las claves nuevas (0 lo desactiva)."""
+    global _reservoir_size
+    _reservoir_size = max(0, int(size))
+
+
+def _histogram_for(key: MetricKey) -> LatencyHistogram:
+    histogram = PERFORMANCE_HISTOGRAMS.get(key)
+    if histogram is None:
+        histogram = PERFORMANCE_HISTOGRAMS[key] = LatencyHistogram()
+    return histogram
+
+
+def _reservoir_for(key: MetricKey) -> SampleReservoir:
+    reservoir = PERFORMANCE_RESERVOIRS.get(key)
+    if reservoir is None:
+        reservoir = PERFORMANCE_RESERVOIRS[key] = SampleReservoir(_reservoir_size)
+    return reservoir
+
+
+def add_performance_metric(database: str, operation: str, time_ms: float, phase: str = TOTAL_PHASE):
     """Agrega una nueva métrica de rendimiento al almacén."""
-    PERFORMANCE_DATA_STORE['database'].append(database)
-    PERFORMANCE_DATA_STORE['operation'].append(operation)
-    PERFORMANCE_DATA_STORE['time_ms'].append(time_ms)
+    key = (database, operation, phase)
+    with _STORE_LOCK:
+        _histogram_for(key).record(time_ms)
+        if _reservoir_size:
+            _reservoir_for(key).add(time_ms)
+
+
+def add_performance_metrics_batch(rows: Iterable[Tuple[str, str, str, float]]):
+    """
+    Agrega un lote de filas (base de datos, operación, fase, tiempo_ms) con una sola toma
+    del lock; las muestras de cada clave se registran de forma vectorizada.
+    """
+    grouped: Dict[MetricKey, List[float]] = defaultdict(list)
+    for database, operation, phase, time_ms in rows:
+        grouped[(database, operation, phase)].append(time_ms)
+    with _STORE_LOCK:
+        for key, values in grouped.items():
+            _histogram_for(key).record_many(values)
+            if _reservoir_size:
+                reservoir = _reservoir_for(key)
+                for value in values:
+                    reservoir.add(value)
+
+
+def add_performance_histogram(database: str, operation: str, histogram: LatencyHistogram, phase: str = TOTAL_PHASE):
+    """Fusiona un histograma de latencias en el almacén."""
+    with _STORE_LOCK:
+        _histogram_for((database, operation, phase)).merge(histogram)
+
+
+def get_performance_data_store(phase: str = TOTAL_PHASE) -> dict:
+    """
+    Devuelve las muestras crudas del reservorio para una fase, en el formato de columnas
+    {'database', 'operation', 'time_ms'}.
+    """
+    data = {'database': [], 'operation': [], 'time_ms': []}
+    with _STORE_LOCK:
+        reservoirs = [(key, list(reservoir.samples)) for key, reservoir in PERFORMANCE_RESERVOIRS.items()]
+    for (database, operation, key_phase), samples in reservoirs:
+        if key_phase != phase:
+            continue
+        data['database'].extend([database] * len(samples))
+        data['operation'].extend([operation] * len(samples))
+        data['time_ms'].extend(samples)
+    return data
+
+
+def get_performance_histograms() -> Dict[MetricKey, LatencyHistogram]:
+    """Devuelve los histogramas de latencia por (base de datos, operación, fase)."""
+    return PERFORMANCE_HISTOGRAMS
+
+
+def get_performance_summary(phase: Optional[str] = TOTAL_PHASE) -> List[Dict[str, Any]]:
+    """Resumen (conteo, errores, media, percentiles) por clave; phase=None incluye todas las fases."""
+    rows = []
+    with _STORE_LOCK:
+        for (database, operation, key_phase), histogram in PERFORMANCE_HISTOGRAMS.items():
+            if phase is not None and key_phase != phase:
+                continue
+            rows.append({"database": database, "operation": operation, "phase": key_phase, **histogram.summary()})
+    return rows
+
+
+def add_query_plan(database: str, operation: str, plan: Dict[str, Any]):
+    """Guarda el plan de ejecución de una operación junto a sus métricas (reemplaza el anterior)."""
+    with _STORE_LOCK:
+        QUERY_PLANS[(database, operation)] = {"database": database, "operation": operation, **plan}
+
+
+def get_query_plans() -> Dict[Tuple[str, str], Dict[str, Any]]:
+    with _STORE_LOCK:
+        return dict(QUERY_PLANS)
 
-def get_performance_data_store() -> dict:
-    """Devuelve el almacén de datos de rendimiento."""
-    return PERFORMANCE_DATA_STORE
 
 def clear_performance_data():
     """Limpia los datos de rendimiento almacenados."""
-    PERFORMANCE_DATA_STORE['database'].clear()
-    PERFORMANCE_DATA_STORE['operation'].clear()
-    PERFORMANCE_DATA_STORE['time_ms'].clear()
+    with _STORE_LOCK:
+        PERFORMANCE_HISTOGRAMS.clear()
+        PERFORMANCE_RESERVOIRS.clear()
+        QUERY_PLANS.clear()
@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from shared.tracing import span
+
+# Fases de una operación, en el orden en que ocurren
+POOL_WAIT = "pool_wait"          # espera para obtener una conexión del pool
+EXECUTE = "execute"              # envío de la consulta y ejecución en el servidor
+FETCH = "fetch"                  # lectura de filas desde el driver
+MATERIALIZE = "materialize"      # deserialización / construcción de dicts o DataFrames
+COMMIT = "commit"                # confirmación de la transacción
+OTHER = "other"                  # resto del tiempo total no cubierto por las fases anteriores
+
+PHASES = (POOL_WAIT, EXECUTE, FETCH, MATERIALIZE, COMMIT)
+
+# Fases de la operación en curso (None fuera de una operación medida)
+_current_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("current_phases", default=None)
+# Fases de la última operación terminada en este hilo / tarea
+_last_phases: ContextVar[Dict[str, float]] = ContextVar("last_phases", default={})
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Acumula en la operación en curso el tiempo del bloque bajo la fase indicada (ms)."""
+    phases = _current_phases.get()
+    if phases is None:
+        with span(name):
+            yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        # Con el trazado activo cada fase es también un span hijo de la operación
+        with span(name):
+            yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter_ns() - start) / 1e6
+
+
+@contextmanager
+def collect_phases() -> Iterator[Dict[str, float]]:
+    """
+    Abre la recolección de fases de una operación. Es reentrante: una recolección anidada
+    (p. ej. DbRepository sobre el conector) comparte el diccionario de la exterior, y solo
+    la más externa publica el resultado en get_last_phases().
+    """
+    phases = _current_phases.get()
+    if phases is not None:
+        yield phases
+        return
+    phases = {}
+    token = _current_phases.set(phases)
+    try:
+        yield phases
+    finally:
+        _current_phases.reset(token)
+        _last_phases.set(phases)
+
+
+def reset_last_phases() -> None:
+    """Olvida las fases publicadas (para no atribuir fases antiguas a una operación sin instrumentar)."""
+    _last_phases.set({})
+
+
+def get_last_phases() -> Dict[str, float]:
+    """Fases (ms) de la última operación medida en el hilo o tarea actual."""
+    return dict(_last_phases.get())
+
+
+def with_other_phase(phases: Dict[str, float], total_ms: float) -> Dict[str, float]:
+    """Añade la fase OTHER: tiempo total menos la suma de las fases medidas."""
+    breakdown = dict(phases)
+    breakdown[OTHER] = max(0.0, total_ms - sum(phases.values()))
+    return breakdown
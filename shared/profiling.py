@@ -0,0 +1,130 @@
+import cProfile
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Directorio por defecto de los ficheros .prof y de los informes de asignaciones
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_TOP_N = 20
+# Marcos guardados por asignación: suficiente para ver quién llama al driver o a pandas
+TRACEMALLOC_FRAMES = 10
+
+# Último informe por (base de datos, operación)
+PROFILE_REPORTS: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_REPORTS_LOCK = threading.Lock()
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_").lower()
+
+
+def _function_label(func_key: Tuple[str, int, str]) -> str:
+    filename, line, name = func_key
+    if filename == "~":
+        # Funciones built-in: pstats las guarda con fichero "~"
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def _top_functions(profiler: cProfile.Profile, top_n: int) -> List[Dict[str, Any]]:
+    """Funciones ordenadas por tiempo propio (sin contar las funciones a las que llaman)."""
+    stats = pstats.Stats(profiler).stats
+    rows = [
+        {
+            "function": _function_label(func_key),
+            "calls": total_calls,
+            "self_ms": self_time * 1000,
+            "cumulative_ms": cumulative_time * 1000,
+        }
+        for func_key, (_primitive_calls, total_calls, self_time, cumulative_time, _callers) in stats.items()
+    ]
+    rows.sort(key=lambda row: row["self_ms"], reverse=True)
+    return rows[:top_n]
+
+
+def _top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top_n: int) -> List[Dict[str, Any]]:
+    """Líneas que más memoria han dejado asignada entre las dos instantáneas."""
+    ignore = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    )
+    differences = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return [
+        {
+            "location": f"{os.path.basename(diff.traceback[0].filename)}:{diff.traceback[0].lineno}",
+            "size_kb": diff.size_diff / 1024,
+            "count": diff.count_diff,
+        }
+        for diff in differences[:top_n]
+    ]
+
+
+@contextmanager
+def profile_block(database: str, operation: str, output_dir: str = DEFAULT_PROFILE_DIR,
+                  top_n: int = DEFAULT_TOP_N) -> Iterator[Dict[str, Any]]:
+    """
+    Perfila el bloque con cProfile (tiempo por función) y tracemalloc (asignaciones y pico
+    de memoria). Al salir guarda el .prof y el informe de asignaciones en output_dir,
+    completa el diccionario entregado y lo publica en PROFILE_REPORTS.
+
+    Los tiempos medidos dentro del bloque están inflados por el propio perfilado: no se
+    deben mezclar con los del benchmark normal.
+    """
+    report: Dict[str, Any] = {"database": database, "operation": operation}
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.join(output_dir, f"{_slug(database)}_{_slug(operation)}_{time.strftime('%Y%m%d_%H%M%S')}")
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    start = time.perf_counter_ns()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        wall_ms = (time.perf_counter_ns() - start) / 1e6
+        _current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+
+        top_allocations = _top_allocations(before, after, top_n)
+        prof_path = f"{base_name}.prof"
+        profiler.dump_stats(prof_path)
+        alloc_path = f"{base_name}_alloc.txt"
+        with open(alloc_path, "w", encoding="utf-8") as alloc_file:
+            alloc_file.write(f"{database} - {operation}: pico de memoria {peak / 1024:.1f} KiB\n")
+            for row in top_allocations:
+                alloc_file.write(f"{row['location']}: {row['size_kb']:+.1f} KiB ({row['count']:+d} bloques)\n")
+
+        report.update({
+            "wall_ms": wall_ms,
+            "peak_memory_kb": peak / 1024,
+            "top_functions": _top_functions(profiler, top_n),
+            "top_allocations": top_allocations,
+            "prof_path": prof_path,
+            "alloc_path": alloc_path,
+        })
+        with _REPORTS_LOCK:
+            PROFILE_REPORTS[(database, operation)] = report
+
+
+def get_profile_reports() -> Dict[Tuple[str, str], Dict[str, Any]]:
+    with _REPORTS_LOCK:
+        return dict(PROFILE_REPORTS)
+
+
+def clear_profile_reports() -> None:
+    with _REPORTS_LOCK:
+        PROFILE_REPORTS.clear()
@@ -0,0 +1,218 @@
+import functools
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Spans terminados que se conservan (los más antiguos se descartan)
+DEFAULT_MAX_SPANS = 10_000
+
+
+class Span:
+    """
+    Intervalo con nombre dentro de una traza. Los identificadores siguen el formato de
+    OpenTelemetry (trace_id de 16 bytes y span_id de 8, en hexadecimal) para poder
+    correlacionarlos con otras herramientas.
+    """
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "thread_id")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.status = "ok"
+        self.thread_id = threading.get_ident()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": dict(self.attributes),
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_enabled = False
+_finished: Deque[Span] = deque(maxlen=DEFAULT_MAX_SPANS)
+
+
+class _SpanContext:
+    """Gestor de contexto de un span activo (clase y no generador: es más barato en la ruta caliente)."""
+    __slots__ = ("_span", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self._span = Span(name, _current_span.get(), attributes)
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._span.end_ns = time.perf_counter_ns()
+        if exc is not None:
+            self._span.status = "error"
+            self._span.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        # deque.append es atómico: no hace falta lock entre hilos
+        _finished.append(self._span)
+        return False
+
+
+class _NoopSpanContext:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpanContext()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Abre un span hijo del span activo (o raíz de una traza nueva). Con el trazado
+    desactivado devuelve un contexto vacío compartido, sin crear objetos.
+    """
+    if not _enabled:
+        return _NOOP
+    return _SpanContext(name, attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorador que envuelve cada llamada (síncrona o corrutina) en un span."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def enable_tracing(max_spans: int = DEFAULT_MAX_SPANS) -> None:
+    global _enabled, _finished
+    if _finished.maxlen != max_spans:
+        _finished = deque(_finished, maxlen=max_spans)
+    _enabled = True
+
+
+def disable_tracing() -> None:
+    global _enabled
+    _enabled = False
+
+
+def tracing_enabled() -> bool:
+    return _enabled
+
+
+def get_finished_spans(trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Spans terminados (todos o los de una traza), en orden de inicio."""
+    spans = [s for s in list(_finished) if trace_id is None or s.trace_id == trace_id]
+    spans.sort(key=lambda s: s.start_ns)
+    return [s.to_dict() for s in spans]
+
+
+def clear_spans() -> None:
+    _finished.clear()
+
+
+def last_trace_id(root_name: Optional[str] = None) -> Optional[str]:
+    """Traza de la última raíz terminada (opcionalmente con ese nombre)."""
+    for s in reversed(list(_finished)):
+        if s.parent_id is None and (root_name is None or s.name == root_name):
+            return s.trace_id
+    return None
+
+
+def span_tree(trace_id: str) -> List[Dict[str, Any]]:
+    """Spans de una traza en orden de árbol (padre antes que hijos) con su profundidad."""
+    spans = get_finished_spans(trace_id)
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    known_ids = {s["span_id"] for s in spans}
+    for s in spans:
+        # Un padre descartado por el límite del búfer convierte al hijo en raíz
+        parent_id = s["parent_id"] if s["parent_id"] in known_ids else None
+        children.setdefault(parent_id, []).append(s)
+
+    ordered = []
+
+    def _walk(parent_id: Optional[str], depth: int) -> None:
+        for s in children.get(parent_id, []):
+            ordered.append({**s, "depth": depth})
+            _walk(s["span_id"], depth + 1)
+
+    _walk(None, 0)
+    return ordered
+
+
+def to_chrome_trace(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Formato Trace Event de Chrome (chrome://tracing, Perfetto): eventos completos "X" con
+    marca y duración en microsegundos, un hilo por traza para que el anidamiento se vea.
+    """
+    if not spans:
+        return {"traceEvents": [], "displayTimeUnit": "ms"}
+    origin_ns = min(s["start_ns"] for s in spans)
+    trace_tids: Dict[str, int] = {}
+    events = []
+    for s in spans:
+        tid = trace_tids.setdefault(s["trace_id"], len(trace_tids) + 1)
+        end_ns = s["end_ns"] if s["end_ns"] is not None else s["start_ns"]
+        events.append({
+            "name": s["name"],
+            "cat": s["status"],
+            "ph": "X",
+            "ts": (s["start_ns"] - origin_ns) / 1000,
+            "dur": (end_ns - s["start_ns"]) / 1000,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": {**s["attributes"], "trace_id": s["trace_id"], "span_id": s["span_id"], "parent_id": s["parent_id"]},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path: str, trace_id: Optional[str] = None) -> int:
+    """Escribe los spans (todos o los de una traza) en un JSON de Chrome trace; devuelve cuántos."""
+    spans = get_finished_spans(trace_id)
+    with open(path, "w", encoding="utf-8") as trace_file:
+        json.dump(to_chrome_trace(spans), trace_file, default=str)
+    return len(spans)
@@ -0,0 +1,115 @@
+import gzip
+import json
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Optional
+import numpy as np
+from shared.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Directorio por defecto de las capturas (como profiles/, no se versiona)
+DEFAULT_CAPTURE_DIR = "captures"
+CAPTURE_FORMAT_VERSION = 1
+# Líneas acumuladas antes de escribir: el registro no paga una escritura por llamada
+FLUSH_EVERY = 256
+
+
+def _json_default(value: Any) -> Any:
+    """Tipos que llegan desde pandas / NumPy / los controladores y json no sabe serializar."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def _open(path: str, mode: str):
+    # .gz: cada apertura en modo "a" añade un miembro gzip, que se lee como un único flujo
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class CaptureWriter:
+    """
+    Fichero de captura de solo anexado, una línea JSON por llamada con claves cortas:
+    "t" (inicio, segundos epoch), "op", "a" (argumentos), "ms" (latencia medida por el
+    conector, si la hay), "id" (clave creada por una escritura) y "err". La primera línea
+    de cada sesión es una cabecera con la base de datos y la versión del formato.
+    """
+    def __init__(self, path: str, database: str):
+        self.path = path
+        self.database = database
+        self.count = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._file = _open(path, "a")
+        self._file.write(_dumps({"capture": CAPTURE_FORMAT_VERSION, "database": database, "started": time.time()}) + "\n")
+        self._file.flush()
+
+    def write(self, operation: str, args: Dict[str, Any], started: float, latency_ms: Optional[float] = None,
+              created_id: Any = None, error: Optional[str] = None) -> None:
+        entry = {"t": started, "op": operation, "a": args}
+        if latency_ms is not None:
+            entry["ms"] = latency_ms
+        if created_id is not None:
+            entry["id"] = created_id
+        if error is not None:
+            entry["err"] = error
+        line = _dumps(entry)
+        with self._lock:
+            if self._file is None:
+                return
+            self._pending.append(line)
+            self.count += 1
+            if len(self._pending) >= FLUSH_EVERY:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._pending:
+            self._file.write("\n".join(self._pending) + "\n")
+            self._file.flush()
+            self._pending = []
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._flush_locked()
+
+    def close(self) -> int:
+        """Escribe lo pendiente y cierra; devuelve cuántas llamadas se capturaron."""
+        with self._lock:
+            if self._file is not None:
+                self._flush_locked()
+                self._file.close()
+                self._file = None
+        logger.info("Captura cerrada: %s llamadas en %s.", self.count, self.path)
+        return self.count
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Llamadas capturadas en orden de escritura (sin las cabeceras). Una línea incompleta,
+    p. ej. al final de una captura interrumpida, se descarta con un aviso.
+    """
+    with _open(path, "r") as capture_file:
+        for line_number, line in enumerate(capture_file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning("Línea %s de %s ilegible; se descarta.", line_number, path)
+                continue
+            if "capture" not in entry:
+                yield entry
@@ -0,0 +1,206 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+# Especificación por defecto, en la raíz del proyecto junto a default_db_credentials.json
+DEFAULT_WORKLOAD_FILE = Path(__file__).resolve().parents[1] / "default_workload.json"
+
+# Generadores de parámetros admitidos en "params"
+PARAM_GENERATORS = ("constant", "uniform", "zipf", "invoice_lines")
+# Distribuciones del número de líneas por factura
+LINE_DISTRIBUTIONS = ("constant", "uniform", "poisson")
+
+# Llamada generada: (nombre_mostrado, nombre_metodo_en_repositorio, argumentos)
+WorkloadCall = Tuple[str, str, Dict[str, Any]]
+
+
+class WorkloadOperation(NamedTuple):
+    name: str
+    method: str
+    weight: float
+    params: Dict[str, Dict[str, Any]]
+
+
+def _validate_generator(operation: str, param: str, spec: Dict[str, Any]) -> None:
+    generator = spec.get("generator")
+    if generator not in PARAM_GENERATORS:
+        raise ValueError(f"Generador '{generator}' no soportado en {operation}.{param}. Opciones: {', '.join(PARAM_GENERATORS)}.")
+    if generator in ("uniform", "zipf") and "table" not in spec and not ("min" in spec and "max" in spec):
+        raise ValueError(f"{operation}.{param}: '{generator}' necesita una tabla ('table') o un rango ('min' y 'max').")
+    if generator in ("uniform", "zipf") and int(spec.get("batch", 1)) < 1:
+        raise ValueError(f"{operation}.{param}: el tamaño de lote 'batch' debe ser al menos 1.")
+    if generator == "zipf" and spec.get("s", 1.0) <= 0:
+        raise ValueError(f"{operation}.{param}: el exponente 's' de Zipf debe ser positivo.")
+    if generator == "invoice_lines":
+        if "table" not in spec:
+            raise ValueError(f"{operation}.{param}: 'invoice_lines' necesita la tabla de productos ('table').")
+        distribution = spec.get("lines", {}).get("distribution", "poisson")
+        if distribution not in LINE_DISTRIBUTIONS:
+            raise ValueError(f"{operation}.{param}: distribución de líneas '{distribution}' no soportada. Opciones: {', '.join(LINE_DISTRIBUTIONS)}.")
+
+
+class WorkloadSpec:
+    """
+    Carga de trabajo declarativa: mezcla de operaciones con pesos y un generador por
+    parámetro (uniforme o Zipf sobre los ids existentes, tamaño de factura según una
+    distribución). Sustituye a llamar cada operación con sus argumentos por defecto, que
+    mide siempre la misma fila (client_id=1, invoice_id=1), caliente en caché.
+    """
+    def __init__(self, name: str, operations: List[WorkloadOperation], iterations: int = 200, seed: Optional[int] = None):
+        if not operations:
+            raise ValueError("La carga de trabajo no tiene operaciones.")
+        if any(op.weight <= 0 for op in operations):
+            raise ValueError("Los pesos de las operaciones deben ser positivos.")
+        self.name = name
+        self.operations = operations
+        self.iterations = iterations
+        self.seed = seed
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WorkloadSpec":
+        operations = []
+        for op in data.get("operations", []):
+            params = op.get("params", {})
+            for param, generator_spec in params.items():
+                _validate_generator(op["name"], param, generator_spec)
+            operations.append(WorkloadOperation(op["name"], op["method"], float(op.get("weight", 1.0)), params))
+        return cls(data.get("name", "carga"), operations, int(data.get("iterations", 200)), data.get("seed"))
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "WorkloadSpec":
+        """Lee la especificación de un JSON (o YAML si está instalado pyyaml)."""
+        path = Path(path) if path else DEFAULT_WORKLOAD_FILE
+        with open(path, "r", encoding="utf-8") as spec_file:
+            if path.suffix.lower() in (".yaml", ".yml"):
+                try:
+                    import yaml
+                except ImportError:
+                    raise RuntimeError("El módulo 'yaml' no está instalado. Por favor, instala 'pyyaml' (`pip install pyyaml`) o usa JSON.")
+                return cls.from_dict(yaml.safe_load(spec_file))
+            return cls.from_dict(json.load(spec_file))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "seed": self.seed,
+            "iterations": self.iterations,
+            "operations": [
+                {"name": op.name, "method": op.method, "weight": op.weight, "params": op.params}
+                for op in self.operations
+            ],
+        }
+
+    def operations_config(self) -> List[Tuple[str, str]]:
+        """(nombre_mostrado, nombre_metodo) de cada operación, el formato del resto de servicios."""
+        return [(op.name, op.method) for op in self.operations]
+
+    def tables(self) -> List[str]:
+        """Tablas cuyos ids existentes necesitan los generadores."""
+        tables = []
+        for op in self.operations:
+            for generator_spec in op.params.values():
+                table = generator_spec.get("table")
+                if table and table not in tables:
+                    tables.append(table)
+        return tables
+
+    def generate(self, count: int, id_pools: Dict[str, np.ndarray], seed: Optional[int] = None) -> List[WorkloadCall]:
+        """
+        `count` llamadas según los pesos. Los parámetros se sortean por lotes con NumPy
+        antes de medir nada, así el coste de generarlos no entra en las latencias. Un
+        parámetro cuya tabla no tiene ids se omite y se usa el valor por defecto del método.
+        """
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+        weights = np.array([op.weight for op in self.operations])
+        choices = rng.choice(len(self.operations), size=count, p=weights / weights.sum())
+        # La asignación de rangos de Zipf a ids no depende de la semilla de la ejecución:
+        # las filas calientes son las mismas en todos los backends y trabajadores
+        zipf_rng = np.random.default_rng(self.seed)
+        calls: List[Optional[WorkloadCall]] = [None] * count
+        for op_index, op in enumerate(self.operations):
+            positions = np.flatnonzero(choices == op_index)
+            if not len(positions):
+                continue
+            columns = {}
+            for param, generator_spec in op.params.items():
+                values = _draw(generator_spec, len(positions), rng, zipf_rng, id_pools)
+                if values is not None:
+                    columns[param] = values
+            for i, position in enumerate(positions):
+                calls[position] = (op.name, op.method, {param: values[i] for param, values in columns.items()})
+        return calls
+
+
+def _ids_for(spec: Dict[str, Any], id_pools: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+    if "table" in spec:
+        ids = id_pools.get(spec["table"])
+        return ids if ids is not None and len(ids) else None
+    return np.arange(int(spec["min"]), int(spec["max"]) + 1)
+
+
+def _zipf_probabilities(size: int, s: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1) ** s
+    return weights / weights.sum()
+
+
+def _draw_ids(spec: Dict[str, Any], count: int, rng: np.random.Generator, zipf_rng: np.random.Generator,
+              id_pools: Dict[str, np.ndarray]) -> Optional[List[int]]:
+    ids = _ids_for(spec, id_pools)
+    if ids is None:
+        return None
+    if spec.get("generator", "uniform") == "zipf":
+        # Zipf acotado a los ids existentes: el rango k tiene probabilidad proporcional a 1/k^s
+        ranked = zipf_rng.permutation(ids)
+        drawn = rng.choice(ranked, size=count, p=_zipf_probabilities(len(ranked), float(spec.get("s", 1.0))))
+    else:
+        drawn = rng.choice(ids, size=count)
+    # Enteros de Python: los controladores no adaptan numpy.int64
+    return drawn.tolist()
+
+
+def _draw_line_counts(spec: Dict[str, Any], count: int, rng: np.random.Generator) -> np.ndarray:
+    distribution = spec.get("distribution", "poisson")
+    low, high = int(spec.get("min", 1)), int(spec.get("max", 10))
+    if distribution == "constant":
+        counts = np.full(count, int(spec.get("value", low)))
+    elif distribution == "uniform":
+        counts = rng.integers(low, high + 1, size=count)
+    else:
+        counts = rng.poisson(float(spec.get("mean", 3.0)), size=count)
+    return np.clip(counts, low, high)
+
+
+def _draw(spec: Dict[str, Any], count: int, rng: np.random.Generator, zipf_rng: np.random.Generator,
+          id_pools: Dict[str, np.ndarray]) -> Optional[List[Any]]:
+    generator = spec["generator"]
+    if generator == "constant":
+        return [spec["value"]] * count
+    if generator in ("uniform", "zipf"):
+        if "batch" not in spec:
+            return _draw_ids(spec, count, rng, zipf_rng, id_pools)
+        # Una lista de `batch` ids por llamada, para las búsquedas por lotes (search_clients...)
+        batch = int(spec["batch"])
+        ids = _draw_ids(spec, count * batch, rng, zipf_rng, id_pools)
+        return None if ids is None else [ids[i * batch:(i + 1) * batch] for i in range(count)]
+
+    # invoice_lines: cadena JSON para sp_generar_factura con productos y cantidades sorteados
+    line_counts = _draw_line_counts(spec.get("lines", {}), count, rng)
+    product_spec = {"generator": spec.get("product_generator", "uniform"), "table": spec["table"], "s": spec.get("s", 1.0)}
+    products = _draw_ids(product_spec, int(line_counts.sum()), rng, zipf_rng, id_pools)
+    if products is None:
+        return None
+    quantity = spec.get("quantity", {})
+    quantities = rng.integers(int(quantity.get("min", 1)), int(quantity.get("max", 5)) + 1, size=len(products)).tolist()
+    invoices, start = [], 0
+    for lines in line_counts.tolist():
+        invoices.append(json.dumps([
+            {"producto_id": products[i], "cantidad": quantities[i]} for i in range(start, start + lines)
+        ]))
+        start += lines
+    return invoices
+
+
+def load_workload_spec(path: Optional[str] = None) -> WorkloadSpec:
+    """Atajo a WorkloadSpec.load (por defecto default_workload.json)."""
+    return WorkloadSpec.load(path)
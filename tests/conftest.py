@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# El proyecto no es un paquete instalable: los módulos se importan desde la raíz
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from infrastructure.adapters.out.connectors.memory.in_memory_connector import InMemoryConnector
+from infrastructure.adapters.out.connectors.sqlite.sqlite_connector import SQLiteConnector
+from infrastructure.adapters.out.persistence.repositories.db_repository import DbRepository
+
+
+@pytest.fixture
+def memory_repository():
+    connector = InMemoryConnector()
+    connector.connect()
+    connector.create_tables()
+    connector.generate_test_data()
+    yield DbRepository(connector_instance=connector)
+    connector.disconnect()
+
+
+@pytest.fixture
+def sqlite_repository(tmp_path):
+    connector = SQLiteConnector()
+    connector.connect(database=str(tmp_path / "test.sqlite3"))
+    connector.create_tables()
+    connector.generate_test_data()
+    yield DbRepository(connector_instance=connector)
+    connector.disconnect()
@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet  # noqa: E402
+
+from infrastructure.adapters.out.connectors.memory.in_memory_connector import InMemoryConnector  # noqa: E402
+from infrastructure.adapters.out.persistence.repositories.db_repository import DbRepository  # noqa: E402
+from infrastructure.adapters.out.persistence.transfer.arrow_transfer import export_table, import_table  # noqa: E402
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".arrow"])
+def test_decimals_round_trip_as_decimal128(memory_repository, tmp_path, extension):
+    path = tmp_path / f"Producto{extension}"
+
+    assert export_table(memory_repository, "Producto", path, chunk_size=3) == 10
+
+    if extension == ".parquet":
+        table = pa.parquet.read_table(str(path))
+    else:
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+    assert table.schema.field("precio").type == pa.decimal128(10, 2)
+    assert table.column("precio").to_pylist()[:2] == [Decimal("10.50"), Decimal("11.00")]
+
+    connector = InMemoryConnector()
+    connector.connect()
+    connector.create_tables()
+    target = DbRepository(connector_instance=connector)
+    assert import_table(target, "Producto", path) == 10
+    prices = target.fetch_all_records("Producto").sort_values("producto_id")["precio"].tolist()
+    assert prices == [10.0 + i * 0.5 for i in range(1, 11)]
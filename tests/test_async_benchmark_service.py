@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+
+from application.services.async_benchmark_service import AsyncBenchmarkService
+from infrastructure.adapters.out.connectors.async_base_connector import AsyncBaseConnector
+from shared.workload_spec import WorkloadSpec
+
+
+class RecordingConnector(AsyncBaseConnector):
+    """Conector asíncrono de prueba que anota los ids que recibe."""
+    def __init__(self):
+        super().__init__("Prueba")
+        self.client_ids = []
+
+    async def connect(self, **credentials):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def search_client(self, client_id: int = 1):
+        self.client_ids.append(client_id)
+        return None, 0.1
+
+    async def search_product(self, product_id: int = 1):
+        return None, 0.1
+
+    async def generate_invoice(self, client_id=1, staff_id=1, products_json_str="[]"):
+        return None, 0.1
+
+    async def query_invoice(self, invoice_id: int = 1):
+        return None, 0.1
+
+    async def sales_report(self):
+        return None, 0.1
+
+
+def test_workload_ids_reach_the_async_connector():
+    workload = WorkloadSpec.from_dict({"seed": 3, "operations": [
+        {"name": "cliente", "method": "search_client", "params": {"client_id": {"generator": "uniform", "table": "Clientes"}}},
+    ]})
+    connector = RecordingConnector()
+    rows = asyncio.run(AsyncBenchmarkService(connector).run_concurrency_scaling(
+        workload.operations_config(), concurrency_levels=(4,), requests_per_level=50,
+        workload=workload, id_pools={"Clientes": np.arange(100, 200)},
+    ))
+
+    assert rows[0]["requests"] == 50
+    assert len(set(connector.client_ids)) > 1
+    assert all(100 <= client_id < 200 for client_id in connector.client_ids)
+
+
+def test_without_workload_every_call_uses_the_default_id():
+    connector = RecordingConnector()
+    asyncio.run(AsyncBenchmarkService(connector).run_concurrency_scaling(
+        [("cliente", "search_client")], concurrency_levels=(2,), requests_per_level=10,
+    ))
+    assert connector.client_ids == [1] * 10
+
+
+class FailingConnector(RecordingConnector):
+    async def search_client(self, client_id: int = 1):
+        raise ConnectionError("sin conexión")
+
+
+def test_a_level_without_completed_requests_reports_nan_percentiles():
+    rows = asyncio.run(AsyncBenchmarkService(FailingConnector()).run_concurrency_scaling(
+        [("cliente", "search_client")], concurrency_levels=(2,), requests_per_level=10,
+    ))
+
+    assert rows[0]["requests"] == 0 and rows[0]["errors"] == 10
+    assert all(np.isnan(rows[0][key]) for key in ("p50_ms", "p95_ms", "p99_ms"))
@@ -0,0 +1,24 @@
+import pytest
+
+from application.services.performance_service import BATCH_MODE_BATCH, BATCH_MODE_SINGLE, PerformanceService
+
+
+@pytest.mark.parametrize("repository_fixture", ["memory_repository", "sqlite_repository"])
+def test_batch_lookup_returns_distinct_existing_rows(request, repository_fixture):
+    repository = request.getfixturevalue(repository_fixture)
+    rows, elapsed_ms = repository.search_clients([1, 1, 2, 999_999])
+    assert sorted(row[0] for row in rows) == [1, 2]
+    assert elapsed_ms >= 0
+
+
+def test_benchmark_skips_batches_larger_than_the_table(memory_repository):
+    clients = memory_repository.count_records("Clientes")
+    rows = PerformanceService(memory_repository).benchmark_batch_lookups("InMemory", [1, clients, clients * 10], repetitions=2)
+
+    client_rows = [row for row in rows if row["operation"] == "Búsqueda de clientes"]
+    assert {row["batch_size"] for row in client_rows} == {1, clients}
+    for row in client_rows:
+        assert row["count"] == 2 and row["errors"] == 0
+        assert row["per_key_ms"] == pytest.approx(row["p50_ms"] / row["batch_size"])
+    modes = {row["mode"] for row in client_rows}
+    assert modes == {BATCH_MODE_SINGLE, BATCH_MODE_BATCH}
@@ -0,0 +1,41 @@
+import math
+
+import pytest
+
+from application.services.concurrency_sweep_service import fit_usl, usl_throughput
+
+LEVELS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _levels(lambda_ops, sigma, kappa):
+    return [{"clients": n, "throughput_ops": float(usl_throughput(n, lambda_ops, sigma, kappa))} for n in LEVELS]
+
+
+def test_fit_usl_recovers_the_model_coefficients():
+    fit = fit_usl(_levels(1_000.0, 0.05, 0.002))
+
+    assert fit["lambda_ops"] == pytest.approx(1_000.0)
+    assert fit["sigma"] == pytest.approx(0.05)
+    assert fit["kappa"] == pytest.approx(0.002)
+    assert fit["r2"] == pytest.approx(1.0)
+    assert fit["peak_clients"] == pytest.approx(math.sqrt(0.95 / 0.002))
+    assert fit["peak_throughput_ops"] == pytest.approx(float(usl_throughput(fit["peak_clients"], 1_000.0, 0.05, 0.002)))
+
+
+def test_fit_usl_without_coherence_is_amdahl():
+    fit = fit_usl(_levels(500.0, 0.1, 0.0))
+
+    assert fit["kappa"] == pytest.approx(0.0, abs=1e-12)
+    assert fit["sigma"] == pytest.approx(0.1)
+    assert fit["peak_clients"] > 1e6
+    assert fit["peak_throughput_ops"] == pytest.approx(500.0 / 0.1, rel=1e-3)
+    assert fit["amdahl_max_speedup"] == pytest.approx(10.0)
+
+
+def test_fit_usl_requires_the_single_client_level():
+    levels = [row for row in _levels(1_000.0, 0.05, 0.002) if row["clients"] != 1]
+
+    with pytest.raises(ValueError):
+        fit_usl(levels)
+    with pytest.raises(ValueError):
+        fit_usl(_levels(1_000.0, 0.05, 0.002)[:2])
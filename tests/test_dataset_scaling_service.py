@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from application.services.dataset_scaling_service import DatasetScalingService, fit_growth_exponents
+from shared.workload_spec import WorkloadSpec
+
+SPEC = {
+    "seed": 3,
+    "operations": [
+        {"name": "cliente", "method": "search_client", "weight": 1,
+         "params": {"client_id": {"generator": "uniform", "table": "Clientes"}}},
+        {"name": "factura", "method": "generate_invoice", "weight": 1,
+         "params": {"products_json_str": {"generator": "invoice_lines", "table": "Producto"}}},
+    ],
+}
+
+
+def test_fit_growth_exponents_recovers_power_laws():
+    sizes = [1_000, 10_000, 100_000, 1_000_000]
+    rows = [{"database": "db", "operation": "indice", "size": n, "p50_ms": 0.5} for n in sizes]
+    rows += [{"database": "db", "operation": "recorrido", "size": n, "p50_ms": 2e-4 * n} for n in sizes]
+    rows += [{"database": "db", "operation": "un_punto", "size": 1_000, "p50_ms": 1.0}]
+
+    fits = {fit["operation"]: fit for fit in fit_growth_exponents(rows)}
+
+    assert set(fits) == {"indice", "recorrido"}
+    assert fits["indice"]["exponent"] == pytest.approx(0.0, abs=1e-9) and fits["indice"]["growth"] == "O(1)"
+    assert fits["recorrido"]["exponent"] == pytest.approx(1.0) and fits["recorrido"]["growth"] == "O(N)"
+    assert fits["recorrido"]["r2"] == pytest.approx(1.0)
+    assert fit_growth_exponents([]) == []
+
+
+def test_run_sweep_excludes_writes_so_the_size_stays_fixed(memory_repository):
+    service = DatasetScalingService(memory_repository)
+
+    rows = service.run_sweep("memory", WorkloadSpec.from_dict(SPEC), sizes=[40, 20], iterations_per_size=30)
+
+    assert [(row["size"], row["operation"]) for row in rows] == [(20, "cliente"), (40, "cliente")]
+    assert all(row["errors"] == 0 and row["count"] == 30 for row in rows)
+    assert memory_repository.count_records("Factura") == 40
+    assert np.isfinite([row["p50_ms"] for row in rows]).all()
+
+
+def test_run_sweep_rejects_write_only_workloads(memory_repository):
+    writes = WorkloadSpec.from_dict({"operations": [SPEC["operations"][1]]})
+
+    with pytest.raises(ValueError, match="escritura"):
+        DatasetScalingService(memory_repository).run_sweep("memory", writes, sizes=[10])
@@ -0,0 +1,92 @@
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from application.services.entity_service import EntityService
+
+
+def _clients(rows):
+    return pd.DataFrame(rows, columns=["cliente_id", "nombre", "email", "telefono", "direccion"])
+
+
+ORIGINAL = _clients([
+    (1, "Ana", "ana@example.com", None, "Calle 1"),
+    (2, "Luis", "luis@example.com", "600", "Calle 2"),
+    (3, "Eva", "eva@example.com", np.nan, "Calle 3"),
+])
+
+
+def _diff(table_name, original, edited):
+    return EntityService(repository=None).diff_entity_data(table_name, original, edited)
+
+
+def test_rows_without_pk_are_inserts_and_blank_rows_are_ignored():
+    edited = pd.concat([ORIGINAL, _clients([
+        (np.nan, "Nuevo", "nuevo@example.com", None, None),
+        (np.nan, None, "", "  ", np.nan),
+    ])], ignore_index=True)
+
+    changes = _diff("Clientes", ORIGINAL, edited)
+
+    assert changes["inserts"] == [{"nombre": "Nuevo", "email": "nuevo@example.com", "telefono": None, "direccion": None}]
+    assert changes["updates"] == [] and changes["deletes"] == []
+
+
+def test_removed_rows_are_deletes():
+    changes = _diff("Clientes", ORIGINAL, ORIGINAL[ORIGINAL["cliente_id"] != 2])
+
+    assert changes["deletes"] == [2]
+    assert changes["inserts"] == [] and changes["updates"] == []
+
+
+def test_a_single_cell_edit_updates_only_that_column():
+    edited = ORIGINAL.copy()
+    edited.loc[1, "telefono"] = "699"
+
+    assert _diff("Clientes", ORIGINAL, edited) == {"inserts": [], "updates": [(2, {"telefono": "699"})], "deletes": []}
+
+
+def test_missing_values_in_either_form_are_unchanged():
+    edited = ORIGINAL.copy()
+    # None -> NaN (fila 1) y NaN -> NaN (fila 3), como los deja st.data_editor
+    edited["telefono"] = [np.nan, "600", np.nan]
+
+    assert _diff("Clientes", ORIGINAL, edited)["updates"] == []
+
+
+def test_datetimes_and_decimals_are_compared_normalized():
+    original = pd.DataFrame({
+        "factura_id": [1, 2], "cliente_id": [1, 1], "personal_id": [1, 1],
+        "fecha": ["2024-01-01 10:00:00", "2024-01-02 10:00:00"],
+        "total": [Decimal("10.50"), Decimal("20.00")],
+    })
+    edited = original.copy()
+    edited["fecha"] = [pd.Timestamp("2024-01-01 10:00:00"), pd.Timestamp("2024-01-03 10:00:00")]
+    edited["total"] = [10.5, 25.0]
+
+    changes = _diff("Factura", original, edited)
+
+    assert changes["updates"] == [(2, {"fecha": datetime(2024, 1, 3, 10, 0), "total": 25.0})]
+
+
+@pytest.mark.parametrize("repository_fixture", ["memory_repository", "sqlite_repository"])
+def test_save_entity_changes_round_trip(request, repository_fixture):
+    service = EntityService(request.getfixturevalue(repository_fixture))
+    original = service.get_entity_data("Clientes").sort_values("cliente_id").reset_index(drop=True)
+    edited = original[original["cliente_id"] != 3].copy()
+    edited.loc[edited["cliente_id"] == 1, "nombre"] = "Cliente Uno"
+    edited = pd.concat([edited, original.iloc[[0]].assign(cliente_id=np.nan, nombre="Alta")], ignore_index=True)
+
+    changes = service.diff_entity_data("Clientes", original, edited)
+    service.save_entity_changes("Clientes", changes)
+
+    saved = service.get_entity_data("Clientes").set_index("cliente_id")
+    assert 3 not in saved.index
+    assert saved.loc[1, "nombre"] == "Cliente Uno"
+    assert (saved["nombre"] == "Alta").sum() == 1
+    assert len(saved) == len(original)
+    assert service.diff_entity_data("Clientes", saved.reset_index(), saved.reset_index()) == {
+        "inserts": [], "updates": [], "deletes": []}
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from shared.latency_histogram import RELATIVE_PRECISION, LatencyHistogram
+
+
+def _histogram(values):
+    histogram = LatencyHistogram()
+    histogram.record_many(values)
+    return histogram
+
+
+def test_percentiles_stay_within_the_bucket_precision():
+    values = np.random.default_rng(0).lognormal(mean=0.0, sigma=1.5, size=50_000)
+    histogram = _histogram(values)
+
+    expected = np.percentile(values, [50, 90, 99, 99.9], method="inverted_cdf")
+    assert histogram.percentiles([50, 90, 99, 99.9]) == pytest.approx(expected, rel=RELATIVE_PRECISION)
+    assert histogram.total_count == values.size
+    assert histogram.mean_ms == pytest.approx(values.mean())
+    assert (histogram.min_ms, histogram.max_ms) == (values.min(), values.max())
+
+
+def test_record_and_record_many_agree_and_count_errors_apart():
+    values = [0.0005, 0.2, 3.5, 3.5, -1.0, 120.0, 5_000_000.0]
+    one_by_one = LatencyHistogram()
+    for value in values:
+        one_by_one.record(value)
+    batch = _histogram(values)
+
+    assert np.array_equal(one_by_one.counts, batch.counts)
+    assert one_by_one.error_count == batch.error_count == 1
+    assert one_by_one.total_count == batch.total_count == 6
+
+
+def test_merge_equals_recording_everything_in_one_histogram():
+    rng = np.random.default_rng(1)
+    first, second = rng.exponential(5.0, 1_000), rng.exponential(50.0, 3_000)
+
+    merged = _histogram(first).merge(_histogram(second))
+    combined = _histogram(np.concatenate([first, second]))
+
+    assert np.array_equal(merged.counts, combined.counts)
+    assert merged.summary() == pytest.approx(combined.summary())
+
+
+def test_to_dict_round_trip_and_empty_histogram():
+    histogram = _histogram([1.0, 2.0, 2.0, -1.0, 40.0])
+
+    restored = LatencyHistogram.from_dict(histogram.to_dict())
+
+    assert np.array_equal(restored.counts, histogram.counts)
+    assert restored.summary() == histogram.summary()
+    assert np.isnan(LatencyHistogram().percentile(50))
+    assert LatencyHistogram().summary()["count"] == 0
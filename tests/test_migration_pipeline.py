@@ -0,0 +1,71 @@
+import json
+
+from infrastructure.adapters.out.connectors.memory.in_memory_connector import InMemoryConnector
+from infrastructure.adapters.out.persistence.transfer.migration_pipeline import MigrationPipeline
+
+
+def _connector(num_clients=0):
+    connector = InMemoryConnector()
+    connector.connect()
+    connector.create_tables()
+    if num_clients:
+        connector.generate_test_data(num_clients)
+    return connector
+
+
+def _client_ids(connector):
+    return sorted(connector.fetch_all_records("Clientes")["cliente_id"].tolist())
+
+
+def _resume_from(tmp_path, source, checkpoints):
+    """Destinos con las filas hasta su checkpoint ya copiadas, y el archivo de checkpoint."""
+    targets = {}
+    for name, last_pk in checkpoints.items():
+        target = _connector()
+        rows = source.fetch_all_records("Clientes")
+        target.bulk_insert_records("Clientes", rows[rows["cliente_id"] <= last_pk].to_dict("records"))
+        targets[name] = target
+    path = tmp_path / "checkpoint.json"
+    path.write_text(json.dumps({name: {"Clientes": last_pk} for name, last_pk in checkpoints.items()}))
+    return targets, path
+
+
+def test_resume_each_target_from_its_own_checkpoint(tmp_path):
+    source = _connector(30)
+    targets, path = _resume_from(tmp_path, source, {"a": 5, "b": 20})
+
+    report = MigrationPipeline(source, targets, checkpoint_path=path, chunk_size=4, tables=["Clientes"]).run()
+
+    assert report["errors"] == []
+    for target in targets.values():
+        assert _client_ids(target) == list(range(1, 31))
+    assert json.loads(path.read_text()) == {"a": {"Clientes": 30}, "b": {"Clientes": 30}}
+
+
+def test_resume_when_the_checkpoint_row_was_deleted_from_the_source(tmp_path):
+    source = _connector(30)
+    targets, path = _resume_from(tmp_path, source, {"a": 5, "b": 12})
+    source.delete_record("Clientes", 12)
+
+    report = MigrationPipeline(source, targets, checkpoint_path=path, chunk_size=4, tables=["Clientes"]).run()
+
+    assert report["errors"] == []
+    assert _client_ids(targets["b"]) == list(range(1, 31))
+    assert _client_ids(targets["a"]) == [pk for pk in range(1, 31) if pk != 12]
+
+
+class _TokenOrderConnector(InMemoryConnector):
+    CHUNKS_IN_PK_ORDER = False
+
+
+def test_refuses_to_resume_diverging_checkpoints_without_pk_order(tmp_path):
+    source = _TokenOrderConnector()
+    source.connect()
+    source.create_tables()
+    source.generate_test_data(30)
+    targets, path = _resume_from(tmp_path, source, {"a": 5, "b": 20})
+
+    report = MigrationPipeline(source, targets, checkpoint_path=path, tables=["Clientes"]).run()
+
+    assert len(report["errors"]) == 1 and "no se puede reanudar" in report["errors"][0]
+    assert _client_ids(targets["a"]) == list(range(1, 6))
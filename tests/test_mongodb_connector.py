@@ -0,0 +1,32 @@
+import mongomock
+import pytest
+
+from infrastructure.adapters.out.connectors.mongodb.mongodb_connector import MongoDBConnector
+
+
+@pytest.fixture
+def connector():
+    connector = MongoDBConnector()
+    connector.db = mongomock.MongoClient()["tienda"]
+    connector.db["Factura"].insert_many([{"factura_id": i, "total": 1.0} for i in (1, 2, 3)])
+    connector._seed_id_sequences()
+    return connector
+
+
+def _invoice_ids(connector):
+    return sorted(doc["factura_id"] for doc in connector.db["Factura"].find())
+
+
+def test_table_changes_assign_missing_invoice_ids_from_the_counter(connector):
+    # El editor de mantenedores envía las altas sin clave primaria
+    connector.apply_table_changes("Factura", [{"total": 5.0}, {"factura_id": None, "total": 6.0}], [], [])
+
+    assert _invoice_ids(connector) == [1, 2, 3, 4, 5]
+    assert connector.insert_record("Factura", {"total": 7.0}) == 6
+
+
+def test_table_changes_with_explicit_ids_raise_the_counter(connector):
+    connector.apply_table_changes("Factura", [{"factura_id": 40, "total": 5.0}], [], [])
+
+    assert connector._next_id("factura_id") == 41
+    assert len(_invoice_ids(connector)) == len(set(_invoice_ids(connector)))
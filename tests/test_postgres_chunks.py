@@ -0,0 +1,83 @@
+import psycopg2
+import pytest
+
+from infrastructure.adapters.out.connectors.postgres.postgres_connector import PostgreSQLConnector
+
+ROWS = [(i, f"Cliente {i}", f"c{i}@example.com", "600", "Calle") for i in range(1, 8)]
+COLUMNS = ["cliente_id", "nombre", "email", "telefono", "direccion"]
+
+
+class _FakeConnection:
+    """Conexión de psycopg2 mínima: registra commits, cierres y los cursores con nombre."""
+    def __init__(self):
+        self.commits = 0
+        self.closed = False
+        self.readonly = None
+
+    def set_session(self, readonly=None):
+        self.readonly = readonly
+
+    def cursor(self, name=None):
+        return _FakeNamedCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeNamedCursor:
+    description = [(column,) for column in COLUMNS]
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.position = 0
+
+    def execute(self, query, params=None):
+        self.rows = [row for row in ROWS if params is None or row[0] > params[0]]
+
+    def fetchmany(self, size):
+        assert not self.connection.closed, "cursor leído tras cerrar su conexión"
+        chunk = self.rows[self.position:self.position + size]
+        self.position += size
+        return chunk
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    opened = []
+
+    def connect(conn_str):
+        opened.append(_FakeConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(psycopg2, "connect", connect)
+    connector = PostgreSQLConnector()
+    connector.connect("localhost", "tienda", "postgres", "secreto", 5432)
+    connector.opened = opened
+    return connector
+
+
+def test_interleaved_readers_use_their_own_connections(connector):
+    shared = connector.connection
+    first = connector.fetch_records_in_chunks("Clientes", chunk_size=2)
+    second = connector.fetch_records_in_chunks("Clientes", chunk_size=3, start_after=2)
+
+    ids_first, ids_second = [], []
+    ids_first += next(first)["cliente_id"].tolist()
+    ids_second += next(second)["cliente_id"].tolist()
+    # El segundo lector termina primero: no debe afectar al primero
+    for chunk in second:
+        ids_second += chunk["cliente_id"].tolist()
+    for chunk in first:
+        ids_first += chunk["cliente_id"].tolist()
+
+    assert ids_first == list(range(1, 8))
+    assert ids_second == list(range(3, 8))
+    readers = connector.opened[1:]
+    assert len(readers) == 2 and all(c.closed and c.readonly for c in readers)
+    assert shared.commits == 0 and not shared.closed
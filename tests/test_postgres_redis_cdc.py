@@ -0,0 +1,101 @@
+import fakeredis
+import pytest
+
+from infrastructure.adapters.out.connectors.redis.redis_connector import RedisConnector
+from infrastructure.adapters.out.sync.postgres_redis_cdc import PostgresToRedisCDC
+
+
+def _change(change_id, record_id):
+    return (change_id, "Clientes", "I", record_id, {"cliente_id": record_id, "nombre": f"C{record_id}"}, 1.0)
+
+
+class _ScriptedPostgres:
+    """
+    Conexión de PostgreSQL con respuestas guionizadas: cada txid_current_snapshot() y cada
+    lectura de cdc_change_log devuelven el siguiente valor de su lista, en orden.
+    """
+    def __init__(self, snapshots, reads, max_change_id=0):
+        self.connection = self
+        self.snapshots = list(snapshots)
+        self.reads = list(reads)
+        self.max_change_id = max_change_id
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None):
+        if "txid_current_snapshot" in query:
+            self.statements.append("snapshot")
+            self._result = [self.snapshots.pop(0)]
+        elif "MAX(change_id)" in query:
+            self.statements.append("max")
+            self._result = [(self.max_change_id,)]
+        else:
+            self.statements.append("read")
+            self._result = [row for row in self.reads.pop(0) if row[0] > params[0]]
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+    def commit(self):
+        pass
+
+    def fetch_records_in_chunks(self, table_name, chunk_size):
+        return iter(())
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def redis_connector():
+    connector = RedisConnector()
+    connector.client = fakeredis.FakeStrictRedis(decode_responses=True)
+    return connector
+
+
+def test_consumable_prefix_waits_for_the_gap_barrier(redis_connector):
+    cdc = PostgresToRedisCDC(_ScriptedPostgres([], []), redis_connector)
+    rows = [_change(1, 1), _change(3, 3)]
+
+    assert [r[0] for r in cdc._consumable_prefix(rows, 0, xmin=100, xmax=102)] == [1]
+    assert cdc._consumable_prefix(rows[1:], 1, xmin=100, xmax=103) == []
+    assert cdc._gap_barrier == 102
+    # Todas las transacciones de la lectura con el hueco ya terminaron: el hueco es un rollback
+    assert [r[0] for r in cdc._consumable_prefix(rows[1:], 1, xmin=102, xmax=104)] == [3]
+    assert cdc._gap_barrier is None
+
+
+def test_gap_committed_right_after_a_read_is_not_skipped(redis_connector):
+    # La transacción 100 tiene el change_id 2 y confirma justo después de la segunda lectura:
+    # el snapshot posterior a esa lectura ya no la ve activa, pero la lectura no trae su fila
+    pg = _ScriptedPostgres(
+        snapshots=[(100, 101), (100, 102),   # poll 1: antes / después de la lectura
+                   (100, 102), (102, 103),   # poll 2: la 100 confirma entre la lectura y el snapshot
+                   (102, 103), (102, 103)],  # poll 3
+        reads=[[_change(1, 1), _change(3, 3)], [_change(3, 3)], [_change(2, 2), _change(3, 3)]],
+    )
+    cdc = PostgresToRedisCDC(pg, redis_connector)
+
+    assert cdc.poll_once() == 1
+    assert cdc.poll_once() == 0
+    assert cdc.get_checkpoint() == 1
+    assert cdc.poll_once() == 2
+    assert cdc.get_checkpoint() == 3
+    assert redis_connector.client.hget("clientes:2", "nombre") == "C2"
+    assert pg.statements[:3] == ["snapshot", "read", "snapshot"]
+
+
+def test_snapshot_waits_for_transactions_active_at_the_checkpoint(redis_connector):
+    # Al leer MAX(change_id) hay transacciones activas hasta el txid 119: se espera a xmin >= 120
+    pg = _ScriptedPostgres(snapshots=[(90, 120), (95, 121), (120, 122)], reads=[], max_change_id=7)
+    cdc = PostgresToRedisCDC(pg, redis_connector, poll_interval_s=0)
+
+    cdc.snapshot()
+
+    assert cdc.get_checkpoint() == 7
+    assert pg.statements == ["max", "snapshot", "snapshot", "snapshot"]
@@ -0,0 +1,31 @@
+import fakeredis
+import pytest
+
+from infrastructure.adapters.out.connectors.redis.redis_connector import RedisConnector
+
+
+@pytest.fixture
+def redis_connector():
+    connector = RedisConnector()
+    connector.client = fakeredis.FakeStrictRedis(decode_responses=True)
+    return connector
+
+
+def test_bulk_update_and_delete_use_the_bulk_insert_keys(redis_connector):
+    redis_connector.bulk_insert_records("Producto", [
+        {"producto_id": 1, "nombre": "A", "precio": 1.0, "stock": 5},
+        {"producto_id": 2, "nombre": "B", "precio": 2.0, "stock": 5},
+    ])
+
+    assert redis_connector.update_records("Producto", [(1, {"precio": 9.5})]) == 1
+    assert redis_connector.delete_records("Producto", [2]) == 1
+
+    assert redis_connector.client.hget("productos:1", "precio") == "9.5"
+    assert not redis_connector.client.exists("productos:2")
+    assert not redis_connector.client.keys("Producto:*")
+
+
+def test_table_changes_keep_the_primary_key_as_id(redis_connector):
+    redis_connector.apply_table_changes("Clientes", [{"cliente_id": 7, "nombre": "X"}, {"nombre": "Y"}], [], [])
+    assert redis_connector.client.hget("clientes:7", "id") == "7"
+    assert redis_connector.count_records("Clientes") == 2
@@ -0,0 +1,89 @@
+from application.services import replay_service
+from application.services.replay_service import PACING_ASAP, IdRemapper, WorkloadReplayService
+from infrastructure.adapters.out.connectors.memory.in_memory_connector import InMemoryConnector
+from infrastructure.adapters.out.persistence.repositories.db_repository import DbRepository
+
+NEW_CLIENT = {"nombre": "Nuevo", "email": "nuevo@example.com", "telefono": "600000000", "direccion": "Calle 1"}
+
+
+def _invoice(factura_id, cliente_id):
+    return {"factura_id": factura_id, "cliente_id": cliente_id, "personal_id": 1, "fecha": "2024-01-01", "total": 10.0}
+
+
+def _memory_repository(connector_class=InMemoryConnector):
+    connector = connector_class()
+    connector.connect()
+    connector.create_tables()
+    connector.generate_test_data()
+    return DbRepository(connector_instance=connector)
+
+
+def _capture(repository, path):
+    repository.start_capture(str(path))
+    client_id = repository.insert_record("Clientes", dict(NEW_CLIENT))
+    repository.apply_table_changes("Factura", [_invoice(900, client_id)], [], [])
+    repository.stop_capture()
+    return client_id
+
+
+def test_remap_call_translates_apply_table_changes_payloads():
+    remapper = IdRemapper()
+    remapper.add("Clientes", 51, 52)
+    remapper.add("Factura", 7, 8)
+    args = remapper.remap_call("apply_table_changes", {
+        "table_name": "Factura",
+        "inserts": [_invoice(900, 51)],
+        "updates": [[7, {"cliente_id": 51}]],
+        "deletes": [7, 3],
+    })
+    assert args["inserts"][0]["cliente_id"] == 52
+    assert args["inserts"][0]["factura_id"] == 900
+    assert args["updates"] == [(8, {"cliente_id": 52})]
+    assert args["deletes"] == [8, 3]
+
+
+def test_replay_remaps_foreign_keys_of_captured_inserts(memory_repository, tmp_path):
+    captured_client = _capture(memory_repository, tmp_path / "capture.jsonl")
+    target = _memory_repository()
+    # Un alta previa en el destino: el cliente reproducido recibe otro id
+    target.insert_record("Clientes", dict(NEW_CLIENT))
+
+    result = WorkloadReplayService(target).replay("memory", str(tmp_path / "capture.jsonl"), pacing=PACING_ASAP)
+
+    assert result["errors"] == 0
+    assert result["remapped_ids"] == 1
+    invoice = target.fetch_all_records("Factura").set_index("factura_id").loc[900]
+    assert invoice["cliente_id"] == captured_client + 1
+
+
+class _NoIdConnector(InMemoryConnector):
+    def insert_record(self, table_name, data):
+        super().insert_record(table_name, data)
+
+
+def test_replay_warns_when_insert_does_not_return_the_id(memory_repository, tmp_path, monkeypatch):
+    _capture(memory_repository, tmp_path / "capture.jsonl")
+    warnings = []
+    monkeypatch.setattr(replay_service.logger, "warning", lambda message, *args: warnings.append(message % args))
+
+    result = WorkloadReplayService(_memory_repository(_NoIdConnector)).replay(
+        "memory", str(tmp_path / "capture.jsonl"), pacing=PACING_ASAP)
+
+    assert result["remapped_ids"] == 0
+    assert len(warnings) == 1 and "Clientes" in warnings[0]
+
+
+def test_replay_warns_once_per_table_for_apply_table_changes_inserts_without_pk(memory_repository, tmp_path, monkeypatch):
+    memory_repository.start_capture(str(tmp_path / "capture.jsonl"))
+    for _ in range(2):
+        memory_repository.apply_table_changes("Clientes", [dict(NEW_CLIENT)], [], [])
+    memory_repository.apply_table_changes("Factura", [_invoice(900, 1)], [], [])
+    memory_repository.stop_capture()
+    warnings = []
+    monkeypatch.setattr(replay_service.logger, "warning", lambda message, *args: warnings.append(message % args))
+
+    result = WorkloadReplayService(_memory_repository()).replay(
+        "memory", str(tmp_path / "capture.jsonl"), pacing=PACING_ASAP)
+
+    assert result["errors"] == 0
+    assert len(warnings) == 1 and "Clientes" in warnings[0]
@@ -0,0 +1,39 @@
+import pytest
+
+from infrastructure.adapters.out.connectors.sqlserver.sqlserver_connector import SQLServerConnector
+
+
+class _FailingCursor:
+    """Cursor de pyodbc mínimo cuyo executemany falla (p. ej. una clave duplicada)."""
+    fast_executemany = False
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+
+    def executemany(self, query, values):
+        raise RuntimeError("Violation of PRIMARY KEY constraint")
+
+
+class _Connection:
+    def __init__(self):
+        self.rollbacks = 0
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_identity_insert_is_switched_off_when_the_insert_fails():
+    connector = SQLServerConnector()
+    connector.cursor, connector.connection = _FailingCursor(), _Connection()
+
+    with pytest.raises(RuntimeError):
+        connector.bulk_insert_records("Clientes", [{"cliente_id": 1, "nombre": "A"}])
+
+    assert connector.cursor.statements == ["SET IDENTITY_INSERT Clientes ON", "SET IDENTITY_INSERT Clientes OFF"]
+    assert connector.connection.rollbacks == 1
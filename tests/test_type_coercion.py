@@ -0,0 +1,42 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from infrastructure.adapters.out.persistence.config.table_definitions import get_table_definition
+from infrastructure.adapters.out.persistence.utils.type_coercion import coerce_value, normalize_records
+
+
+def test_normalize_records_matches_coerce_value_per_cell():
+    # Mezcla de lo que devuelven los backends: cadenas de Redis, Decimal, NaN/NaT, date...
+    df = pd.DataFrame({
+        "FACTURA_ID": ["1", "2.0", None, "4"],
+        "cliente_id": [1, 2, 3, np.nan],
+        "personal_id": [np.int64(5)] * 4,
+        "fecha": [date(2024, 1, 1), "2024-02-03 10:00:00", None, pd.Timestamp("2024-03-01")],
+        "total": [Decimal("1.50"), 2, None, "3.25"],
+        "_id": ["x"] * 4,
+    })
+    fields = get_table_definition("Factura")["fields"]
+    expected = [
+        {field: coerce_value(row.get(field.upper() if field == "factura_id" else field), field_type)
+         for field, field_type in fields.items()}
+        for row in df.to_dict("records")
+    ]
+
+    records = normalize_records("Factura", df)
+
+    assert records == expected
+    assert [type(value) for value in records[0].values()] == [int, int, int, datetime, float]
+    assert records[2]["factura_id"] is None and records[3]["cliente_id"] is None
+
+
+def test_normalize_records_fills_missing_columns_with_none():
+    df = pd.DataFrame({"cliente_id": np.arange(3), "nombre": ["a", "b", None]})
+
+    records = normalize_records("Clientes", df)
+
+    assert records[0] == {"cliente_id": 0, "nombre": "a", "email": None, "telefono": None, "direccion": None}
+    assert records[2]["nombre"] is None
+    assert normalize_records("Clientes", df.iloc[:0]) == []
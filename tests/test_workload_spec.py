@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from application.services.performance_service import PerformanceService
+from shared.workload_spec import WorkloadSpec
+
+SPEC = {
+    "seed": 7,
+    "operations": [
+        {"name": "cliente", "method": "search_client", "weight": 3,
+         "params": {"client_id": {"generator": "zipf", "table": "Clientes", "s": 1.1}}},
+        {"name": "factura", "method": "generate_invoice", "weight": 1,
+         "params": {"products_json_str": {"generator": "invoice_lines", "table": "Producto"}}},
+        {"name": "lote", "method": "search_clients", "weight": 1,
+         "params": {"client_ids": {"generator": "uniform", "table": "Clientes", "batch": 4}}},
+    ],
+}
+POOLS = {"Clientes": np.arange(1, 51), "Producto": np.arange(1, 21)}
+
+
+def test_generate_is_deterministic_for_a_seed():
+    workload = WorkloadSpec.from_dict(SPEC)
+    assert workload.generate(300, POOLS) == workload.generate(300, POOLS)
+    assert workload.generate(300, POOLS, seed=1) != workload.generate(300, POOLS, seed=2)
+
+
+def test_generate_draws_existing_ids_and_batches():
+    calls = WorkloadSpec.from_dict(SPEC).generate(300, POOLS)
+    assert {method for _, method, _ in calls} == {"search_client", "generate_invoice", "search_clients"}
+    for _, method, kwargs in calls:
+        if method == "search_client":
+            assert 1 <= kwargs["client_id"] <= 50
+        elif method == "search_clients":
+            assert len(kwargs["client_ids"]) == 4
+
+
+def test_invalid_generator_is_rejected():
+    with pytest.raises(ValueError):
+        WorkloadSpec.from_dict({"operations": [{"name": "x", "method": "search_client",
+                                                "params": {"client_id": {"generator": "gauss"}}}]})
+
+
+def test_table_ids_are_sorted_whatever_the_scan_order(memory_repository):
+    # Claves no contiguas: load_table_ids lee la tabla en lugar de generar 1..N
+    memory_repository.delete_record("Clientes", 2)
+    ids = PerformanceService(memory_repository).load_table_ids("Clientes")
+    assert list(ids) == sorted(ids)
+    assert 2 not in ids